@@ -0,0 +1,178 @@
+#Frame time benchmark for the Bomber games.
+#
+# Plays each version of the game (bomber_proc.py, bomber_oo.py, and
+# bomber_mvc.py from Topics/05_Dynamic_Data_Structures/assets) for a
+# number of frames, dropping bombs as it goes, and reports the time per
+# frame (including tkinter redrawing the window), the canvas calls made
+# and the canvas items created.  Each game is played twice:
+# - drawing through the Renderer in bomber_render.py, which creates
+#   each item once and sends the frame's changes to the canvas together
+# - drawing as the games used to, deleting each item that moves and
+#   creating a new one (LegacyRenderer below)
+#
+# The plane is kept at the top of the screen, so it never crashes and
+# every frame is a full frame of play.  This needs a display to run on.
+#
+#   python3 bomber_bench.py [-f frames]
+
+import argparse, os, sys, time
+from random import Random
+from tkinter import Tk, TclError
+from bomber_render import Renderer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "Topics", "05_Dynamic_Data_Structures", "assets"))
+import bomber_proc, bomber_oo, bomber_mvc
+
+BOMB_EVERY = 30   # frames between bombs
+
+''' LegacyRenderer draws the way the games did before the Renderer:
+    every time something moves, its item is deleted and a new one is
+    created, straight away.  It hands out its own numbers for items, as
+    the canvas item behind each one keeps changing. '''
+class LegacyRenderer(Renderer):
+    def __init__(self, canvas, layers=()):
+        Renderer.__init__(self, canvas, layers)
+        # our item number -> [kind, coords, options, canvas item or None if hidden]
+        self.items = {}
+
+    def _create(self, entry):
+        if entry[0] == "polygon":
+            entry[3] = self.canvas.create_polygon(*entry[1], **entry[2])
+        else:
+            entry[3] = self.canvas.create_rectangle(*entry[1], **entry[2])
+        self.items_created += 1
+        self.canvas_calls += 1
+
+    def _delete(self, entry):
+        if entry[3] is not None:
+            self.canvas.delete(entry[3])
+            entry[3] = None
+            self.canvas_calls += 1
+
+    def _new(self, kind, coords, options):
+        number = -1 - len(self.items)
+        self.items[number] = [kind, list(coords), dict(options), None]
+        self._create(self.items[number])
+        return number
+
+    def polygon(self, points, layer=None, **options):
+        return self._new("polygon", points, options)
+
+    def rectangle(self, coords, layer=None, **options):
+        return self._new("rectangle", coords, options)
+
+    def set_coords(self, item, coords):
+        entry = self.items[item]
+        entry[1] = list(coords)
+        if entry[3] is not None:
+            self._delete(entry)
+            self._create(entry)
+
+    def configure(self, item, **options):
+        if item not in self.items:
+            # not one of ours, e.g. the score
+            self.canvas.itemconfig(item, **options)
+            self.canvas_calls += 1
+            return
+        entry = self.items[item]
+        state = options.pop("state", None)
+        entry[2].update(options)
+        if state == "hidden":
+            self._delete(entry)
+        elif state == "normal" or len(options) > 0:
+            self._delete(entry)
+            self._create(entry)
+
+    def take_rectangle(self, kind, coords, layer=None, **options):
+        return self.rectangle(coords, layer, **options)
+
+    def release(self, kind, item):
+        self._delete(self.items.pop(item))
+
+    def flush(self):
+        pass
+
+def play_proc():
+    root = Tk()
+    bomber_proc.rand = Random(1)
+    bomber_proc.speed = 1.0
+    plane_pos, bomb_pos = [0, 0], [0, 0]
+    heights, xpos, rects = [], [], []
+    canvas = bomber_proc.init_display(root, plane_pos, bomb_pos, heights, xpos, rects)
+    def frame(number):
+        plane_pos[1] = 0
+        if number % BOMB_EVERY == 0:
+            bomber_proc.drop_bomb(bomb_pos, plane_pos)
+        bomber_proc.move_plane(plane_pos)
+        bomber_proc.check_plane(canvas, plane_pos, bomber_proc.building_width, heights, xpos)
+        bomber_proc.move_bomb(bomb_pos)
+        bomber_proc.check_bomb(canvas, bomb_pos, bomber_proc.building_width, heights, xpos, rects)
+        bomber_proc.redraw_plane(canvas, plane_pos)
+        bomber_proc.redraw_bomb(canvas, bomb_pos)
+        bomber_proc.display_score(canvas, 0, 1)
+        bomber_proc.renderer.flush()
+        root.update()
+    return root, frame, lambda: bomber_proc.renderer
+
+def play_oo():
+    root = Tk()
+    bomber_oo.speed = 1.0
+    display = bomber_oo.Display(root)
+    def frame(number):
+        display.plane.position.Y = 0
+        if number % BOMB_EVERY == 0:
+            display.drop_bomb()
+        display.update()
+        root.update()
+    return root, frame, lambda: display.renderer
+
+def play_mvc():
+    bomber_mvc.speed = 1.0
+    controller = bomber_mvc.Controller()
+    model = controller.model
+    def frame(number):
+        model.plane.position.Y = 0
+        if number % BOMB_EVERY == 0:
+            model.drop_bomb()
+        model.update()
+        for view in controller.views:
+            view.update()
+        controller.root.update()
+    return controller.root, frame, lambda: controller.views[0].renderer
+
+def timed_game(play, module, renderer_class, frames):
+    module.Renderer = renderer_class
+    (root, frame, renderer) = play()
+    calls_before = renderer().canvas_calls
+    created_before = renderer().items_created
+    start = time.perf_counter()
+    for number in range(frames):
+        frame(number)
+    elapsed = time.perf_counter() - start
+    calls = renderer().canvas_calls - calls_before
+    created = renderer().items_created - created_before
+    root.destroy()
+    module.Renderer = Renderer
+    return 1000 * elapsed / frames, calls / frames, created
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Times drawing frames of the Bomber games.')
+    parser.add_argument('-f', '--frames', type=int, default=2000, help='Frames to play in each game')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    print("{} frames per game".format(args.frames))
+    print("{:<8} {:<10} {:>10} {:>16} {:>14}".format("game", "drawing", "ms/frame", "canvas calls/f", "items created"))
+    for (name, play, module) in [("proc", play_proc, bomber_proc), ("oo", play_oo, bomber_oo), ("mvc", play_mvc, bomber_mvc)]:
+        for (drawing, renderer_class) in [("legacy", LegacyRenderer), ("renderer", Renderer)]:
+            try:
+                (ms, calls, created) = timed_game(play, module, renderer_class, args.frames)
+            except TclError as e:
+                print("can't open a window to draw in:", e)
+                return
+            print("{:<8} {:<10} {:>10.3f} {:>16.1f} {:>14}".format(name, drawing, ms, calls, created))
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from tkinter import font
 from math import sqrt
 from random import *
 from time import time
+from bomber_render import Renderer
 
 #some global constants
 CANVAS_WIDTH = 1000
@@ -62,12 +63,15 @@ def update_position(position_list, position):
 
 ''' The Building class holds all the state associated with one building '''
 class Building():
-    def __init__(self, canvas, building_num, height, width):
-        self.canvas = canvas
+    def __init__(self, renderer, building_num, height, width):
+        self.renderer = renderer
         self.height = height
         self.x = building_num*SPACING
         self.width = width
-        self.main_rect = canvas.create_rectangle(self.x, CANVAS_HEIGHT, self.x + self.width, CANVAS_HEIGHT-self.height, fill="brown")
+        self.main_rect = renderer.take_rectangle("building", self.get_coords(), "building", fill="brown")
+
+    def get_coords(self):
+        return [self.x, CANVAS_HEIGHT, self.x + self.width, CANVAS_HEIGHT-self.height]
 
     ''' is_inside tests if a point is inside the building '''
     def is_inside(self, point):
@@ -78,35 +82,38 @@ class Building():
     ''' shrink the building when a bomb drops on it '''
     def shrink(self):
         self.height = self.height - 50
-        self.canvas.delete(self.main_rect)
-        self.main_rect = self.canvas.create_rectangle(self.x, CANVAS_HEIGHT, self.x + self.width, CANVAS_HEIGHT-self.height, fill="brown")
+        self.renderer.set_coords(self.main_rect, self.get_coords())
 
+    ''' hand the building's rectangle back, for a building on the next level '''
     def cleanup(self):
-        self.canvas.delete(self.main_rect)
+        self.renderer.release("building", self.main_rect)
 
 ''' The Bomb class holds the state associated with the bomb.  There's
     only one bomb.  Once it explodes it can be reused again '''
 class Bomb():
-    def __init__(self, canvas):
-        self.canvas = canvas
+    def __init__(self, renderer):
+        self.renderer = renderer
         self.falling = False
         self.drawn = False
         self.position = Point(0,0)
         ''' self.points contains x,y coordinate pairs to draw a bomb with top left
             corner at position 0,0'''
         self.points = [0,0, 10,0, 5,5, 10,10, 10,20, 5,22, 0,20, 0,10, 5,5]
+        # the polygon is created once, and moved or hidden after that
+        self.polygon = renderer.polygon(self.points, "bomb", fill="black")
         self.draw()
 
     ''' draw the bomb at its current position '''
     def draw(self):
         current_points = update_position(self.points, self.position)
-        self.polygon = self.canvas.create_polygon(*current_points, fill="black")
+        self.renderer.set_coords(self.polygon, current_points)
+        self.renderer.show(self.polygon)
         self.drawn = True
 
     ''' erase the old bomb, and redraw it '''
     def redraw(self):
         if self.drawn:
-            self.canvas.delete(self.polygon)
+            self.renderer.hide(self.polygon)
         if self.falling:
             self.draw()
 
@@ -130,8 +137,8 @@ class Bomb():
 
 ''' The Plane class holds the state associated with the plane. '''
 class Plane():
-    def __init__(self, canvas, x, y):
-        self.canvas = canvas
+    def __init__(self, renderer, x, y):
+        self.renderer = renderer
         self.start_position = Point(x, y)
         self.position = Point(x, y)
         ''' plane is drawn as four polygons.  The following four lists
@@ -142,6 +149,11 @@ class Plane():
         self.wing2_points = [52,16, 78,8, 94,8, 81,16]
         self.tail_points = [90,16, 110,0, 124,0, 116,16]
         self.width = 124 # plane width
+        # the polygons are created once, and moved after that
+        self.body = renderer.polygon(self.body_points, "plane", fill="red")
+        self.wing1 = renderer.polygon(self.wing1_points, "plane", fill="grey")
+        self.wing2 = renderer.polygon(self.wing2_points, "plane", fill="grey")
+        self.tail = renderer.polygon(self.tail_points, "plane", fill="grey")
         self.draw()
 
     ''' reset the plane to its starting position at the start of a new level '''
@@ -153,16 +165,12 @@ class Plane():
         current_wing1_points = update_position(self.wing1_points, self.position)
         current_wing2_points = update_position(self.wing2_points, self.position)
         current_tail_points = update_position(self.tail_points, self.position)
-        self.body = self.canvas.create_polygon(*current_body_points, fill="red")
-        self.wing1 = self.canvas.create_polygon(*current_wing1_points, fill="grey")
-        self.wing2 = self.canvas.create_polygon(*current_wing2_points, fill="grey")
-        self.tail = self.canvas.create_polygon(*current_tail_points, fill="grey")
+        self.renderer.set_coords(self.body, current_body_points)
+        self.renderer.set_coords(self.wing1, current_wing1_points)
+        self.renderer.set_coords(self.wing2, current_wing2_points)
+        self.renderer.set_coords(self.tail, current_tail_points)
 
     def redraw(self):
-        self.canvas.delete(self.body)
-        self.canvas.delete(self.wing1)
-        self.canvas.delete(self.wing2)
-        self.canvas.delete(self.tail)
         self.draw()
 
     ''' move the plane however much it moves during one frame '''
@@ -187,13 +195,16 @@ class Display(Frame):
         self.frame = root
         self.canvas = Canvas(self.frame, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, bg="white")
         self.canvas.pack(side = LEFT, fill=BOTH, expand=TRUE)
+        # the moving things are drawn through the renderer, which sends
+        # the changes to the canvas once per frame (see bomber_render.py)
+        self.renderer = Renderer(self.canvas, ["building", "plane", "bomb"])
         self.init_fonts()
         self.init_score()
         self.rand = Random()
 
         #create game objects
-        self.plane = Plane(self.canvas, CANVAS_WIDTH - 100, 0)
-        self.bomb = Bomb(self.canvas)
+        self.plane = Plane(self.renderer, CANVAS_WIDTH - 100, 0)
+        self.bomb = Bomb(self.renderer)
         self.buildings = []
         self.building_width = SPACING * 0.8
         self.create_buildings()
@@ -213,7 +224,7 @@ class Display(Frame):
         self.canvas.itemconfig(self.score_text, text="Score:", font=self.scorefont)
 
     def display_score(self):
-        self.canvas.itemconfig(self.score_text, text="Level: " + str(self.level) + "  Score: " + str(self.score), font=self.scorefont)
+        self.renderer.configure(self.score_text, text="Level: " + str(self.level) + "  Score: " + str(self.score), font=self.scorefont)
 
     ''' create new buildings at the start of a level '''
     def create_buildings(self):
@@ -225,9 +236,19 @@ class Display(Frame):
         #create the new ones
         for building_num in range(0, 1200//SPACING):
             height = self.rand.randint(10,500) #random number between 10 and 500
-            self.buildings.append(Building(self.canvas, building_num, height,
+            self.buildings.append(Building(self.renderer, building_num, height,
                                            self.building_width))
 
+    ''' building_at returns the building whose slot contains x
+        coordinate x, or None if there isn't one.  Buildings are SPACING
+        apart, so we can work this out directly from x, rather than
+        testing every building. '''
+    def building_at(self, x):
+        building_num = int(x // SPACING)
+        if building_num < 0 or building_num >= len(self.buildings):
+            return None
+        return self.buildings[building_num]
+
     def drop_bomb(self):
         self.bomb.drop(self.plane.position)
 
@@ -235,11 +256,11 @@ class Display(Frame):
     def check_bomb(self):
         if not self.bomb.falling:
             return
-        # did the bomb hit a building?
-        for building in self.buildings:
-            if building.is_inside(self.bomb.position):
-                self.bomb.explode()
-                building.shrink()
+        # did the bomb hit a building?  Only the one below it can have been hit.
+        building = self.building_at(self.bomb.position.getX())
+        if building is not None and building.is_inside(self.bomb.position):
+            self.bomb.explode()
+            building.shrink()
 
     ''' check the state of the plane each frame '''
     def check_plane(self):
@@ -251,7 +272,14 @@ class Display(Frame):
         plane_body_bottom.move(12, 32)
         plane_wing = self.plane.position.copy()
         plane_wing.move(94,48)
-        for building in self.buildings:
+        # only the buildings below the three points (which go from
+        # left to right) can have been hit
+        candidates = []
+        for point in [plane_nose, plane_body_bottom, plane_wing]:
+            building = self.building_at(point.getX())
+            if building is not None and building not in candidates:
+                candidates.append(building)
+        for building in candidates:
             if (building.is_inside(plane_nose)
                 or building.is_inside(plane_body_bottom)
                 or building.is_inside(plane_wing)):
@@ -314,6 +342,7 @@ class Display(Frame):
             self.plane.redraw()
             self.bomb.redraw()
             self.display_score()
+        self.renderer.flush()
 
 ''' the Game class runs the main loop, and initializes tkinter '''
 class Game():
@@ -365,5 +394,6 @@ class Game():
             self.checkspeed()
         self.root.destroy()
 
-game = Game();
-game.run()
+if __name__ == "__main__":
+    game = Game();
+    game.run()
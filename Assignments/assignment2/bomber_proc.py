@@ -3,6 +3,7 @@ from tkinter import font
 from math import sqrt
 from random import *
 from time import time
+from bomber_render import Renderer
 
 #some global constants
 CANVAS_WIDTH = 1000
@@ -35,8 +36,8 @@ def init_building(canvas, building_num, building_width, building_heights, buildi
     building_heights.append(height)
     x = building_num*SPACING
     building_xpos.append(x)
-    building_rects.append(canvas.create_rectangle(x, CANVAS_HEIGHT, x + building_width,
-                                                  CANVAS_HEIGHT-height, fill="brown"))
+    building_rects.append(renderer.take_rectangle("building", [x, CANVAS_HEIGHT, x + building_width,
+                                                               CANVAS_HEIGHT-height], "building", fill="brown"))
 
 ''' is_inside_builing tests if point pos is inside building number
     building_num.  It takes the lists of building widths, heights and x
@@ -48,17 +49,27 @@ def is_inside_building(building_num, pos, building_width, building_heights, buil
             return False
     return True
 
+''' building_at returns the number of the building whose slot
+    contains x coordinate x, or None if there isn't one.  Buildings are
+    SPACING apart, so we can work this out directly from x, rather than
+    testing every building. '''
+def building_at(x, building_xpos):
+    building_num = int(x // SPACING)
+    if building_num < 0 or building_num >= len(building_xpos):
+        return None
+    return building_num
+
 ''' shrink_building shrinks building number building_num when a bomb drops on it '''
 def shrink_building(canvas, building_num, building_width, building_heights, building_xpos, building_rects):
     building_heights[building_num] = building_heights[building_num] - 50
-    canvas.delete(building_rects[building_num])
     x = building_xpos[building_num]
-    building_rects[building_num] = canvas.create_rectangle(x, CANVAS_HEIGHT, x + building_width,
-                                                           CANVAS_HEIGHT-building_heights[building_num], fill="brown")
+    renderer.set_coords(building_rects[building_num], [x, CANVAS_HEIGHT, x + building_width,
+                                                       CANVAS_HEIGHT-building_heights[building_num]])
 
-''' delete building number building_num from the canvas '''
+''' delete building number building_num from the canvas.  The renderer
+    keeps its rectangle, hidden, to use for a building on the next level '''
 def delete_building(canvas, building_num):
-    canvas.delete(building_rects[building_num])
+    renderer.release("building", building_rects[building_num])
 
 ''' initialize the state for the bomb.  As there's only one bomb, we store this 
     state as global variables.  One the bomb explodes it can be reused again. '''
@@ -72,20 +83,24 @@ def init_bomb(canvas, bomb_pos):
     ''' bomb_points contains x,y coordinate pairs to draw a bomb with top left
         corner at position 0,0'''
     bomb_points = [0,0, 10,0, 5,5, 10,10, 10,20, 5,22, 0,20, 0,10, 5,5]
+    global bomb_polygon
+    # the bomb's polygon is created once, and moved or hidden after that
+    bomb_polygon = renderer.polygon(bomb_points, "bomb", fill="black")
     draw_bomb(canvas, bomb_pos)
 
 ''' draw the bomb at position pos '''
 def draw_bomb(canvas, pos):
     global bomb_drawn, bomb_polygon
     current_points = update_position(bomb_points, pos[0], pos[1])
-    bomb_polygon = canvas.create_polygon(*current_points, fill="black")
+    renderer.set_coords(bomb_polygon, current_points)
+    renderer.show(bomb_polygon)
     bomb_drawn = True
 
 ''' erase the old bomb, and redraw it at position pos '''
 def redraw_bomb(canvas, pos):
     global bomb_drawn, bomb_polygon, bomb_falling
     if bomb_drawn:
-        canvas.delete(bomb_polygon)
+        renderer.hide(bomb_polygon)
     if bomb_falling:
         draw_bomb(canvas, pos)
 
@@ -124,6 +139,12 @@ def init_plane(canvas, plane_pos):
     plane_wing2_points = [52,16, 78,8, 94,8, 81,16]
     plane_tail_points = [90,16, 110,0, 124,0, 116,16]
     plane_width = 124
+    global plane_body, plane_wing1, plane_wing2, plane_tail
+    # the plane's polygons are created once, and moved after that
+    plane_body = renderer.polygon(plane_body_points, "plane", fill="red")
+    plane_wing1 = renderer.polygon(plane_wing1_points, "plane", fill="grey")
+    plane_wing2 = renderer.polygon(plane_wing2_points, "plane", fill="grey")
+    plane_tail = renderer.polygon(plane_tail_points, "plane", fill="grey")
     draw_plane(canvas, plane_pos)
 
 ''' reset the plane to its starting position at the start of a new level '''
@@ -140,17 +161,12 @@ def draw_plane(canvas, plane_pos):
     current_wing1_points = update_position(plane_wing1_points, x, y)
     current_wing2_points = update_position(plane_wing2_points, x, y)
     current_tail_points = update_position(plane_tail_points, x, y)
-    plane_body = canvas.create_polygon(*current_body_points, fill="red")
-    plane_wing1 = canvas.create_polygon(*current_wing1_points, fill="grey")
-    plane_wing2 = canvas.create_polygon(*current_wing2_points, fill="grey")
-    plane_tail = canvas.create_polygon(*current_tail_points, fill="grey")
+    renderer.set_coords(plane_body, current_body_points)
+    renderer.set_coords(plane_wing1, current_wing1_points)
+    renderer.set_coords(plane_wing2, current_wing2_points)
+    renderer.set_coords(plane_tail, current_tail_points)
 
 def redraw_plane(canvas, plane_pos):
-    global plane_body, plane_wing1, plane_wing2, plane_tail
-    canvas.delete(plane_body)
-    canvas.delete(plane_wing1)
-    canvas.delete(plane_wing2)
-    canvas.delete(plane_tail)
     draw_plane(canvas, plane_pos)
 
 ''' move the plane however much it moves during one frame '''
@@ -170,11 +186,14 @@ def move_plane(pos):
 
 ''' initialize the GUI state and the game state '''    
 def init_display(root, plane_pos, bomb_pos, building_heights, building_xpos, building_rects):
-    global building_width, game_running, canvas, won
+    global building_width, game_running, canvas, won, renderer
     root.wm_title("Bomber")
     windowsystem = root.call('tk', 'windowingsystem')
     canvas = Canvas(root, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, bg="white")
     canvas.pack(side = LEFT, fill=BOTH, expand=TRUE)
+    # all the moving things are drawn through the renderer, which sends
+    # the changes to the canvas once per frame (see bomber_render.py)
+    renderer = Renderer(canvas, ["building", "plane", "bomb"])
     init_fonts()
     init_score(canvas)
 
@@ -205,7 +224,7 @@ def init_score(canvas):
 
 def display_score(canvas, score, level):
     global score_text, scorefont
-    canvas.itemconfig(score_text, text="Level: " + str(level) + "  Score: " + str(score), font=scorefont)
+    renderer.configure(score_text, text="Level: " + str(level) + "  Score: " + str(score), font=scorefont)
 
 ''' create new buildings at the start of a level '''
 def create_buildings(canvas, building_width, building_heights, building_xpos, building_rects):
@@ -215,6 +234,7 @@ def create_buildings(canvas, building_width, building_heights, building_xpos, bu
             delete_building(canvas, building_num)
     building_heights.clear()
     building_xpos.clear()
+    building_rects.clear()
 
     #create the new ones
     for building_num in range(0, 1200//SPACING):
@@ -224,8 +244,9 @@ def create_buildings(canvas, building_width, building_heights, building_xpos, bu
 def check_bomb(canvas, bomb_pos, building_width, building_heights, building_xpos, building_rects):
     if not bomb_falling:
         return
-    # did the bomb hit a building?
-    for building_num in range(0, 1200//SPACING):
+    # did the bomb hit a building?  Only the one below it can have been hit.
+    building_num = building_at(bomb_pos[0], building_xpos)
+    if building_num is not None:
         if is_inside_building(building_num, bomb_pos, building_width, building_heights, building_xpos):
             explode()
             shrink_building(canvas, building_num, building_width, building_heights, building_xpos, building_rects)
@@ -238,7 +259,14 @@ def check_plane(canvas, plane_pos, building_width, building_heights, building_xp
     plane_nose_pos = [plane_pos[0], plane_pos[1] + 28]
     plane_body_pos = [plane_pos[0] + 12, plane_pos[1] + 32]
     plane_wing_pos = [plane_pos[0] + 94, plane_pos[1] + 48]
-    for building_num in range(0, 1200//SPACING):
+    # only the buildings below the three points (which go from left to
+    # right) can have been hit
+    candidates = []
+    for pos in [plane_nose_pos, plane_body_pos, plane_wing_pos]:
+        building_num = building_at(pos[0], building_xpos)
+        if building_num is not None and building_num not in candidates:
+            candidates.append(building_num)
+    for building_num in candidates:
         if (is_inside_building(building_num, plane_nose_pos, building_width,
                                building_heights, building_xpos)
             or is_inside_building(building_num, plane_body_pos, building_width,
@@ -365,8 +393,10 @@ def run_game():
             redraw_plane(canvas, plane_pos)
             redraw_bomb(canvas, bomb_pos)
             display_score(canvas, score, level)
+        renderer.flush()
         root.update()
         checkspeed()
     root.destroy()
 
-run_game()
+if __name__ == "__main__":
+    run_game()
@@ -0,0 +1,114 @@
+# Frogger collision benchmark.  Runs the model without a GUI, with far
+# more traffic than the real game, and compares checking the frog
+# against every car and log (the old way) with only checking the
+# frog's lane (Lane.car_hit and Lane.object_under).  Moving the objects
+# costs the same either way, so only the collision checks are timed.
+#
+#   python3 fr_benchmark.py [objects per lane ...]
+
+import time
+from sys import argv
+import fr_model
+from fr_model import Model, Car, Log, Turtle
+from fr_settings import CANVAS_WIDTH, GRID_SIZE, Direction
+
+FRAMES = 600
+
+class BenchController():
+    def register_frog(self, frog): pass
+    def update_score(self, score): pass
+    def update_level(self, level, end_time): pass
+    def update_lives(self, lives): pass
+    def register_river_object(self, obj): pass
+    def register_car(self, obj): pass
+    def unregister_objects(self): pass
+
+def dense_model(per_lane):
+    ''' a model with per_lane cars in each road lane and per_lane logs
+        or turtles in each river lane '''
+    model = Model(BenchController())
+    model.cars.clear()
+    model.logs.clear()
+    model.road_lanes.clear()
+    model.river_lanes.clear()
+    # objects wrap around over a distance of twice the canvas width
+    spacing = 2 * CANVAS_WIDTH / per_lane
+    for row in range(0, 5):
+        y = GRID_SIZE * (10 + row)
+        for i in range(0, per_lane):
+            dir = Direction.LEFT if row % 2 == 0 else Direction.RIGHT
+            car = Car(-CANVAS_WIDTH/2 + i * spacing, y, 0, dir, 1 + row/2)
+            model.cars.append(car)
+            model.add_to_lane(model.road_lanes, car)
+        y = GRID_SIZE * (4 + row)
+        for i in range(0, per_lane):
+            # half the lane is covered, so the frog lands on something
+            # about half the time; river objects mustn't overlap
+            if row % 2 == 0:
+                obj = Log(-CANVAS_WIDTH/2 + i * spacing, y, spacing/2, Direction.RIGHT, 1 + row/2)
+            else:
+                obj = Turtle(-CANVAS_WIDTH/2 + i * spacing, y, spacing/2, Direction.LEFT, 1 + row/2)
+            model.logs.append(obj)
+            model.add_to_lane(model.river_lanes, obj)
+    return model
+
+def frog_positions():
+    # visit every road and river lane at a spread of x positions
+    positions = []
+    for frame in range(0, FRAMES):
+        x = (frame * 37) % CANVAS_WIDTH
+        if frame % 2 == 0:
+            y = GRID_SIZE * (10 + frame % 5)
+        else:
+            y = GRID_SIZE * (4 + frame % 5)
+        positions.append((x, y))
+    return positions
+
+def run_linear(model, positions):
+    hits = 0
+    elapsed = 0
+    for x, y in positions:
+        model.move_objects()
+        model.frog.x, model.frog.y = x, y
+        start = time.perf_counter()
+        for car in model.cars:
+            if car.collided(x, y):
+                hits += 1
+                break
+        for log in model.logs:
+            if log.contains(model.frog):
+                hits += 1
+                break
+        elapsed += time.perf_counter() - start
+    return hits, elapsed
+
+def run_lanes(model, positions):
+    hits = 0
+    elapsed = 0
+    for x, y in positions:
+        model.move_objects()
+        model.frog.x, model.frog.y = x, y
+        start = time.perf_counter()
+        lane = model.road_lanes.get(y)
+        if lane is not None and lane.car_hit(x, y) is not None:
+            hits += 1
+        lane = model.river_lanes.get(y)
+        if lane is not None and lane.object_under(model.frog) is not None:
+            hits += 1
+        elapsed += time.perf_counter() - start
+    return hits, elapsed
+
+def main():
+    fr_model.speed = 1.0
+    sizes = [int(arg) for arg in argv[1:]] or [8, 64, 512, 4096]
+    positions = frog_positions()
+    print("%8s %16s %16s" % ("per lane", "linear us/frame", "lanes us/frame"))
+    for per_lane in sizes:
+        linear_hits, linear = run_linear(dense_model(per_lane), positions)
+        lane_hits, lanes = run_lanes(dense_model(per_lane), positions)
+        # both should find the same collisions
+        assert linear_hits == lane_hits, (linear_hits, lane_hits)
+        print("%8d %16.1f %16.1f" % (per_lane, 1e6 * linear / FRAMES, 1e6 * lanes / FRAMES))
+
+if __name__ == "__main__":
+    main()
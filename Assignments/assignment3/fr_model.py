@@ -2,11 +2,15 @@
 
 from random import *
 import time
+import heapq
 from fr_settings import CANVAS_WIDTH, CANVAS_HEIGHT, GRID_SIZE, LOG_HEIGHT, Direction
 
 LEVEL_TIME = 120
 speed = 0.0
 
+# frog doesn't fill a square, so allow some slack when hitting cars
+CAR_MARGIN = (GRID_SIZE*8)//10
+
 class RiverObject():
     def __init__(self, x, y, width, dir, speed):
         self.x = x
@@ -89,14 +93,88 @@ class Car():
         if frog_y != self.y:
             return False
         # x positions are center of objects
-        # frog doesn't fill a square, so allow some slack
-        margin = (GRID_SIZE*8)//10
-        if frog_x > self.x - margin and frog_x < self.x + margin:
+        if frog_x > self.x - CAR_MARGIN and frog_x < self.x + CAR_MARGIN:
             return True
 
+class Lane():
+    ''' All the cars, logs or turtles in one row of the screen.  They all
+        move at the same speed, so they stay sorted by x position, except
+        when one wraps around from one side of the screen to the other.
+        Keeping them sorted means we can find the only object the frog
+        could be touching with a binary search, rather than checking
+        every object on the screen. '''
+    def __init__(self, y, dir):
+        self.y = y
+        self.dir = dir
+        self.objects = []  # sorted by x
+        self.widest = 0    # width of the widest log or turtle
+
+    def index_after(self, x):
+        ''' index of the first object whose x position is greater than x '''
+        low = 0
+        high = len(self.objects)
+        while low < high:
+            mid = (low + high) // 2
+            if self.objects[mid].x > x:
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def add(self, obj):
+        self.objects.insert(self.index_after(obj.x), obj)
+        if isinstance(obj, RiverObject):
+            self.widest = max(self.widest, obj.get_width())
+
+    def move(self):
+        wrapped = []
+        if self.dir == Direction.RIGHT:
+            for obj in self.objects:
+                old_x = obj.x
+                obj.move()
+                if obj.x < old_x:
+                    wrapped.append(obj)
+        else:
+            for obj in self.objects:
+                old_x = obj.x
+                obj.move()
+                if obj.x > old_x:
+                    wrapped.append(obj)
+        if wrapped:
+            # objects that wrapped around are now in the wrong place in
+            # the list.  This only happens every few seconds, so it's
+            # fine to just take them out and put them back in.
+            self.objects = [obj for obj in self.objects if obj not in wrapped]
+            for obj in wrapped:
+                self.add(obj)
+
+    def car_hit(self, frog_x, frog_y):
+        ''' the car the frog collided with, or None '''
+        # only the first car to the right of frog_x - CAR_MARGIN can be
+        # close enough
+        i = self.index_after(frog_x - CAR_MARGIN)
+        if i < len(self.objects) and self.objects[i].collided(frog_x, frog_y):
+            return self.objects[i]
+        return None
+
+    def object_under(self, frog):
+        ''' the log or turtle the frog is on, or None '''
+        # Usually only the last object starting to the left of the frog
+        # can be under it, but objects of different widths can come to
+        # overlap after wrapping around, so look back through all the
+        # ones that start close enough to reach the frog.
+        (frog_x, frog_y) = frog.get_position()
+        i = self.index_after(frog_x) - 1
+        while i >= 0 and self.objects[i].x + self.widest >= frog_x:
+            if self.objects[i].contains(frog):
+                return self.objects[i]
+            i -= 1
+        return None
+
 
 class Frog():
-    def __init__(self, x, y):
+    def __init__(self, x, y, clock=time.time):
+        self.clock = clock
         self.start_position = (x, y)
         self.x = x
         self.y = y
@@ -134,7 +212,7 @@ class Frog():
     def move(self, dir):
         self.direction = dir
         self.moving = True
-        self.start_move_time = time.time()
+        self.start_move_time = self.clock()
         if dir == Direction.LEFT:
             self.x = self.x - GRID_SIZE//2
         elif dir == Direction.RIGHT:
@@ -145,7 +223,8 @@ class Frog():
             self.y = self.y + GRID_SIZE//2
 
     def finish_move(self):
-        if (not self.moving) or (time.time() - self.start_move_time < 0.1):
+        # the model's timer calls this once the first half has been drawn
+        if not self.moving:
             return
         dir = self.direction
         if dir == Direction.LEFT:
@@ -158,28 +237,67 @@ class Frog():
             self.y = self.y + GRID_SIZE//2
         self.moving = False
 
+class TimerQueue():
+    ''' Functions to be called at some time in the future, kept in a heap
+        so the next one due is always at the front.  The clock is a
+        function returning the current time, so tests can use a fake
+        clock instead of waiting for real time to pass. '''
+    def __init__(self, clock):
+        self.clock = clock
+        self.heap = []
+        self.count = 0  # so timers due at the same time run in the order they were set
+
+    def schedule(self, delay, function):
+        ''' call function after delay seconds.  Returns the timer, which
+            can be passed to cancel. '''
+        self.count = self.count + 1
+        timer = [self.clock() + delay, self.count, function]
+        heapq.heappush(self.heap, timer)
+        return timer
+
+    def cancel(self, timer):
+        # removing it from the middle of the heap is slow, so just
+        # mark it so it's ignored when it comes to the front
+        timer[2] = None
+
+    def clear(self):
+        self.heap.clear()
+
+    def run_due(self):
+        now = self.clock()
+        while self.heap and self.heap[0][0] <= now:
+            (due, count, function) = heapq.heappop(self.heap)
+            if function is not None:
+                function()
+
 class Model():
-    def __init__(self, controller):
+    def __init__(self, controller, clock=time.time):
         self.controller = controller
+        self.clock = clock
+        self.timers = TimerQueue(clock)
+        self.level_timer = None
         self.lives = 7
-        self.end_time = time.time() + LEVEL_TIME
+        self.end_time = clock() + LEVEL_TIME
         self.init_score()
         self.rand = Random()
 
         #create game objects
-        self.frog = Frog(CANVAS_WIDTH//2, GRID_SIZE*15)
+        self.frog = Frog(CANVAS_WIDTH//2, GRID_SIZE*15, clock)
         controller.register_frog(self.frog)
         self.logs = []
         self.cars = []
+        self.river_lanes = {}  # Lanes of logs and turtles, indexed by y
+        self.road_lanes = {}   # Lanes of cars, indexed by y
         self.create_logs()
         self.create_cars()
         self.create_homes()
         self.game_running = True
         self.paused = False
         self.won = False
+        self.start_level_timer()
 
         # initialized speed measurement (see checkspeed for use)
-        self.lastframe = time.time()
+        self.lastframe = clock()
         self.framecount = 0
         self.dont_update_speed = True
 
@@ -198,6 +316,7 @@ class Model():
     def create_logs(self):
         #remove any old logs or turtles
         self.logs.clear()
+        self.river_lanes.clear()
 
         #create the new ones
         y = GRID_SIZE*4
@@ -223,12 +342,14 @@ class Model():
                         width = self.rand.randint(80,200 - self.level * 20)
                         object = Log(x, y, width, dir, speeds[row])
                     self.logs.append(object);
+                    self.add_to_lane(self.river_lanes, object)
                     self.controller.register_river_object(object)
             y = y + GRID_SIZE
 
     def create_cars(self):
         #remove any old cars
         self.cars.clear()
+        self.road_lanes.clear()
 
         y = GRID_SIZE*10
         speeds = [2, 4, 2.5, 1, 3]
@@ -247,9 +368,15 @@ class Model():
                     carnum = 0
                     car = Car(x, y, carnums[row], dir, speeds[row])
                     self.cars.append(car)
+                    self.add_to_lane(self.road_lanes, car)
                     self.controller.register_car(car)
             y = y + GRID_SIZE
 
+    def add_to_lane(self, lanes, obj):
+        if obj.y not in lanes:
+            lanes[obj.y] = Lane(obj.y, obj.dir)
+        lanes[obj.y].add(obj)
+
     def create_homes(self):
         # init where the frog homes are at the top of the screen
         self.frogs_home = 0
@@ -272,7 +399,7 @@ class Model():
 
         #update score
         self.score = self.score + 200
-        remaining_time = int(self.end_time - time.time())
+        remaining_time = int(self.end_time - self.clock())
         if remaining_time > 0:
             self.score = self.score + remaining_time
 
@@ -283,10 +410,10 @@ class Model():
         if self.frogs_home == 5:
             self.level_finished()
         else:
-            self.pause_start(1, "self.frog.reset_position()")
+            self.pause_start(1, self.frog.reset_position)
 
     def level_finished(self):
-        self.pause_start(1, "self.next_level()")
+        self.pause_start(1, self.next_level)
 
     def reset_homes(self):
         for i in range(0,6):
@@ -299,25 +426,42 @@ class Model():
         if self.lives == 0:
             self.game_over()
         else:
-            self.pause_start(1, "self.new_life()")
+            self.pause_start(1, self.new_life)
 
     def pause_start(self, pause_time, unpause_function):
         self.paused = True
-        self.pause_end_time = time.time() + pause_time
-        # register the function to call when we unpause
-        self.unpause_function = unpause_function
+        # unpause, then call the function we were given
+        self.timers.schedule(pause_time, self.pause_end)
+        self.timers.schedule(pause_time, unpause_function)
+
+    def pause_end(self):
+        self.paused = False
+        self.dont_update_speed = True
 
     def check_pause(self):
-        if time.time() > self.pause_end_time:
-            self.paused = False
-            self.dont_update_speed = True
-            # evaluate the registered function
-            exec(self.unpause_function)
+        self.timers.run_due()
+
+    def start_level_timer(self):
+        if self.level_timer is not None:
+            self.timers.cancel(self.level_timer)
+        self.end_time = self.clock() + LEVEL_TIME
+        self.level_timer = self.timers.schedule(LEVEL_TIME, self.out_of_time)
+
+    def out_of_time(self):
+        # the frog took too long - it loses a life and the clock restarts
+        self.level_timer = None
+        self.died()
+        self.start_level_timer()
+        self.controller.update_level(self.level, self.end_time)
             
     def new_life(self):
         self.controller.update_lives(self.lives)
 
     def game_over(self):
+        # stop the level clock, or out_of_time would carry on killing the frog
+        if self.level_timer is not None:
+            self.timers.cancel(self.level_timer)
+            self.level_timer = None
         self.game_running = False
         self.won = False
         self.controller.game_over()
@@ -333,8 +477,11 @@ class Model():
         self.reset_level()
 
     def reset_level(self):
+        # forget anything we were waiting to do on the old level
+        self.timers.clear()
+        self.level_timer = None
         self.frogs_home = 0
-        self.end_time = time.time() + LEVEL_TIME
+        self.start_level_timer()
         self.controller.update_level(self.level, self.end_time)
         self.frog.reset_position()
         self.lives = 7
@@ -350,12 +497,14 @@ class Model():
     def move_frog(self, dir):
         if self.game_running and not self.paused:
             self.frog.move(dir)
+            # finish the hop once the first half has been drawn
+            self.timers.schedule(0.1, self.frog.finish_move)
 
     def move_objects(self):
-        for log in self.logs:
-            log.move()
-        for car in self.cars:
-            car.move()
+        for lane in self.river_lanes.values():
+            lane.move()
+        for lane in self.road_lanes.values():
+            lane.move()
 
     def check_frog_crossing_river(self):
         # frog is crossing the river
@@ -365,11 +514,11 @@ class Model():
             on_log = None
         if on_log is None:
             # it's no longer on the previous log
-            # check if it's now on any other log
-            for log in self.logs:
-                if log.contains(self.frog):
-                    on_log = log
-                    break
+            # check if it's now on any other log in this row
+            (x, y) = self.frog.get_position()
+            lane = self.river_lanes.get(y)
+            if lane is not None:
+                on_log = lane.object_under(self.frog)
         if on_log is None:
             # frog is not on a log - it must be in the water
             self.died()
@@ -381,10 +530,9 @@ class Model():
     def check_frog_crossing_road(self):
         # frog is on the road
         (x, y) = self.frog.get_position()
-        for car in self.cars:
-            if car.collided(x, y):
-                self.died()
-                return
+        lane = self.road_lanes.get(y)
+        if lane is not None and lane.car_hit(x, y) is not None:
+            self.died()
 
     def check_frog_entering_home(self):
         # frog is attempting to enter home
@@ -398,8 +546,7 @@ class Model():
 
     def check_frog(self):
         if self.frog.moving:
-            self.frog.finish_move()
-            return
+            return  # wait for the hop to finish
         
         (x, y) = self.frog.get_position()
         if x < 0 or x > CANVAS_WIDTH:
@@ -422,7 +569,7 @@ class Model():
         self.framecount = self.framecount + 1
         # only check every ten frames                                                        
         if self.framecount == 10:
-            now = time.time()
+            now = self.clock()
             elapsed = now - self.lastframe
             self.lastframe = now
             self.framecount = 0
@@ -441,11 +588,10 @@ class Model():
                 speed = speed * 0.9 + 0.1 * 6 * elapsed
         
     def update(self):
+        self.timers.run_due()
         if self.game_running and not self.paused:
             self.move_objects()
             self.controller.update_score(self.score)
             self.check_frog()
             self.checkspeed()
-        elif self.paused:
-            self.check_pause()
 
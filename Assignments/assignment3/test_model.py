@@ -1,5 +1,6 @@
 from time import sleep
-from fr_model import Model, RiverObject, Frog, Car, Log
+import fr_model
+from fr_model import Model, RiverObject, Frog, Car, Log, Lane, TimerQueue
 from fr_settings import CANVAS_WIDTH, CANVAS_HEIGHT, GRID_SIZE, LOG_HEIGHT, Direction, GRID_SIZE
 
 class DummyController():
@@ -34,6 +35,9 @@ class DummyController():
     def died(self):
         assert(True)  # just a placeholder
 
+    def game_over(self):
+        assert(True)  # just a placeholder
+
 def test_river_object():
     x = 100
     y = 100
@@ -111,7 +115,6 @@ def test_frog():
     assert(frog.on_log() == None)
 
     frog.move(Direction.UP)
-    frog.finish_move()
     assert(frog.get_position() == (x, y - GRID_SIZE//2))
     sleep(0.2)
     frog.finish_move()
@@ -156,6 +159,40 @@ def test_frog():
     frog.move_with(log)
     assert(frog.get_position() == (x + lspeed*2, y))
 
+def test_lane():
+    y = 100
+    lane = Lane(y, Direction.RIGHT)
+    for x in [300, -40, 100, 1470]:
+        lane.add(Log(x, y, 40, Direction.RIGHT, 20))
+    assert([obj.x for obj in lane.objects] == [-40, 100, 300, 1470])
+
+    # check only objects in the frog's position are found
+    assert(lane.object_under(Frog(110, y)) == lane.objects[1])
+    assert(lane.object_under(Frog(150, y)) == None)
+    assert(lane.object_under(Frog(-100, y)) == None)
+
+    # a frog on a long log is found even when a shorter one overlaps it
+    overlapping = Lane(y, Direction.RIGHT)
+    overlapping.add(Log(0, y, 200, Direction.RIGHT, 20))
+    overlapping.add(Log(100, y, 40, Direction.RIGHT, 20))
+    assert(overlapping.object_under(Frog(170, y)) == overlapping.objects[0])
+    assert(overlapping.object_under(Frog(120, y)) == overlapping.objects[1])
+    assert(overlapping.object_under(Frog(210, y)) == None)
+
+    # check the list stays sorted when an object wraps around
+    old_speed = fr_model.speed
+    fr_model.speed = 1
+    lane.move()
+    fr_model.speed = old_speed
+    assert([obj.x for obj in lane.objects] == [-40, -20, 120, 320])
+
+    cars = Lane(y, Direction.LEFT)
+    for x in [500, 100, 300]:
+        cars.add(Car(x, y, 0, Direction.LEFT, 10))
+    assert(cars.car_hit(300, y) == cars.objects[1])
+    assert(cars.car_hit(300 + GRID_SIZE//2, y) == cars.objects[1])
+    assert(cars.car_hit(200, y) == None)
+
 def unpause_func():  #used to test unpause callback
     global paused
     paused = False
@@ -164,7 +201,9 @@ def test_model_pause():
     controller = DummyController()
     model = Model(controller)
     model.dummyvar = 0  # use this to test the callback was called correctly
-    model.pause_start(0.1, "self.dummyvar=1")
+    def set_dummyvar():
+        model.dummyvar = 1
+    model.pause_start(0.1, set_dummyvar)
     assert(model.paused)
     model.check_pause()
     assert(model.paused)
@@ -175,6 +214,79 @@ def test_model_pause():
     assert(model.dummyvar==1)
 
     
+class FakeClock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+def test_timer_queue():
+    clock = FakeClock()
+    timers = TimerQueue(clock.time)
+    called = []
+    timers.schedule(2, lambda: called.append("b"))
+    timers.schedule(1, lambda: called.append("a"))
+    timer = timers.schedule(1, lambda: called.append("cancelled"))
+    timers.schedule(2, lambda: called.append("c"))
+    timers.cancel(timer)
+    timers.run_due()
+    assert(called == [])
+    clock.now += 1
+    timers.run_due()
+    assert(called == ["a"])
+    clock.now += 5
+    timers.run_due()
+    assert(called == ["a", "b", "c"])
+
+def test_model_clock():
+    # with a fake clock, we don't have to wait for the frog to hop
+    clock = FakeClock()
+    controller = DummyController()
+    model = Model(controller, clock.time)
+    (fx, fy) = controller.frog.get_position()
+    model.move_frog(Direction.UP)
+    model.update()
+    assert(controller.frog.get_position() == (fx, fy - GRID_SIZE//2))
+    clock.now += 0.1
+    model.update()
+    assert(controller.frog.get_position() == (fx, fy - GRID_SIZE))
+
+    # the pause only ends when the fake clock says so
+    model.pause_start(1, controller.frog.reset_position)
+    clock.now += 0.5
+    model.update()
+    assert(model.paused)
+    clock.now += 0.5
+    model.update()
+    assert(not model.paused)
+    assert(controller.frog.get_position() == (fx, fy))
+
+def test_model_epoch_clock():
+    # a real clock reads about 1.76e9 seconds: the hop must still finish
+    clock = FakeClock()
+    clock.now = 1.76e9
+    controller = DummyController()
+    model = Model(controller, clock.time)
+    (fx, fy) = controller.frog.get_position()
+    model.move_frog(Direction.UP)
+    clock.now += 0.1
+    model.update()
+    assert(not controller.frog.moving)
+    assert(controller.frog.get_position() == (fx, fy - GRID_SIZE))
+
+def test_game_over_stops_level_timer():
+    clock = FakeClock()
+    controller = DummyController()
+    model = Model(controller, clock.time)
+    model.game_over()
+    assert(model.level_timer is None)
+    lives = model.lives
+    clock.now += fr_model.LEVEL_TIME + 1
+    model.update()
+    assert(model.lives == lives)
+    assert(model.level_timer is None)
+
 def test_model():
     controller = DummyController()
     assert(controller.frog == None)
@@ -1,4 +1,6 @@
 # Audio based on code from Ethan Wood
+import threading
+
 class Audio:
     def __init__(self):
         self.AUDIO = True 
@@ -8,15 +10,32 @@ class Audio:
             self.AUDIO = False
 
         if self.AUDIO:
-            self.track = [simpleaudio.WaveObject.from_wave_file("./assets/eat.wav"),
-                          simpleaudio.WaveObject.from_wave_file("./assets/melody.wav"),
-                          simpleaudio.WaveObject.from_wave_file("./assets/died.wav"),
-                          simpleaudio.WaveObject.from_wave_file("./assets/ghostdie.wav")]
+            # the wav files are big, so load them on a background thread
+            # rather than holding up the game before it starts, or the
+            # first time each one is played
+            self.simpleaudio = simpleaudio
+            self.track_files = ["./assets/eat.wav", "./assets/melody.wav",
+                                "./assets/died.wav", "./assets/ghostdie.wav"]
+            self.track = [None, None, None, None]
+            # the loading thread and play() both load tracks, so only
+            # one of them at a time checks for and loads a track
+            self.track_lock = threading.Lock()
             #self.background = simpleaudio.WaveObject.from_wave_file("./assets/loop2.wav")
             self.background_play = None
             self.track_play = [None, None, None, None, None, None]
             self.background_pause = False
             self.background_waiting = None
+            threading.Thread(target=self.load_tracks, daemon=True).start()
+
+    def load_tracks(self):
+        for index in range(len(self.track)):
+            self.load_track(index)
+
+    def load_track(self, index):
+        with self.track_lock:
+            if self.track[index] is None:
+                self.track[index] = self.simpleaudio.WaveObject.from_wave_file(self.track_files[index])
+            return self.track[index]
 
     def update(self):
         if self.AUDIO:
@@ -32,7 +51,8 @@ class Audio:
     def play(self, index):
         if self.AUDIO:
             if self.track_play[index] is None or not self.track_play[index].is_playing():
-                self.track_play[index] = self.track[index].play()
+                # only loads it here if the background thread hasn't yet
+                self.track_play[index] = self.load_track(index).play()
                 if not index == 0 and not index == 3:
                     self.background_waiting = self.track_play[index]
                     self.background_pause = True
@@ -11,6 +11,7 @@ import time
 
 class Controller():
     def __init__(self, argv):
+        startup_time = time.time()
         self.parse_args(argv)
         self.root = Tk();
         self.windowsystem = self.root.call('tk', 'windowingsystem')
@@ -29,26 +30,31 @@ class Controller():
         self.net = None
         self.model = Model(self, self.serv);
         self.add_view(View(self.root, self))
-        self.net = Network(self, self.passwd)
-        self.local_ip = self.net.get_local_ip_addr()
+        self.net = Network(self, self.passwd, self.udp)
+        if self.serv:
+            # only the server needs to know its address, to tell player 2
+            self.local_ip = self.net.get_local_ip_addr()
         for view in self.views:
             if self.serv:
                 view.display_msg("Waiting for Player 2 to connect\nIP addr: " + self.local_ip)
             view.update(time.time())
         self.root.update()
+        if LOGTIME:
+            print("Startup took", time.time() - startup_time, "seconds")
         self.init_net()
         self.model.activate()
 
     def parse_args(self, argv):
         try:
             if "pacman.py" in argv[0]:
-                opts, args = getopt(argv[1:], "sc:p:", ["serv=", "conn=", "pass="])
+                opts, args = getopt(argv[1:], "sc:p:u", ["serv=", "conn=", "pass=", "udp"])
             else:
-                opts, args = getopt(argv, "sc:p:", ["serv=", "conn=", "pass="])
+                opts, args = getopt(argv, "sc:p:u", ["serv=", "conn=", "pass=", "udp"])
         except GetoptError:
             self.usage()
         self.passwd = "000000"
         self.serv = False
+        self.udp = False
         self.connect_to = "127.0.0.1"
         for opt, arg in opts:
             if opt in ("-s", "--server"):
@@ -57,6 +63,8 @@ class Controller():
                 self.connect_to = arg
             elif opt in ("-p", "--passwd"):
                 self.passwd = arg
+            elif opt in ("-u", "--udp"):
+                self.udp = True
             else:
                 self.usage()
         if self.serv:
@@ -71,7 +79,7 @@ class Controller():
             self.net.client(self.connect_to, 9872)
 
     def usage(self):
-        print("pacman.py [-s | --server] [-c <ip address> | --connect=<ip address>] \n          [-p <password> | --passwd=<password>]")
+        print("pacman.py [-s | --server] [-c <ip address> | --connect=<ip address>] \n          [-p <password> | --passwd=<password>] [-u | --udp]")
         sys.exit(2)
 
     def display_msg(self, msg):
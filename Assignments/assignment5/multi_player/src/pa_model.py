@@ -4,6 +4,7 @@ from random import *
 from enum import Enum
 import time
 from pa_settings import CANVAS_WIDTH, CANVAS_HEIGHT, GRID_SIZE, STARTUP_LIVES, DONT_DIE, Direction, PAUSETIME, LOGTIME
+from pa_settings import NET_UPDATE_INTERVAL, INTERP_DELAY, MAX_EXTRAPOLATION
 import sys
 
 speed = 0.0
@@ -34,6 +35,70 @@ def next_square(pos, direction, distance):
         y += distance
     return x, y
 
+# checkspeed scales the global speed so that an object with a
+# move_speed of 1 covers 120 pixels per second, whatever the frame rate.
+PIXELS_PER_SECOND = 120
+
+def direction_vector(direction):
+    if direction == Direction.UP:
+        return 0, -1
+    elif direction == Direction.LEFT:
+        return -1, 0
+    elif direction == Direction.RIGHT:
+        return 1, 0
+    elif direction == Direction.DOWN:
+        return 0, 1
+    return 0, 0
+
+class SnapshotBuffer():
+    ''' Timestamped position updates for an object controlled by the
+        remote machine.  Rather than jumping the object to each update as
+        it arrives, we show where it was INTERP_DELAY ago, interpolating
+        between the updates either side of that time.  If we run out of
+        updates, we extrapolate from the last one using its direction and
+        speed (dead reckoning). '''
+    def __init__(self):
+        self.__snapshots = []  # (time, position, direction, speed), oldest first
+
+    def add(self, now, pos, dirn, speed):
+        self.__snapshots.append((now, pos, dirn, speed))
+        if len(self.__snapshots) > 64:
+            # nobody is asking for positions (e.g. game paused) - don't grow forever
+            self.__snapshots.pop(0)
+
+    def clear(self):
+        self.__snapshots.clear()
+
+    @property
+    def empty(self):
+        return len(self.__snapshots) == 0
+
+    def state_at(self, now):
+        ''' returns position and direction to display at time now '''
+        t = now - INTERP_DELAY
+        snaps = self.__snapshots
+        # throw away snapshots we'll never need again: we only need the
+        # newest one before t, and those after it.
+        while len(snaps) > 1 and snaps[1][0] <= t:
+            snaps.pop(0)
+        t0, pos0, dir0, speed0 = snaps[0]
+        if t <= t0:
+            return pos0, dir0
+        if len(snaps) == 1:
+            # no newer update yet - dead reckoning
+            dt = min(t - t0, MAX_EXTRAPOLATION)
+            dx, dy = direction_vector(dir0)
+            dist = speed0 * PIXELS_PER_SECOND * dt
+            return (pos0[0] + dx * dist, pos0[1] + dy * dist), dir0
+        t1, pos1, dir1, speed1 = snaps[1]
+        if not closer_than(pos0, pos1, 2 * GRID_SIZE):
+            # went through the tunnel or was reset - don't slide across the screen
+            return pos0, dir0
+        frac = (t - t0) / (t1 - t0)
+        x = pos0[0] + (pos1[0] - pos0[0]) * frac
+        y = pos0[1] + (pos1[1] - pos0[1]) * frac
+        return (x, y), dir0
+
 class Status(Enum):
     LOCAL = 0   # local object, currently local
     AWAY = 1    # local object, currently on vacation
@@ -55,6 +120,7 @@ class MovableObject():
         self.__original_speed = speed
         self.__status = status
         self.__name = name
+        self.snapshots = SnapshotBuffer()  # only used for foreign and remote objects
 
     @property
     def name(self):
@@ -788,6 +854,7 @@ class Model():
         self.start_time = now
         self.framecount = 0
         self.dont_update_speed = True
+        self.last_net_update = 0
 
     def activate(self):
         self.controller.send_maze(self.__maze)
@@ -982,10 +1049,13 @@ class Model():
         
         level_finished = False
         for obj in self.movables:
+            if obj.status == Status.FOREIGN:
+                continue  # moved by apply_snapshots instead
             if obj.on_our_screen:
                 obj.move(self.__maze)
             else:
                 obj.move(self.__remote_maze)
+        self.apply_snapshots(now)
         self.check_collisions()
         if self.pacman.on_our_screen:
             maze = self.__maze
@@ -1029,6 +1099,9 @@ class Model():
             
         if level_finished and maze_finished is self.__maze:
             self.level_finished()
+        if now - self.last_net_update < NET_UPDATE_INTERVAL:
+            return
+        self.last_net_update = now
         if self.pacman.status == Status.AWAY:
             self.controller.send_pacman_update(self.pacman.position,
                                                self.pacman.direction,
@@ -1039,6 +1112,17 @@ class Model():
                                                   ghost.direction, ghost.speed,
                                                   ghost.mode)
 
+    def apply_snapshots(self, now):
+        ''' move the objects the remote machine controls to where their
+            position updates say they should be now '''
+        remotes = list(self.remote_ghosts)
+        if self.foreign_pacman is not None and not self.foreign_pacman.frozen:
+            remotes.append(self.foreign_pacman)
+        for obj in remotes:
+            if obj.snapshots.empty:
+                continue
+            obj.position, obj.direction = obj.snapshots.state_at(now)
+
     def notify_eat_food(self, pos):
         self.notify_eat(pos, False)
 
@@ -1128,8 +1212,7 @@ class Model():
 
     def foreign_pacman_update(self, pos, dir, speed):
         if self.foreign_pacman is not None and self.foreign_pacman.frozen == False:
-            self.foreign_pacman.position = pos
-            self.foreign_pacman.direction = dir
+            self.foreign_pacman.snapshots.add(time.time(), pos, dir, speed)
             self.foreign_pacman.speed = speed
 
     def foreign_pacman_ate_ghost(self, ghostnum):
@@ -1146,8 +1229,7 @@ class Model():
         
     def remote_ghost_update(self, ghostnum, pos, dir, speed, mode):
         ghost = self.remote_ghosts[ghostnum]
-        ghost.position = pos
-        ghost.directon = dir
+        ghost.snapshots.add(time.time(), pos, dir, speed)
         ghost.speed = speed
         ghost.mode = mode
 
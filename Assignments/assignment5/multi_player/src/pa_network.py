@@ -2,21 +2,93 @@ import socket
 import sys
 import pickle
 import select
+import struct
 from time import sleep
+from pa_settings import Direction
+from pa_model import GhostMode
+
+local_ip = None  # cached by get_local_ip_addr
+
+def get_local_ip_addr():
+    ''' Find an IP address other machines on our network can reach us
+        on.  This doesn't send any packets, so it can't block, and the
+        answer is cached as it won't change while we're running. '''
+    global local_ip
+    if local_ip is not None:
+        return local_ip
+    # Ask the OS which interface it would use to reach another machine.
+    # Connecting a UDP socket only picks a route; nothing is sent, and
+    # unlike looking up our hostname it can't wait on a DNS server.  The
+    # address is a private one, so we don't name any host on the Internet.
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(("10.255.255.255", 1))
+        local_ip = s.getsockname()[0]
+    except OSError:
+        local_ip = "127.0.0.1"  # no network at all
+    finally:
+        s.close()
+    return local_ip
+
+# Position updates are state snapshots: only the newest one matters.  In
+# UDP mode they are sent as datagrams so a lost packet never holds up the
+# packets behind it, as it would on the TCP stream.  Everything else
+# (eat, ghosteaten, status, ...) is an event and stays on TCP.
+#
+# Anyone on the network can send us a datagram with the other player's
+# address on it, so snapshots are never pickled (unpickling can run any
+# code the sender likes).  Each one is a fixed layout packed with struct:
+# sequence number (I), kind (B), ghost number (B), x (d), y (d),
+# direction (B), speed (d), ghost mode (B).
+
+SNAPSHOT = struct.Struct("!IBBddBdB")
+PACMAN_SNAPSHOT = 0
+GHOST_SNAPSHOT = 1
+NO_MODE = 255   # ghost mode None
+
+def encode_snapshot(seq, msg):
+    if msg[0] == "pacman":
+        (pos, dirn, speed) = msg[1]
+        return SNAPSHOT.pack(seq, PACMAN_SNAPSHOT, 0, pos[0], pos[1], dirn, speed, NO_MODE)
+    (ghostnum, pos, dirn, speed, mode) = msg[1]
+    mode = NO_MODE if mode is None else mode.value
+    return SNAPSHOT.pack(seq, GHOST_SNAPSHOT, ghostnum, pos[0], pos[1], dirn, speed, mode)
+
+def decode_snapshot(data):
+    ''' returns (seq, msg), or None if data isn't a snapshot '''
+    if len(data) != SNAPSHOT.size:
+        return None
+    (seq, kind, ghostnum, x, y, dirn, speed, mode) = SNAPSHOT.unpack(data)
+    try:
+        dirn = Direction(dirn)
+        if kind == PACMAN_SNAPSHOT:
+            return seq, ["pacman", [(x, y), dirn, speed]]
+        if kind == GHOST_SNAPSHOT and ghostnum < 4:
+            mode = None if mode == NO_MODE else GhostMode(mode)
+            return seq, ["ghost", [ghostnum, (x, y), dirn, speed, mode]]
+    except ValueError:
+        pass  # not a direction or ghost mode we know
+    return None
 
 class Network():
-    def __init__(self, controller, password):
+    def __init__(self, controller, password, udp=False):
         self.__controller = controller
         self.__password = password
         self.__server = False
         self.__connected = False
+        self.__udp = udp
+        self.__udp_sock = None
+        self.__udp_peer = None   # only set once both sides have agreed to use UDP
+        self.__udp_send_seq = 0
+        self.__udp_recv_seqs = {}  # highest sequence number seen, indexed by snapshot key
+        self.stale_snapshots = 0   # count of snapshots discarded as out of date
+        self.bad_snapshots = 0     # count of datagrams that weren't snapshots
         try:
             self.__sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         except socket.error as err: 
             print("socket creation failed with error %s" %(err))
             sys.exit()
         self.__recv_buf = bytes()
-        self.get_local_ip_addr()
 
 
     def server(self, port):
@@ -49,26 +121,55 @@ class Network():
         self.__listen_sock = self.__sock
         self.__sock = c_sock
         self.__connected = True
+        if self.__udp:
+            self.open_udp()
             
 
     def client(self, ip, port):
         self.__sock.connect((ip, port))
         self.__sock.send(self.__password.encode())
-        msg = self.__sock.recv(1024)
+        # The server may send its first message straight after the OK,
+        # so read exactly the OK and leave the rest for recv().
+        ok = "OK\n".encode()
+        msg = bytes()
+        while len(msg) < len(ok):
+            data = self.__sock.recv(len(ok) - len(msg))
+            if len(data) == 0:
+                break  # the server closed the connection: wrong password
+            msg = msg + data
         txt = msg.decode()
         if txt == "OK\n":
             self.__connected = True
+            if self.__udp:
+                self.open_udp()
         else:
             print("handshake failed\n")
 
+    def open_udp(self):
+        # Bind a UDP socket to the same local address as our TCP
+        # connection, and tell the other side (over TCP) which port it
+        # got.  We only start sending snapshots over UDP once we've
+        # heard the other side's port, so if the other side isn't in
+        # UDP mode everything carries on over TCP as before.
+        local_ip = self.__sock.getsockname()[0]
+        self.__udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__udp_sock.bind((local_ip, 0))
+        self.__udp_sock.setblocking(False)
+        port = self.__udp_sock.getsockname()[1]
+        self.send(["udpport", [port]])
+
+    def udp_port(self, msg):
+        if self.__udp_sock is None:
+            return  # we're not in UDP mode, so ignore it
+        ip = self.__sock.getpeername()[0]
+        self.__udp_peer = (ip, msg[0])
+
+    @property
+    def using_udp(self):
+        return self.__udp_peer is not None
+
     def get_local_ip_addr(self):
-        # ugly hacky way to find our IP address
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        # connect to nrg.cs.uc.ac.uk
-        s.connect(("128.16.66.166", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
+        return get_local_ip_addr()
 
     @property
     def connected(self):
@@ -79,15 +180,31 @@ class Network():
         lenbytes = len(send_bytes).to_bytes(2, byteorder='big')
         self.__sock.send(lenbytes + send_bytes)
 
+    def udp_send(self, send_bytes):
+        try:
+            self.__udp_sock.sendto(send_bytes, self.__udp_peer)
+        except OSError:
+            pass  # a lost snapshot doesn't matter, the next one replaces it
+
+    def send_snapshot(self, msg):
+        if self.__udp_peer is None:
+            self.send(msg)
+            return
+        self.__udp_send_seq += 1
+        self.udp_send(encode_snapshot(self.__udp_send_seq, msg))
+
     def send_maze(self, maze):
         msg = ["maze", maze]
         self.send(msg)
 
     def check_for_messages(self, now):
-        rd, wd, ed = select.select([self.__sock],[],[],0)
-        if not rd:
-            pass
-        else:
+        socks = [self.__sock]
+        if self.__udp_sock is not None:
+            socks.append(self.__udp_sock)
+        rd, wd, ed = select.select(socks,[],[],0)
+        if self.__udp_sock in rd:
+            self.check_for_snapshots()
+        if self.__sock in rd:
             try:
                 recv_bytes = self.__sock.recv(10000)
             except ConnectionResetError as e:
@@ -102,8 +219,40 @@ class Network():
                     recv_len = int.from_bytes(self.__recv_buf[0:2], byteorder='big')
                     
         
+    def check_for_snapshots(self):
+        # Drain all the datagrams that have arrived, keeping only the
+        # newest snapshot for each object, then apply those.
+        latest = {}
+        while True:
+            try:
+                recv_bytes, addr = self.__udp_sock.recvfrom(10000)
+            except (BlockingIOError, ConnectionRefusedError):
+                break
+            if addr != self.__udp_peer:
+                continue  # not from the player we're connected to
+            snapshot = decode_snapshot(recv_bytes)
+            if snapshot is None:
+                self.bad_snapshots += 1
+                continue
+            seq, msg = snapshot
+            if msg[0] == "ghost":
+                key = ("ghost", msg[1][0])
+            else:
+                key = msg[0]
+            if seq <= self.__udp_recv_seqs.get(key, 0):
+                # reordered or duplicated - we've already seen something newer
+                self.stale_snapshots += 1
+                continue
+            self.__udp_recv_seqs[key] = seq
+            latest[key] = msg
+        for msg in latest.values():
+            self.handle_msg(msg)
+
     def parse_msg(self, buf):
         msg = pickle.loads(buf)
+        self.handle_msg(msg)
+
+    def handle_msg(self, msg):
         if msg[0] == "maze":
             maze = msg[1]
             self.__controller.received_maze(maze)
@@ -137,6 +286,9 @@ class Network():
         elif msg[0] == "status":
             #A status update message
             self.status_update(msg[1])
+        elif msg[0] == "udpport":
+            #The remote player's UDP port for snapshots
+            self.udp_port(msg[1])
         else:
             print("Unknown message type: ", msg[0])
         
@@ -191,7 +343,7 @@ class Network():
         #print("send pacman_update")
         payload = [pos, dir, speed]
         msg = ["pacman", payload]
-        self.send(msg)
+        self.send_snapshot(msg)
         
     def ghost_update(self, msg):
         #print("received ghost_update")
@@ -206,7 +358,7 @@ class Network():
         #print("send ghost_update")
         payload = [ghostnum, pos, dirn, speed, mode]
         msg = ["ghost", payload]
-        self.send(msg)
+        self.send_snapshot(msg)
 
     def send_foreign_pacman_ate_ghost(self, ghostnum):
         payload = [ghostnum] # probably shouldn't be a list - inefficient
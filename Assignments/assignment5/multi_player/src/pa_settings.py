@@ -12,6 +12,14 @@ PAUSETIME = 0
 LOGTIME = False
 PARTIAL_UPDATE = False
 
+# Networking.  Position updates are sent NET_UPDATE_INTERVAL apart;
+# the receiver draws remote objects INTERP_DELAY behind real time so it
+# nearly always has an update either side to interpolate between, and
+# extrapolates for at most MAX_EXTRAPOLATION if updates stop arriving.
+NET_UPDATE_INTERVAL = 1/15
+INTERP_DELAY = 0.1
+MAX_EXTRAPOLATION = 0.25
+
 # debugging feature
 DONT_DIE = False
 
@@ -42,24 +42,33 @@ def get_tuple(x):
     
     
 class PacmanView(GameObjectView):
+    # Rotating images pixel by pixel is slow, so we keep the rotated
+    # images, indexed by the original ones, rather than redoing it every
+    # time a pacman is created.
+    rotated_pngs = {}
+
     def __init__(self, canvas, pacman, pngs, dying_pngs):
         GameObjectView.__init__(self, canvas)
         self.pacman = pacman
-        self.__pngs = [[],[],[],[]]
         self.__dying_pngs = dying_pngs
-        self.__pngs[Direction.LEFT] = pngs
         self.pointing_direction = Direction.LEFT
 
-        # rotate the image to create a PacMan facing each direction
-        prevlist = pngs
-        for dir in [Direction.UP, Direction.RIGHT, Direction.DOWN]:
-            pnglist = []
-            for image in prevlist:
-                newimage = self.__rotate_image(image, Direction.RIGHT)
-                pnglist.append(newimage)
-            self.__pngs[dir] = pnglist
-            prevlist = pnglist
-            
+        key = tuple(pngs)
+        if key not in PacmanView.rotated_pngs:
+            # rotate the image to create a PacMan facing each direction
+            rotated = [[],[],[],[]]
+            rotated[Direction.LEFT] = pngs
+            prevlist = pngs
+            for dir in [Direction.UP, Direction.RIGHT, Direction.DOWN]:
+                pnglist = []
+                for image in prevlist:
+                    newimage = self.__rotate_image(image, Direction.RIGHT)
+                    pnglist.append(newimage)
+                rotated[dir] = pnglist
+                prevlist = pnglist
+            PacmanView.rotated_pngs[key] = rotated
+        self.__pngs = PacmanView.rotated_pngs[key]
+
         self.__pngnum = 0
         self.__pngcounter = 0
         self.__last_change = 0
@@ -239,6 +248,7 @@ class View(Frame):
         self.__ghost_down_pngs = []
         for i in range(0, 4):
             self.__ghost_down_pngs.append(PhotoImage(file = './assets/ghost' + str(i) + 'down.gif').zoom(2))
+        self.__ghost_right_pngs = {}  # reflected on demand, indexed by ghostnum
         self.__ghost_scared_pngs = []
         self.__ghost_scared_pngs.append(PhotoImage(file = './assets/ghostscared.gif').zoom(2))
         self.__ghost_scared_pngs.append(PhotoImage(file = './assets/ghostscaredending.gif').zoom(2))
@@ -354,7 +364,9 @@ class View(Frame):
         pngs = []
         pngs.append(self.__ghost_up_pngs[ghostnum])
         pngs.append(self.__ghost_left_pngs[ghostnum])
-        pngs.append(self.__reflect_image(self.__ghost_left_pngs[ghostnum]))
+        if ghostnum not in self.__ghost_right_pngs:
+            self.__ghost_right_pngs[ghostnum] = self.__reflect_image(self.__ghost_left_pngs[ghostnum])
+        pngs.append(self.__ghost_right_pngs[ghostnum])
         pngs.append(self.__ghost_down_pngs[ghostnum])
         self.__ghost_views.append(GhostView(self.canvas, ghost_model, pngs, self.__ghost_eyes_pngs, self.__ghost_scared_pngs))
 
@@ -0,0 +1,155 @@
+# Pacman network test harness.  Measures how stale the foreign pacman's
+# position is on the receiving side when the network loses and delays
+# packets, with position updates sent over TCP or over UDP.
+#
+# Both players run in this one process over loopback, so no GUI and no
+# second machine is needed:
+#
+#   python3 udp_harness.py [-l <loss>] [-d <delay ms>] [-j <jitter ms>] [-t <seconds>]
+#
+# Loss is injected in the sender.  For TCP we can't really lose a
+# segment on loopback, so we model what TCP would do: the lost message
+# is retransmitted after RTO, and everything sent after it waits behind
+# it (head-of-line blocking).  For UDP a lost datagram is just gone, and
+# jitter can reorder datagrams.
+
+import random
+import threading
+import time
+from sys import argv, exit
+from getopt import getopt, GetoptError
+from pa_network import Network
+from pa_settings import Direction
+
+PORT = 9873
+FRAME_TIME = 1/60
+RTO = 0.2   # Linux minimum TCP retransmission timeout
+
+class FakeController():
+    ''' stands in for the real Controller, remembering the newest
+        position update the network has given us '''
+    def __init__(self):
+        self.latest_frame = -1
+
+    def foreign_pacman_update(self, pos, dir, speed):
+        # the harness sends the frame number as the x coordinate
+        self.latest_frame = max(self.latest_frame, pos[0])
+
+    def remote_ghost_update(self, ghostnum, pos, dir, speed, mode):
+        pass
+
+class ImpairedNetwork(Network):
+    ''' a Network whose outgoing messages are delayed and lost before
+        they're really sent.  Call pump() regularly to send the ones
+        that are due. '''
+    def __init__(self, controller, password, udp, loss, delay, jitter):
+        Network.__init__(self, controller, password, udp)
+        self.loss = loss
+        self.delay = delay
+        self.jitter = jitter
+        self.queue = []  # (due time, sequence, send function, arg)
+        self.count = 0
+        self.last_tcp_due = 0
+
+    def delayed(self, send_fun, arg, due):
+        self.count += 1
+        self.queue.append((due, self.count, send_fun, arg))
+
+    def send(self, msg):
+        now = time.time()
+        due = now + self.delay + random.uniform(0, self.jitter)
+        if random.random() < self.loss:
+            due += RTO
+        # TCP delivers in order, so nothing overtakes a retransmission
+        due = max(due, self.last_tcp_due)
+        self.last_tcp_due = due
+        self.delayed(Network.send, msg, due)
+
+    def udp_send(self, send_bytes):
+        if random.random() < self.loss:
+            return
+        due = time.time() + self.delay + random.uniform(0, self.jitter)
+        self.delayed(Network.udp_send, send_bytes, due)
+
+    def pump(self, now):
+        self.queue.sort()
+        while self.queue and self.queue[0][0] <= now:
+            due, count, send_fun, arg = self.queue.pop(0)
+            send_fun(self, arg)
+
+def connect_pair(udp, loss, delay, jitter):
+    password = "harness"
+    receiver_ctrl = FakeController()
+    receiver = Network(receiver_ctrl, password, udp)
+    sender = ImpairedNetwork(FakeController(), password, udp, loss, delay, jitter)
+    server_thread = threading.Thread(target=receiver.server, args=(PORT,))
+    server_thread.start()
+    time.sleep(0.1)
+    sender.client("127.0.0.1", PORT)
+    server_thread.join()
+    # wait for the UDP ports to be exchanged
+    if udp:
+        while not (sender.using_udp and receiver.using_udp):
+            now = time.time()
+            sender.pump(now)
+            sender.check_for_messages(now)
+            receiver.check_for_messages(now)
+            time.sleep(0.01)
+    return sender, receiver, receiver_ctrl
+
+def run(udp, loss, delay, jitter, duration):
+    sender, receiver, receiver_ctrl = connect_pair(udp, loss, delay, jitter)
+    staleness = []
+    frame = 0
+    start = time.time()
+    while time.time() - start < duration:
+        now = time.time()
+        sender.send_pacman_update((frame, 0), Direction.LEFT, 1)
+        for ghostnum in range(0, 4):
+            sender.send_ghost_update(ghostnum, (frame, 0), Direction.UP, 1, None)
+        sender.pump(now)
+        receiver.check_for_messages(now)
+        if receiver_ctrl.latest_frame >= 0:
+            staleness.append((frame - receiver_ctrl.latest_frame) * FRAME_TIME)
+        frame += 1
+        time.sleep(max(0, start + frame * FRAME_TIME - time.time()))
+    staleness.sort()
+    if udp:
+        name = "UDP"
+    else:
+        name = "TCP"
+    print("%s: mean staleness %.1fms, 95th percentile %.1fms, max %.1fms, %d stale snapshots dropped" %
+          (name, 1000 * sum(staleness) / len(staleness),
+           1000 * staleness[int(len(staleness) * 0.95)],
+           1000 * staleness[-1], receiver.stale_snapshots))
+
+def usage():
+    print("udp_harness.py [-l <loss>] [-d <delay ms>] [-j <jitter ms>] [-t <seconds>]")
+    exit(2)
+
+def main():
+    global PORT
+    try:
+        opts, args = getopt(argv[1:], "l:d:j:t:")
+    except GetoptError:
+        usage()
+    loss = 0.02
+    delay = 0.02
+    jitter = 0.01
+    duration = 10
+    for opt, arg in opts:
+        if opt == "-l":
+            loss = float(arg)
+        elif opt == "-d":
+            delay = float(arg) / 1000
+        elif opt == "-j":
+            jitter = float(arg) / 1000
+        elif opt == "-t":
+            duration = float(arg)
+    print("loss %.0f%%, delay %.0fms, jitter %.0fms" % (loss * 100, delay * 1000, jitter * 1000))
+    run(False, loss, delay, jitter, duration)
+    PORT += 1
+    run(True, loss, delay, jitter, duration)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#Benchmark of the computer's first move in Noughts and Crosses.
+#
+# For each of X's possible first moves (up to symmetry), we time
+# choosing O's reply, and count the moves tested, with:
+# - the old search, which clones the board for every move it tries
+#   (LegacyModel below, as oxo_model.py used to do it)
+# - the bitboard engine in oxo_engine.py, with nothing solved yet
+# - the same engine again, in the next game, remembering what it solved
+#
+#   python3 oxo_bench.py
+
+import time
+from copy import deepcopy
+from oxo_engine import Engine, WIN, DRAW, LOSE, square
+
+def other_player(player):
+    if player == "X":
+        return "O"
+    else:
+        return "X"
+
+class LegacyModel():
+    def __init__(self, rows):
+        self.rows = rows
+
+    def clone(self):
+        return LegacyModel(deepcopy(self.rows))
+
+    def test_for_win(self, player):
+        for line in [[(0,y), (1,y), (2,y)] for y in range(3)] + [[(x,0), (x,1), (x,2)] for x in range(3)] \
+                    + [[(0,0), (1,1), (2,2)], [(0,2), (1,1), (2,0)]]:
+            if all([self.rows[y][x] == player for (x,y) in line]):
+                return line
+        return None
+
+    def all_played(self):
+        return all([square != "." for row in self.rows for square in row])
+
+    def test_move(self, player, x, y):
+        moves_tested = 1
+        self.rows[y][x] = player
+        if self.test_for_win(player) is not None:
+            if player == "X":
+                return LOSE, moves_tested
+            return WIN, moves_tested
+        if self.all_played():
+            return DRAW, moves_tested
+        scores = [0, 0, 0]
+        for y in range(3):
+            for x in range(3):
+                if self.rows[y][x] == ".":
+                    result, count = self.clone().test_move(other_player(player), x, y)
+                    scores[result] += 1
+                    moves_tested += count
+        if player == "O":
+            if scores[LOSE] > 0:
+                return LOSE, moves_tested
+            elif scores[DRAW] > 0:
+                return DRAW, moves_tested
+            return WIN, moves_tested
+        if scores[WIN] > 0:
+            return WIN, moves_tested
+        if scores[DRAW] > 0:
+            return DRAW, moves_tested
+        return LOSE, moves_tested
+
+def legacy_first_move(x, y):
+    rows = [[".", ".", "."], [".", ".", "."], [".", ".", "."]]
+    rows[y][x] = "X"
+    moves_tested = 0
+    for oy in range(3):
+        for ox in range(3):
+            if rows[oy][ox] == ".":
+                result, count = LegacyModel(deepcopy(rows)).test_move("O", ox, oy)
+                moves_tested += count
+    return moves_tested
+
+def engine_first_move(engine, x, y):
+    x_mask = 1 << square(x, y)
+    moves_tested = 0
+    for i in range(9):
+        if not x_mask & (1 << i):
+            result, count = engine.test_move(x_mask, 0, "O", i)
+            moves_tested += count
+    return moves_tested
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, 1000 * (time.perf_counter() - start)
+
+def main():
+    engine = Engine()
+    print("{:<8} {:>16} {:>10} {:>16} {:>10} {:>16} {:>10}".format(
+        "X plays", "legacy tested", "ms", "engine tested", "ms", "next game", "ms"))
+    for (name, x, y) in [("corner", 0, 0), ("edge", 1, 0), ("centre", 1, 1)]:
+        (legacy_tested, legacy_ms) = timed(legacy_first_move, x, y)
+        (engine_tested, engine_ms) = timed(engine_first_move, engine, x, y)
+        (again_tested, again_ms) = timed(engine_first_move, engine, x, y)
+        print("{:<8} {:>16} {:>10.1f} {:>16} {:>10.2f} {:>16} {:>10.3f}".format(
+            name, legacy_tested, legacy_ms, engine_tested, engine_ms, again_tested, again_ms))
+    print("positions solved: {}".format(engine.positions_solved()))
+
+if __name__ == "__main__":
+    main()
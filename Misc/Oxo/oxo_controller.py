@@ -2,6 +2,7 @@
 from tkinter import *
 from oxo_view import View
 from oxo_model import Model
+from oxo_settings import BOARD_WIDTH, BOARD_HEIGHT, GRAVITY
 
 class Controller():
     def __init__(self):
@@ -15,9 +16,14 @@ class Controller():
     def key(self, event):
         if event.char >= '1' and event.char <= '9':
             pos = ord(event.char) - ord('1')
-            x = pos % 3
-            y = pos // 3
-            self.model.x_plays(x, y)
+            if GRAVITY:
+                # keys choose the column to drop a piece in
+                if pos < BOARD_WIDTH:
+                    self.model.x_plays(pos, 0)
+            elif pos < BOARD_WIDTH * BOARD_HEIGHT <= 9:
+                # keys number the squares row by row, if there are few enough;
+                # otherwise click on the square
+                self.model.x_plays(pos % BOARD_WIDTH, pos // BOARD_WIDTH)
         elif event.char == 'q':
             self.play_game = False
         elif event.char == 'p':
@@ -0,0 +1,145 @@
+#Search engine for Noughts and Crosses on bitboards.
+#
+# The board is held as two 9-bit masks, one for X and one for O, where
+# square (x,y) is bit y*3 + x.  A line of three is then just a mask to
+# compare against, and a position can be turned into any of its 8
+# symmetric versions (rotations and reflections) with table lookups.
+# The engine remembers every position it has solved, under the smallest
+# of its symmetric versions, so each distinct position is only solved
+# once, however many games are played.
+
+import pickle
+
+WIN = 0
+DRAW = 1
+LOSE = 2
+
+FULL_BOARD = 0b111111111
+
+# the 8 lines of three, as (mask, squares)
+WIN_LINES = []
+for y in range(3):
+    WIN_LINES.append([(0,y), (1,y), (2,y)])
+for x in range(3):
+    WIN_LINES.append([(x,0), (x,1), (x,2)])
+WIN_LINES.append([(0,0), (1,1), (2,2)])
+WIN_LINES.append([(0,2), (1,1), (2,0)])
+WIN_MASKS = [sum([1 << (y*3 + x) for (x,y) in line]) for line in WIN_LINES]
+
+def square(x, y):
+    return y*3 + x
+
+def square_coords(square):
+    return square % 3, square // 3
+
+def is_win(mask):
+    for win_mask in WIN_MASKS:
+        if mask & win_mask == win_mask:
+            return True
+    return False
+
+# The 8 symmetries of the board, each as a function of (x,y) ...
+SYMMETRIES = [
+    lambda x, y: (x, y),
+    lambda x, y: (2-y, x),        # rotate 90 degrees
+    lambda x, y: (2-x, 2-y),      # rotate 180 degrees
+    lambda x, y: (y, 2-x),        # rotate 270 degrees
+    lambda x, y: (2-x, y),        # reflect left to right
+    lambda x, y: (x, 2-y),        # reflect top to bottom
+    lambda x, y: (y, x),          # reflect along the main diagonal
+    lambda x, y: (2-y, 2-x),      # reflect along the other diagonal
+]
+
+# ... and as a table mapping every 9-bit mask to its symmetric mask
+def _symmetry_table(symmetry):
+    destination = [square(*symmetry(*square_coords(i))) for i in range(9)]
+    table = []
+    for mask in range(FULL_BOARD + 1):
+        mapped = 0
+        for i in range(9):
+            if mask & (1 << i):
+                mapped |= 1 << destination[i]
+        table.append(mapped)
+    return table
+
+SYMMETRY_TABLES = [_symmetry_table(symmetry) for symmetry in SYMMETRIES]
+
+def canonical(x_mask, o_mask):
+    ''' the key shared by a position and all its symmetric versions '''
+    return min([(table[x_mask] << 9) | table[o_mask] for table in SYMMETRY_TABLES])
+
+
+class Engine():
+    def __init__(self):
+        # canonical position (after a move) -> result for O with best play
+        self.solved = dict()
+
+    # test_move returns whether "player", playing at square, will result
+    # in a WIN, LOSE or DRAW for O (the computer), if both computer and
+    # human play their best move from then on, and how many moves were
+    # tested to find out.  Positions solved before, in this game or in
+    # an earlier one, only count as one move.
+    def test_move(self, x_mask, o_mask, player, square):
+        if player == "X":
+            return self._solve(x_mask | (1 << square), o_mask, "X")
+        return self._solve(x_mask, o_mask | (1 << square), "O")
+
+    # _solve works out the result for O of the position given by the
+    # masks, in which "player" has just moved.
+    def _solve(self, x_mask, o_mask, player):
+        key = canonical(x_mask, o_mask)
+        result = self.solved.get(key)
+        if result is not None:
+            return result, 1
+
+        moves_tested = 1
+        if player == "X" and is_win(x_mask):
+            result = LOSE
+        elif player == "O" and is_win(o_mask):
+            result = WIN
+        elif x_mask | o_mask == FULL_BOARD:
+            result = DRAW
+        else:
+            # try out the other player's moves, stopping as soon as one
+            # is as good as it gets for them
+            if player == "O":
+                best, worst = LOSE, WIN
+            else:
+                best, worst = WIN, LOSE
+            result = worst
+            empty = FULL_BOARD & ~(x_mask | o_mask)
+            for i in range(9):
+                if empty & (1 << i):
+                    if player == "O":
+                        next_result, count = self._solve(x_mask | (1 << i), o_mask, "X")
+                        result = max(result, next_result)
+                    else:
+                        next_result, count = self._solve(x_mask, o_mask | (1 << i), "O")
+                        result = min(result, next_result)
+                    moves_tested += count
+                    if result == best:
+                        break
+
+        self.solved[key] = result
+        return result, moves_tested
+
+    def positions_solved(self):
+        return len(self.solved)
+
+    # the solved positions can be kept in a file, so they survive
+    # from one run of the game to the next
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            pickle.dump(self.solved, f)
+
+    def load(self, filename):
+        try:
+            with open(filename, "rb") as f:
+                self.solved.update(pickle.load(f))
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # no file yet, or a broken one: start from scratch
+            pass
+
+
+# the engine is shared by all games, so it keeps what it has solved
+engine = Engine()
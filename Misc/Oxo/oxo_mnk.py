@@ -0,0 +1,257 @@
+#m,n,k-games: Noughts and Crosses generalised to boards m squares wide
+#and n high, won by getting k in a row (e.g., 4x4 with 4 in a row, 7x6
+#with gravity like Connect Four, or gomoku on 15x15 with 5 in a row).
+#
+# These boards are too big to search to the end, so the computer uses
+# alpha-beta search, deepening one move at a time until its time is up.
+# The board keeps a count of each player's pieces in every line of k
+# squares (a "window"), updated around each move, which gives both the
+# heuristic score of a position and whether the last move won.
+
+import random, time
+
+EMPTY = "."
+DIRECTIONS = [(1,0), (0,1), (1,1), (1,-1)]
+WIN_SCORE = 1000000
+NEIGHBOURHOOD = 2          # on big boards, only try moves this close to a piece
+BIG_BOARD = 49             # boards with more squares than this are big
+TIME_CHECK_NODES = 256     # look at the clock every this many nodes
+
+def other_player(player):
+    if player == "X":
+        return "O"
+    else:
+        return "X"
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Board():
+    def __init__(self, width, height, k, gravity=False):
+        self.width = width
+        self.height = height
+        self.k = k
+        self.gravity = gravity
+        size = width * height
+        self.squares = [EMPTY] * size
+        self.moves_played = []
+        self.winning_window = None
+        # with gravity, the lowest empty square (y) in each column
+        self.column_tops = [height - 1] * width
+        self._init_windows()
+        # heuristic score from X's point of view, and counts of each
+        # player's pieces in each window
+        self.score = 0
+        self.x_counts = [0] * len(self.windows)
+        self.o_counts = [0] * len(self.windows)
+        # a window with c of one player's pieces and none of the other's
+        # is worth 4**(c-1) to that player
+        self.window_values = [0] + [4 ** (c - 1) for c in range(1, k + 1)]
+        # on big boards, how many pieces are near each square
+        self.restrict_moves = size > BIG_BOARD
+        self.neighbours = [0] * size
+        self.near = [self._squares_near(i) for i in range(size)]
+        # Zobrist hashing: the position's hash is the xor of a random
+        # number for each (square, player) played
+        rand = random.Random(0)
+        self.zobrist = {"X": [rand.getrandbits(64) for i in range(size)],
+                        "O": [rand.getrandbits(64) for i in range(size)]}
+        self.hash = 0
+
+    def _init_windows(self):
+        self.windows = []
+        self.windows_of = [[] for i in range(self.width * self.height)]
+        for y in range(self.height):
+            for x in range(self.width):
+                for (dx, dy) in DIRECTIONS:
+                    end_x = x + dx * (self.k - 1)
+                    end_y = y + dy * (self.k - 1)
+                    if 0 <= end_x < self.width and 0 <= end_y < self.height:
+                        window = tuple([(y + dy*i) * self.width + x + dx*i for i in range(self.k)])
+                        for square in window:
+                            self.windows_of[square].append(len(self.windows))
+                        self.windows.append(window)
+
+    def _squares_near(self, square):
+        (x, y) = self.coords(square)
+        near = []
+        for ny in range(max(0, y - NEIGHBOURHOOD), min(self.height, y + NEIGHBOURHOOD + 1)):
+            for nx in range(max(0, x - NEIGHBOURHOOD), min(self.width, x + NEIGHBOURHOOD + 1)):
+                if (nx, ny) != (x, y):
+                    near.append(ny * self.width + nx)
+        return near
+
+    def square(self, x, y):
+        return y * self.width + x
+
+    def coords(self, square):
+        return square % self.width, square // self.width
+
+    def _window_value(self, window):
+        x_count = self.x_counts[window]
+        o_count = self.o_counts[window]
+        if x_count > 0 and o_count > 0:
+            return 0
+        return self.window_values[x_count] - self.window_values[o_count]
+
+    # play puts player's piece on square, and returns True if that won
+    # the game.  Only the windows through the square are looked at.
+    def play(self, square, player):
+        self.squares[square] = player
+        self.moves_played.append(square)
+        self.hash ^= self.zobrist[player][square]
+        if self.gravity:
+            (x, y) = self.coords(square)
+            self.column_tops[x] = y - 1
+        for near in self.near[square]:
+            self.neighbours[near] += 1
+        counts = self.x_counts if player == "X" else self.o_counts
+        won = False
+        for window in self.windows_of[square]:
+            before = self._window_value(window)
+            counts[window] += 1
+            self.score += self._window_value(window) - before
+            if counts[window] == self.k:
+                self.winning_window = self.windows[window]
+                won = True
+        return won
+
+    def undo(self):
+        square = self.moves_played.pop()
+        player = self.squares[square]
+        self.squares[square] = EMPTY
+        self.hash ^= self.zobrist[player][square]
+        self.winning_window = None
+        if self.gravity:
+            (x, y) = self.coords(square)
+            self.column_tops[x] = y
+        for near in self.near[square]:
+            self.neighbours[near] -= 1
+        counts = self.x_counts if player == "X" else self.o_counts
+        for window in self.windows_of[square]:
+            before = self._window_value(window)
+            counts[window] -= 1
+            self.score += self._window_value(window) - before
+
+    def drop_square(self, x):
+        ''' with gravity, the square a piece played in column x lands on, or None if the column is full '''
+        if self.column_tops[x] < 0:
+            return None
+        return self.square(x, self.column_tops[x])
+
+    def legal_moves(self):
+        if self.gravity:
+            return [self.square(x, self.column_tops[x]) for x in range(self.width) if self.column_tops[x] >= 0]
+        if self.restrict_moves and len(self.moves_played) > 0:
+            return [i for i in range(len(self.squares)) if self.squares[i] == EMPTY and self.neighbours[i] > 0]
+        return [i for i in range(len(self.squares)) if self.squares[i] == EMPTY]
+
+    def is_full(self):
+        return len(self.moves_played) == len(self.squares)
+
+    def winning_squares(self):
+        if self.winning_window is None:
+            return None
+        return [self.coords(square) for square in self.winning_window]
+
+
+class Search():
+    def __init__(self, board, time_budget, progress=None):
+        self.board = board
+        self.time_budget = time_budget
+        # progress(depth, square, value, nodes) is called after each depth
+        self.progress = progress
+        # position hash -> (depth, value, best move)
+        self.table = dict()
+        self.history = [0] * len(board.squares)
+        self.nodes = 0
+        self.depth_reached = 0
+        # squares near the middle are tried first, everything else being equal
+        (cx, cy) = ((board.width - 1) / 2, (board.height - 1) / 2)
+        self.centrality = [-abs(x - cx) - abs(y - cy) for (x, y) in [board.coords(i) for i in range(len(board.squares))]]
+
+    # choose_move returns the best square for player to play, and its
+    # value (from player's point of view), searching deeper and deeper
+    # until the time budget runs out or the result is certain.
+    def choose_move(self, player):
+        self.deadline = time.perf_counter() + self.time_budget
+        self.nodes = 0
+        moves = self.board.legal_moves()
+        best_move, best_value = moves[0], 0
+        max_depth = len(self.board.squares) - len(self.board.moves_played)
+        for depth in range(1, max_depth + 1):
+            try:
+                (value, move) = self._search_root(player, depth, moves)
+            except SearchTimeout:
+                break
+            (best_move, best_value) = (move, value)
+            self.depth_reached = depth
+            if self.progress is not None:
+                self.progress(depth, best_move, best_value, self.nodes)
+            if abs(best_value) >= WIN_SCORE - len(self.board.squares):
+                break    # someone can force a win
+        return best_move, best_value
+
+    def _search_root(self, player, depth, moves):
+        alpha = -WIN_SCORE - 1
+        best_move = None
+        for move in self._ordered(moves, self.table.get(self.board.hash)):
+            value = self._value_of_move(move, player, depth, alpha, WIN_SCORE + 1, 1)
+            if best_move is None or value > alpha:
+                (alpha, best_move) = (value, move)
+        self.table[self.board.hash] = (depth, alpha, best_move)
+        return alpha, best_move
+
+    def _value_of_move(self, move, player, depth, alpha, beta, ply):
+        board = self.board
+        try:
+            if board.play(move, player):
+                value = WIN_SCORE - ply
+            elif board.is_full():
+                value = 0
+            else:
+                value = - self._negamax(other_player(player), depth - 1, - beta, - alpha, ply + 1)
+        finally:
+            # leave the board as it was, even if time ran out
+            board.undo()
+        return value
+
+    def _negamax(self, player, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_NODES == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        board = self.board
+        if depth == 0:
+            return board.score if player == "X" else - board.score
+        entry = self.table.get(board.hash)
+        if entry is not None and entry[0] >= depth and abs(entry[1]) < WIN_SCORE - len(board.squares):
+            # searched before, at least as deep (only exact values are kept)
+            return entry[1]
+        best_value = -WIN_SCORE - 1
+        best_move = None
+        original_alpha = alpha
+        for move in self._ordered(board.legal_moves(), entry):
+            value = self._value_of_move(move, player, depth, alpha, beta, ply)
+            if value > best_value:
+                (best_value, best_move) = (value, move)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                # the opponent won't let us get here: remember the move that showed it
+                self.history[move] += depth * depth
+                break
+        if original_alpha < best_value < beta:
+            self.table[board.hash] = (depth, best_value, best_move)
+        elif entry is None:
+            # not exact, but its best move is still worth trying first next time
+            self.table[board.hash] = (-1, 0, best_move)
+        return best_value
+
+    def _ordered(self, moves, entry):
+        history = self.history
+        centrality = self.centrality
+        moves = sorted(moves, key=lambda move: (history[move], centrality[move]), reverse=True)
+        if entry is not None and entry[2] in moves:
+            moves.remove(entry[2])
+            moves.insert(0, entry[2])
+        return moves
@@ -0,0 +1,61 @@
+#Benchmark of the m,n,k-game search in oxo_mnk.py.
+#
+# For several board sizes, we give the search a time budget to choose
+# a move from a short opening, and report how deep it got, how many
+# positions (nodes) it searched, and the nodes searched per second.
+# We also time playing and undoing moves on its own, which is where
+# the search spends much of its time, as every move updates the
+# counts of pieces in each line of k squares through it.
+#
+#   python3 oxo_mnk_bench.py [-t seconds]
+
+import argparse, time
+from oxo_mnk import Board, Search, other_player
+
+# (name, width, height, k, gravity, opening moves as (x,y), X first)
+BOARDS = [
+    ("3x3, 3 in a row", 3, 3, 3, False, [(1,1)]),
+    ("4x4, 4 in a row", 4, 4, 4, False, [(1,1), (2,2)]),
+    ("connect four 7x6", 7, 6, 4, True, [(3,5), (3,4), (2,5)]),
+    ("gomoku 15x15", 15, 15, 5, False, [(7,7), (8,8), (8,6)]),
+]
+
+def opening(width, height, k, gravity, moves):
+    board = Board(width, height, k, gravity)
+    player = "X"
+    for (x, y) in moves:
+        board.play(board.square(x, y), player)
+        player = other_player(player)
+    return board, player
+
+def time_play_undo(board, repeats):
+    ''' microseconds to play and undo each legal move once '''
+    moves = board.legal_moves()
+    start = time.perf_counter()
+    for repeat in range(repeats):
+        for move in moves:
+            board.play(move, "X")
+            board.undo()
+    return 1e6 * (time.perf_counter() - start) / (repeats * len(moves))
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Times the m,n,k-game search at several board sizes.')
+    parser.add_argument('-t', '--time', type=float, default=2.0, help='Seconds to search each position for')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    print("{:<18} {:>6} {:>6} {:>10} {:>10} {:>10} {:>10} {:>14}".format(
+        "board", "moves", "depth", "nodes", "seconds", "nodes/s", "move", "play+undo us"))
+    for (name, width, height, k, gravity, moves) in BOARDS:
+        (board, player) = opening(width, height, k, gravity, moves)
+        search = Search(board, args.time)
+        start = time.perf_counter()
+        (move, value) = search.choose_move(player)
+        seconds = time.perf_counter() - start
+        print("{:<18} {:>6} {:>6} {:>10} {:>10.2f} {:>10.0f} {:>10} {:>14.2f}".format(
+            name, len(board.legal_moves()), search.depth_reached, search.nodes, seconds,
+            search.nodes / seconds, str(board.coords(move)), time_play_undo(board, 200)))
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 #Simple Noughts and Crosses Game, Mark Handley, 2018
 from copy import deepcopy
 from enum import IntEnum
+from oxo_engine import WIN, DRAW, LOSE, engine, square
+from oxo_mnk import Board, Search, WIN_SCORE
+from oxo_settings import SOLVED_POSITIONS_FILE, BOARD_WIDTH, BOARD_HEIGHT, WIN_LENGTH, GRAVITY, SEARCH_TIME
 
-WIN = 0
-DRAW = 1
-LOSE = 2
 def result_str(result):
     strs = ("WIN", "DRAW", "LOSE")
     return strs[result]
@@ -19,15 +19,26 @@ def other_player(player):
 # Note, computer plays O, human plays X
 
 class Model():
-    def __init__(self, controller):
+    def __init__(self, controller, width=BOARD_WIDTH, height=BOARD_HEIGHT, k=WIN_LENGTH, gravity=GRAVITY):
         self.controller = controller
+        self.width = width
+        self.height = height
+        self.k = k
+        self.gravity = gravity
+        # the classic game is solved exactly by oxo_engine.py; other
+        # boards are searched by oxo_mnk.py, as far as time allows
+        self.classic = (width, height, k, gravity) == (3, 3, 3, False)
+        # an empty board, just for its lines of k squares ("windows")
+        self.lines = Board(width, height, k)
+        if self.classic and SOLVED_POSITIONS_FILE is not None:
+            engine.load(SOLVED_POSITIONS_FILE)
         self.init_game()
 
     def init_game(self):
         # We'll hold the board as a list of lists of strings, one for each square.
         # A '.' indicates no-one played this square.  Otherwise a
         # square should be "X" or"O"
-        self.rows = [[".", ".", "."], [".", ".", "."], [".", ".", "."]]
+        self.rows = [["."] * self.width for y in range(self.height)]
         self.players_move = True
         self.game_over = False
 
@@ -44,7 +55,7 @@ class Model():
         self.controller.clear_board()
 
     def clone(self):
-        model = Model(self.controller)
+        model = Model(self.controller, self.width, self.height, self.k, self.gravity)
         model.rows = deepcopy(self.rows)
         return model
 
@@ -58,6 +69,12 @@ class Model():
             # computer is still thinking, so don't let human play...
             return
 
+        if self.gravity:
+            # the piece drops to the lowest empty square of column x
+            y = self.drop_row(x)
+            if y is None:
+                return
+
         if self.rows[y][x] != ".":
             # square has already been played
             return
@@ -67,7 +84,7 @@ class Model():
         self.players_move = False
 
         # did the human win?
-        winning_squares = self.test_for_win("X")
+        winning_squares = self.test_for_win("X", (x, y))
         if winning_squares is not None:
             self.game_over = True
             self.controller.win(winning_squares)
@@ -79,15 +96,19 @@ class Model():
             return
 
         # OK, choose my best move
-        self.choose_move()
+        move = self.choose_move()
 
         # Did I win?
-        winning_squares = self.test_for_win("O")
+        winning_squares = self.test_for_win("O", move)
         if winning_squares is not None:
             self.game_over = True
             self.controller.win(winning_squares)
             return
 
+        if self.all_played():
+            self.game_over = True
+            return
+
         # Let the human play again
         self.players_move = True
         
@@ -96,45 +117,30 @@ class Model():
     # parameter has just played their move.  It checks if the move was
     # a winning move.  It returns None if the move was not a winning
     # move, and returns a list of (x,y) coordinates of the winning
-    # squares if the move was a winning move.
-    def test_for_win(self, player):
-        # First, test the rows and columns for a win.  We just need to
-        # count the number of positions played by the player in each
-        # row and in each column. If that total is three, it's a
-        # winning move.
-        colcounts = [0, 0, 0]  # count for each column - we'll check all these at once.
-        for y in range(3):
-            rowcount = 0  # count for the current row.
-            for x in range(3):
-                if self.rows[y][x] == player:
-                    rowcount += 1;
-                    colcounts[x] += 1
-                    if colcounts[x] == 3:
-                        # this is a winning column.
-                        return [(x,0), (x,1), (x,2)]
-            if rowcount == 3:
-                # this is a winning row.
-                return [(0,y), (1,y), (2,y)]
-
-        #Ok, didn't win horizontally or vertically
-        #Now, check diagonals
-        d1_count = 0
-        d2_count = 0
-        for i in range(3):
-            if self.rows[i][i] == player:
-                d1_count += 1
-            if self.rows[2-i][i] == player:
-                d2_count += 1
-        if d1_count == 3:
-            # the top left to bottom right diagonal is a win
-            return [(0,0), (1,1), (2,2)]
-        if d2_count == 3:
-            # the bottom left to top right diagonal is a win
-            return [(0,2), (1,1), (2,0)]
+    # squares if the move was a winning move.  If we know which square
+    # was just played, only the lines through it need checking.
+    def test_for_win(self, player, last_move=None):
+        lines = self.lines
+        if last_move is None:
+            windows = range(len(lines.windows))
+        else:
+            windows = lines.windows_of[lines.square(*last_move)]
+        for window in windows:
+            squares = [lines.coords(i) for i in lines.windows[window]]
+            if all([self.rows[y][x] == player for (x,y) in squares]):
+                return squares
 
         #No, player didn't win
         return None
 
+    # drop_row returns the row a piece played in column x would drop
+    # to, or None if the column is full.
+    def drop_row(self, x):
+        for y in range(self.height - 1, -1, -1):
+            if self.rows[y][x] == ".":
+                return y
+        return None
+
     # all_played returns True if all the squares have been played
     def all_played(self):
         for row in self.rows:
@@ -144,95 +150,41 @@ class Model():
         return True
 
 
+    # masks returns the board as two 9-bit masks, one for the squares
+    # X played and one for the squares O played (see oxo_engine.py).
+    # Only for the classic 3x3 board.
+    def masks(self):
+        x_mask = 0
+        o_mask = 0
+        for y in range(3):
+            for x in range(3):
+                if self.rows[y][x] == "X":
+                    x_mask |= 1 << square(x, y)
+                elif self.rows[y][x] == "O":
+                    o_mask |= 1 << square(x, y)
+        return x_mask, o_mask
+
     # test_move checks whether "player", playing at position (x,y)
     # will result in a win, lose or draw, if both computer and human
-    # play their best move.  "trace" keeps track of moves played so far,
-    # but is only for debugging.
+    # play their best move.  The search is done by the engine in
+    # oxo_engine.py, which remembers the positions it has solved.
+    # "trace" is only kept for compatibility.
     def test_move(self, player, x, y, trace):
-        #uncomment the next line to print out all the moves explored
-        #print(trace, player)
-
-        # play the move
-        moves_tested = 1
+        x_mask, o_mask = self.masks()
         self.rows[y][x] = player
+        return engine.test_move(x_mask, o_mask, player, square(x, y))
 
-        # First, has someone won?
-        winning_squares = self.test_for_win(player)
-        if winning_squares is not None:
-            # someone won.
-            if player == "X":
-                # human won, we lose
-                return LOSE, moves_tested
-            else:
-                # we won
-                return WIN, moves_tested
-
-        # If no-one has won, have all the positions been played?
-        if self.all_played():
-            return DRAW, moves_tested
-
-        # OK, not a win or a draw.  Carry on testing moves.
-        scores = [0, 0, 0] #number of positions that WIN, LOSE, or
-                           #DRAW respectively from this starting
-                           #position
-        
-        # try out playing in all squares that don't alredy have a piece
-        for y in range(3):
-            for x in range(3):
-                if self.rows[y][x] == ".": # this square is empty, so try it
-                    
-                    # we clone the model state, so we can test
-                    # possible moves without messing up the current
-                    # version of the model.  We'll use this cloned
-                    # version to try moves.
-                    model = self.clone()
-
-                    # keep track of how we got here for debugging
-                    newtrace = trace + " (" + str(x) + "," + str(y) + ")"
-
-                    # see how this move does.
-                    result, count = model.test_move(other_player(player), x, y, newtrace)
-
-                    # record the outcome
-                    scores[result] += 1
-                    moves_tested += count
-
-        # If it's our (i.e., the computer's) turn, and any of the next
-        # moves result in a lose, then playing this position is a
-        # LOSE.  If not, but any next move results in a draw, then the
-        # human can still force a draw, so playing this move is rated
-        # a DRAW.  Otherwise it's rate a WIN.
-        if player == "O":
-            if scores[LOSE] > 0:
-                return LOSE, moves_tested
-            elif scores[DRAW] > 0:
-                return DRAW, moves_tested
-            else:
-                assert(scores[WIN] > 0)
-                return WIN, moves_tested
-
-        # If it's our opponents move, but any of the next moves result
-        # in us winning, then this is a WIN for us.
-        assert(player == "X")
-        if scores[WIN] > 0:
-            return WIN, moves_tested
-        if scores[DRAW] > 0:
-            return DRAW, moves_tested
-        else:
-            assert(scores[LOSE] > 0)
-            return LOSE, moves_tested
-        
-        
-
+    # choose_move plays the computer's move, and returns it as (x,y)
     def choose_move(self):
+        if not self.classic:
+            return self.search_move()
         best = None
         moves_tested = 0
+        x_mask, o_mask = self.masks()
         for y in range(3):
             for x in range(3):
                 if self.rows[y][x] == ".":
-                    model = self.clone()
-                    trace = "(" + str(x) + "," + str(y) + ")"
-                    result, count = model.test_move("O", x, y, trace)
+                    result, count = engine.test_move(x_mask, o_mask, "O", square(x, y))
                     moves_tested += count
                     print("Position ", x, y, " predict: ", result, ", moves tested:", moves_tested)
                     msg1 = result_str(result)
@@ -244,7 +196,8 @@ class Model():
                         print("Computer plays ", x, y)
                         self.display_board()
                         self.controller.display_move("O", x, y)
-                        return
+                        self.save_solved_positions()
+                        return x, y
                     elif result == DRAW:
                         # our best result looks like a draw
                         best = x,y
@@ -254,3 +207,45 @@ class Model():
             print("Computer plays ", x, y, " predicts draw, moves tested:", moves_tested)
             self.display_board()
             self.controller.display_move("O", x, y)
+        self.save_solved_positions()
+        return best
+
+    def save_solved_positions(self):
+        if SOLVED_POSITIONS_FILE is not None:
+            engine.save(SOLVED_POSITIONS_FILE)
+
+    # board returns the position as a Board from oxo_mnk.py.  X and O
+    # may have played in any order, so only pieces that are part of
+    # the position are placed, without checking for wins.
+    def board(self):
+        board = Board(self.width, self.height, self.k, self.gravity)
+        # with gravity, pieces must be placed from the bottom up
+        for y in range(self.height - 1, -1, -1):
+            for x in range(self.width):
+                if self.rows[y][x] != ".":
+                    board.play(board.square(x, y), self.rows[y][x])
+        return board
+
+    # search_move chooses the computer's move on boards too big to
+    # search to the end, using alpha-beta search that goes one move
+    # deeper each time round until SEARCH_TIME is up.  After each
+    # depth, the best move so far is shown as the computer thinks.
+    def search_move(self):
+        board = self.board()
+        def progress(depth, move, value, nodes):
+            x, y = board.coords(move)
+            print("Depth ", depth, " best ", x, y, " value: ", value, ", nodes searched:", nodes)
+            self.controller.thinking("Depth " + str(depth), "Tested " + str(nodes), x, y)
+        search = Search(board, SEARCH_TIME, progress)
+        move, value = search.choose_move("O")
+        x, y = board.coords(move)
+        self.rows[y][x] = "O"
+        if value >= WIN_SCORE - len(board.squares):
+            print("Computer plays ", x, y, " predicts win, nodes searched:", search.nodes)
+        elif value <= len(board.squares) - WIN_SCORE:
+            print("Computer plays ", x, y, " predicts loss, nodes searched:", search.nodes)
+        else:
+            print("Computer plays ", x, y, " depth:", search.depth_reached, ", nodes searched:", search.nodes)
+        self.display_board()
+        self.controller.display_move("O", x, y)
+        return x, y
@@ -0,0 +1,119 @@
+import pytest
+import mock
+from oxo_engine import *
+from oxo_model import Model
+from oxo_mnk import Board, Search, WIN_SCORE
+
+def minimax(x_mask, o_mask, player):
+    # plain search, without remembering anything, for player having just moved
+    if is_win(x_mask):
+        return LOSE
+    if is_win(o_mask):
+        return WIN
+    if x_mask | o_mask == FULL_BOARD:
+        return DRAW
+    results = []
+    for i in range(9):
+        if not (x_mask | o_mask) & (1 << i):
+            if player == "O":
+                results.append(minimax(x_mask | (1 << i), o_mask, "X"))
+            else:
+                results.append(minimax(x_mask, o_mask | (1 << i), "O"))
+    if player == "O":
+        return max(results)
+    return min(results)
+
+class TestSuiteForEngine:
+    def test_symmetric_positions_share_a_key(self):
+        # X in a corner and O in the centre, in each of the four corners
+        keys = set([canonical(1 << square(x, y), 1 << square(1, 1)) for (x, y) in [(0,0), (2,0), (0,2), (2,2)]])
+        assert len(keys) == 1
+        assert canonical(1 << square(0, 0), 0) != canonical(1 << square(1, 0), 0)
+
+    def test_engine_agrees_with_minimax(self):
+        engine = Engine()
+        for first in range(9):
+            for second in range(9):
+                if second == first:
+                    continue
+                x_mask = 1 << first
+                o_mask = 1 << second
+                for i in range(9):
+                    if not (x_mask | o_mask) & (1 << i):
+                        result, count = engine.test_move(x_mask, o_mask, "X", i)
+                        assert result == minimax(x_mask | (1 << i), o_mask, "X")
+
+    def test_solved_positions_are_remembered(self, tmp_path):
+        engine = Engine()
+        first, first_count = engine.test_move(1 << square(0, 0), 0, "O", square(1, 1))
+        again, again_count = engine.test_move(1 << square(0, 0), 0, "O", square(1, 1))
+        assert first == again == DRAW and again_count == 1 and first_count > 1
+        filename = str(tmp_path / "solved.pickle")
+        engine.save(filename)
+        loaded = Engine()
+        loaded.load(filename)
+        assert loaded.test_move(1 << square(2, 2), 0, "O", square(1, 1)) == (DRAW, 1)
+
+class TestSuiteForModel:
+    def setup_method(self):
+        self.model = Model(mock.MagicMock())
+
+    def test_computer_blocks_and_wins(self):
+        self.model.x_plays(0, 0)
+        self.model.x_plays(1, 0)
+        # O must block the top row
+        assert self.model.rows[0][2] == "O"
+        self.model.rows = [["X", "X", "O"], ["X", "O", "."], [".", ".", "."]]
+        self.model.choose_move()
+        # O blocks the column and completes the diagonal
+        assert self.model.rows[2][0] == "O" and self.model.test_for_win("O") == [(0,2), (1,1), (2,0)]
+
+class TestSuiteForMnk:
+    def test_win_detected_around_last_move(self):
+        board = Board(5, 5, 4)
+        for x in range(3):
+            assert not board.play(board.square(x + 1, 2), "X")
+            board.play(board.square(x, 4), "O")
+        assert board.play(board.square(4, 2), "X")
+        assert board.winning_squares() == [(1,2), (2,2), (3,2), (4,2)]
+        board.undo()
+        assert board.winning_squares() is None
+        for i in range(3):
+            board.play(board.square(i, 3 - i), "O")
+        assert board.play(board.square(3, 0), "O")
+        assert board.winning_squares() == [(0,3), (1,2), (2,1), (3,0)]
+
+    def test_search_wins_and_blocks(self):
+        # O can win with (3,3), and must otherwise block X's column
+        board = Board(4, 4, 4)
+        for (x, y) in [(0,0), (0,1), (0,2)]:
+            board.play(board.square(x, y), "X")
+        for (x, y) in [(0,3), (1,3), (2,3)]:
+            board.play(board.square(x, y), "O")
+        move, value = Search(board, 1.0).choose_move("O")
+        assert board.coords(move) == (3,3) and value == WIN_SCORE - 1
+        move, value = Search(board, 1.0).choose_move("X")
+        assert board.coords(move) == (3,3)
+
+    def test_model_with_gravity(self):
+        model = Model(mock.MagicMock(), 7, 6, 4, True)
+        model.x_plays(3, 0)
+        assert model.rows[5][3] == "X"
+        # the computer answered, and both pieces are at the bottom
+        assert sum([row.count("O") for row in model.rows]) == 1
+        assert "O" in model.rows[5] or model.rows[4][3] == "O"
+        model.init_game()
+        for x in range(3):
+            model.rows[5][x] = "X"
+        model.rows[4][0] = "O"
+        model.rows[4][1] = "O"
+        model.choose_move()
+        # O must stop X getting four along the bottom
+        assert model.rows[5][3] == "O"
+
+    def test_board_restored_when_time_runs_out(self):
+        board = Board(15, 15, 5)
+        board.play(board.square(7, 7), "X")
+        search = Search(board, 0.05)
+        search.choose_move("O")
+        assert board.moves_played == [board.square(7, 7)] and board.score == 1 * len(board.windows_of[board.square(7, 7)])
@@ -1 +1,19 @@
 CANVAS_SIZE = 600
+
+# File to keep the positions the computer has solved in from one run of
+# the game to the next (e.g., "oxo_solved.pickle"), or None to only keep
+# them while the game runs.
+SOLVED_POSITIONS_FILE = None
+
+# The board is BOARD_WIDTH squares wide and BOARD_HEIGHT high, and
+# WIN_LENGTH in a row wins.  With GRAVITY, pieces drop to the bottom of
+# their column, as in Connect Four.  For example, 7, 6, 4 and True for
+# Connect Four, or 15, 15, 5 and False for gomoku.
+BOARD_WIDTH = 3
+BOARD_HEIGHT = 3
+WIN_LENGTH = 3
+GRAVITY = False
+
+# Seconds the computer may think for on boards bigger than 3x3, which
+# are too big to search to the end.
+SEARCH_TIME = 1.0
@@ -3,7 +3,7 @@
 from tkinter import *
 from tkinter.font import Font
 import time
-from oxo_settings import CANVAS_SIZE
+from oxo_settings import CANVAS_SIZE, BOARD_WIDTH, BOARD_HEIGHT
 
 class View(Frame):
     def __init__(self, controller, root):
@@ -14,8 +14,8 @@ class View(Frame):
         self.canvas = Canvas(self.frame, width=CANVAS_SIZE, height=CANVAS_SIZE, bg="white")
         self.canvas.pack(side = LEFT, fill=BOTH, expand=FALSE)
         self.canvas.bind("<Button-1>", self.mouse_click)
-        self.init_fonts()
         self.init_board()
+        self.init_fonts()
         self.pieces = []
         self.thinking_tags = []
         self.last_move = 0
@@ -27,11 +27,13 @@ class View(Frame):
     def init_board(self):
         self.margin = CANVAS_SIZE//10
         board_width = CANVAS_SIZE - 2 * self.margin
-        self.square_size = board_width // 3
-        self.canvas.create_line(self.margin, self.square_size + self.margin, board_width + self.margin, self.square_size + self.margin, fill="darkblue")
-        self.canvas.create_line(self.margin, 2 * self.square_size + self.margin, board_width + self.margin, 2 * self.square_size + self.margin, fill="darkblue")
-        self.canvas.create_line(self.square_size + self.margin, self.margin, self.square_size + self.margin, board_width + self.margin, fill="darkblue")
-        self.canvas.create_line(2 * self.square_size + self.margin, self.margin, 2 * self.square_size + self.margin, board_width + self.margin, fill="darkblue")
+        self.square_size = board_width // max(BOARD_WIDTH, BOARD_HEIGHT)
+        right = BOARD_WIDTH * self.square_size + self.margin
+        bottom = BOARD_HEIGHT * self.square_size + self.margin
+        for y in range(1, BOARD_HEIGHT):
+            self.canvas.create_line(self.margin, y * self.square_size + self.margin, right, y * self.square_size + self.margin, fill="darkblue")
+        for x in range(1, BOARD_WIDTH):
+            self.canvas.create_line(x * self.square_size + self.margin, self.margin, x * self.square_size + self.margin, bottom, fill="darkblue")
 
     def clear_board(self):
         for piece in self.pieces:
@@ -39,9 +41,11 @@ class View(Frame):
         self.pieces.clear()
 
     def init_fonts(self):
-        self.bigfont = Font(family="TkDefaultFont", size=90)
-        self.smallfont = Font(family="TkDefaultFont", size=16)
-        self.tinyfont = Font(family="TkDefaultFont", size=12)
+        # sized for 3x3 squares, and scaled down for smaller squares
+        scale = min(1, self.square_size / 160)
+        self.bigfont = Font(family="TkDefaultFont", size=int(90 * scale))
+        self.smallfont = Font(family="TkDefaultFont", size=max(6, int(16 * scale)))
+        self.tinyfont = Font(family="TkDefaultFont", size=max(5, int(12 * scale)))
 
     def map_coords(self, x, y):
         nx = (x + 0.5)*self.square_size + self.margin
@@ -61,7 +65,7 @@ class View(Frame):
     def win(self, winning_line):
         x1,y1 = winning_line[0]
         nx1,ny1 = self.map_coords(x1,y1)
-        x2,y2 = winning_line[2]
+        x2,y2 = winning_line[-1]
         nx2,ny2 = self.map_coords(x2,y2)
         line = self.canvas.create_line(nx1,ny1, nx2,ny2, fill="blue", width=3)
         self.pieces.append(line)
@@ -71,7 +75,7 @@ class View(Frame):
         msgtag = self.canvas.create_text(nx, ny, anchor="c")
         self.canvas.itemconfig(msgtag, text=msg, font=self.smallfont, fill="red")
         self.thinking_tags.append(msgtag)
-        msgtag = self.canvas.create_text(nx, ny+15, anchor="c")
+        msgtag = self.canvas.create_text(nx, ny + self.smallfont.metrics("linespace"), anchor="c")
         self.canvas.itemconfig(msgtag, text=msg2, font=self.tinyfont, fill="red")
         self.thinking_tags.append(msgtag)
         self.is_thinking = True
@@ -88,7 +92,7 @@ class View(Frame):
     def mouse_click(self, event):
         x = (event.x - self.margin)//self.square_size
         y = (event.y - self.margin)//self.square_size
-        if x < 0 or x > 2 or y < 0 or y > 2:
+        if x < 0 or x >= BOARD_WIDTH or y < 0 or y >= BOARD_HEIGHT:
             return
         self.controller.click(x, y)
 
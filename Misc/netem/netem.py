@@ -0,0 +1,240 @@
+# Loopback network emulator.  Relays UDP datagrams or TCP connections
+# between programs on one machine, delaying, losing, reordering and
+# rate-limiting what passes through, so networked games can be tried out
+# under realistic network conditions without a second machine.
+#
+#   python3 netem.py udp <listen port> <target ip>:<target port> [options]
+#   python3 netem.py tcp <listen port> <target ip>:<target port> [options]
+#
+# Options (the same impairments are applied in both directions):
+#   -d <ms>     one-way delay
+#   -j <ms>     jitter: extra delay chosen uniformly between 0 and this
+#   -l <loss>   probability a packet is lost
+#   -r <prob>   probability a UDP datagram is held back by an extra
+#               delay, so the ones sent after it overtake it
+#   -b <kbit/s> bandwidth cap (0 for none)
+#
+# UDP: datagrams sent to the listen port are forwarded to the target, and
+# datagrams the target sends back to us are forwarded to whoever last sent
+# us one.  Apart from reordering, datagrams are delivered in order.
+#
+# TCP: each connection to the listen port is relayed to a new connection
+# to the target.  A TCP stream can't really lose data, so a lost segment
+# is modelled as TCP would handle it: it arrives after a retransmission
+# timeout, and everything behind it waits (head-of-line blocking).
+
+import asyncio, random, sys
+from getopt import getopt, GetoptError
+
+RTO = 0.2              # Linux minimum TCP retransmission timeout
+TCP_SEGMENT = 1448     # bytes of payload per TCP segment
+
+
+''' The network conditions on a link. '''
+class Impairment():
+    def __init__(self, delay=0, jitter=0, loss=0, reorder=0, bandwidth=0, rand=None):
+        self.delay = delay          # seconds
+        self.jitter = jitter        # seconds
+        self.loss = loss
+        self.reorder = reorder
+        self.bandwidth = bandwidth  # bytes per second, 0 for no cap
+        if rand is None:
+            rand = random.Random()
+        self.rand = rand
+
+    def copy(self):
+        return Impairment(self.delay, self.jitter, self.loss, self.reorder, self.bandwidth, self.rand)
+
+
+''' One direction of a link: works out when each packet sent on it
+should be delivered, given its Impairment. '''
+class Link():
+    def __init__(self, impairment):
+        self.impairment = impairment
+        self.link_free = 0    # when the last packet finishes being sent
+        self.last_due = 0     # when the last in-order packet is delivered
+        self.sent = 0
+        self.lost = 0
+        self.reordered = 0
+
+    def _transmit(self, size, now):
+        # with a bandwidth cap, packets queue up behind each other
+        imp = self.impairment
+        if imp.bandwidth > 0:
+            self.link_free = max(self.link_free, now) + size / imp.bandwidth
+            return self.link_free
+        return now
+
+    def datagram_due(self, size, now):
+        ''' returns when a datagram sent now should be delivered, or None if it is lost '''
+        imp = self.impairment
+        self.sent += 1
+        if imp.loss > 0 and imp.rand.random() < imp.loss:
+            self.lost += 1
+            return None
+        due = self._transmit(size, now) + imp.delay + imp.rand.uniform(0, imp.jitter)
+        if imp.reorder > 0 and imp.rand.random() < imp.reorder:
+            # held back, without holding back the datagrams behind it
+            self.reordered += 1
+            return due + imp.delay + imp.jitter
+        due = max(due, self.last_due)
+        self.last_due = due
+        return due
+
+    def stream_due(self, size, now):
+        ''' returns when size bytes written to a TCP stream now should be delivered '''
+        imp = self.impairment
+        self.sent += 1
+        due = self._transmit(size, now) + imp.delay + imp.rand.uniform(0, imp.jitter)
+        if imp.loss > 0:
+            segments = max(1, (size + TCP_SEGMENT - 1) // TCP_SEGMENT)
+            for i in range(segments):
+                if imp.rand.random() < imp.loss:
+                    self.lost += 1
+                    due += RTO
+        # nothing overtakes data that is still being retransmitted
+        due = max(due, self.last_due)
+        self.last_due = due
+        return due
+
+
+''' Asyncio protocol relaying datagrams between a client and the target. '''
+class UdpRelayProtocol():
+    def __init__(self, target, impairment, loop):
+        self.target = target
+        self.loop = loop
+        self.to_target = Link(impairment.copy())
+        self.to_client = Link(impairment.copy())
+        self.client = None
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if addr == self.target:
+            if self.client is None:
+                return
+            (link, dest) = (self.to_client, self.client)
+        else:
+            self.client = addr
+            (link, dest) = (self.to_target, self.target)
+        now = self.loop.time()
+        due = link.datagram_due(len(data), now)
+        if due is not None:
+            self.loop.call_at(due, self._deliver, data, dest)
+
+    def _deliver(self, data, dest):
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(data, dest)
+
+    def error_received(self, exc):
+        pass    # e.g., nobody listening at the target yet
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+
+async def start_udp_relay(listen_port, target, impairment, listen_ip='127.0.0.1'):
+    ''' starts relaying datagrams sent to listen_port on to target, and
+        returns the transport (close it to stop) and the protocol, whose
+        to_target and to_client Links count what they sent and lost '''
+    loop = asyncio.get_event_loop()
+    return await loop.create_datagram_endpoint(
+        lambda: UdpRelayProtocol(target, impairment, loop),
+        local_addr=(listen_ip, listen_port))
+
+
+''' Relays TCP connections to the target. '''
+class TcpRelay():
+    def __init__(self, target, impairment):
+        self.target = target
+        self.impairment = impairment
+        self.links = []
+        self.server = None
+
+    async def start(self, listen_port, listen_ip='127.0.0.1'):
+        self.server = await asyncio.start_server(self.handle_client, listen_ip, listen_port)
+
+    def close(self):
+        self.server.close()
+
+    async def handle_client(self, client_reader, client_writer):
+        try:
+            (target_reader, target_writer) = await asyncio.open_connection(self.target[0], self.target[1])
+        except OSError:
+            client_writer.close()
+            return
+        to_target = Link(self.impairment.copy())
+        to_client = Link(self.impairment.copy())
+        self.links += [to_target, to_client]
+        await asyncio.gather(self.pump(client_reader, target_writer, to_target),
+                             self.pump(target_reader, client_writer, to_client))
+
+    async def pump(self, reader, writer, link):
+        loop = asyncio.get_event_loop()
+        due = loop.time()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                due = link.stream_due(len(data), loop.time())
+                loop.call_at(due, self._write, writer, data)
+        except ConnectionError:
+            pass
+        # close once everything before the end of the stream is delivered
+        loop.call_at(due, writer.close)
+
+    def _write(self, writer, data):
+        if not writer.is_closing():
+            writer.write(data)
+
+
+def parse_target(text):
+    (ip, port) = text.rsplit(":", 1)
+    return (ip, int(port))
+
+def usage():
+    print("netem.py udp|tcp <listen port> <target ip>:<target port> [-d <delay ms>] [-j <jitter ms>] [-l <loss>] [-r <reorder>] [-b <kbit/s>]")
+    sys.exit(2)
+
+def parse_impairment(opts):
+    impairment = Impairment()
+    for opt, arg in opts:
+        if opt == "-d":
+            impairment.delay = float(arg) / 1000
+        elif opt == "-j":
+            impairment.jitter = float(arg) / 1000
+        elif opt == "-l":
+            impairment.loss = float(arg)
+        elif opt == "-r":
+            impairment.reorder = float(arg)
+        elif opt == "-b":
+            impairment.bandwidth = float(arg) * 1000 / 8
+    return impairment
+
+async def serve_forever(protocol, listen_port, target, impairment):
+    if protocol == "udp":
+        await start_udp_relay(listen_port, target, impairment)
+    else:
+        await TcpRelay(target, impairment).start(listen_port)
+    print("relaying {} from port {} to {}:{}".format(protocol, listen_port, target[0], target[1]))
+    while True:
+        await asyncio.sleep(3600)
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ["udp", "tcp"]:
+        usage()
+    try:
+        opts, args = getopt(sys.argv[4:], "d:j:l:r:b:")
+    except GetoptError:
+        usage()
+    impairment = parse_impairment(opts)
+    try:
+        asyncio.run(serve_forever(sys.argv[1], int(sys.argv[2]), parse_target(sys.argv[3]), impairment))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
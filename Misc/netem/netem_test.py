@@ -0,0 +1,33 @@
+import pytest, random
+from netem import *
+
+class TestSuiteForLink:
+    def impairment(self, **kwargs):
+        return Impairment(rand=random.Random(1), **kwargs)
+
+    def test_delay_keeps_datagrams_in_order(self):
+        link = Link(self.impairment(delay=0.05, jitter=0.02))
+        dues = [link.datagram_due(100, t * 0.001) for t in range(100)]
+        assert dues == sorted(dues) and dues[0] >= 0.05
+
+    def test_loss(self):
+        link = Link(self.impairment(loss=0.5))
+        dues = [link.datagram_due(100, 0) for t in range(1000)]
+        assert dues.count(None) == link.lost and 400 < link.lost < 600
+
+    def test_reordering(self):
+        link = Link(self.impairment(delay=0.05, reorder=0.2))
+        dues = [link.datagram_due(100, t * 0.001) for t in range(100)]
+        assert link.reordered > 0 and dues != sorted(dues)
+
+    def test_bandwidth(self):
+        # 10000 bytes per second: each 1000 byte datagram takes 0.1s to send
+        link = Link(self.impairment(bandwidth=10000))
+        dues = [link.datagram_due(1000, 0) for t in range(3)]
+        assert [round(due, 3) for due in dues] == [0.1, 0.2, 0.3]
+
+    def test_tcp_loss_holds_back_the_stream(self):
+        link = Link(self.impairment(delay=0.01, loss=1))
+        first = link.stream_due(100, 0)
+        second = link.stream_due(100, 0.001)
+        assert round(first, 3) == round(0.01 + RTO, 3) and second >= first
@@ -0,0 +1,148 @@
+# Runs two headless multiplayer Pacman players, connected over TCP through
+# netem.py's TCP relay, and reports how the network conditions affect
+# the updates they send each other:
+#
+# - latency: how long after being sent each pacman update arrives
+# - update rate: how many pacman updates each player gets per second
+# - divergence: how far a pacman moving at full speed has got from the
+#   newest position the other player knows about, sampled every frame
+#
+#   python3 pacman_latency.py [-t <seconds>] [-s <ms>[,<ms>...]] [netem options]
+#
+# -s is the time between updates (NET_UPDATE_INTERVAL in pa_settings.py);
+# give a list to compare several.  Each update also carries the four
+# ghosts, as in the game.  The netem options (-d, -j, -l, -r, -b) are
+# those of netem.py; -r has no effect on TCP.
+
+import asyncio, os, sys, threading, time
+from getopt import getopt, GetoptError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Assignments", "assignment5", "multi_player", "src"))
+
+from pa_network import Network
+from pa_settings import Direction, NET_UPDATE_INTERVAL
+from pa_model import PIXELS_PER_SECOND
+from netem import TcpRelay, parse_impairment
+
+PORT = 9872
+RELAY_PORT = 19872
+FRAME_TIME = 1/60
+
+
+''' Stands in for the real Controller, remembering the pacman updates
+the network gives us.  The "position" we send is the send time. '''
+class HeadlessController():
+    def __init__(self):
+        self.latencies = []
+        self.newest_sent = None
+
+    def foreign_pacman_update(self, pos, dir, speed):
+        (sent, frame) = pos
+        self.latencies.append(time.time() - sent)
+        if self.newest_sent is None or sent > self.newest_sent:
+            self.newest_sent = sent
+
+    def remote_ghost_update(self, ghostnum, pos, dir, speed, mode):
+        pass
+
+
+def percentile(values, fraction):
+    if len(values) == 0:
+        return 0
+    return sorted(values)[int(len(values) * fraction)]
+
+def mean(values):
+    if len(values) == 0:
+        return 0
+    return sum(values) / len(values)
+
+def start_relay(impairment, port):
+    ''' runs a TcpRelay in its own thread, returning it and its event loop '''
+    loop = asyncio.new_event_loop()
+    relay = TcpRelay(('127.0.0.1', port), impairment)
+    ready = threading.Event()
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(relay.start(port + RELAY_PORT - PORT))
+        ready.set()
+        loop.run_forever()
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return relay, loop
+
+def connect_pair(port):
+    password = "netem"
+    controllers = [HeadlessController(), HeadlessController()]
+    server = Network(controllers[0], password)
+    client = Network(controllers[1], password)
+    server_thread = threading.Thread(target=server.server, args=(port,))
+    server_thread.start()
+    time.sleep(0.1)
+    # the client connects through the relay
+    client.client("127.0.0.1", port + RELAY_PORT - PORT)
+    server_thread.join()
+    return [server, client], controllers
+
+def play(impairment, send_interval, duration, port):
+    (relay, loop) = start_relay(impairment, port)
+    (networks, controllers) = connect_pair(port)
+    divergences = []
+    frame = 0
+    last_send = 0
+    start = time.time()
+    while time.time() - start < duration:
+        now = time.time()
+        if now - last_send >= send_interval:
+            last_send = now
+            for network in networks:
+                network.send_pacman_update((now, frame), Direction.LEFT, 1)
+                for ghostnum in range(0, 4):
+                    network.send_ghost_update(ghostnum, (now, frame), Direction.UP, 1, None)
+        for network in networks:
+            network.check_for_messages(now)
+        for controller in controllers:
+            if controller.newest_sent is not None:
+                divergences.append(PIXELS_PER_SECOND * (now - controller.newest_sent))
+        frame += 1
+        time.sleep(max(0, start + frame * FRAME_TIME - time.time()))
+    elapsed = time.time() - start
+    loop.call_soon_threadsafe(relay.close)
+    sent = sum([link.sent for link in relay.links])
+    lost = sum([link.lost for link in relay.links])
+    latencies = controllers[0].latencies + controllers[1].latencies
+    print("{:>7.0f} {:>9} {:>6} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}".format(
+        1000 * send_interval, sent, lost,
+        1000 * mean(latencies), 1000 * percentile(latencies, 0.95),
+        len(latencies) / 2 / elapsed,
+        mean(divergences), percentile(divergences, 0.95), max(divergences + [0])))
+
+def usage():
+    print("pacman_latency.py [-t <seconds>] [-s <ms>[,<ms>...]] [-d <delay ms>] [-j <jitter ms>] [-l <loss>] [-b <kbit/s>]")
+    sys.exit(2)
+
+def main():
+    try:
+        opts, args = getopt(sys.argv[1:], "t:s:d:j:l:r:b:")
+    except GetoptError:
+        usage()
+    duration = 10
+    intervals = [NET_UPDATE_INTERVAL]
+    for opt, arg in opts:
+        if opt == "-t":
+            duration = float(arg)
+        elif opt == "-s":
+            intervals = [float(ms) / 1000 for ms in arg.split(",")]
+    impairment = parse_impairment(opts)
+    print("delay {:.0f}ms, jitter {:.0f}ms, loss {:.0f}%, bandwidth {}".format(
+        1000 * impairment.delay, 1000 * impairment.jitter, 100 * impairment.loss,
+        "{:.0f}kbit/s".format(impairment.bandwidth * 8 / 1000) if impairment.bandwidth > 0 else "unlimited"))
+    print("{:>7} {:>9} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "send ms", "chunks", "lost", "lat ms", "lat 95th", "updates/s", "div px", "div 95th", "div max"))
+    port = PORT
+    for interval in intervals:
+        play(impairment, interval, duration, port)
+        # each run needs its own ports, as the old ones may still be in use
+        port += 1
+
+if __name__ == "__main__":
+    main()
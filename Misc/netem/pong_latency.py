@@ -0,0 +1,145 @@
+# Plays a networked game of Pong between two bots through netem.py's UDP
+# relay, without a GUI, and reports how the network conditions affect it:
+#
+# - latency: how long after being sent each player applies the other's
+#   state
+# - update rate: how many of the other's states each player applies per
+#   second
+# - divergence: how far apart the two players' ideas of where the ball
+#   and the bars are, sampled every 10ms
+#
+#   python3 pong_latency.py [-t <seconds>] [-s <ms>[,<ms>...]] [netem options]
+#
+# -s sets the Controller's net_sending_frequency; give a list to compare
+# several.  The netem options (-d, -j, -l, -r, -b) are those of netem.py.
+
+import asyncio, os, sys, time
+from getopt import getopt, GetoptError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pong"))
+
+import pong_settings
+from pong import Controller
+from network_utils import UdpPeer2PeerDaemon
+from pong_trace import tracer
+from netem import Impairment, start_udp_relay, parse_impairment
+
+PORT_A = 9998
+PORT_B = 9999
+RELAY_OFFSET = 10000    # the relay to a player listens on its port + this
+SAMPLE_INTERVAL = 0.01
+
+
+''' A Controller without a view, which restarts the game when it's over
+and records the latency of the states it applies. '''
+class HeadlessController(Controller):
+    def __init__(self):
+        super().__init__()
+        self.latencies = []
+
+    def add_view(self):
+        pass
+
+    def game_over(self):
+        super().game_over()
+        self.set_local_restart()
+
+    def apply_state_from_net_opponent(self, state):
+        # both players are on this machine, so they share a clock
+        self.latencies.append(time.time() - state.timestamp)
+        super().apply_state_from_net_opponent(state)
+
+
+def percentile(values, fraction):
+    if len(values) == 0:
+        return 0
+    return sorted(values)[int(len(values) * fraction)]
+
+def mean(values):
+    if len(values) == 0:
+        return 0
+    return sum(values) / len(values)
+
+async def sample_divergence(controllers, duration, ball_distances, bar_distances):
+    (a, b) = controllers
+    end = time.time() + duration
+    while time.time() < end:
+        await asyncio.sleep(SAMPLE_INTERVAL)
+        if a.waiting_net_opponent or b.waiting_net_opponent:
+            continue
+        if a.ball.is_inplay() and b.ball.is_inplay():
+            ball_distances.append(a.ball.get_position().distance(b.ball.get_position()))
+        for (bar_a, bar_b) in zip(a.model.bars, b.model.bars):
+            bar_distances.append(bar_a.get_central_point().distance(bar_b.get_central_point()))
+    for controller in controllers:
+        controller.exit()
+
+async def play(impairment, sending_frequency, duration):
+    controllers = [HeadlessController(), HeadlessController()]
+    controllers[1].decision_maker = False
+    relays = []
+    daemons = []
+    for (controller, port, opponent_port) in [(controllers[0], PORT_A, PORT_B), (controllers[1], PORT_B, PORT_A)]:
+        controller.net_sending_frequency = sending_frequency
+        # we send to the relay in front of our opponent
+        (transport, relay) = await start_udp_relay(opponent_port + RELAY_OFFSET, ('127.0.0.1', opponent_port), impairment)
+        relays.append((transport, relay))
+        daemon = UdpPeer2PeerDaemon(port, opponent_port + RELAY_OFFSET)
+        daemon.receive_latest_states(asyncio.get_event_loop(), controller.decode_message_from_net_opponent)
+        controller.daemon = daemon
+        daemons.append(daemon)
+    ball_distances = []
+    bar_distances = []
+    start = time.time()
+    await asyncio.gather(controllers[0].run_game(), controllers[1].run_game(),
+                         sample_divergence(controllers, duration, ball_distances, bar_distances))
+    elapsed = time.time() - start
+    for daemon in daemons:
+        await daemon.shutdown()
+    for (transport, relay) in relays:
+        transport.close()
+    sent = sum([relay.to_target.sent for (transport, relay) in relays])
+    lost = sum([relay.to_target.lost for (transport, relay) in relays])
+    latencies = controllers[0].latencies + controllers[1].latencies
+    print("{:>7.0f} {:>9} {:>6} {:>9.1f} {:>9.1f} {:>9.0f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}".format(
+        1000 * sending_frequency, sent, lost,
+        1000 * mean(latencies), 1000 * percentile(latencies, 0.95),
+        len(latencies) / 2 / elapsed,
+        mean(ball_distances), percentile(ball_distances, 0.95),
+        mean(bar_distances), percentile(bar_distances, 0.95)))
+
+def usage():
+    print("pong_latency.py [-t <seconds>] [-s <ms>[,<ms>...]] [-d <delay ms>] [-j <jitter ms>] [-l <loss>] [-r <reorder>] [-b <kbit/s>]")
+    sys.exit(2)
+
+def main():
+    try:
+        opts, args = getopt(sys.argv[1:], "t:s:d:j:l:r:b:")
+    except GetoptError:
+        usage()
+    duration = 10
+    frequencies = [0.001]
+    for opt, arg in opts:
+        if opt == "-t":
+            duration = float(arg)
+        elif opt == "-s":
+            frequencies = [float(ms) / 1000 for ms in arg.split(",")]
+    impairment = parse_impairment(opts)
+    # two bots playing each other over the network
+    pong_settings.local_human_players = 0
+    pong_settings.local_bot_players = 1
+    pong_settings.remote_players = 1
+    pong_settings.net_fast_path = True
+    tracer.set_level("net", "error")
+    tracer.set_level("game", "error")
+    tracer.set_level("model", "error")
+    print("delay {:.0f}ms, jitter {:.0f}ms, loss {:.0f}%, reordering {:.0f}%, bandwidth {}".format(
+        1000 * impairment.delay, 1000 * impairment.jitter, 100 * impairment.loss, 100 * impairment.reorder,
+        "{:.0f}kbit/s".format(impairment.bandwidth * 8 / 1000) if impairment.bandwidth > 0 else "unlimited"))
+    print("{:>7} {:>9} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "send ms", "sent", "lost", "lat ms", "lat 95th", "updates/s", "ball px", "ball 95th", "bar px", "bar 95th"))
+    for frequency in frequencies:
+        asyncio.run(play(impairment, frequency, duration))
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import asyncio
 import argparse
 import random, string, time
 
+from pong_trace import net_trace
+
 
 ###################################
 # Unified UDP sender and receiver #
@@ -11,15 +13,18 @@ import random, string, time
 
 class UdpPeer2PeerDaemon:
     
-    def __init__(self, listen_port, send_port, listen_ip='127.0.0.1', send_ip='127.0.0.1'):
+    def __init__(self, listen_port, send_port, listen_ip='127.0.0.1', send_ip='127.0.0.1', more_peers=()):
         self.listen_port = listen_port
         self.send_port = send_port
         self.listen_ip = listen_ip
         self.send_ip = send_ip
+        self.more_peers = list(more_peers)     # (ip, port) of any further peers, only used by send_batch
         self.created_tasks = []
+        self.mailbox = None
+        self.mailbox_protocol = None
 
     def process_incoming_messages(self, loop, packet_handle_function = None):
-        print("Starting UDP server (on local port {})".format(self.listen_port))
+        net_trace.info("Starting UDP server (on local port {})", self.listen_port)
         if packet_handle_function is None:
             packet_handle_function = self._only_print_incoming_packets
         listening_endpoint = loop.create_datagram_endpoint(
@@ -38,8 +43,43 @@ class UdpPeer2PeerDaemon:
                 remote_addr=(self.send_ip, self.send_port))
         self.created_tasks.append(loop.create_task(sending_endpoint))
 
+    # Fast path: rather than running a task per datagram, decode each
+    # datagram as soon as it arrives and only keep the newest state from
+    # each peer, for the game to take once per tick.  Send with
+    # send_batch from the same socket.
+
+    def receive_latest_states(self, loop, decode_function):
+        ''' decode_function(data, addr) is called for each datagram, and must return the decoded state, or None to drop the datagram '''
+        net_trace.info("Starting UDP server (on local port {})", self.listen_port)
+        self.mailbox = LatestStateMailbox(decode_function)
+        self.mailbox_protocol = MailboxUdpProtocol(self.mailbox)
+        listening_endpoint = loop.create_datagram_endpoint(
+                lambda: self.mailbox_protocol,
+                local_addr=(self.listen_ip, self.listen_port))
+        self.created_tasks.append(loop.create_task(listening_endpoint))
+
+    def take_latest_states(self):
+        ''' returns a dictionary from peer address to (state, arrival time) with the newest state of each peer that sent one since the last call '''
+        return self.mailbox.take_all()
+
+    def send_batch(self, buffers, addr=None):
+        ''' sends the pre-encoded buffers to addr (every peer by default) straight away, and returns how many were sent '''
+        transport = self.mailbox_protocol.transport
+        if transport is None:
+            return 0    # the socket isn't open yet
+        if addr is None:
+            addresses = [(self.send_ip, self.send_port)] + self.more_peers
+        else:
+            addresses = [addr]
+        for addr in addresses:
+            for buffer in buffers:
+                transport.sendto(buffer, addr)
+        return len(buffers) * len(addresses)
+
     async def shutdown(self):
         await asyncio.gather(*self.created_tasks)
+        if self.mailbox_protocol is not None and self.mailbox_protocol.transport is not None:
+            self.mailbox_protocol.transport.close()
         
 
 # Asyncio protocols used by the UdpPeer2PeerDaemon class.
@@ -58,6 +98,49 @@ class FlexibleUdpServerProtocol:
     def datagram_received(self, data, addr):
         self.loop.create_task(self.handle_fun(data, addr))
         
+''' Holds the newest state decoded from each peer's datagrams, until it is taken.  Older states that are never taken are simply overwritten. '''
+class LatestStateMailbox:
+    def __init__(self, decode_function):
+        self.decode = decode_function
+        self.slots = dict()     # peer address -> (state, arrival time)
+        self.received = 0
+        self.dropped = 0
+        self.overwritten = 0
+
+    def put(self, data, addr):
+        self.received += 1
+        arrival = time.perf_counter()
+        state = self.decode(data, addr)
+        if state is None:
+            self.dropped += 1
+            return
+        if addr in self.slots:
+            self.overwritten += 1
+        self.slots[addr] = (state, arrival)
+
+    def take_all(self):
+        slots = self.slots
+        self.slots = dict()
+        return slots
+
+''' Asyncio protocol for a UDP socket whose incoming datagrams go straight into a LatestStateMailbox, without creating any task. '''
+class MailboxUdpProtocol:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.mailbox.put(data, addr)
+
+    def error_received(self, exc):
+        net_trace.error("Error on UDP socket: {}", exc)
+
+    def connection_lost(self, exc):
+        self.transport = None
+
 ''' Asyncio protocol for a UDP sender. The input packet_generator_function is an asynchronous generator (type async_generator) that generates data to send out. '''
 class FlexibleUdpAsyncSenderProtocol:
     def __init__(self, loop, packet_generator_function, sending_interval):
@@ -72,18 +155,18 @@ class FlexibleUdpAsyncSenderProtocol:
 
     async def send_outgoing_data(self):
         async for message in self.packet_gen:
-            print('Sending: {}'.format(message))
             if message is None:
                 continue
+            net_trace.debug("Sending {} bytes", len(message))
             self.transport.sendto(message)
             await asyncio.sleep(self.pace)
-        print("Finished sending")
+        net_trace.info("Finished sending")
 
     def datagram_received(self, data, addr):
-        print("Received:", data.decode())
+        net_trace.debug("Received: {}", data)
         
     def error_received(self, exc):
-        print('Error sending message:', exc)
+        net_trace.error("Error sending message: {}", exc)
 
 
 #################################################
@@ -9,19 +9,8 @@ import pong_settings as settings
 from pong_view import TkView
 from pong_model import Model
 from network_utils import UdpPeer2PeerDaemon
-
-
-#############
-# Constants #
-#############
-
-NETMSG_INFO_SEP = ";"
-NETMSG_FIELD_SEP = ","
-NETMSG_BALLPOS_ID = "Ball:"
-NETMSG_BARPOS_ID = "Bar:"
-NETMSG_SCORE_ID = "Score:"
-NETMSG_RST_ID = "Restart:"
-NETMSG_GAMERUN_ID = "Game-running:"
+from pong_trace import tracer,game_trace,net_trace,configure
+from pong_packets import PacketCodec,PongState,MAX_BARS
 
 
 ##############
@@ -43,6 +32,10 @@ class Controller():
         self.remote_game_running = False
         self.local_restart = False
         self.remote_restart = False
+        # what each networked opponent last told us, by address
+        self.remote_restarts = dict()
+        self.remote_games_running = dict()
+        self.rank = 0
         if settings.remote_players == 0:
             self.waiting_net_opponent = False
             self.remote_restart = True
@@ -55,15 +48,25 @@ class Controller():
         self.speed = 1.0
         self.run_update_frequency = 0.001
         self.net_sending_frequency = 0.001
+        # packets to and from the opponents (see pong_packets.py): one
+        # codec for what we send, and one codec and state per opponent
+        self.codec = PacketCodec()
+        self.outgoing_state = PongState()
+        self.peer_codecs = dict()
+        self.daemon = None
+        self.last_net_send = 0
         self.model = self.get_model()
 
     def get_model(self):
-        return Model(self)   
+        return Model(self, self.get_number_players())   
     
     ### Getter and setter methods ###
 
     def get_speed(self):
         return self.speed
+
+    def get_number_players(self):
+        return settings.local_human_players + settings.local_bot_players + settings.remote_players
     
     def get_canvas_width(self):
         return settings.CANVAS_WIDTH
@@ -94,11 +97,13 @@ class Controller():
     def set_local_restart(self, value=True):
         self.local_restart = value
         
-    def set_remote_restart(self, value):
-        self.remote_restart = value
+    def set_remote_restart(self, value, peer=None):
+        self.remote_restarts[peer] = value
+        self.remote_restart = len(self.remote_restarts) >= settings.remote_players and all(self.remote_restarts.values())
 
-    def set_remote_game_running(self, value):
-        self.remote_game_running = value
+    def set_remote_game_running(self, value, peer=None):
+        self.remote_games_running[peer] = value
+        self.remote_game_running = all(self.remote_games_running.values())
 
     ### Methods to interact with model and view ###
 
@@ -138,6 +143,7 @@ class Controller():
         self.local_restart = False
         if settings.remote_players > 0:
             self.remote_restart = False
+            self.remote_restarts.clear()
 
     def restart(self):
         for view in self.views:
@@ -146,21 +152,27 @@ class Controller():
 
     def exit(self):
         self.running = False
-        print("\nGame stop running.")
+        game_trace.info("Game stop running.")
 
     ### Methods to run the game locally (on this machine) ###
        
     def get_players_info(self,remote_higher=True):
-        tot_players = settings.local_human_players + settings.local_bot_players + settings.remote_players
-        # we only support two players so far
-        if tot_players != 2:
+        tot_players = self.get_number_players()
+        local_players = settings.local_human_players + settings.local_bot_players
+        if tot_players < 2 or tot_players > MAX_BARS or (settings.remote_players > 1 and local_players != 1):
             raise RuntimeError ("Unsupported number of players: {} local users, {} local bots and {} remote players".format(settings.local_human_players, settings.local_bot_players, settings.remote_players))
-            raise KeyboardInterrupt             # exit
         tot_ids = list(range(1,tot_players+1))
+        if settings.remote_players > 1:
+            # each machine has one player, whose id is given by its rank among the players' addresses
+            local_feature = 'local' if settings.local_human_players == 1 else 'bot'
+            players_features = ['remote'] * tot_players
+            players_features[self.rank] = local_feature
+            game_trace.info("Players info: {}", list(zip(tot_ids,players_features)))
+            return list(zip(tot_ids,players_features))
         players_features = ['local'] * settings.local_human_players + ['bot'] * settings.local_bot_players + ['remote'] * settings.remote_players
         if remote_higher:
             players_features.reverse()
-        print("Players info: {}".format(list(zip(tot_ids,players_features))))
+        game_trace.info("Players info: {}", list(zip(tot_ids,players_features)))
         return list(zip(tot_ids,players_features))
 
     def calibrate_speed(self):
@@ -207,6 +219,7 @@ class Controller():
 
     async def run_game(self):
         while self.waiting_net_opponent:
+            self.exchange_states_with_net_opponent()
             await asyncio.sleep(self.run_update_frequency)
         players_info = self.get_players_info(remote_higher=self.decision_maker)
         self.model.set_players_info(players_info)
@@ -215,7 +228,9 @@ class Controller():
         while self.running:
             await self.check_restart()
             self.checkspeed()
+            self.apply_latest_states()
             self.model.update(self.speed)
+            self.send_state_to_net_opponent()
             for view in self.views:
                 view.update()
             await asyncio.sleep(self.run_update_frequency)
@@ -224,85 +239,137 @@ class Controller():
 
     ### Methods for network interaction, i.e., to exchange messages with remote opponents ###
     
-    def compose_position_message(self, message_id, fields_content_list):
-        string = message_id + ''
-        for field in fields_content_list:
-            string += str(field) + NETMSG_FIELD_SEP
-        k = string.rfind(NETMSG_FIELD_SEP)
-        string = string[:k] 
-        return string
-        
-    def parse_position_message(self, object_id, message):
-        content = message.split(object_id)[1]
-        return content.split(NETMSG_FIELD_SEP)
+    ''' packs the ball (if we control it), our bars, the score and
+    whether we want to restart and are running a game into one packet.
+    The packet is only valid until the next call. '''
+    def compose_state_message(self):
+        state = self.outgoing_state
+        state.has_ball = not self.ball.is_remotely_controlled()
+        if state.has_ball:
+            ball_pos = self.ball.get_position()
+            state.set_ball(ball_pos.X,ball_pos.Y,self.ball.get_angle())
+        index = 0
+        for local in self.model.get_local_players():
+            bar = local.get_bar()
+            state.set_bar(index,bar.get_id(),bar.get_xpos(),bar.get_ypos())
+            index += 1
+        del state.bars[index:]
+        state.scores[:] = self.get_score()
+        state.restart = self.local_restart
+        state.game_running = self.model.game_running
+        return self.codec.encode(state)
 
     async def generate_messages_for_net_opponent(self):
         try:
             while self.running:
-                msg = ''
-                if not self.ball.is_remotely_controlled():
-                    ball_pos = self.ball.get_position()
-                    msg += self.compose_position_message(NETMSG_BALLPOS_ID,[ball_pos.X,ball_pos.Y,self.ball.get_angle()]) + NETMSG_INFO_SEP
-                for local in self.model.get_local_players():
-                    bar = local.get_bar()
-                    bar_id = bar.get_id()
-                    bar_pos = bar.get_central_point()
-                    msg += self.compose_position_message(NETMSG_BARPOS_ID,[bar_id,bar_pos.X,bar_pos.Y]) + NETMSG_INFO_SEP
-                msg += self.compose_position_message(NETMSG_SCORE_ID,self.get_score()) + NETMSG_INFO_SEP
-                msg += self.compose_position_message(NETMSG_RST_ID,[self.local_restart]) + NETMSG_INFO_SEP
-                msg += self.compose_position_message(NETMSG_GAMERUN_ID,[self.model.game_running])
-                yield msg.encode()
+                yield self.compose_state_message()
                 await asyncio.sleep(self.net_sending_frequency)
         except KeyboardInterrupt:
-            print('Got closing signal <Ctrl-C> from keyboard.')
+            net_trace.info("Got closing signal <Ctrl-C> from keyboard.")
         finally:
-            print('Stopping inform opponent.')
+            net_trace.info("Stopping inform opponent.")
+
+    ''' decodes a packet as soon as it arrives.  Returns the state of
+    the opponent at addr, or None if the packet is malformed or older
+    than one we've already seen from them. '''
+    def decode_message_from_net_opponent(self, data, addr):
+        if addr not in self.peer_codecs:
+            state = PongState()
+            state.sender = addr
+            self.peer_codecs[addr] = (PacketCodec(), state)
+        (codec, state) = self.peer_codecs[addr]
+        if not codec.decode_into(data, state):
+            net_trace.debug("Dropped a packet of {} bytes from {} ({} stale and {} malformed so far)", len(data), addr, codec.stale_packets, codec.bad_packets)
+            return None
+        net_trace.debug("Pong received packet {} from {}", state.seq, addr)
+        return state
+
+    ''' applies the newest state received from each opponent since the
+    last tick, if any (used with settings.net_fast_path).  We stop
+    waiting once we have heard from every opponent. '''
+    def apply_latest_states(self):
+        if self.daemon is None:
+            return
+        for (state, arrival_time) in self.daemon.take_latest_states().values():
+            self.apply_state_from_net_opponent(state)
+            if len(self.remote_games_running) >= settings.remote_players:
+                self.waiting_net_opponent = False
+
+    ''' sends our state to the opponents at most every
+    net_sending_frequency seconds (used with settings.net_fast_path) '''
+    def send_state_to_net_opponent(self):
+        if self.daemon is None:
+            return
+        now = time.time()
+        if now - self.last_net_send < self.net_sending_frequency:
+            return
+        self.last_net_send = now
+        self.daemon.send_batch([self.compose_state_message()])
+
+    def exchange_states_with_net_opponent(self):
+        self.apply_latest_states()
+        self.send_state_to_net_opponent()
 
+    ''' handles each packet in its own task (used without settings.net_fast_path) '''
     async def process_message_from_net_opponent(self, data, addr):
         if self.waiting_net_opponent:
             self.waiting_net_opponent = False
-        message_string = data.decode()
-        print("Pong received {}".format(message_string))
-        for string in message_string.split(NETMSG_INFO_SEP):
-            if string.startswith(NETMSG_BALLPOS_ID):
-                [xpos,ypos,angle] = self.parse_position_message(NETMSG_BALLPOS_ID,string)
-                # adjust the ball as said by the opponent if the ball
-                # is remotely controlled or to (re)start the game
-                if self.ball.is_remotely_controlled() or (not self.remote_game_running and not self.decision_maker):
-                    self.ball.set_position(float(xpos),float(ypos))
-                    self.ball.set_angle(float(angle))
-            elif string.startswith(NETMSG_BARPOS_ID):
-                [bar_id,xpos,ypos] = self.parse_position_message(NETMSG_BARPOS_ID,string)
-                self.model.move_remote_player_bar_to_point(bar_id,float(xpos),float(ypos))
-            elif string.startswith(NETMSG_RST_ID):
-                [remote_start] = self.parse_position_message(NETMSG_RST_ID,string)
-                self.set_remote_restart(remote_start.strip() == "True")
-            elif string.startswith(NETMSG_GAMERUN_ID):
-                [remote_run] = self.parse_position_message(NETMSG_GAMERUN_ID,string)
-                self.set_remote_game_running(remote_run.strip() == "True")
-            elif string.startswith(NETMSG_SCORE_ID):
-                [score_p1,score_p2] = self.parse_position_message(NETMSG_SCORE_ID,string)
-                score = [int(score_p1),int(score_p2)]
-                if self.ball.is_remotely_controlled():
-                    self.update_score(score)
-                    self.model.set_score(score)
+        state = self.decode_message_from_net_opponent(data, addr)
+        if state is not None:
+            self.apply_state_from_net_opponent(state)
+
+    def apply_state_from_net_opponent(self, state):
+        # adjust the ball as said by the opponent if the ball
+        # is remotely controlled or to (re)start the game
+        if state.has_ball and (self.ball.is_remotely_controlled() or (not self.remote_game_running and not self.decision_maker)):
+            self.ball.set_position(state.ball_x,state.ball_y)
+            self.ball.set_angle(state.ball_angle)
+        for (bar_id,xpos,ypos) in state.bars:
+            self.model.move_remote_player_bar_to_point(bar_id,xpos,ypos)
+        # with several opponents, the score comes from whoever has the ball
+        if self.ball.is_remotely_controlled() and (state.has_ball or settings.remote_players == 1):
+            score = list(state.scores)
+            self.update_score(score)
+            self.model.set_score(score)
+        self.set_remote_restart(state.restart, state.sender)
+        self.set_remote_game_running(state.game_running, state.sender)
 
     ### Main method ###
             
-    def run(self,local_ip,local_port,opponent_ip,opponent_port):
-        # check whether we should be the ones making initial decisions (e.g., about ball's initial direction) 
-        if local_ip > opponent_ip or (local_ip == opponent_ip and local_port > opponent_port): 
-            self.decision_maker = False
+    def run(self,local_ip,local_port,opponent_ip,opponent_port,more_opponents=()):
+        # our rank among all the players' addresses gives our player id in
+        # games with more than two players; the first one makes initial
+        # decisions (e.g., about ball's initial direction)
+        endpoints = sorted([(local_ip,local_port),(opponent_ip,opponent_port)] + list(more_opponents))
+        self.rank = endpoints.index((local_ip,local_port))
+        self.decision_maker = self.rank == 0
+        # the model was set up for settings.remote_players opponents, so
+        # the addresses we were given must match
+        if settings.remote_players > 0 and settings.remote_players != 1 + len(more_opponents):
+            raise RuntimeError("settings.remote_players is {}, but there are {} opponents: set it to 1 plus the number of --more-opponents".format(settings.remote_players, 1 + len(more_opponents)))
+        if len(more_opponents) > 0 and not settings.net_fast_path:
+            raise RuntimeError("Games with more than one networked opponent need settings.net_fast_path")
         # setup infrastructure to handle the network connection
         loop = asyncio.get_event_loop()
-        daemon = UdpPeer2PeerDaemon(local_port,opponent_port, listen_ip=local_ip, send_ip=opponent_ip)
-        daemon.process_incoming_messages(loop, packet_handle_function = self.process_message_from_net_opponent)
-        daemon.send(loop, packet_generator_function = self.generate_messages_for_net_opponent(), sending_interval=self.net_sending_frequency)
+        daemon = UdpPeer2PeerDaemon(local_port,opponent_port, listen_ip=local_ip, send_ip=opponent_ip, more_peers=more_opponents)
+        if settings.net_fast_path:
+            # the game loop takes the opponent's latest state and sends ours every tick
+            daemon.receive_latest_states(loop, self.decode_message_from_net_opponent)
+            self.daemon = daemon
+        else:
+            daemon.process_incoming_messages(loop, packet_handle_function = self.process_message_from_net_opponent)
+            daemon.send(loop, packet_generator_function = self.generate_messages_for_net_opponent(), sending_interval=self.net_sending_frequency)
         # run the game
         try:
             loop.run_until_complete(self.run_game())
         except KeyboardInterrupt:
             pass
+        except Exception:
+            # show what led to the error before it is reported
+            tracer.dump()
+            raise
+        finally:
+            tracer.close_file()
         # closing
         loop.run_until_complete(daemon.shutdown())
         loop.close()
@@ -320,12 +387,21 @@ def parse_arguments():
     
     parser.add_argument('opponent_ip', type=str, help='A required string representation of the IP address of the opponent')
     parser.add_argument('opponent_port', type=int, help='A required port number (int) of the opponent')
+
+    parser.add_argument('--more-opponents', type=str, nargs='*', default=[], metavar='IP:PORT', help='The addresses of any further opponents, for games with more than two players')
+    parser.add_argument('--trace', type=str, default=settings.trace_levels, help='Comma-separated trace levels (off, error, info or debug) for the model, net and game, e.g. model=debug,net=off')
+    parser.add_argument('--trace-file', type=str, default=settings.trace_file, help='A file to write a binary trace to (read it with pong_trace.py)')
     args = parser.parse_args()
-    return (args.local_ip,args.local_port,args.opponent_ip,args.opponent_port)
+    configure(tracer, args.trace, args.trace_file)
+    more_opponents = []
+    for address in args.more_opponents:
+        (ip, port) = address.rsplit(":", 1)
+        more_opponents.append((ip, int(port)))
+    return (args.local_ip,args.local_port,args.opponent_ip,args.opponent_port,more_opponents)
 
 if __name__ == "__main__":
-    (local_ip,local_port,opponent_ip,opponent_port) = parse_arguments()
+    (local_ip,local_port,opponent_ip,opponent_port,more_opponents) = parse_arguments()
     controller = Controller()
-    controller.run(local_ip,local_port,opponent_ip,opponent_port)
+    controller.run(local_ip,local_port,opponent_ip,opponent_port,more_opponents)
 
 
@@ -0,0 +1,111 @@
+# Benchmark of the ball's collision checks as the number of players
+# grows, with and without the broad phase (see BroadPhaseGrid in
+# pong_geometry.py and broad_phase in pong_settings.py).
+#
+# For each number of players, bots play each other in a polygonal arena
+# (or on the usual court, for two players) without a GUI, and we time
+# Model.check_ball over the same frames with each setting.
+#
+#   python3 pong_arena_bench.py [-f frames] [-p players,players,...]
+#
+# For each number of players, we report the microseconds per check_ball
+# call and the average number of bars, walls and nets the ball is
+# checked against, with the broad phase off and on.
+
+import argparse, time
+from random import seed
+
+import pong_model
+from pong_model import Model
+from pong_trace import tracer
+from pong_settings import CANVAS_WIDTH,CANVAS_HEIGHT,DISTANCE_BAR_BOUND,GRID_SIZE
+
+''' Stands in for the Controller, which the model only asks for its
+constants and tells about its objects and the score. '''
+class StubController():
+    def get_canvas_width(self):
+        return CANVAS_WIDTH
+
+    def get_canvas_height(self):
+        return CANVAS_HEIGHT
+
+    def get_distance_bar_bound(self):
+        return DISTANCE_BAR_BOUND
+
+    def get_bar_move_unit(self):
+        return GRID_SIZE
+
+    def get_speed(self):
+        return 1.0
+
+    def register_ball(self, ball):
+        pass
+
+    def register_wall(self, wall):
+        pass
+
+    def register_net(self, net):
+        pass
+
+    def register_bar(self, bar):
+        pass
+
+    def update_score(self, score):
+        pass
+
+    def game_over(self):
+        pass
+
+def play(number_players, frames):
+    ''' returns the ball's position and angle at each of the frames of a game between bots '''
+    seed(number_players)
+    model = Model(StubController(), number_players)
+    model.set_players_info([(i, 'bot') for i in range(1, number_players + 1)])
+    model.game_running = True
+    positions = []
+    for frame in range(frames):
+        model.update(1.0)
+        # keep playing after somebody wins
+        model.game_running = True
+        positions.append((model.ball.get_position().X, model.ball.get_position().Y, model.ball.get_angle(), model.ball.is_inplay()))
+    return model, positions
+
+def time_checks(model, positions, broad_phase):
+    ''' times check_ball with the ball at each of the positions, returning
+        microseconds per check and the average number of objects checked '''
+    pong_model.broad_phase = broad_phase
+    ball = model.ball
+    checked = 0
+    elapsed = 0
+    for (x, y, angle, inplay) in positions:
+        if not inplay:
+            continue
+        ball.set_position(x, y)
+        ball.set_angle(angle)
+        ball.inplay = True
+        checked += len(model.get_bouncing_candidates(1.0)) + len(model.get_net_candidates(1.0))
+        start = time.perf_counter()
+        model.check_ball(1.0)
+        elapsed += time.perf_counter() - start
+    number = max(1, len([p for p in positions if p[3]]))
+    return 1e6 * elapsed / number, checked / number
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Times the ball's collision checks for different numbers of players, with and without the broad phase.")
+    parser.add_argument('-f', '--frames', type=int, default=5000, help='Frames to play for each number of players')
+    parser.add_argument('-p', '--players', type=str, default='2,3,4,6,8,12,16', help='Comma-separated numbers of players')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    tracer.set_level("model", "error")
+    print("{} frames".format(args.frames))
+    print("{:>7} {:>10} {:>10} {:>10} {:>10}".format("players", "all us", "all objs", "grid us", "grid objs"))
+    for number_players in [int(n) for n in args.players.split(",")]:
+        (model, positions) = play(number_players, args.frames)
+        (all_time, all_objects) = time_checks(model, positions, False)
+        (grid_time, grid_objects) = time_checks(model, positions, True)
+        print("{:>7} {:>10.2f} {:>10.1f} {:>10.2f} {:>10.1f}".format(number_players, all_time, all_objects, grid_time, grid_objects))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# Headless self-play benchmark for the Pong bots.  Bots play each other
+# without a GUI, on a simulated 60 frames per second clock (so the bots'
+# move_frequency limit works as in a real game), and we compare:
+#
+# - dumb bots, which follow the ball once it is close (DumbBotPlayer)
+# - predictive bots, which move to where the ball's trajectory, bouncing
+#   off the walls, reaches their bar (PredictiveBotPlayer)
+# - player 1 predictive against dumb bots
+#
+#   python3 pong_bots_bench.py [-f frames] [-p players,players,...]
+#
+# For each game, we report the points each player conceded per 1000
+# frames, the microseconds the bots took per frame, and how many times
+# the ball's trajectory was worked out.  Then we time predicting where
+# the ball reaches many bars at once, against working out the ball's
+# trajectory separately for each bar.
+
+import argparse, time
+from random import seed
+
+import pong_model
+from pong_model import Model, DumbBotPlayer, PredictiveBotPlayer
+from pong_geometry import BallTrajectory
+from pong_arena_bench import StubController
+from pong_trace import tracer
+
+FRAME_TIME = 1/60
+
+''' Stands in for time.time in pong_model, so bots move as often as they
+would at 60 frames per second however fast we run the frames. '''
+class FrameClock():
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+def play(number_players, frames, bot_classes):
+    ''' plays a game between bots of the given classes, returning the
+        points each conceded, the bots' time per frame and the number of
+        trajectories worked out '''
+    seed(number_players)
+    clock = FrameClock()
+    pong_model.time = clock
+    model = Model(StubController(), number_players)
+    model.set_players_info([(i, 'bot') for i in range(1, number_players + 1)])
+    for (player_id, bot_class) in zip(range(1, number_players + 1), bot_classes):
+        model.bots[player_id] = bot_class(model.bars[player_id - 1], model)
+    model.game_running = True
+    conceded = [0] * number_players
+    trajectories = 0
+    bots_time = 0
+    update_score = model.update_score
+    def count_conceded(net_id):
+        conceded[int(net_id) - 1] += 1
+        update_score(net_id)
+    model.update_score = count_conceded
+    for frame in range(frames):
+        clock.now += FRAME_TIME
+        # update() ends with the bots acting; time them separately
+        bots = model.bots
+        model.bots = {}
+        model.update(1.0)
+        model.bots = bots
+        trajectory = model.trajectory
+        start = time.perf_counter()
+        for bot in bots.values():
+            bot.act()
+        bots_time += time.perf_counter() - start
+        if model.trajectory is not trajectory:
+            trajectories += 1
+        # keep playing after somebody wins
+        model.game_running = True
+    pong_model.time = time.time
+    return conceded, 1e6 * bots_time / frames, trajectories
+
+def time_crossings(number_bars, repeats):
+    ''' microseconds to predict where the ball reaches number_bars bars:
+        sharing one trajectory, and working one out for each bar '''
+    # the bars of an arena with up to 16 sides, reused if there are more of them
+    model = Model(StubController(), min(max(2, number_bars), 16))
+    faces = [model.bar_faces[i % len(model.bar_faces)] for i in range(number_bars)]
+    position = model.ball.get_position()
+    start = time.perf_counter()
+    for repeat in range(repeats):
+        BallTrajectory(position.X, position.Y, 0.3 + repeat * 0.01, model.mirrors).crossings(faces)
+    shared = time.perf_counter() - start
+    start = time.perf_counter()
+    for repeat in range(repeats):
+        for face in faces:
+            BallTrajectory(position.X, position.Y, 0.3 + repeat * 0.01, model.mirrors).crossing(face)
+    separate = time.perf_counter() - start
+    return 1e6 * shared / repeats, 1e6 * separate / repeats
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares the Pong bots in headless self-play.')
+    parser.add_argument('-f', '--frames', type=int, default=20000, help='Frames to play in each game')
+    parser.add_argument('-p', '--players', type=str, default='2,4,8', help='Comma-separated numbers of players')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    tracer.set_level("model", "error")
+    print("{} frames per game".format(args.frames))
+    print("{:>7} {:<22} {:>32} {:>9} {:>13}".format("players", "bots", "conceded per 1000 frames", "bots us", "trajectories"))
+    for number_players in [int(n) for n in args.players.split(",")]:
+        for (name, bot_classes) in [("dumb", [DumbBotPlayer] * number_players),
+                                    ("predictive", [PredictiveBotPlayer] * number_players),
+                                    ("1 predictive, rest dumb", [PredictiveBotPlayer] + [DumbBotPlayer] * (number_players - 1))]:
+            (conceded, bots_time, trajectories) = play(number_players, args.frames, bot_classes)
+            per_thousand = " ".join(["{:.1f}".format(1000 * points / args.frames) for points in conceded])
+            print("{:>7} {:<22} {:>32} {:>9.1f} {:>13}".format(number_players, name, per_thousand, bots_time, trajectories))
+    print()
+    print("{:>7} {:>12} {:>12}".format("bars", "shared us", "separate us"))
+    for number_bars in [1, 4, 16, 64]:
+        (shared, separate) = time_crossings(number_bars, 2000)
+        print("{:>7} {:>12.1f} {:>12.1f}".format(number_bars, shared, separate))
+
+if __name__ == "__main__":
+    main()
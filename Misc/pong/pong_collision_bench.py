@@ -0,0 +1,124 @@
+# Fuzz test and benchmark for the two ways the Pong model bounces the
+# ball off bars: the original half-plane checks
+# (GenericBar.get_bouncing_angle) and swept collision detection
+# (GenericBar.get_swept_bouncing_angle).  Runs without a GUI.
+#
+# For many random balls near a bar, we work out by brute force whether
+# the ball's next move really touches the bar, and compare each engine's
+# answer with that, and with each other.
+#
+#   python3 pong_collision_bench.py [number_of_cases]
+
+import io, sys, time
+from contextlib import redirect_stdout
+from math import pi, cos, sin, sqrt
+from random import Random
+
+from pong_model import Ball, Bar, Wall
+from pong_geometry import Point
+
+SPEEDS = [1, 2, 5, 10]
+STEPS = 200    # samples along the move for the brute force check
+
+def distance_to_bar(bar, x, y):
+    (ux, uy) = bar.length_direction
+    rx = x - bar.x
+    ry = y - bar.y
+    along = abs(rx * ux + ry * uy) - bar.get_size()/2
+    across = abs(- rx * uy + ry * ux) - bar.get_thickness()/2
+    if along <= 0 and across <= 0:
+        return max(along, across)
+    return sqrt(max(along, 0)**2 + max(across, 0)**2)
+
+def really_touches(bar, ball, speed):
+    (dx, dy) = ball.get_delta_future_position(speed)
+    pos = ball.get_position()
+    for step in range(STEPS + 1):
+        t = step / STEPS
+        if distance_to_bar(bar, pos.X + t*dx, pos.Y + t*dy) < ball.get_size():
+            return True
+    return False
+
+def random_case(rand):
+    if rand.random() < 0.5:
+        bar = Bar(2, 20)
+        bar.set_position(960, rand.uniform(100, 600))
+    else:
+        bar = Wall(500, 0, 1000)
+    while True:
+        ball = Ball()
+        ball.inplay = True
+        ball.set_position(bar.x + rand.uniform(-150, 150), bar.y + rand.uniform(-150, 150))
+        ball.set_angle(rand.uniform(-pi, pi))
+        if distance_to_bar(bar, ball.get_position().X, ball.get_position().Y) >= ball.get_size():
+            return bar, ball, rand.choice(SPEEDS)
+
+def copy_ball(ball):
+    new_ball = Ball()
+    new_ball.inplay = True
+    new_ball.set_position(ball.get_position().X, ball.get_position().Y)
+    new_ball.set_angle(ball.get_angle())
+    return new_ball
+
+def run_engine(engine, bar, ball, speed):
+    ball = copy_ball(ball)
+    start = time.perf_counter()
+    try:
+        # the original engine prints a lot; we don't want to time the terminal
+        with redirect_stdout(io.StringIO()):
+            angle = engine(bar, ball, speed)
+        error = False
+    except RuntimeError:
+        angle = None
+        error = True
+    return angle, error, time.perf_counter() - start
+
+def halfplanes(bar, ball, speed):
+    return bar.get_bouncing_angle(ball, speed)
+
+def swept(bar, ball, speed):
+    return bar.get_swept_bouncing_angle(ball, speed)
+
+def main():
+    cases = 20000
+    if len(sys.argv) > 1:
+        cases = int(sys.argv[1])
+    rand = Random(1)
+    stats = {}
+    for name in ["halfplanes", "swept"]:
+        stats[name] = {"missed": 0, "extra": 0, "errors": 0, "time": 0.0}
+    touching = 0
+    agree = 0
+    angle_diffs = []
+    for i in range(cases):
+        bar, ball, speed = random_case(rand)
+        truth = really_touches(bar, ball, speed)
+        if truth:
+            touching += 1
+        angles = {}
+        for name, engine in [("halfplanes", halfplanes), ("swept", swept)]:
+            angle, error, elapsed = run_engine(engine, bar, ball, speed)
+            s = stats[name]
+            s["time"] += elapsed
+            if error:
+                s["errors"] += 1
+            elif truth and angle is None:
+                s["missed"] += 1
+            elif angle is not None and not truth:
+                s["extra"] += 1
+            angles[name] = angle
+        if (angles["halfplanes"] is None) == (angles["swept"] is None):
+            agree += 1
+            if angles["swept"] is not None:
+                diff = abs((angles["halfplanes"] - angles["swept"] + pi) % (2*pi) - pi)
+                angle_diffs.append(diff)
+    print("{} cases, {} where the ball really touches the bar during its move".format(cases, touching))
+    print("engines agree on bouncing in {:.1f}% of cases; median angle difference when both bounce {:.3f} rad".format(
+        100 * agree / cases, sorted(angle_diffs)[len(angle_diffs)//2] if angle_diffs else 0))
+    print("{:>10} {:>8} {:>8} {:>8} {:>12}".format("engine", "missed", "extra", "errors", "us per call"))
+    for name in ["halfplanes", "swept"]:
+        s = stats[name]
+        print("{:>10} {:>8} {:>8} {:>8} {:>12.1f}".format(name, s["missed"], s["extra"], s["errors"], 1e6 * s["time"] / cases))
+
+if __name__ == "__main__":
+    main()
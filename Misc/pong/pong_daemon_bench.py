@@ -0,0 +1,135 @@
+# Benchmark of how a Pong player handles incoming packets, with a task
+# per datagram (process_incoming_messages) or with the latest-state
+# mailbox taken once per game tick (receive_latest_states).
+#
+# A thread sends the opponent's packets to a Controller over loopback
+# UDP, in bursts, while the game loop runs ticks that each take a few
+# milliseconds (about what drawing a frame takes).  No GUI is needed.
+#
+#   python3 pong_daemon_bench.py [-t seconds] [-b burst size] [-i burst interval ms] [-w frame work ms]
+#
+# For each way, we report the number of game ticks, the number of
+# states applied to the game, the number of tasks created, the most
+# tasks waiting to run at once, the time spent decoding and applying
+# packets, and how long after being sent the states were applied.
+
+import argparse, asyncio, socket, threading, time
+
+from pong import Controller
+from pong_packets import PacketCodec, PongState
+from network_utils import UdpPeer2PeerDaemon
+from pong_trace import tracer
+
+PORT = 9870
+
+''' Controller that measures how it handles packets from the opponent '''
+class BenchController(Controller):
+    def __init__(self):
+        super().__init__()
+        self.model.set_players_info([(1,'bot'),(2,'remote')])
+        self.waiting_net_opponent = False
+        self.latencies = []
+        self.tasks_created = 0
+        self.tasks_finished = 0
+        self.max_waiting_tasks = 0
+        self.handling_time = 0
+
+    def decode_message_from_net_opponent(self, data, addr):
+        start = time.perf_counter()
+        state = super().decode_message_from_net_opponent(data, addr)
+        self.handling_time += time.perf_counter() - start
+        return state
+
+    def apply_state_from_net_opponent(self, state):
+        start = time.perf_counter()
+        # the opponent is on the same machine, so its timestamp uses our clock
+        self.latencies.append(time.time() - state.timestamp)
+        super().apply_state_from_net_opponent(state)
+        self.handling_time += time.perf_counter() - start
+
+    # called by the daemon for each datagram, to make the coroutine it runs as a task
+    def process_message_from_net_opponent(self, data, addr):
+        self.tasks_created += 1
+        self.max_waiting_tasks = max(self.max_waiting_tasks, self.tasks_created - self.tasks_finished)
+        return self.counted_process_message(data, addr)
+
+    async def counted_process_message(self, data, addr):
+        await super().process_message_from_net_opponent(data, addr)
+        self.tasks_finished += 1
+
+def send_bursts(port, duration, burst, interval):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    codec = PacketCodec()
+    state = PongState()
+    state.set_bar(0, 2, 960, 350)
+    state.scores[:] = [0, 0]
+    state.game_running = True
+    end = time.time() + duration
+    sent = 0
+    while time.time() < end:
+        for i in range(burst):
+            state.bars[0][2] = 100 + sent % 500
+            sock.sendto(codec.encode(state), ('127.0.0.1', port))
+            sent += 1
+        time.sleep(interval)
+    sock.close()
+
+async def game_loop(controller, duration, frame_work):
+    ticks = 0
+    end = time.time() + duration + 0.2
+    while time.time() < end:
+        controller.apply_latest_states()
+        # stand in for the model and view updates
+        work_end = time.perf_counter() + frame_work
+        while time.perf_counter() < work_end:
+            pass
+        ticks += 1
+        await asyncio.sleep(0.001)
+    return ticks
+
+def run(fast_path, port, args):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    controller = BenchController()
+    daemon = UdpPeer2PeerDaemon(port, port + 1000)
+    if fast_path:
+        daemon.receive_latest_states(loop, controller.decode_message_from_net_opponent)
+        controller.daemon = daemon
+    else:
+        daemon.process_incoming_messages(loop, packet_handle_function = controller.process_message_from_net_opponent)
+    loop.run_until_complete(asyncio.sleep(0.1))
+    sender = threading.Thread(target=send_bursts, args=(port, args.time, args.burst, args.interval / 1000))
+    sender.start()
+    ticks = loop.run_until_complete(game_loop(controller, args.time, args.work / 1000))
+    sender.join()
+    loop.run_until_complete(daemon.shutdown())
+    loop.close()
+    latencies = sorted(controller.latencies)
+    if fast_path:
+        name = "mailbox"
+    else:
+        name = "task per datagram"
+    print("{:>18} {:>7} {:>8} {:>7} {:>13} {:>12.1f} {:>10.2f} {:>10.2f}".format(
+        name, ticks, len(latencies), controller.tasks_created, controller.max_waiting_tasks,
+        1000 * controller.handling_time, 1000 * sum(latencies) / len(latencies),
+        1000 * latencies[int(len(latencies) * 0.95)]))
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares handling Pong packets with a task per datagram and with a latest-state mailbox.')
+    parser.add_argument('-t', '--time', type=float, default=5, help='Seconds to run each test for')
+    parser.add_argument('-b', '--burst', type=int, default=20, help='Packets in each burst')
+    parser.add_argument('-i', '--interval', type=float, default=10, help='Milliseconds between bursts')
+    parser.add_argument('-w', '--work', type=float, default=5, help='Milliseconds of work in each game tick')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    tracer.set_level("net", "error")
+    print("bursts of {} packets every {:.0f}ms, {:.0f}ms of work per tick".format(args.burst, args.interval, args.work))
+    print("{:>18} {:>7} {:>8} {:>7} {:>13} {:>12} {:>10} {:>10}".format(
+        "", "ticks", "applied", "tasks", "max waiting", "handling ms", "mean ms", "95th ms"))
+    run(False, PORT, args)
+    run(True, PORT + 1, args)
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,20 @@ import math
 
 class Point():
     '''Creates a point on a coordinate plane with values x and y.'''
+    # points are created and moved on every frame, so they don't carry a
+    # __dict__ around
+    __slots__ = ('X', 'Y')
+
     def __init__(self, x, y):
         self.X = round(x,3)
         self.Y = round(y,3)
 
+    '''move this point to (x,y), rounding as a new point would.  Use
+       this rather than creating a new point on hot paths '''
+    def set(self, x, y):
+        self.X = round(x,3)
+        self.Y = round(y,3)
+
     '''create a new object from this one.  we use this when we want to
        create a modified copy of a point without modifying the original object'''
     def copy(self):
@@ -34,7 +44,12 @@ class Point():
     def distance(self, other):
         dx = self.X - other.X
         dy = self.Y - other.Y
-        return math.sqrt(dx**2 + dy**2)
+        return math.sqrt(dx * dx + dy * dy)
+
+    def distance_xy(self, x, y):
+        dx = self.X - x
+        dy = self.Y - y
+        return math.sqrt(dx * dx + dy * dy)
 
     def __eq__(self, other):
         return ((self.X, self.Y) == (other.X, other.Y))
@@ -46,31 +61,63 @@ class Point():
         return ((self.X, self.Y) < (other.X, other.Y))
 
 class Line():
-    '''Creates a line ax + by + c = 0 from input coefficients a, b, c.'''
+    '''Creates a line ax + by + c = 0 from input coefficients a, b, c.
+       The coefficients divided by sqrt(a**2 + b**2) are worked out once,
+       here, as (na, nb, nc): na * x + nb * y + nc is then the signed
+       distance of (x,y) from the line.'''
+    __slots__ = ('a', 'b', 'c', 'na', 'nb', 'nc')
+
     def __init__(self, a, b, c):
+        self.set_coefficients(a, b, c)
+
+    ''' change the line in place '''
+    def set_coefficients(self, a, b, c):
         self.a = a
         self.b = b
         self.c = c
+        # a degenerate line (a = b = 0) is left unnormalised
+        norm = math.sqrt(a * a + b * b) or 1
+        self.na = a / norm
+        self.nb = b / norm
+        self.nc = c / norm
 
     def get_coefficients(self):
         return (self.a, self.b, self.c)
 
+    def get_normalised_coefficients(self):
+        return (self.na, self.nb, self.nc)
+
     def get_slope_and_intersect(self):
         if self.b == 0:
             return (math.inf,self.c/self.a)
         return (-self.a/self.b,-self.c/self.b)
 
+    def get_signed_distance_xy(self, x, y):
+        return self.na * x + self.nb * y + self.nc
+
     def get_min_distance_to_point(self, point):
-        num_distance = abs(self.a * point.X + self.b * point.Y + self.c)
-        den_distance = math.sqrt(self.a**2 + self.b**2)
-        return num_distance / den_distance
+        return abs(self.na * point.X + self.nb * point.Y + self.nc)
+
+    def get_min_distance_to_xy(self, x, y):
+        return abs(self.na * x + self.nb * y + self.nc)
+
+    def get_min_distances_to_points(self, points):
+        ''' the distances of many points from this line, in one call '''
+        (na, nb, nc) = (self.na, self.nb, self.nc)
+        return [abs(na * point.X + nb * point.Y + nc) for point in points]
 
     def get_xaxis_inclination_angle(self):
         (m,_) = self.get_slope_and_intersect()
         return math.atan(m)
 
     def get_intersection(self, other_line):
-        intersection_x, intersection_y = 0, 0
+        intersection = self.get_intersection_xy(other_line)
+        if intersection is None:
+            return None
+        return Point(intersection[0],intersection[1])
+
+    ''' as get_intersection, but returns an (x,y) tuple rather than a new (rounded) Point '''
+    def get_intersection_xy(self, other_line):
         m1, q1 = self.get_slope_and_intersect()
         m2, q2 = other_line.get_slope_and_intersect()
         # parallel lines
@@ -86,7 +133,7 @@ class Line():
         else:
             intersection_x = (q2 - q1) / (m1 - m2)
             intersection_y = m1 * intersection_x + q1
-        return Point(intersection_x,intersection_y)
+        return (intersection_x, intersection_y)
 
     def __str__(self):
         return "Line (%sx + %sy + %s = 0)"%(self.a, self.b, self.c)
@@ -94,7 +141,24 @@ class Line():
     def __repr__(self):
         return str(self)
 
+''' The distances of (x,y) from each of the lines, in one call. '''
+def distances_to_lines(lines, x, y):
+    return [abs(line.na * x + line.nb * y + line.nc) for line in lines]
+
+''' The line closest to (x,y), and its distance, or (None, inf) if there are no lines. '''
+def nearest_line(lines, x, y):
+    best_line = None
+    best_distance = math.inf
+    for line in lines:
+        distance = abs(line.na * x + line.nb * y + line.nc)
+        if distance < best_distance:
+            best_line = line
+            best_distance = distance
+    return (best_line, best_distance)
+
 class LineFactory():
+    __slots__ = ()
+
     def get_line_traversing_point(self, a, b, point):
         c = round(- a * point.X - b * point.Y,3)
         return Line(a,b,c)
@@ -115,9 +179,30 @@ class LineFactory():
         return self.get_line_traversing_point(a,b,point)
 
 class HalfPlane():
+    # sign is 1 if fun is greater_or_equal, -1 if it is less_or_equal, so
+    # contains() can compare directly rather than calling fun
+    __slots__ = ('line', 'fun', 'sign')
+
     def __init__(self, delimiting_line, hf_function):
+        self.set(delimiting_line, hf_function)
+
+    ''' change the half plane in place '''
+    def set(self, delimiting_line, hf_function):
         self.line = delimiting_line
         self.fun = hf_function
+        if hf_function is greater_or_equal:
+            self.sign = 1
+        elif hf_function is less_or_equal:
+            self.sign = -1
+        else:
+            self.sign = 0
+
+    ''' turn the half plane into the opposite one, in place '''
+    def flip(self):
+        if self.fun is greater_or_equal:
+            self.set(self.line, less_or_equal)
+        else:
+            self.set(self.line, greater_or_equal)
 
     def get_line(self):
         return self.line
@@ -129,8 +214,16 @@ class HalfPlane():
         return self.line.get_xaxis_inclination_angle()
 
     def contains(self, point):
-        (a,b,c) = self.line.get_coefficients()
-        return self.fun(a * point.X + b * point.Y + c, 0)
+        return self.contains_xy(point.X, point.Y)
+
+    def contains_xy(self, x, y):
+        line = self.line
+        value = line.a * x + line.b * y + line.c
+        if self.sign > 0:
+            return value >= 0
+        if self.sign < 0:
+            return value <= 0
+        return self.fun(value, 0)
 
     def get_line_intersection(self, other_half_plane):
         return self.line.get_intersection(other_half_plane.get_line())
@@ -156,22 +249,263 @@ def less_or_equal(x,y):
     return x <= y
 
 class HalfPlaneFactory():
+    __slots__ = ('geq_fun', 'leq_fun')
+
     def __init__(self):
         self.geq_fun = greater_or_equal
         self.leq_fun = less_or_equal
 
     def get_halfplane_containing_point(self, line, point):
-        (a,b,c) = line.get_coefficients()
-        hf_function = self.geq_fun
-        if a * point.X + b * point.Y + c < 0:
-            hf_function = self.leq_fun
-        return HalfPlane(line,hf_function)
+        return HalfPlane(line,self._get_function_containing(line, point.X, point.Y))
 
     def get_halfplane_opposite_point(self, line, point):
-        hf_with_point = self.get_halfplane_containing_point(line, point)
-        new_fun = self.geq_fun
-        if hf_with_point.get_function() == self.geq_fun:
-            new_fun = self.leq_fun
-        return HalfPlane(hf_with_point.get_line(),new_fun)
+        hf_function = self.leq_fun
+        if self._get_function_containing(line, point.X, point.Y) == self.leq_fun:
+            hf_function = self.geq_fun
+        return HalfPlane(line,hf_function)
 
+    def get_halfplanes_opposite_point(self, lines, point):
+        ''' the half planes opposite point for each of the lines, in one call '''
+        return [self.get_halfplane_opposite_point(line, point) for line in lines]
+
+    def _get_function_containing(self, line, x, y):
+        if line.a * x + line.b * y + line.c < 0:
+            return self.leq_fun
+        return self.geq_fun
+
+
+
+
+''' Swept collision between a moving circle and a rectangle that can be at
+any inclination.  The circle starts at (px,py) and moves by (dx,dy); the
+rectangle is centred at (cx,cy), with its length along the unit vector
+(ux,uy) and its thickness along the perpendicular.  Returns None if the
+circle doesn't touch the rectangle during the move, otherwise a tuple
+(t, nx, ny, depth): t in [0,1] is the fraction of the move at which they
+first touch, and (nx,ny) is the unit normal of the rectangle at the
+contact point.  If the circle already overlaps the rectangle, t is 0 and
+depth is how far the circle must move along the normal to get out;
+otherwise depth is 0.
+
+This is equivalent to moving the circle's centre as a point against the
+rectangle grown by the circle's radius, whose corners are rounded. '''
+def swept_circle_rectangle(px, py, dx, dy, radius, cx, cy, ux, uy, half_length, half_thickness):
+    # work in the rectangle's frame of reference, where it is axis aligned
+    rx = px - cx
+    ry = py - cy
+    x = rx * ux + ry * uy
+    y = - rx * uy + ry * ux
+    vx = dx * ux + dy * uy
+    vy = - dx * uy + dy * ux
+    hx = half_length
+    hy = half_thickness
+
+    # already overlapping: push out along the shortest way
+    closest_x = min(max(x, -hx), hx)
+    closest_y = min(max(y, -hy), hy)
+    ox = x - closest_x
+    oy = y - closest_y
+    dist2 = ox * ox + oy * oy
+    if dist2 < radius * radius:
+        if dist2 > 0:
+            dist = math.sqrt(dist2)
+            nx, ny = ox / dist, oy / dist
+            depth = radius - dist
+        elif hx - abs(x) < hy - abs(y):
+            # centre inside the rectangle
+            nx, ny = math.copysign(1, x), 0
+            depth = radius + hx - abs(x)
+        else:
+            nx, ny = 0, math.copysign(1, y)
+            depth = radius + hy - abs(y)
+        return (0, nx * ux - ny * uy, nx * uy + ny * ux, depth)
+
+    # entry time into the rectangle grown by radius on every side (slab test)
+    t_enter, t_exit = 0, 1
+    enter_axis = None
+    for (pos, vel, half, axis) in ((x, vx, hx + radius, 0), (y, vy, hy + radius, 1)):
+        if vel == 0:
+            if abs(pos) > half:
+                return None
+            continue
+        t1 = (-half - pos) / vel
+        t2 = (half - pos) / vel
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > t_enter:
+            t_enter = t1
+            enter_axis = axis
+        t_exit = min(t_exit, t2)
+        if t_enter > t_exit:
+            return None
+    # if enter_axis is None, the circle starts inside the grown rectangle
+    # but doesn't overlap the real one, so it must be near a corner
+    hit_x = x + vx * t_enter
+    hit_y = y + vy * t_enter
+
+    if enter_axis is not None and (abs(hit_x) <= hx or abs(hit_y) <= hy):
+        # hit a flat edge
+        if enter_axis == 0:
+            nx, ny = math.copysign(1, hit_x), 0
+        else:
+            nx, ny = 0, math.copysign(1, hit_y)
+        t = t_enter
+    else:
+        # in a corner region: solve |p + t*v - corner| = radius
+        corner_x = math.copysign(hx, hit_x)
+        corner_y = math.copysign(hy, hit_y)
+        fx = x - corner_x
+        fy = y - corner_y
+        a = vx * vx + vy * vy
+        b = fx * vx + fy * vy
+        c = fx * fx + fy * fy - radius * radius
+        discriminant = b * b - a * c
+        if discriminant < 0:
+            return None    # passes by the corner
+        t = (-b - math.sqrt(discriminant)) / a
+        if t < 0 or t > 1:
+            return None
+        nx = (fx + vx * t) / radius
+        ny = (fy + vy * t) / radius
+
+    # back to screen coordinates
+    return (t, nx * ux - ny * uy, nx * uy + ny * ux, 0)
+
+''' Angle of a ball travelling at the given angle after bouncing off a
+surface with unit normal (nx,ny). '''
+def reflected_angle(angle, nx, ny):
+    vx = math.cos(angle)
+    vy = math.sin(angle)
+    dot = vx * nx + vy * ny
+    return math.atan2(vy - 2 * dot * ny, vx - 2 * dot * nx)
+
+''' Broad phase for collision checks: the canvas is divided into square
+cells, and each cell lists the objects whose bounding box, grown by
+margin, overlaps it.  candidates() then only returns the objects that
+could be within reach of a point, without checking any of the others. '''
+class BroadPhaseGrid():
+    def __init__(self, width, height, cell_size, margin):
+        self.cell_size = cell_size
+        self.margin = margin
+        self.columns = int(width // cell_size) + 1
+        self.rows = int(height // cell_size) + 1
+        self.objects = []
+        self.cells = [()] * (self.columns * self.rows)
+
+    def _column(self, x):
+        return min(max(int(x // self.cell_size), 0), self.columns - 1)
+
+    def _row(self, y):
+        return min(max(int(y // self.cell_size), 0), self.rows - 1)
+
+    def add(self, obj, xmin, ymin, xmax, ymax):
+        ''' adds obj, whose bounding box is given; objects are returned
+            by candidates() in the order they were added '''
+        self.objects.append(obj)
+        for row in range(self._row(ymin - self.margin), self._row(ymax + self.margin) + 1):
+            for column in range(self._column(xmin - self.margin), self._column(xmax + self.margin) + 1):
+                index = row * self.columns + column
+                self.cells[index] = self.cells[index] + (obj,)
+
+    def candidates(self, x, y, reach):
+        ''' returns the objects that may be within reach of (x,y) '''
+        if reach <= self.margin:
+            # the common case: one cell already lists everything in reach
+            return self.cells[self._row(y) * self.columns + self._column(x)]
+        found = set()
+        for row in range(self._row(y - reach), self._row(y + reach) + 1):
+            for column in range(self._column(x - reach), self._column(x + reach) + 1):
+                found.update(self.cells[row * self.columns + column])
+        return [obj for obj in self.objects if obj in found]
+
+''' Divides the plane around a centre into equal angular sectors, the
+first of which is centred on first_angle. '''
+class AngularSectors():
+    def __init__(self, xcenter, ycenter, number, first_angle):
+        self.x = xcenter
+        self.y = ycenter
+        self.number = number
+        self.first_angle = first_angle
+        self.width = 2 * math.pi / number
+
+    def get_sector_angle(self, index):
+        return self.first_angle + index * self.width
+
+    def index_of(self, point):
+        angle = math.atan2(point.Y - self.y, point.X - self.x)
+        return int(round((angle - self.first_angle) / self.width)) % self.number
+
+''' The region made of some of the sectors of an AngularSectors. Like a
+HalfPlane, it can tell whether it contains a point. '''
+class SectorsRegion():
+    def __init__(self, sectors, indices):
+        self.sectors = sectors
+        self.indices = set(indices)
 
+    def contains(self, point):
+        return self.sectors.index_of(point) in self.indices
+
+''' The path of a ball's centre from (x,y) in the direction of angle,
+bouncing off mirrors: Lines whose normalised signed distance is positive
+on the side the ball travels on (e.g., walls, moved out by their half
+thickness plus the ball's radius).  The path is worked out once, for up
+to max_bounces bounces, and any number of players can then ask where it
+crosses their own line with crossing() or, all at once, crossings(). '''
+class BallTrajectory():
+    __slots__ = ('x', 'y', 'angle', 'segments')
+
+    def __init__(self, x, y, angle, mirrors, max_bounces=8):
+        self.x = x
+        self.y = y
+        self.angle = angle
+        # (start x, start y, unit dx, unit dy, length, distance travelled before it)
+        self.segments = []
+        dx = math.cos(angle)
+        dy = math.sin(angle)
+        travelled = 0
+        for bounce in range(max_bounces + 1):
+            (mirror, length) = (None, math.inf)
+            for candidate in mirrors:
+                toward = candidate.na * dx + candidate.nb * dy
+                if toward >= 0:
+                    continue    # moving away from it, or along it
+                # a ball already past the mirror bounces straight away
+                t = max(0, - (candidate.na * x + candidate.nb * y + candidate.nc) / toward)
+                if t < length:
+                    (mirror, length) = (candidate, t)
+            self.segments.append((x, y, dx, dy, length, travelled))
+            if mirror is None:
+                break
+            x += dx * length
+            y += dy * length
+            travelled += length
+            dot = dx * mirror.na + dy * mirror.nb
+            dx -= 2 * dot * mirror.na
+            dy -= 2 * dot * mirror.nb
+
+    def crossing(self, target):
+        ''' returns (x, y, distance) where the path first reaches target,
+            a Line whose normalised signed distance is positive on the
+            ball's side, and how far the ball travels to get there; or
+            None if it doesn't within max_bounces bounces '''
+        return self.crossings((target,))[0]
+
+    def crossings(self, targets):
+        ''' as crossing(), for each of the targets, going through the path only once '''
+        results = [None] * len(targets)
+        pending = list(range(len(targets)))
+        for (x, y, dx, dy, length, travelled) in self.segments:
+            still_pending = []
+            for index in pending:
+                target = targets[index]
+                toward = target.na * dx + target.nb * dy
+                if toward < 0:
+                    t = max(0, - (target.na * x + target.nb * y + target.nc) / toward)
+                    if t <= length:
+                        results[index] = (x + dx * t, y + dy * t, travelled + t)
+                        continue
+                still_pending.append(index)
+            pending = still_pending
+            if not pending:
+                break
+        return results
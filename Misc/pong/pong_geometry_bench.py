@@ -0,0 +1,147 @@
+# Micro-benchmarks for the geometry classes the Pong model uses on every
+# frame (Point, Line, HalfPlane and HalfPlaneFactory in pong_geometry.py).
+#
+# Each operation is timed with the current classes, and with copies of
+# the classes as they were before they got __slots__, cached normalised
+# line coefficients and in-place and batch methods (the Legacy classes
+# below), doing the same work.
+#
+#   python3 pong_geometry_bench.py [-n repeats]
+#
+# We report microseconds per operation for each, and the size of a point
+# and a line.
+
+import argparse, math, sys, timeit
+
+from pong_geometry import Point, Line, HalfPlane, HalfPlaneFactory, distances_to_lines, greater_or_equal, less_or_equal
+
+
+class LegacyPoint():
+    def __init__(self, x, y):
+        self.X = round(x,3)
+        self.Y = round(y,3)
+
+    def distance(self, other):
+        dx = self.X - other.X
+        dy = self.Y - other.Y
+        return math.sqrt(dx**2 + dy**2)
+
+class LegacyLine():
+    def __init__(self, a, b, c):
+        self.a = a
+        self.b = b
+        self.c = c
+
+    def get_coefficients(self):
+        return (self.a, self.b, self.c)
+
+    def get_slope_and_intersect(self):
+        if self.b == 0:
+            return (math.inf,self.c/self.a)
+        return (-self.a/self.b,-self.c/self.b)
+
+    def get_min_distance_to_point(self, point):
+        num_distance = abs(self.a * point.X + self.b * point.Y + self.c)
+        den_distance = math.sqrt(self.a**2 + self.b**2)
+        return num_distance / den_distance
+
+    def get_intersection(self, other_line):
+        m1, q1 = self.get_slope_and_intersect()
+        m2, q2 = other_line.get_slope_and_intersect()
+        if m1 == m2:
+            return None
+        if m1 == math.inf:
+            intersection_x = -q1
+            intersection_y = m2 * intersection_x + q2
+        elif m2 == math.inf:
+            intersection_x = -q2
+            intersection_y = m1 * intersection_x + q1
+        else:
+            intersection_x = (q2 - q1) / (m1 - m2)
+            intersection_y = m1 * intersection_x + q1
+        return LegacyPoint(intersection_x,intersection_y)
+
+class LegacyHalfPlane():
+    def __init__(self, delimiting_line, hf_function):
+        self.line = delimiting_line
+        self.fun = hf_function
+
+    def get_line(self):
+        return self.line
+
+    def get_function(self):
+        return self.fun
+
+    def contains(self, point):
+        (a,b,c) = self.line.get_coefficients()
+        return self.fun(a * point.X + b * point.Y + c, 0)
+
+class LegacyHalfPlaneFactory():
+    def __init__(self):
+        self.geq_fun = greater_or_equal
+        self.leq_fun = less_or_equal
+
+    def get_halfplane_containing_point(self, line, point):
+        (a,b,c) = line.get_coefficients()
+        hf_function = self.geq_fun
+        if a * point.X + b * point.Y + c < 0:
+            hf_function = self.leq_fun
+        return LegacyHalfPlane(line,hf_function)
+
+    def get_halfplane_opposite_point(self, line, point):
+        hf_with_point = self.get_halfplane_containing_point(line, point)
+        new_fun = self.geq_fun
+        if hf_with_point.get_function() == self.geq_fun:
+            new_fun = self.leq_fun
+        return LegacyHalfPlane(hf_with_point.get_line(),new_fun)
+
+
+def time_per_call(statement, repeats, namespace):
+    ''' microseconds per run of statement, the best of three '''
+    timer = timeit.Timer(statement, globals=namespace)
+    return 1e6 * min(timer.repeat(3, repeats)) / repeats
+
+def cases():
+    ''' (name, legacy statement, new statement, number of operations per statement, namespace) '''
+    lines = [(1,0,-90),(1,0,-110),(0,1,-80),(0,1,-120),(1,-1,5),(2,-1,-30)]
+    namespace = {
+        'LegacyPoint': LegacyPoint, 'Point': Point,
+        'old_point': LegacyPoint(120.5,130.25), 'new_point': Point(120.5,130.25),
+        'old_other': LegacyPoint(3,4), 'new_other': Point(3,4),
+        'old_line': LegacyLine(1,-1,5), 'new_line': Line(1,-1,5),
+        'old_vertical': LegacyLine(1,0,-90), 'new_vertical': Line(1,0,-90),
+        'old_lines': [LegacyLine(*c) for c in lines], 'new_lines': [Line(*c) for c in lines],
+        'old_half_plane': LegacyHalfPlane(LegacyLine(1,-1,5), less_or_equal),
+        'new_half_plane': HalfPlane(Line(1,-1,5), less_or_equal),
+        'old_factory': LegacyHalfPlaneFactory(), 'new_factory': HalfPlaneFactory(),
+        'distances_to_lines': distances_to_lines,
+    }
+    return [
+        ("Point: move to (x,y)", "old_point = LegacyPoint(10.5,20.25)", "new_point.set(10.5,20.25)", 1, namespace),
+        ("Point: distance", "old_point.distance(old_other)", "new_point.distance(new_other)", 1, namespace),
+        ("Line: distance to point", "old_line.get_min_distance_to_point(old_point)", "new_line.get_min_distance_to_point(new_point)", 1, namespace),
+        ("Line: distances to 6 lines", "[l.get_min_distance_to_point(old_point) for l in old_lines]", "distances_to_lines(new_lines, new_point.X, new_point.Y)", 6, namespace),
+        ("Line: intersection", "old_line.get_intersection(old_vertical)", "new_line.get_intersection_xy(new_vertical)", 1, namespace),
+        ("HalfPlane: contains", "old_half_plane.contains(old_point)", "new_half_plane.contains(new_point)", 1, namespace),
+        ("HalfPlaneFactory: opposite", "old_factory.get_halfplane_opposite_point(old_line, old_point)", "new_factory.get_halfplane_opposite_point(new_line, new_point)", 1, namespace),
+    ]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Times the Pong geometry classes against their older versions.')
+    parser.add_argument('-n', '--repeats', type=int, default=200000, help='Times to run each operation')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    print("{:<30} {:>10} {:>10} {:>8}".format("", "legacy us", "new us", "speedup"))
+    for (name, legacy, new, operations, namespace) in cases():
+        legacy_time = time_per_call(legacy, args.repeats, namespace) / operations
+        new_time = time_per_call(new, args.repeats, namespace) / operations
+        print("{:<30} {:>10.3f} {:>10.3f} {:>7.2f}x".format(name, legacy_time, new_time, legacy_time / new_time))
+    print("bytes per point: {} legacy, {} new".format(
+        sys.getsizeof(LegacyPoint(1,2)) + sys.getsizeof(LegacyPoint(1,2).__dict__), sys.getsizeof(Point(1,2))))
+    print("bytes per line: {} legacy, {} new".format(
+        sys.getsizeof(LegacyLine(1,2,3)) + sys.getsizeof(LegacyLine(1,2,3).__dict__), sys.getsizeof(Line(1,2,3))))
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
 # Simple Pong Game Model.
 
-from math import pi,sqrt,cos,sin,tan,atan,inf
+from math import pi,sqrt,cos,sin,tan,atan,atan2,copysign,inf
 from random import Random
 from abc import abstractmethod
 from time import time
 
-from pong_geometry import Point,Line,LineFactory,HalfPlaneFactory
-from pong_settings import Direction,winning_score
+from pong_geometry import Point,Line,LineFactory,HalfPlaneFactory,swept_circle_rectangle,reflected_angle
+from pong_geometry import BroadPhaseGrid,AngularSectors,SectorsRegion,BallTrajectory
+from pong_settings import Direction,winning_score,swept_collisions,broad_phase,bot_strategy
+from pong_trace import model_trace
+
+ARENA_MARGIN = 10           # space between a polygonal arena and the canvas edges
+BROAD_PHASE_CELL = 50       # size of the broad phase grid's cells
+BROAD_PHASE_STEP = 40       # ball moves up to this far per frame without a slower broad phase lookup
 
 
 #########
@@ -32,32 +38,140 @@ class Model():
         self.bar_move_unit = self.controller.get_bar_move_unit()
 
     def init_game_objects(self, number_players):        
-        # Ball (initially placed in the middle of the screen)
+        self.number_players = number_players
         self.ball = Ball()
-        self.ball_starting_point = Point(self.canvas_width/2,self.distance_bar_bound*8) 
+        if number_players == 2:
+            self._init_court()
+        else:
+            self._init_polygonal_arena(number_players)
         self.ball.set_position(self.ball_starting_point.X,self.ball_starting_point.Y)
         self.controller.register_ball(self.ball)
-        # Walls
-        self.walls = [Wall(self.canvas_width/2,0,self.canvas_width), Wall(self.canvas_width/2,self.canvas_height,self.canvas_width)]
         for wall in self.walls:
             self.controller.register_wall(wall)
-        # Nets
-        self.nets = [Net(0,self.canvas_width/2,self.canvas_width-self.walls[0].get_thickness()*2,net_id=1),Net(self.canvas_width,self.canvas_height/2,self.canvas_height-self.walls[0].get_thickness()*2,net_id=2)]
         for net in self.nets:
             self.controller.register_net(net)
-        # Players' bars
-        self.bars = []
-        for i in range(1,number_players+1):
-            bar = Bar(i,self.bar_move_unit)
-            self.bars.append(bar)
+        for bar in self.bars:
             self.controller.register_bar(bar)
+        self._init_broad_phase()
+        self._init_trajectories()
         self._set_initial_bar_positions()
         # Players (initially empty, must be filled with set_players_info)
         self.bots = dict()
         self.local_players = dict()
         self.remote_players = dict()
 
+    ''' Two players: a rectangular court with walls at the top and the
+    bottom, and nets on the left and the right '''
+    def _init_court(self):
+        # Ball (initially placed in the middle of the screen)
+        self.ball_starting_point = Point(self.canvas_width/2,self.distance_bar_bound*8) 
+        # Walls
+        self.walls = [Wall(self.canvas_width/2,0,self.canvas_width), Wall(self.canvas_width/2,self.canvas_height,self.canvas_width)]
+        # Nets
+        self.nets = [Net(0,self.canvas_width/2,self.canvas_width-self.walls[0].get_thickness()*2,net_id=1),Net(self.canvas_width,self.canvas_height/2,self.canvas_height-self.walls[0].get_thickness()*2,net_id=2)]
+        # Players' bars, which move up and down between the walls
+        self.bars = []
+        self.sectors = None
+        wall_margin = self.walls[0].get_thickness()/2
+        for (i,xcenter) in [(1,self.distance_bar_bound),(2,self.canvas_width-self.distance_bar_bound)]:
+            bar = Bar(i,self.bar_move_unit)
+            bar.set_track(xcenter, self.canvas_height/2, self.canvas_height/2 - wall_margin - bar.get_height()/2)
+            self.bars.append(bar)
+
+    ''' Three or more players: a regular polygon with a net on each side,
+    and a bar in front of each net.  Player i's side is centred on
+    sector i-1 of self.sectors, starting with player 1 on the left. '''
+    def _init_polygonal_arena(self, number_players):
+        center = Point(self.canvas_width/2,self.canvas_height/2)
+        self.ball_starting_point = center
+        radius = min(self.canvas_width,self.canvas_height)/2 - ARENA_MARGIN
+        apothem = radius * cos(pi/number_players)
+        side = 2 * radius * sin(pi/number_players)
+        self.sectors = AngularSectors(center.X,center.Y,number_players,pi)
+        self.walls = []
+        self.nets = []
+        self.bars = []
+        for i in range(number_players):
+            angle = self.sectors.get_sector_angle(i)
+            inclination = (angle + pi/2) % (2*pi)
+            self.nets.append(Net(center.X + apothem*cos(angle),center.Y + apothem*sin(angle),side,net_inclination=inclination,net_color="light gray",net_id=i+1))
+            # the bar moves along a chord of the polygon, parallel to its net
+            bar_distance = apothem - self.distance_bar_bound
+            chord = side * bar_distance / apothem
+            bar = Bar(i+1,self.bar_move_unit,bar_height=min(100,chord/2),bar_inclination=inclination)
+            track_half_range = max(0, (chord - bar.get_height())/2 - bar.get_width())
+            bar.set_track(center.X + bar_distance*cos(angle),center.Y + bar_distance*sin(angle),track_half_range)
+            self.bars.append(bar)
+
+    ''' Every frame, the ball is only checked against the bars, walls and
+    nets that the broad phase grids list near it, rather than all of them. '''
+    def _init_broad_phase(self):
+        margin = self.ball.get_size() + BROAD_PHASE_STEP
+        self.bouncing_grid = BroadPhaseGrid(self.canvas_width,self.canvas_height,BROAD_PHASE_CELL,margin)
+        self.net_grid = BroadPhaseGrid(self.canvas_width,self.canvas_height,BROAD_PHASE_CELL,margin)
+        # bars can be anywhere along their track
+        for bar in self.bars:
+            self.bouncing_grid.add(bar,*bar.get_track_bounding_box())
+        for wall in self.walls:
+            self.bouncing_grid.add(wall,*wall.get_bounding_box())
+        for net in self.nets:
+            self.net_grid.add(net,*net.get_bounding_box())
+        self.bouncing_objects = tuple(self.bars + self.walls)
+
+    ''' Bots predict where the ball will reach their bar from its
+    trajectory, which is worked out again only when the ball's angle
+    changes, for all the bars at once. '''
+    def _init_trajectories(self):
+        self.mirrors = [self._get_facing_line(wall,wall.get_xpos(),wall.get_ypos()) for wall in self.walls]
+        self.bar_faces = []
+        for bar in self.bars:
+            center = bar.get_track_center()
+            self.bar_faces.append(self._get_facing_line(bar,center.X,center.Y))
+        self.trajectory = None
+        self.bar_crossings = None
+
+    ''' returns the line the ball's centre is on when the ball touches the
+    face of bar (centred at xcenter, ycenter) towards the middle of the
+    canvas, as a Line whose signed distance is positive on that side '''
+    def _get_facing_line(self,bar,xcenter,ycenter):
+        (ux, uy) = bar.length_direction
+        (nx, ny) = (-uy, ux)
+        if nx * (self.canvas_width/2 - xcenter) + ny * (self.canvas_height/2 - ycenter) < 0:
+            (nx, ny) = (-nx, -ny)
+        return Line(nx, ny, - nx * xcenter - ny * ycenter - bar.get_thickness()/2 - self.ball.get_size())
+
+    def get_ball_trajectory(self):
+        angle = self.ball.get_angle()
+        if self.trajectory is None or self.trajectory.angle != angle:
+            position = self.ball.get_position()
+            self.trajectory = BallTrajectory(position.X,position.Y,angle,self.mirrors)
+            self.bar_crossings = None
+        return self.trajectory
+
+    ''' returns (x, y, distance) where the ball will reach bar's face, or
+    None if it won't within a few bounces off the walls '''
+    def get_bar_crossing(self,bar):
+        trajectory = self.get_ball_trajectory()
+        if self.bar_crossings is None:
+            self.bar_crossings = trajectory.crossings(self.bar_faces)
+        return self.bar_crossings[bar.get_id()-1]
+
+    def get_bouncing_candidates(self,game_speed):
+        if not broad_phase:
+            return self.bouncing_objects
+        return self._get_candidates(self.bouncing_grid,game_speed)
+
+    def get_net_candidates(self,game_speed):
+        if not broad_phase:
+            return self.nets
+        return self._get_candidates(self.net_grid,game_speed)
+
+    def _get_candidates(self,grid,game_speed):
+        position = self.ball.get_position()
+        return grid.candidates(position.X,position.Y,self.ball.get_size() + self.ball.get_step_length(game_speed))
+
     def set_players_info(self, players_info):
+        remote_sectors = []
         for (player_id,player_type) in players_info:
             bar = self.bars[player_id-1]
             if player_type == 'local':
@@ -66,15 +180,22 @@ class Model():
                 bar.set_color('red') 
                 self.remote_players[player_id] = ManualPlayer(bar,self,is_local=False)
                 # switch control between players depending on the position of the ball
+                if self.sectors is not None:
+                    # the ball is controlled by whoever's sector it is in
+                    remote_sectors.append(player_id-1)
+                    self.ball.set_remote_player_region(SectorsRegion(self.sectors,remote_sectors))
+                    continue
                 hf_factory = HalfPlaneFactory()
                 remote_player_halfplane = hf_factory.get_halfplane_containing_point(Line(1,0,-self.canvas_width/2),bar.get_central_point())
                 self.ball.set_remote_player_region(remote_player_halfplane)
-            else:
+            elif bot_strategy == 'dumb':
                 self.bots[player_id] = DumbBotPlayer(bar,self)
+            else:
+                self.bots[player_id] = PredictiveBotPlayer(bar,self)
 
     def restart(self):
         self._set_initial_bar_positions()
-        self.score = [0,0]
+        self.score = [0] * len(self.bars)
         self.controller.update_score(self.score)
         self.kickoff_time = True
         self.game_running = True
@@ -86,9 +207,8 @@ class Model():
             self.bars[i].set_position(bar_pos.X,bar_pos.Y)
             i += 1
 
-    # NOTE: the following assumes only two players -- could be extended for more players
     def _compute_initial_bar_positions(self):
-        return [Point(self.distance_bar_bound,self.canvas_height/2), Point(self.canvas_width-self.distance_bar_bound,self.canvas_height/2)]
+        return [bar.get_track_center() for bar in self.bars]
 
     # getter and setter methods
 
@@ -128,7 +248,7 @@ class Model():
         if int(player_id) in self.remote_players:
             self.remote_players[int(player_id)].move_bar_to(xpos, ypos)
         else:
-            print("Model asked to move bar of remote player, but {} isn't a remote player -- i.e., not in {}".format(player_id, self.remote_players.keys()))
+            model_trace.error("Model asked to move bar of remote player, but {} isn't a remote player -- i.e., not in {}", player_id, list(self.remote_players.keys()))
 
     def _is_player_bar(self,bar):
         return bar.get_id() > 0 and bar.get_id() < len(self.score)+1
@@ -145,19 +265,26 @@ class Model():
             raise RuntimeError("Ball out of the screen!")
     
     def _check_ball_bouncing(self,game_speed):
-        for bar in self.bars + self.walls:
-            new_angle = bar.get_bouncing_angle(self.ball,game_speed)
+        for bar in self.get_bouncing_candidates(game_speed):
+            if swept_collisions:
+                new_angle = bar.get_swept_bouncing_angle(self.ball,game_speed)
+            else:
+                new_angle = bar.get_bouncing_angle(self.ball,game_speed)
             if new_angle != None:
-                print("Ball (at {}) bouncing from angle {} to new angle {}".format(self.ball.position,self.ball.get_angle(),new_angle))
+                model_trace.debug("Ball (at ({},{})) bouncing from angle {} to new angle {}", self.ball.position.X, self.ball.position.Y, self.ball.get_angle(), new_angle)
                 self.ball.bounce(new_angle,self.controller.get_speed())
                 if self._is_player_bar(bar):
                     self.last_ball_hitter = int(bar.get_id())
                 return
     
     def _check_ball_scoring(self,game_speed):
-        for net in self.nets:
-            if net.get_bouncing_angle(self.ball,game_speed)!= None:
-                print("Ball touched a net: updating score")
+        for net in self.get_net_candidates(game_speed):
+            if swept_collisions:
+                new_angle = net.get_swept_bouncing_angle(self.ball,game_speed)
+            else:
+                new_angle = net.get_bouncing_angle(self.ball,game_speed)
+            if new_angle != None:
+                model_trace.info("Ball touched net {}: updating score", net.get_id())
                 self.update_score(net.get_id())
                 self.ball.set_outofbound()
 
@@ -230,7 +357,8 @@ class Ball():
         return self.position
 
     def set_position(self,xpos,ypos):
-        self.position = Point(float(xpos),float(ypos))
+        # in place, as this is called for every state from the network
+        self.position.set(float(xpos),float(ypos))
     
     def get_angle(self):
         return self.angle
@@ -250,8 +378,11 @@ class Ball():
     def is_inplay(self):
         return self.inplay
 
+    def get_step_length(self,speed):
+        return 12 * speed
+
     def get_delta_future_position(self,speed):
-        ball_speed = 12 * speed
+        ball_speed = self.get_step_length(speed)
         delta_x = ball_speed * cos(self.angle)
         delta_y = ball_speed * sin(self.angle)
         return delta_x,delta_y
@@ -271,7 +402,7 @@ class Ball():
         if self.inplay:
             return
         self.inplay = True
-        self.position = point.copy()
+        self.position.set(point.X,point.Y)
 
 ''' The GenericBar class implements methods common to all kinds of bars in the game (players' bats, walls, nets).'''
 class GenericBar():
@@ -282,6 +413,8 @@ class GenericBar():
         self.thickness = thickness
         self.color = color
         self.bar_id = bar_id
+        # unit vector along the bar's length, used by the swept collision check
+        self.length_direction = (cos(self.inclination),sin(self.inclination))
         self.line_factory = LineFactory()
         self.halfplane_factory = HalfPlaneFactory()
         self.set_position(xcenter,ycenter)
@@ -289,7 +422,15 @@ class GenericBar():
     def set_position(self,x,y):
         self.x = x
         self.y = y
-        self._update_bouncing_half_planes()
+        # the half planes are recomputed the next time they're needed, so
+        # moving a bar several times per frame doesn't cost anything extra
+        self._half_planes = None
+
+    @property
+    def bouncing_half_planes(self):
+        if self._half_planes is None:
+            self._update_bouncing_half_planes()
+        return self._half_planes
 
     def get_xpos(self):
         return self.x
@@ -300,6 +441,24 @@ class GenericBar():
     def get_central_point(self):
         return Point(self.get_xpos(),self.get_ypos())
 
+    ''' returns (xmin,ymin,xmax,ymax) of the box around the bar '''
+    def get_bounding_box(self):
+        return self._get_bounding_box_at(self.x,self.y)
+
+    def _get_bounding_box_at(self,x,y):
+        (ux, uy) = self.length_direction
+        half_width = abs(ux) * self.size/2 + abs(uy) * self.thickness/2
+        half_height = abs(uy) * self.size/2 + abs(ux) * self.thickness/2
+        return (x - half_width, y - half_height, x + half_width, y + half_height)
+
+    ''' returns the bar's four corners, as (x,y) tuples going around it '''
+    def get_corners(self):
+        (ux, uy) = self.length_direction
+        (lx, ly) = (ux * self.size/2, uy * self.size/2)
+        (tx, ty) = (-uy * self.thickness/2, ux * self.thickness/2)
+        return [(self.x - lx - tx, self.y - ly - ty), (self.x + lx - tx, self.y + ly - ty),
+                (self.x + lx + tx, self.y + ly + ty), (self.x - lx + tx, self.y - ly + ty)]
+
     def get_max_dimension(self):
         return max(self.get_size(),self.get_thickness())
 
@@ -327,13 +486,13 @@ class GenericBar():
     # Methods to compute the lines corresponding to the bar edges
     
     def _update_bouncing_half_planes(self):
-        self.bouncing_half_planes = []    # re-initialise the HalfPlane objects not containing the bar center
+        self._half_planes = []    # re-initialise the HalfPlane objects not containing the bar center
         angles = [self.inclination,self.inclination-pi/2]
         dimensions = [self.thickness,self.size]
+        center = self.get_central_point()
         for index in range(len(angles)):
-            for line in self._get_lines(angles[index], dimensions[index]):
-                new_bouncing_halfplane = self.halfplane_factory.get_halfplane_opposite_point(line,self.get_central_point())
-                self.bouncing_half_planes.append(new_bouncing_halfplane)
+            lines = self._get_lines(angles[index], dimensions[index])
+            self._half_planes += self.halfplane_factory.get_halfplanes_opposite_point(lines,center)
 
 
     def _get_lines(self,angle,dimension):
@@ -357,7 +516,8 @@ class GenericBar():
         ball_angle = ball.get_angle()
         ball_position = ball.get_position()
         bouncing_planes_containing_ball = self.get_bouncing_half_planes(ball_position)
-        print("get_bouncing_angle, half planes ball is in: {}".format(bouncing_planes_containing_ball))
+        if model_trace.debug_on:
+            model_trace.debug("get_bouncing_angle, half planes ball is in: {}", str(bouncing_planes_containing_ball))
         # if the ball is inside the bar (e.g., because the bar moved),
         # bring the ball back outside
         while len(bouncing_planes_containing_ball) == 0:
@@ -377,10 +537,9 @@ class GenericBar():
             distance_ball_bhf = line.get_min_distance_to_point(ball_position)
             
             (delta_x, delta_y) = ball.get_delta_future_position(game_speed)
-            ball_future_position = Point(ball_position.X + delta_x, ball_position.Y + delta_y)
-            future_distance_ball_bhf = line.get_min_distance_to_point(ball_future_position)
+            (future_x, future_y) = (ball_position.X + delta_x, ball_position.Y + delta_y)
 
-            if (bhf.contains(ball_position) and not bhf.contains(ball_future_position)) or (distance_ball_bhf <= ball.get_size()):
+            if (bhf.contains(ball_position) and not bhf.contains_xy(future_x, future_y)) or (distance_ball_bhf <= ball.get_size()):
                 crossed_half_planes = [bhf]
                 # move the ball fully outside the bar
                 self._move_ball_outside_bar(ball,line,game_speed)
@@ -390,17 +549,50 @@ class GenericBar():
         # center to all bar's corner is smaller than the ball's size
         elif len(bouncing_planes_containing_ball) == 2:
             [bp1,bp2] = bouncing_planes_containing_ball
-            corner = bp1.get_line_intersection(bp2)
-            if corner.distance(ball_position) < ball.get_size():
+            (corner_x, corner_y) = bp1.get_line().get_intersection_xy(bp2.get_line())
+            if ball_position.distance_xy(corner_x, corner_y) < ball.get_size():
                 crossed_half_planes = bouncing_planes_containing_ball
         # it shouldn't be possible for the ball to face more than
         # two bar's edges
         else:
             raise RuntimeError("Ball ({},{}) facing an unexpected number of edges in Bar {}: {}".format(ball.get_position(),ball.get_angle(),self.get_id(),bouncing_planes_containing_ball))
         # return the bouncing angle
-        print("\nFound intersected bar's edges: {}".format(crossed_half_planes))
+        if model_trace.debug_on:
+            model_trace.debug("Found intersected bar's edges: {}", str(crossed_half_planes))
         return self._get_new_angle(crossed_half_planes,ball_angle)
 
+    '''Returns an angle if the ball touches the bar during its next move, None otherwise.
+    Unlike get_bouncing_angle, this finds the exact point along the move at
+    which the ball first touches the bar, so a fast ball can't go through
+    the bar, and moves the ball there.  If the ball is already inside the
+    bar (e.g., because the bar moved), it is moved straight out.'''
+    def get_swept_bouncing_angle(self,ball,game_speed):
+        (delta_x, delta_y) = ball.get_delta_future_position(game_speed)
+        hit = self._get_swept_hit(ball,delta_x,delta_y)
+        if hit is None:
+            return None
+        (t, nx, ny, depth) = hit
+        self._move_ball_to_contact(ball, t * delta_x + depth * nx, t * delta_y + depth * ny)
+        if delta_x * nx + delta_y * ny >= 0:
+            return None    # the ball is already moving away
+        return self._avoid_vertical_angle(reflected_angle(ball.get_angle(), nx, ny))
+
+    def _get_swept_hit(self,ball,delta_x,delta_y):
+        ball_position = ball.get_position()
+        (ux, uy) = self.length_direction
+        return swept_circle_rectangle(ball_position.X, ball_position.Y, delta_x, delta_y, ball.get_size(),
+                                      self.x, self.y, ux, uy, self.size/2, self.thickness/2)
+
+    def _move_ball_to_contact(self,ball,delta_x,delta_y):
+        ball.get_position().move(delta_x, delta_y)
+
+    def _avoid_vertical_angle(self,angle):
+        # a ball going (nearly) straight up and down would bounce between
+        # the walls for ever
+        if abs(cos(angle)) < sin(pi/10):
+            angle = atan2(sin(angle), copysign(sin(pi/10), cos(angle)))
+        return angle
+
     def _get_min_distance_from_bar_extreme(self,ball_position):
         # NOTE: we could store extremes (and update them when move)
         # instead of recomputing them every time 
@@ -414,11 +606,8 @@ class GenericBar():
         return min_dist
 
     def get_bouncing_half_planes(self,ball_center_position):
-        matching_half_planes = []
-        for hf in self.bouncing_half_planes:
-            if hf.contains(ball_center_position):
-                matching_half_planes.append(hf)
-        return matching_half_planes
+        (x, y) = (ball_center_position.X, ball_center_position.Y)
+        return [hf for hf in self.bouncing_half_planes if hf.contains_xy(x, y)]
 
     def _move_ball_outside_bar(self,ball,edge_line,game_speed):
         ball_angle = ball.get_angle()
@@ -427,7 +616,8 @@ class GenericBar():
             if distance_ball_bhf > ball.get_size():
                 return
             ball.move(game_speed, ball_angle - pi)
-            print("Moved the ball backwards.\nBall angle: {}, new ball position: {}, new distance: {}".format(ball.get_angle(),ball.get_position(),distance_ball_bhf))
+            if model_trace.debug_on:
+                model_trace.debug("Moved the ball backwards. Ball angle: {}, new ball position: {}, new distance: {}", ball.get_angle(), str(ball.get_position()), distance_ball_bhf)
     
     def _get_new_angle(self,crossed_half_planes,initial_angle):
         if len(crossed_half_planes) == 0:
@@ -467,15 +657,48 @@ class Net(GenericBar):
             return ball.get_angle()
         return None
 
+    def get_swept_bouncing_angle(self,ball,game_speed):
+        (delta_x, delta_y) = ball.get_delta_future_position(game_speed)
+        if self._get_swept_hit(ball,delta_x,delta_y) != None:
+            return ball.get_angle()
+        return None
+
     # don't mind move the ball backwards when it hits a net
     def _move_ball_outside_bar(self,ball,edge_line,game_speed):
         pass
 
 ''' Bars represent players' bats (name of the class could have been more explicit, actually).'''
 class Bar(GenericBar):
-    def __init__(self, player_id, move_unit, bar_xcenter=0, bar_ycenter=0, bar_height=100, bar_width=20, bar_color="blue"):
-        super().__init__(xcenter=bar_xcenter, ycenter=bar_ycenter, size=bar_height, inclination_angle_wrt_xaxis=pi/2, thickness=bar_width, color=bar_color, bar_id = player_id)
+    def __init__(self, player_id, move_unit, bar_xcenter=0, bar_ycenter=0, bar_height=100, bar_width=20, bar_color="blue", bar_inclination=pi/2):
+        super().__init__(xcenter=bar_xcenter, ycenter=bar_ycenter, size=bar_height, inclination_angle_wrt_xaxis=bar_inclination, thickness=bar_width, color=bar_color, bar_id = player_id)
         self.move_unit = move_unit
+        self.track = None
+
+    ''' the bar moves along its length, up to half_range either side of
+    the track's centre. '''
+    def set_track(self, xcenter, ycenter, half_range):
+        self.track = (xcenter, ycenter, half_range)
+
+    def get_track_center(self):
+        (xcenter, ycenter, half_range) = self.track
+        return Point(xcenter, ycenter)
+
+    ''' returns how far along the track (x,y) is from the track's centre '''
+    def get_track_offset(self, x, y):
+        (xcenter, ycenter, half_range) = self.track
+        (ux, uy) = self.length_direction
+        return (x - xcenter) * ux + (y - ycenter) * uy
+
+    ''' returns (xmin,ymin,xmax,ymax) of the box around everywhere the bar can be '''
+    def get_track_bounding_box(self):
+        if self.track is None:
+            return self.get_bounding_box()
+        center = self.get_track_center()
+        half_range = self.track[2]
+        (ux, uy) = self.length_direction
+        (xmin1, ymin1, xmax1, ymax1) = self._get_bounding_box_at(center.X - half_range*ux, center.Y - half_range*uy)
+        (xmin2, ymin2, xmax2, ymax2) = self._get_bounding_box_at(center.X + half_range*ux, center.Y + half_range*uy)
+        return (min(xmin1,xmin2), min(ymin1,ymin2), max(xmax1,xmax2), max(ymax1,ymax2))
 
     def get_move_unit(self):
         return self.move_unit
@@ -486,8 +709,19 @@ class Bar(GenericBar):
     def get_height(self):
         return self.size
 
-    ''' move due to user input '''
+    ''' move due to user input: UP and DOWN move the bar back and forth
+    along its track (for vertical bars, really up and down) '''
     def move_bar(self, direction, walls_array):
+        if self.track is not None:
+            (xcenter, ycenter, half_range) = self.track
+            (ux, uy) = self.length_direction
+            offset = self.get_track_offset(self.x, self.y)
+            if direction == Direction.UP:
+                offset = max(offset - self.move_unit, -half_range)
+            elif direction == Direction.DOWN:
+                offset = min(offset + self.move_unit, half_range)
+            self.set_position(xcenter + offset * ux, ycenter + offset * uy)
+            return
         wall_margin = walls_array[0].get_height()/2
         max_wall_height = max([w.get_ypos() for w in walls_array])
         new_y = self.y
@@ -544,13 +778,41 @@ class DumbBotPlayer(AbstractPlayer):
         ball_distance = self.bar.get_central_point().distance(ball.get_position())
         if ball_distance > self.model.get_canvas_width()/3:
             return
-        # otherwise, try to match ball's position
-        if self.bar.get_ypos() - self.bar.get_height()/2 > ball.get_position().Y:
+        # otherwise, try to match ball's position along the bar's track
+        (ux, uy) = self.bar.length_direction
+        ball_position = ball.get_position()
+        offset = (ball_position.X - self.bar.get_xpos()) * ux + (ball_position.Y - self.bar.get_ypos()) * uy
+        if offset < - self.bar.get_height()/2:
             self.bar.move_bar(Direction.UP,walls)
-        elif self.bar.get_ypos() + self.bar.get_height()/2 < ball.get_position().Y:
+        elif offset > self.bar.get_height()/2:
             self.bar.move_bar(Direction.DOWN,walls)
         self.last_move_time = time()
 
+''' Computer player that moves its bar to where the ball will reach it,
+after bouncing off the walls (see Model.get_bar_crossing), rather than
+following the ball.  It is held to the same number of moves per second
+as DumbBotPlayer. '''
+class PredictiveBotPlayer(DumbBotPlayer):
+    def act(self):
+        if not self.model.get_ball().is_inplay():
+            return
+        curr_time = time()
+        if curr_time - self.last_move_time < self.move_frequency:
+            return
+        crossing = self.model.get_bar_crossing(self.bar)
+        # wait in the middle of the track if the ball isn't coming our way
+        target = 0
+        if crossing is not None:
+            target = self.bar.get_track_offset(crossing[0],crossing[1])
+        offset = self.bar.get_track_offset(self.bar.get_xpos(),self.bar.get_ypos())
+        if abs(target - offset) <= self.bar.get_move_unit()/2:
+            return
+        if target < offset:
+            self.bar.move_bar(Direction.UP,self.model.get_walls())
+        else:
+            self.bar.move_bar(Direction.DOWN,self.model.get_walls())
+        self.last_move_time = curr_time
+
 ''' Class modeling non-computer players -- e.g., manually controlled by the user or network opponents '''
 class ManualPlayer(AbstractPlayer):
     def __init__(self, own_bar, model, is_local):
@@ -2,6 +2,7 @@ import pytest
 import mock, math
 from pong_model import *
 from pong_settings import *
+from pong_geometry import distances_to_lines,nearest_line
 
 class TestSuiteForBar:
     def setup_method(self):
@@ -194,3 +195,179 @@ class TestSuiteForBar:
 
 
 
+
+class TestSuiteForSweptCollision:
+    def setup_method(self):
+        self.vertical_bar = GenericBar(xcenter=100,ycenter=100,size=40,inclination_angle_wrt_xaxis=math.pi/2,thickness=20,color="red",bar_id=1)
+        self.ball = Ball()
+        self.ball.inplay = True
+
+    def test_swept_kernel_face_and_corner(self):
+        # ball moving right hits the left face of the bar a third of the way along its move
+        (t, nx, ny, depth) = swept_circle_rectangle(60,100,30,0,20,100,100,0,1,20,10)
+        assert round(t,3) == round(1/3,3) and (round(nx,3), round(ny,3)) == (-1,0) and depth == 0
+        # passing above the bar
+        assert swept_circle_rectangle(60,50,80,0,20,100,100,0,1,20,10) == None
+        # hits the top left corner diagonally
+        (t, nx, ny, depth) = swept_circle_rectangle(60,50,30,30,20,100,100,0,1,20,10)
+        assert 0 < t < 1 and nx < 0 and ny < 0
+
+    def test_swept_bounce_from_left(self):
+        self.ball.set_position(65,100)
+        self.ball.set_angle(0)
+        angle = self.vertical_bar.get_swept_bouncing_angle(self.ball,1)
+        assert round(abs(angle),3) == round(pi,3)
+        # the ball is moved to where it touches the bar
+        assert round(self.ball.get_position().X,3) == 70
+
+    def test_swept_fast_ball_does_not_tunnel(self):
+        # the ball would end up well past the bar after this move
+        self.ball.set_position(-50,100)
+        self.ball.set_angle(0)
+        assert self.vertical_bar.get_swept_bouncing_angle(self.ball,20) != None
+        assert round(self.ball.get_position().X,3) == 70
+
+    def test_swept_ball_moving_away(self):
+        self.ball.set_position(70,100)
+        self.ball.set_angle(pi)
+        assert self.vertical_bar.get_swept_bouncing_angle(self.ball,1) == None
+
+    def test_swept_ball_inside_bar_is_pushed_out(self):
+        self.ball.set_position(95,100)
+        self.ball.set_angle(0)
+        assert self.vertical_bar.get_swept_bouncing_angle(self.ball,1) != None
+        assert round(self.ball.get_position().X,3) == 70
+
+class TestSuiteForGeometry:
+    def test_point_set_in_place(self):
+        point = Point(1,2)
+        point.set(3.14159,-2.71828)
+        assert point == Point(3.14159,-2.71828) and (point.X, point.Y) == (3.142,-2.718)
+        with pytest.raises(AttributeError):
+            point.Z = 0
+
+    def test_line_distances(self):
+        lines = [Line(1,0,-90),Line(0,2,-240),Line(1,-1,5)]
+        assert Line(3,4,-10).get_normalised_coefficients() == (0.6,0.8,-2)
+        assert distances_to_lines(lines,100,100) == [line.get_min_distance_to_point(Point(100,100)) for line in lines]
+        assert [round(d,6) for d in distances_to_lines(lines,100,100)] == [10,20,round(5/sqrt(2),6)]
+        assert nearest_line(lines,100,100) == (lines[2],5/sqrt(2))
+        assert lines[0].get_intersection_xy(lines[1]) == (90,120) and lines[0].get_intersection(lines[1]) == Point(90,120)
+
+    def test_half_planes(self):
+        factory = HalfPlaneFactory()
+        half_plane = factory.get_halfplane_opposite_point(Line(1,0,-90),Point(100,100))
+        assert half_plane.get_function() == factory.leq_fun
+        assert half_plane.contains(Point(80,0)) and half_plane.contains_xy(90,0) and not half_plane.contains_xy(91,0)
+        half_plane.flip()
+        assert half_plane.get_function() == factory.geq_fun and half_plane.contains_xy(91,0)
+
+class TestSuiteForArena:
+    def setup_method(self):
+        self.controller = mock.MagicMock()
+        self.controller.get_canvas_width.return_value = CANVAS_WIDTH
+        self.controller.get_canvas_height.return_value = CANVAS_HEIGHT
+        self.controller.get_distance_bar_bound.return_value = DISTANCE_BAR_BOUND
+        self.controller.get_bar_move_unit.return_value = GRID_SIZE
+
+    def test_broad_phase_grid(self):
+        grid = BroadPhaseGrid(100,100,10,5)
+        grid.add("left",0,0,10,100)
+        grid.add("right",90,0,100,100)
+        assert grid.candidates(3,50,5) == ("left",)
+        assert grid.candidates(50,50,5) == ()
+        # a longer reach looks in more cells, and keeps the order objects were added in
+        assert grid.candidates(50,50,50) == ["left","right"]
+
+    def test_angular_sectors(self):
+        sectors = AngularSectors(0,0,4,pi)
+        assert [sectors.index_of(p) for p in [Point(-5,0),Point(0,-5),Point(5,0),Point(0,5)]] == [0,1,2,3]
+        assert SectorsRegion(sectors,[1,2]).contains(Point(4,-1)) and not SectorsRegion(sectors,[1,2]).contains(Point(-4,1))
+
+    def test_polygonal_arena(self):
+        model = Model(self.controller,5)
+        assert len(model.bars) == 5 and len(model.nets) == 5 and model.walls == [] and model.score == [0]*5
+        center = Point(CANVAS_WIDTH/2,CANVAS_HEIGHT/2)
+        for (bar,net) in zip(model.bars,model.nets):
+            # each bar is in front of its own net
+            assert bar.get_central_point().distance(center) < net.get_central_point().distance(center)
+            assert model.sectors.index_of(bar.get_central_point()) == bar.get_id() - 1
+
+    def test_many_sided_arena(self):
+        # with enough sides, the bars are longer than their chords leave
+        # room for, and the tracks have no room to move along at all
+        for sides in [8,20,40]:
+            model = Model(self.controller,sides)
+            for bar in model.bars:
+                assert bar.track[2] >= 0
+                center = bar.get_track_center()
+                for direction in [Direction.UP,Direction.DOWN]:
+                    for i in range(5):
+                        bar.move_bar(direction,model.walls)
+                    assert bar.get_central_point().distance(center) <= bar.track[2] + 0.01   # positions are rounded
+        assert model.bars[0].track[2] == 0
+
+    def test_bar_moves_along_track(self):
+        model = Model(self.controller,3)
+        bar = model.bars[1]
+        start = bar.get_central_point()
+        for i in range(20):
+            bar.move_bar(Direction.DOWN,model.walls)
+        # the bar stops at the end of its track, still parallel to its net
+        assert round(bar.get_central_point().distance(start),2) == round(bar.track[2],2)
+        bar.move_bar(Direction.UP,model.walls)
+        assert round(bar.get_central_point().distance(start),2) == round(bar.track[2] - GRID_SIZE,2)
+
+    def test_broad_phase_finds_bar_near_ball(self):
+        model = Model(self.controller,2)
+        bar = model.bars[0]
+        model.ball.set_position(bar.get_xpos() + 30,bar.get_ypos())
+        assert bar in model.get_bouncing_candidates(1)
+        model.ball.set_position(CANVAS_WIDTH/2,CANVAS_HEIGHT/2)
+        assert list(model.get_bouncing_candidates(1)) == []
+
+class TestSuiteForTrajectory:
+    def setup_method(self):
+        self.controller = mock.MagicMock()
+        self.controller.get_canvas_width.return_value = CANVAS_WIDTH
+        self.controller.get_canvas_height.return_value = CANVAS_HEIGHT
+        self.controller.get_distance_bar_bound.return_value = DISTANCE_BAR_BOUND
+        self.controller.get_bar_move_unit.return_value = GRID_SIZE
+
+    def test_trajectory_bounces_off_mirrors(self):
+        # between y = 0 and y = 100, from (0,50) at 45 degrees towards x = 300
+        mirrors = [Line(0,1,0),Line(0,-1,100)]
+        trajectory = BallTrajectory(0,50,pi/4,mirrors)
+        (x, y, distance) = trajectory.crossing(Line(-1,0,300))
+        assert (round(x,6), round(y,6), round(distance,6)) == (300, 50, round(300*sqrt(2),6))
+        # nothing to reach behind the ball
+        assert trajectory.crossings([Line(1,0,0),Line(-1,0,300)])[0] == None
+
+    def test_bar_crossings_are_cached_until_the_angle_changes(self):
+        model = Model(self.controller,2)
+        model.ball.set_position(500,350)
+        model.ball.set_angle(0.3)
+        crossing = model.get_bar_crossing(model.bars[1])
+        trajectory = model.get_ball_trajectory()
+        # the ball reaches the right bar's face, between the walls
+        assert round(crossing[0],6) == CANVAS_WIDTH - DISTANCE_BAR_BOUND - 10 - 20
+        assert 35 <= crossing[1] <= CANVAS_HEIGHT - 35
+        assert model.get_bar_crossing(model.bars[0]) == None
+        model.ball.move(1)
+        assert model.get_ball_trajectory() is trajectory
+        model.ball.set_angle(pi - 0.3)
+        assert model.get_ball_trajectory() is not trajectory and model.get_bar_crossing(model.bars[1]) == None
+
+    def test_predictive_bot_moves_towards_crossing(self):
+        model = Model(self.controller,2)
+        model.set_players_info([(1,'bot'),(2,'bot')])
+        bot = model.bots[2]
+        bot.last_move_time = 0
+        model.ball.inplay = True
+        model.ball.set_position(500,350)
+        model.ball.set_angle(-0.2)
+        target = model.bars[1].get_track_offset(*model.get_bar_crossing(model.bars[1])[:2])
+        start = model.bars[1].get_track_offset(model.bars[1].get_xpos(),model.bars[1].get_ypos())
+        bot.act()
+        moved = model.bars[1].get_track_offset(model.bars[1].get_xpos(),model.bars[1].get_ypos())
+        assert abs(target - moved) < abs(target - start)
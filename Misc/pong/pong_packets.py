@@ -0,0 +1,168 @@
+# Binary packets exchanged by Pong players over the network.
+#
+# Every datagram carries the sender's whole game state, with a fixed
+# layout built with the struct module (all little-endian):
+#
+#   header:  magic (H), version (B), session (I), sequence number (I),
+#            timestamp (d), flags (B), number of bars (B),
+#            number of scores (B)
+#   ball:    x (d), y (d), angle (d) -- only meaningful with FLAG_BALL
+#   bars:    for each bar, id (B), x (d), y (d)
+#   scores:  for each player, score (H)
+#
+# Sequence numbers let the receiver drop datagrams that arrive after a
+# newer one, which UDP is allowed to do, so that an old position can't
+# move the ball backwards.  The session is a random number each sender
+# picks when it starts: when an opponent restarts, its packets carry a
+# new session and are numbered from 0 again, and the receiver starts
+# afresh rather than taking them for old packets.
+
+import random, struct, time
+
+MAGIC = 0x5047          # "PG"
+VERSION = 2
+
+FLAG_BALL = 1           # the sender controls the ball and says where it is
+FLAG_RESTART = 2        # the sender wants to (re)start a game
+FLAG_GAME_RUNNING = 4   # the sender's game is running
+
+MAX_BARS = 8
+MAX_SCORES = 8
+
+HEADER = struct.Struct("<HBIIdBBB")
+BALL = struct.Struct("<ddd")
+BAR = struct.Struct("<Bdd")
+SCORE = struct.Struct("<H")
+
+MAX_PACKET_SIZE = HEADER.size + BALL.size + MAX_BARS * BAR.size + MAX_SCORES * SCORE.size
+
+SEQ_MODULO = 2**32
+
+
+''' The game state carried by a packet.  The receiver decodes every
+packet into the same PongState object, rather than making a new one. '''
+class PongState():
+    def __init__(self):
+        self.seq = 0
+        self.timestamp = 0.0
+        self.has_ball = False
+        self.ball_x = 0.0
+        self.ball_y = 0.0
+        self.ball_angle = 0.0
+        self.bars = []          # list of [bar_id, x, y]
+        self.scores = []
+        self.restart = False
+        self.game_running = False
+        self.sender = None      # address of whoever sent it, not sent in packets
+
+    def set_ball(self, x, y, angle):
+        self.has_ball = True
+        self.ball_x = x
+        self.ball_y = y
+        self.ball_angle = angle
+
+    def set_bar(self, index, bar_id, x, y):
+        # reuse the bar's list if we already have one
+        if index < len(self.bars):
+            bar = self.bars[index]
+            bar[0] = bar_id
+            bar[1] = x
+            bar[2] = y
+        else:
+            self.bars.append([bar_id, x, y])
+
+
+''' Encodes outgoing packets, numbering them, and decodes incoming ones,
+dropping those that are stale or malformed.  Use one PacketCodec for
+each opponent. '''
+class PacketCodec():
+    def __init__(self, session=None):
+        self.buffer = bytearray(MAX_PACKET_SIZE)
+        if session is None:
+            session = random.getrandbits(32)
+        self.session = session
+        self.next_seq = 0
+        self.last_session = None
+        self.last_seq = None
+        self.old_sessions = set()   # sessions the opponent has restarted since
+        self.stale_packets = 0
+        self.bad_packets = 0
+
+    def encode(self, state, timestamp=None):
+        ''' packs state into the codec's buffer and returns a memoryview
+            of the packet; it is only valid until the next call '''
+        if timestamp is None:
+            timestamp = time.time()
+        flags = 0
+        if state.has_ball:
+            flags |= FLAG_BALL
+        if state.restart:
+            flags |= FLAG_RESTART
+        if state.game_running:
+            flags |= FLAG_GAME_RUNNING
+        state.seq = self.next_seq
+        self.next_seq = (self.next_seq + 1) % SEQ_MODULO
+        buffer = self.buffer
+        HEADER.pack_into(buffer, 0, MAGIC, VERSION, self.session, state.seq, timestamp, flags, len(state.bars), len(state.scores))
+        offset = HEADER.size
+        BALL.pack_into(buffer, offset, state.ball_x, state.ball_y, state.ball_angle)
+        offset += BALL.size
+        for (bar_id, x, y) in state.bars:
+            BAR.pack_into(buffer, offset, bar_id, x, y)
+            offset += BAR.size
+        for score in state.scores:
+            SCORE.pack_into(buffer, offset, score)
+            offset += SCORE.size
+        return memoryview(buffer)[:offset]
+
+    def is_newer(self, session, seq):
+        if session != self.last_session:
+            # a late packet from before the opponent restarted is stale,
+            # anything else is the opponent's new session
+            return session not in self.old_sessions
+        # newer if it's less than half way round the sequence numbers
+        # ahead of the last one; 0 ahead is a duplicate
+        ahead = (seq - self.last_seq) % SEQ_MODULO
+        return 0 < ahead < SEQ_MODULO // 2
+
+    def decode_into(self, data, state):
+        ''' decodes the packet in data into state.  Returns False, leaving
+            state unchanged, if the packet is malformed or older than one
+            we have already decoded. '''
+        if len(data) < HEADER.size + BALL.size:
+            self.bad_packets += 1
+            return False
+        (magic, version, session, seq, timestamp, flags, number_bars, number_scores) = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION or len(data) != HEADER.size + BALL.size + number_bars * BAR.size + number_scores * SCORE.size:
+            self.bad_packets += 1
+            return False
+        if not self.is_newer(session, seq):
+            self.stale_packets += 1
+            return False
+        if session != self.last_session and self.last_session is not None:
+            self.old_sessions.add(self.last_session)
+        self.last_session = session
+        self.last_seq = seq
+        state.seq = seq
+        state.timestamp = timestamp
+        state.has_ball = flags & FLAG_BALL != 0
+        state.restart = flags & FLAG_RESTART != 0
+        state.game_running = flags & FLAG_GAME_RUNNING != 0
+        offset = HEADER.size
+        (state.ball_x, state.ball_y, state.ball_angle) = BALL.unpack_from(data, offset)
+        offset += BALL.size
+        for index in range(number_bars):
+            (bar_id, x, y) = BAR.unpack_from(data, offset)
+            state.set_bar(index, bar_id, x, y)
+            offset += BAR.size
+        del state.bars[number_bars:]
+        scores = state.scores
+        del scores[number_scores:]
+        for index in range(number_scores):
+            (score,) = SCORE.unpack_from(data, offset)
+            if index < len(scores):
+                scores[index] = score
+            else:
+                scores.append(score)
+            offset += SCORE.size
+        return True
@@ -0,0 +1,111 @@
+# Throughput benchmark for Pong's network packets: the binary packets of
+# pong_packets.py against the text messages the Controller used to send,
+# which are reproduced below.  Each packet carries the ball, one bar, the
+# score, and the restart and game-running flags.
+#
+#   python3 pong_packets_bench.py [number_of_packets]
+
+import sys, time
+
+from pong_packets import PacketCodec, PongState
+
+NETMSG_INFO_SEP = ";"
+NETMSG_FIELD_SEP = ","
+NETMSG_BALLPOS_ID = "Ball:"
+NETMSG_BARPOS_ID = "Bar:"
+NETMSG_SCORE_ID = "Score:"
+NETMSG_RST_ID = "Restart:"
+NETMSG_GAMERUN_ID = "Game-running:"
+
+def compose_position_message(message_id, fields_content_list):
+    string = message_id + ''
+    for field in fields_content_list:
+        string += str(field) + NETMSG_FIELD_SEP
+    k = string.rfind(NETMSG_FIELD_SEP)
+    string = string[:k]
+    return string
+
+def parse_position_message(object_id, message):
+    content = message.split(object_id)[1]
+    return content.split(NETMSG_FIELD_SEP)
+
+def text_encode(ball, bar, score, restart, running):
+    msg = compose_position_message(NETMSG_BALLPOS_ID, ball) + NETMSG_INFO_SEP
+    msg += compose_position_message(NETMSG_BARPOS_ID, bar) + NETMSG_INFO_SEP
+    msg += compose_position_message(NETMSG_SCORE_ID, score) + NETMSG_INFO_SEP
+    msg += compose_position_message(NETMSG_RST_ID, [restart]) + NETMSG_INFO_SEP
+    msg += compose_position_message(NETMSG_GAMERUN_ID, [running])
+    return msg.encode()
+
+def text_decode(data):
+    decoded = {}
+    for string in data.decode().split(NETMSG_INFO_SEP):
+        if string.startswith(NETMSG_BALLPOS_ID):
+            [xpos, ypos, angle] = parse_position_message(NETMSG_BALLPOS_ID, string)
+            decoded["ball"] = (float(xpos), float(ypos), float(angle))
+        elif string.startswith(NETMSG_BARPOS_ID):
+            [bar_id, xpos, ypos] = parse_position_message(NETMSG_BARPOS_ID, string)
+            decoded["bar"] = (int(bar_id), float(xpos), float(ypos))
+        elif string.startswith(NETMSG_RST_ID):
+            [remote_start] = parse_position_message(NETMSG_RST_ID, string)
+            decoded["restart"] = remote_start.strip() == "True"
+        elif string.startswith(NETMSG_GAMERUN_ID):
+            [remote_run] = parse_position_message(NETMSG_GAMERUN_ID, string)
+            decoded["running"] = remote_run.strip() == "True"
+        elif string.startswith(NETMSG_SCORE_ID):
+            [score_p1, score_p2] = parse_position_message(NETMSG_SCORE_ID, string)
+            decoded["score"] = [int(score_p1), int(score_p2)]
+    return decoded
+
+def frame_values(i):
+    return ([500.0 + i % 300 * 1.37, 350.0 - i % 200 * 0.91, 0.5235987755982988], [2, 960.0, 350.0 + i % 100], [i % 5, 3], True, i % 2 == 0)
+
+def bench_text(packets):
+    start = time.perf_counter()
+    size = 0
+    for i in range(packets):
+        (ball, bar, score, restart, running) = frame_values(i)
+        data = text_encode(ball, bar, score, restart, running)
+        size = len(data)
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(packets):
+        text_decode(data)
+    return encode_time, time.perf_counter() - start, size
+
+def bench_binary(packets):
+    sender = PacketCodec()
+    receiver = PacketCodec()
+    outgoing = PongState()
+    incoming = PongState()
+    encoded = []
+    start = time.perf_counter()
+    for i in range(packets):
+        (ball, bar, score, restart, running) = frame_values(i)
+        outgoing.set_ball(ball[0], ball[1], ball[2])
+        outgoing.set_bar(0, bar[0], bar[1], bar[2])
+        outgoing.scores[:] = score
+        outgoing.restart = restart
+        outgoing.game_running = running
+        data = sender.encode(outgoing)
+    encode_time = time.perf_counter() - start
+    # decoding needs packets with increasing sequence numbers
+    for i in range(packets):
+        encoded.append(bytes(sender.encode(outgoing)))
+    start = time.perf_counter()
+    for data in encoded:
+        receiver.decode_into(data, incoming)
+    return encode_time, time.perf_counter() - start, len(data)
+
+def main():
+    packets = 200000
+    if len(sys.argv) > 1:
+        packets = int(sys.argv[1])
+    print("{} packets".format(packets))
+    print("{:>8} {:>8} {:>16} {:>16}".format("format", "bytes", "encode packets/s", "decode packets/s"))
+    for (name, bench) in [("text", bench_text), ("binary", bench_binary)]:
+        (encode_time, decode_time, size) = bench(packets)
+        print("{:>8} {:>8} {:>16.0f} {:>16.0f}".format(name, size, packets / encode_time, packets / decode_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import pytest
+from pong_packets import *
+
+class TestSuiteForPackets:
+    def setup_method(self):
+        self.sender = PacketCodec()
+        self.receiver = PacketCodec()
+        self.outgoing = PongState()
+        self.incoming = PongState()
+
+    def send(self):
+        return bytes(self.sender.encode(self.outgoing, timestamp=12.5))
+
+    def test_round_trip(self):
+        self.outgoing.set_ball(100.5, 200.25, 0.5)
+        self.outgoing.set_bar(0, 1, 40, 350)
+        self.outgoing.set_bar(1, 3, 960, 120.5)
+        self.outgoing.scores[:] = [2, 4]
+        self.outgoing.game_running = True
+        assert self.receiver.decode_into(self.send(), self.incoming)
+        state = self.incoming
+        assert (state.seq, state.timestamp, state.has_ball, state.restart, state.game_running) == (0, 12.5, True, False, True)
+        assert (state.ball_x, state.ball_y, state.ball_angle) == (100.5, 200.25, 0.5)
+        assert state.bars == [[1, 40, 350], [3, 960, 120.5]] and state.scores == [2, 4]
+        # fewer bars and no ball in the next packet
+        self.outgoing.has_ball = False
+        del self.outgoing.bars[1:]
+        assert self.receiver.decode_into(self.send(), self.incoming)
+        assert not state.has_ball and state.bars == [[1, 40, 350]] and state.seq == 1
+
+    def test_stale_packets_are_dropped(self):
+        packets = [self.send() for i in range(3)]
+        assert self.receiver.decode_into(packets[0], self.incoming)
+        assert self.receiver.decode_into(packets[2], self.incoming)
+        assert not self.receiver.decode_into(packets[1], self.incoming)
+        assert not self.receiver.decode_into(packets[2], self.incoming)
+        assert self.incoming.seq == 2 and self.receiver.stale_packets == 2
+
+    def test_sequence_wraps_around(self):
+        self.sender.next_seq = SEQ_MODULO - 1
+        assert self.receiver.decode_into(self.send(), self.incoming)
+        assert self.receiver.decode_into(self.send(), self.incoming)
+        assert self.incoming.seq == 0
+
+    def test_long_delayed_packet_is_dropped(self):
+        # at 1000 packets a second, this one is about 100ms late
+        late = self.send()
+        for i in range(100):
+            assert self.receiver.decode_into(self.send(), self.incoming)
+        assert not self.receiver.decode_into(late, self.incoming)
+        assert self.incoming.seq == 100 and self.receiver.stale_packets == 1
+
+    def test_restarted_opponent(self):
+        self.sender.next_seq = 5000
+        assert self.receiver.decode_into(self.send(), self.incoming)
+        late = self.send()
+        assert self.receiver.decode_into(bytes(PacketCodec().encode(self.outgoing)), self.incoming)
+        assert self.incoming.seq == 0
+        # a packet from before the restart turning up late is stale
+        assert not self.receiver.decode_into(late, self.incoming)
+        assert self.incoming.seq == 0
+
+    def test_malformed_packets(self):
+        packet = self.send()
+        assert not self.receiver.decode_into(b"Game-running:True", self.incoming)
+        assert not self.receiver.decode_into(packet[:-1], self.incoming)
+        assert self.receiver.bad_packets == 2
+        assert self.receiver.decode_into(packet, self.incoming)
@@ -8,13 +8,44 @@ SPACING = 100
 DISTANCE_BAR_BOUND = 40
 GRID_SIZE = 40
 
-# A total of two players must be specified across the following categories.
+# Players, across the following categories.  With two, they play on a
+# court; with three or more, on a regular polygon with a net on each
+# side.  With more than one remote player, there must be one local player.
 local_human_players = 0
 local_bot_players = 1
 remote_players = 1
 
 winning_score = 5
 
+# How bots play: "predictive" bots move to where the ball will reach
+# their bar, bouncing off the walls on the way; "dumb" bots (easier to
+# beat) follow the ball once it is close.
+bot_strategy = "predictive"
+
+# True to bounce the ball using swept (continuous) collision detection,
+# which finds exactly when the ball touches a bar during each move.  False
+# uses the original half-plane checks in GenericBar.get_bouncing_angle.
+swept_collisions = True
+
+# Debug tracing (see pong_trace.py).  Comma-separated levels (off, error,
+# info or debug) for the "model", "net" and "game" channels, e.g.
+# "model=debug,net=off"; channels not listed trace at info level.
+# trace_file names a file to also write a binary trace to.  Both can be
+# overridden with the --trace and --trace-file options of pong.py.
+trace_levels = ""
+trace_file = None
+
+# True to take the opponent's newest state once per game tick, and send
+# ours from the game loop (see receive_latest_states and send_batch in
+# network_utils.py).  False handles each incoming datagram in its own
+# asyncio task and sends from an async generator, as the game used to.
+net_fast_path = True
+
+# True to only check the ball against the bars, walls and nets near it
+# (see BroadPhaseGrid in pong_geometry.py).  False checks all of them
+# every frame.
+broad_phase = True
+
 class Direction(Enum):
     DOWN = 0
     UP = 1
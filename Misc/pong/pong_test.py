@@ -1,6 +1,7 @@
 import pytest, time
 import mock, asyncio
 from pong import *
+from network_utils import LatestStateMailbox
 
 
 class MockView():
@@ -19,7 +20,7 @@ class MockIncomingConnection():
     async def send_to(self, function, frequency):
         for new_data in self.data:
             await asyncio.sleep(frequency)
-            await function(new_data.encode(), self.addr)
+            await function(new_data, self.addr)
 
 
 async def force_exit(controller,timeout):
@@ -68,8 +69,11 @@ class TestSuiteForController:
         self.no_view_controller.ball = mock.MagicMock()
         self.no_view_controller.waiting_net_opponent = True
         self.no_view_controller.run_update_frequency = 0.45
-        fake_incoming_message = self.no_view_controller.compose_position_message(NETMSG_GAMERUN_ID,[True])
-        fake_connection = MockIncomingConnection([fake_incoming_message]*2)
+        fake_state = PongState()
+        fake_state.game_running = True
+        fake_codec = PacketCodec()
+        fake_incoming_messages = [bytes(fake_codec.encode(fake_state)) for i in range(2)]
+        fake_connection = MockIncomingConnection(fake_incoming_messages)
         fake_connection_frequency = 1
         force_exit_timeout = 2
         loop = asyncio.get_event_loop()
@@ -81,4 +85,22 @@ class TestSuiteForController:
             ))
         assert mock_check.call_count == max(1,int((force_exit_timeout - fake_connection_frequency) / self.no_view_controller.run_update_frequency))
 
-        
+    def test_more_opponents_than_remote_players(self):
+        # settings.remote_players is 1, so a third machine is one too many
+        with pytest.raises(RuntimeError, match="remote_players"):
+            self.no_view_controller.run('127.0.0.1',9000,'127.0.0.1',9001,[('127.0.0.1',9002)])
+
+    def test_latest_state_mailbox(self):
+        controller = self.no_view_controller
+        mailbox = LatestStateMailbox(controller.decode_message_from_net_opponent)
+        fake_state = PongState()
+        fake_codec = PacketCodec()
+        packets = [bytes(fake_codec.encode(fake_state)) for i in range(3)]
+        addr = ('127.0.0.1', 9999)
+        mailbox.put(packets[0], addr)
+        mailbox.put(packets[2], addr)
+        mailbox.put(packets[1], addr)   # arrives late, so it's dropped
+        slots = mailbox.take_all()
+        assert list(slots.keys()) == [addr] and slots[addr][0].seq == 2
+        assert (mailbox.received, mailbox.dropped, mailbox.overwritten) == (3, 1, 1)
+        assert mailbox.take_all() == {}
@@ -0,0 +1,176 @@
+# Debug tracing for the Simple Pong Game.
+#
+# Instead of printing, each part of the game traces through its own
+# channel: "model" (pong_model.py), "game" (the Controller in pong.py)
+# and "net" (network_utils.py and the Controller's networking).  Each
+# channel has a level, and a message is only kept if the channel's level
+# is at least the message's level.
+#
+# Messages are given as a format string and its arguments, e.g.
+#
+#   model_trace.debug("Ball at {} bouncing to angle {}", x, angle)
+#
+# and are only formatted when they are shown, so a message whose channel
+# is switched off costs one comparison.  In the few places that are run
+# for every bar on every frame, callers also check the channel's
+# debug_on flag first, so that they don't even build the arguments.
+#
+# Kept messages go to an in-memory ring buffer holding the most recent
+# ones, which is dumped if the game stops because of an error.  They can
+# also be echoed to the console, and written to a binary trace file that
+# can be read back with:
+#
+#   python3 pong_trace.py <trace file>
+
+import struct, sys, time
+from collections import deque
+
+OFF = 0
+ERROR = 1
+INFO = 2
+DEBUG = 3
+
+LEVEL_NAMES = {"off": OFF, "error": ERROR, "info": INFO, "debug": DEBUG}
+
+CHANNEL_NAMES = ["model", "net", "game"]
+
+# trace file records: time, channel number, level and message length,
+# followed by the message encoded as UTF-8
+RECORD_HEADER = struct.Struct("<dBBH")
+MAX_MESSAGE_LENGTH = 0xffff
+
+
+''' A TraceChannel is what the game traces messages through.  It has
+its own level, but shares the ring buffer and outputs of its Tracer.'''
+class TraceChannel():
+    def __init__(self, tracer, name, level):
+        self.tracer = tracer
+        self.name = name
+        self.number = CHANNEL_NAMES.index(name)
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        # checked by callers in hot loops before building a message
+        self.debug_on = level >= DEBUG
+
+    def error(self, fmt, *args):
+        if self.level >= ERROR:
+            self.tracer.record(self, ERROR, fmt, args)
+
+    def info(self, fmt, *args):
+        if self.level >= INFO:
+            self.tracer.record(self, INFO, fmt, args)
+
+    def debug(self, fmt, *args):
+        if self.level >= DEBUG:
+            self.tracer.record(self, DEBUG, fmt, args)
+
+
+''' The Tracer holds the channels, the ring buffer of recent messages,
+and the optional console and trace file outputs.'''
+class Tracer():
+    def __init__(self, ring_size=1000, console=sys.stdout):
+        self.ring = deque(maxlen=ring_size)
+        self.recorded = 0
+        self.console = console
+        self.trace_file = None
+        self.channels = {}
+        for name in CHANNEL_NAMES:
+            self.channels[name] = TraceChannel(self, name, INFO)
+
+    def channel(self, name):
+        return self.channels[name]
+
+    def set_level(self, name, level):
+        if isinstance(level, str):
+            level = LEVEL_NAMES[level.lower()]
+        self.channels[name].set_level(level)
+
+    def set_console(self, console):
+        self.console = console
+
+    def open_file(self, filename):
+        self.close_file()
+        self.trace_file = open(filename, "wb")
+
+    def close_file(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+    def record(self, channel, level, fmt, args):
+        now = time.time()
+        self.recorded += 1
+        # the arguments are stored as they are, and only formatted if
+        # the ring is dumped, so callers should pass values that won't
+        # change afterwards (e.g., coordinates rather than a Point)
+        self.ring.append((now, channel.name, level, fmt, args))
+        if self.console is None and self.trace_file is None:
+            return
+        message = format_message(fmt, args)
+        if self.console is not None:
+            print(message, file=self.console)
+        if self.trace_file is not None:
+            data = message.encode()[:MAX_MESSAGE_LENGTH]
+            self.trace_file.write(RECORD_HEADER.pack(now, channel.number, level, len(data)))
+            self.trace_file.write(data)
+
+    def dump(self, out=sys.stderr):
+        ''' print the messages in the ring buffer, oldest first '''
+        print("Last {} trace messages:".format(len(self.ring)), file=out)
+        for (when, name, level, fmt, args) in self.ring:
+            print(format_line(when, name, level, format_message(fmt, args)), file=out)
+
+    def clear(self):
+        self.ring.clear()
+        self.recorded = 0
+
+
+def format_message(fmt, args):
+    if args:
+        return fmt.format(*args)
+    return fmt
+
+def format_line(when, name, level, message):
+    level_name = [n for n in LEVEL_NAMES if LEVEL_NAMES[n] == level][0]
+    return "{:.6f} {:>5} {:>5}: {}".format(when, name, level_name, message)
+
+def read_trace_file(filename):
+    ''' returns the list of (time, channel name, level, message) records
+        in a trace file '''
+    records = []
+    with open(filename, "rb") as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return records
+            (when, number, level, length) = RECORD_HEADER.unpack(header)
+            message = f.read(length).decode(errors="replace")
+            records.append((when, CHANNEL_NAMES[number], level, message))
+
+def configure(tracer, levels_string="", trace_filename=None):
+    ''' levels_string is a comma-separated list of channel=level, e.g.
+        "model=debug,net=off" '''
+    for item in levels_string.split(","):
+        if item.strip() == "":
+            continue
+        (name, level) = item.split("=")
+        tracer.set_level(name.strip(), level.strip())
+    if trace_filename is not None:
+        tracer.open_file(trace_filename)
+
+
+# The tracer and channels used by the game
+tracer = Tracer()
+model_trace = tracer.channel("model")
+net_trace = tracer.channel("net")
+game_trace = tracer.channel("game")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 pong_trace.py <trace file>")
+        sys.exit(2)
+    for (when, name, level, message) in read_trace_file(sys.argv[1]):
+        print(format_line(when, name, level, message))
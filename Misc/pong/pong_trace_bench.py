@@ -0,0 +1,112 @@
+# Benchmark of the Pong game loop with tracing on and off.  Runs two
+# networked controllers (each with a local bot playing against the other)
+# in one process, without a GUI and without a real network: each
+# controller's outgoing messages are handed straight to the other one's
+# incoming message handler.  Frames are run as fast as possible, and we
+# report how many frames per second we get with different trace settings.
+#
+#   python3 pong_trace_bench.py [-f frames] [--halfplanes] [--stdout]
+#
+# --halfplanes uses the original half-plane collision checks, which trace
+# for every bar on every frame.  Console output goes to os.devnull, which
+# is much faster than a real terminal, unless --stdout is given.
+
+import argparse, asyncio, os, sys, tempfile, time
+
+import pong_model
+from pong import Controller
+from network_utils import FlexibleUdpServerProtocol, FlexibleUdpAsyncSenderProtocol
+from pong_trace import tracer, CHANNEL_NAMES, OFF, INFO, DEBUG
+
+
+class LoopbackTransport():
+    ''' stands in for a UDP transport, delivering datagrams to the
+        other controller as a FlexibleUdpServerProtocol would '''
+    def __init__(self, receiving_controller, loop):
+        self.receiver = FlexibleUdpServerProtocol(receiving_controller.process_message_from_net_opponent, loop)
+
+    def sendto(self, data):
+        # like a real transport, don't keep a reference to the sender's buffer
+        self.receiver.datagram_received(bytes(data), ('127.0.0.1', 0))
+
+
+def make_controllers():
+    controllers = [Controller(), Controller()]
+    # bar 1 is ours on the first controller, bar 2 on the second
+    controllers[0].model.set_players_info([(1,'bot'),(2,'remote')])
+    controllers[1].model.set_players_info([(1,'remote'),(2,'bot')])
+    controllers[1].decision_maker = False
+    for controller in controllers:
+        controller.waiting_net_opponent = False
+        controller.net_sending_frequency = 0
+    return controllers
+
+async def run_frames(frames):
+    loop = asyncio.get_event_loop()
+    controllers = make_controllers()
+    for (sender, receiver) in [(controllers[0], controllers[1]), (controllers[1], controllers[0])]:
+        protocol = FlexibleUdpAsyncSenderProtocol(loop, sender.generate_messages_for_net_opponent(), 0)
+        protocol.connection_made(LoopbackTransport(receiver, loop))
+    start = time.perf_counter()
+    for frame in range(frames):
+        for controller in controllers:
+            if not controller.model.game_running:
+                controller.model.restart()
+            controller.model.update(controller.get_speed())
+        # let the senders and receivers run
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    for controller in controllers:
+        controller.exit()
+    await asyncio.sleep(0.01)
+    return frames / elapsed
+
+def set_levels(level):
+    for name in CHANNEL_NAMES:
+        tracer.set_level(name, level)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Frames per second of a headless two-player Pong game with different trace settings.')
+    parser.add_argument('-f', '--frames', type=int, default=20000, help='Number of frames to run for each setting')
+    parser.add_argument('--halfplanes', action='store_true', help='Use the half-plane collision checks instead of swept collisions')
+    parser.add_argument('--stdout', action='store_true', help='Echo console traces to standard output instead of os.devnull')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    frames = args.frames
+    pong_model.swept_collisions = not args.halfplanes
+    if args.stdout:
+        console = sys.stdout
+    else:
+        console = open(os.devnull, "w")
+    trace_filename = os.path.join(tempfile.mkdtemp(), "pong.trace")
+    configurations = [
+        ("off", OFF, None, False),
+        ("info", INFO, console, False),
+        ("debug, ring buffer only", DEBUG, None, False),
+        ("debug, console", DEBUG, console, False),
+        ("debug, trace file", DEBUG, None, True),
+    ]
+    loop = asyncio.get_event_loop()
+    results = []
+    for (name, level, output, to_file) in configurations:
+        set_levels(level)
+        tracer.set_console(output)
+        tracer.clear()
+        if to_file:
+            tracer.open_file(trace_filename)
+        fps = loop.run_until_complete(run_frames(frames))
+        tracer.close_file()
+        results.append((name, fps, tracer.recorded))
+    os.remove(trace_filename)
+    # print at the end, so the results aren't lost among --stdout traces
+    tracer.set_console(sys.stdout)
+    set_levels(INFO)
+    print("{} frames of a two-player game, {} collisions".format(frames, "half-plane" if args.halfplanes else "swept"))
+    print("{:>24} {:>10} {:>12}".format("tracing", "fps", "messages"))
+    for (name, fps, recorded) in results:
+        print("{:>24} {:>10.0f} {:>12}".format(name, fps, recorded))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import pytest, io, os
+from pong_trace import *
+
+class TestSuiteForTracer:
+    def setup_method(self):
+        self.tracer = Tracer(ring_size=3, console=None)
+        self.model = self.tracer.channel("model")
+
+    def test_levels(self):
+        self.model.debug("not kept {}", 1)
+        self.model.info("kept {}", 2)
+        self.tracer.set_level("model", "debug")
+        self.model.debug("kept {}", 3)
+        self.tracer.set_level("model", OFF)
+        self.model.error("not kept")
+        assert [format_message(fmt, args) for (_, _, _, fmt, args) in self.tracer.ring] == ["kept 2", "kept 3"]
+
+    def test_ring_keeps_latest_messages(self):
+        for i in range(5):
+            self.model.info("message {}", i)
+        out = io.StringIO()
+        self.tracer.dump(out)
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 4 and lines[1].endswith("message 2") and lines[3].endswith("message 4")
+
+    def test_trace_file(self, tmpdir):
+        filename = os.path.join(str(tmpdir), "test.trace")
+        configure(self.tracer, "net=debug", filename)
+        self.tracer.channel("net").debug("Sending: {}", b"Ball:1,2,3")
+        self.model.info("Ball touched net {}: updating score", 2)
+        self.tracer.close_file()
+        records = read_trace_file(filename)
+        assert [(name, level, message) for (_, name, level, message) in records] == [("net", DEBUG, "Sending: b'Ball:1,2,3'"), ("model", INFO, "Ball touched net 2: updating score")]
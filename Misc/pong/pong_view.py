@@ -28,7 +28,8 @@ class TkView(Frame):
             self.root.wm_title("Pong")
         self.canvas = Canvas(self.root, width=int(CANVAS_WIDTH*self.scale), height=int(CANVAS_HEIGHT*self.scale), bg="white")
         self.canvas.pack(side = LEFT, fill=BOTH, expand=TRUE)
-        self.canvas.create_line(int(self.scale*CANVAS_WIDTH/2), 0, int(self.scale*CANVAS_WIDTH/2), int(self.scale*CANVAS_HEIGHT), dash=(4, 2))
+        if self.controller.get_number_players() == 2:
+            self.canvas.create_line(int(self.scale*CANVAS_WIDTH/2), 0, int(self.scale*CANVAS_WIDTH/2), int(self.scale*CANVAS_HEIGHT), dash=(4, 2))
         self.init_fonts()
         self.root.bind('<Key>', self.key)
     
@@ -64,8 +65,10 @@ class TkView(Frame):
         wall_view.draw(self.scale)
 
     def register_net(self, net_model):
-        # don't need to visualize nets
-        pass
+        # on a court, the nets are just the edges of the screen; in a
+        # polygonal arena, they show where its sides are
+        if self.controller.get_number_players() > 2:
+            BarView(self.canvas, net_model, self.scale, show_id=False)
 
     def register_bar(self, bar_model):
         self.bars_view.append(BarView(self.canvas, bar_model, self.scale))
@@ -105,9 +108,10 @@ class TkView(Frame):
     
 ''' The BarView class has the task of displaying one bar '''
 class BarView():
-    def __init__(self, canvas, bar, scale):
+    def __init__(self, canvas, bar, scale, show_id=True):
         self.canvas = canvas
         self.bar = bar
+        self.show_id = show_id
         self.xpos = self.bar.get_xpos()
         self.ypos = self.bar.get_ypos()
         self.id_text = None
@@ -116,13 +120,12 @@ class BarView():
         
     ''' draw the bar '''
     def draw(self, scale):
-        height = scale*self.bar.get_height()
-        width = scale*self.bar.get_width()
         xpos = scale*self.bar.get_xpos()
         ypos = scale*self.bar.get_ypos()
-        canvas_height = scale*CANVAS_HEIGHT
-        self.main_rect = self.canvas.create_rectangle(xpos - width/2, ypos - height/2, xpos + width/2, ypos + height/2, fill=self.bar.color)
-        if self.bar.get_id() != None and self.bar.get_id() != -1:
+        # bars can be at any angle in a polygonal arena
+        scaled_corners = [scale*coordinate for corner in self.bar.get_corners() for coordinate in corner]
+        self.main_rect = self.canvas.create_polygon(*scaled_corners, fill=self.bar.color, outline="black")
+        if self.show_id and self.bar.get_id() != None and self.bar.get_id() != -1:
             self.id_text = self.canvas.create_text(xpos, ypos)
             idfont = font.nametofont("TkDefaultFont")
             idfont.configure(size=int(20*scale))
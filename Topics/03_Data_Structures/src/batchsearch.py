@@ -0,0 +1,238 @@
+# Looking up lots of values in a sorted list at once.
+#
+# is_in_bisect in binarysearch.py answers one question at a time: is
+# val in lst?  When we have a whole batch of values to look up, there
+# are faster ways than asking about each one in turn.  Each function
+# here takes a sorted list and a list of queries, and returns two lists:
+# - found[i] is True if queries[i] is in the list
+# - positions[i] is where queries[i] is, or would go to keep the list
+#   sorted (the same as bisect.bisect_left gives)
+#
+# The ways of doing it:
+# - search_bisect: bisect.bisect_left for each query.  Like
+#   is_in_bisect, but the loop is in C rather than Python.
+# - search_merge: if the queries are sorted too, walk along both lists
+#   together, like merging them.  O(n + m) for n items and m queries,
+#   so it's good when there are lots of queries.
+# - Eytzinger: the same items stored in a different order, so binary
+#   search reads them from memory in an order that suits the cache,
+#   with no if in the loop.
+# - search_numpy: numpy.searchsorted does the whole batch in C, if
+#   NumPy is installed.  Turning a list into a NumPy array takes O(n),
+#   so if you search the same list more than once, convert it once
+#   with numpy.array(lst) and pass the array in instead.
+# batch_search picks one of them for you.
+
+import bisect
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import random
+import pytest
+
+def reference(lst, queries):
+    positions = [bisect.bisect_left(lst, x) for x in queries]
+    found = [i < len(lst) and lst[i] == x for (i, x) in zip(positions, queries)]
+    return (found, positions)
+
+def make_test(n, m):
+    lst = sorted(random.randrange(n * 2) for i in range(n))
+    queries = [random.randrange(-5, n * 2 + 5) for i in range(m)]
+    return (lst, queries)
+
+def test_small():
+    lst = [1,2,2,2,3,10]
+    queries = [0, 1, 2, 3, 4, 10, 11]
+    expected = ([False, True, True, True, False, True, False], [0, 0, 1, 4, 5, 5, 6])
+    assert search_bisect(lst, queries) == expected
+    assert search_merge(lst, queries) == expected
+    assert Eytzinger(lst).search(queries) == expected
+    assert Eytzinger(lst).position(4) == 5
+    assert batch_search(lst, queries, "bisect") == expected
+    assert batch_search(lst, queries) == expected
+
+def test_empty():
+    assert search_bisect([], [1, 2]) == ([False, False], [0, 0])
+    assert search_merge([], [1, 2]) == ([False, False], [0, 0])
+    assert Eytzinger([]).search([1, 2]) == ([False, False], [0, 0])
+    assert search_merge([1, 2], []) == ([], [])
+
+def test_random():
+    for n in [1, 2, 3, 7, 8, 100, 1000]:
+        (lst, queries) = make_test(n, 500)
+        expected = reference(lst, queries)
+        assert search_bisect(lst, queries) == expected
+        assert Eytzinger(lst).search(queries) == expected
+        queries.sort()
+        assert search_merge(lst, queries) == reference(lst, queries)
+
+def test_merge_needs_sorted():
+    with pytest.raises(ValueError):
+        search_merge([1, 2, 3], [3, 1])
+
+def test_batch_search_returns_lists():
+    (lst, queries) = make_test(100, 1000)
+    queries.sort()
+    expected = reference(lst, queries)
+    methods = [None, "bisect", "merge", "eytzinger"]
+    if np is not None:
+        methods.append("numpy")
+    for method in methods:
+        (found, positions) = batch_search(lst, queries, method)
+        assert type(found) == list and type(positions) == list
+        assert (found, positions) == expected
+
+@pytest.mark.skipif(np is None, reason="NumPy is not installed")
+def test_numpy():
+    (lst, queries) = make_test(1000, 500)
+    expected = reference(lst, queries)
+    assert search_numpy(lst, queries) == expected
+    # an array is used as it is, and batch_search always picks NumPy for it
+    array = np.array(lst)
+    assert search_numpy(array, queries) == expected
+    assert batch_search(array, queries[:3]) == reference(lst, queries[:3])
+
+
+def search_bisect(lst, queries):
+    found = []
+    positions = []
+    n = len(lst)
+    for x in queries:
+        i = bisect.bisect_left(lst, x)
+        positions.append(i)
+        found.append(i < n and lst[i] == x)
+    return (found, positions)
+
+def search_merge(lst, queries):
+    ''' The queries must be in order.  Rather than starting each search
+        from scratch, carry on along lst from where the last one ended.'''
+    found = []
+    positions = []
+    n = len(lst)
+    i = 0
+    previous = None
+    for x in queries:
+        if previous is not None and x < previous:
+            raise ValueError("search_merge needs the queries in order")
+        previous = x
+        while i < n and lst[i] < x:
+            i += 1
+        positions.append(i)
+        found.append(i < n and lst[i] == x)
+    return (found, positions)
+
+def search_numpy(lst, queries):
+    ''' lst can be a list or a sorted NumPy array; only a list needs
+        converting first.  Returns lists, like the others.'''
+    if isinstance(lst, np.ndarray):
+        items = lst
+    else:
+        items = np.array(lst)
+    values = np.asarray(queries)
+    positions = np.searchsorted(items, values, side='left')
+    found = np.zeros(len(values), dtype=bool)
+    inside = positions < len(items)
+    found[inside] = items[positions[inside]] == values[inside]
+    return (found.tolist(), positions.tolist())
+
+
+'''Binary search always looks at the middle item first, then the middle
+   of one half, then the middle of one quarter, and so on: all over the
+   list, so each look is likely to be a cache miss.
+
+   The Eytzinger layout (named after a 16th century genealogist, who
+   numbered people's ancestors this way) stores the items in the order
+   binary search visits them: the middle item at position 1, the
+   middles of the two halves at 2 and 3, the middles of the quarters at
+   4 to 7, and so on.  The item at k has the smaller items below it at
+   2k and the larger ones at 2k+1.  The first few levels of the search,
+   which every search visits, are all together at the start, and each
+   step goes to k = 2k or 2k+1 depending on a comparison, which we can
+   add on as 0 or 1 rather than testing with an if.'''
+class Eytzinger():
+    def __init__(self, lst):
+        n = len(lst)
+        self.n = n
+        # items[k] is the item at position k (items[0] isn't used), and
+        # rank[k] is where it is in the sorted list
+        self.items = [None] * (n + 1)
+        self.rank = [n] * (n + 1)
+        # visit positions 1..n in order (left subtree, node, right
+        # subtree), handing out the sorted items as we go
+        i = 0
+        k = 1
+        stack = []
+        while len(stack) > 0 or k <= n:
+            if k <= n:
+                stack.append(k)
+                k = 2 * k
+            else:
+                k = stack.pop()
+                self.items[k] = lst[i]
+                self.rank[k] = i
+                i += 1
+                k = 2 * k + 1
+
+    def position(self, x):
+        ''' Where x is, or would go, in the sorted list.'''
+        items = self.items
+        n = self.n
+        k = 1
+        while k <= n:
+            k = 2 * k + (items[k] < x)
+        # The last time we went left (the last 0 bit of k) was at the
+        # smallest item that isn't less than x.  Throw away the 1s for
+        # the times we went right after that, and the 0 itself.
+        k >>= (~k & (k + 1)).bit_length()
+        # k is 0 if we never went left: x is bigger than everything,
+        # and rank[0] is n
+        return self.rank[k]
+
+    def search(self, queries):
+        found = []
+        positions = []
+        items = self.items
+        rank = self.rank
+        n = self.n
+        for x in queries:
+            k = 1
+            while k <= n:
+                k = 2 * k + (items[k] < x)
+            k >>= (~k & (k + 1)).bit_length()
+            positions.append(rank[k])
+            found.append(k != 0 and items[k] == x)
+        return (found, positions)
+
+
+def batch_search(lst, queries, method=None):
+    ''' Look up all the queries in the sorted list lst, returning lists
+        of found and positions whichever way it's done.  method is
+        "bisect", "merge", "eytzinger" or "numpy"; if it's None, we
+        choose:
+        - NumPy if lst is a NumPy array already
+        - if there are enough queries to be worth a pass over all of lst
+          (m searches of log n steps is more than n), NumPy if it's
+          installed, otherwise merging if the queries are in order
+        - otherwise bisect.'''
+    if method is None:
+        worthwhile = len(queries) * max(1, len(lst).bit_length()) > len(lst)
+        if np is not None and (isinstance(lst, np.ndarray) or worthwhile):
+            method = "numpy"
+        elif worthwhile and all(a <= b for (a, b) in zip(queries, queries[1:])):
+            method = "merge"
+        else:
+            method = "bisect"
+    if method == "bisect":
+        return search_bisect(lst, queries)
+    elif method == "merge":
+        return search_merge(lst, queries)
+    elif method == "eytzinger":
+        return Eytzinger(lst).search(queries)
+    elif method == "numpy":
+        if np is None:
+            raise ValueError("NumPy is not installed")
+        return search_numpy(lst, queries)
+    raise ValueError("unknown method " + str(method))
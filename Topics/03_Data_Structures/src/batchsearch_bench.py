@@ -0,0 +1,67 @@
+# Benchmark of the batch searches in batchsearch.py against calling
+# is_in_bisect from binarysearch.py once per query, for a sorted list
+# of n random integers and m random queries.  We time:
+# - is_in_bisect: binarysearch.is_in_bisect for each query
+# - bisect: batchsearch.search_bisect
+# - merge: batchsearch.search_merge (the time includes sorting the
+#   queries, which it needs)
+# - eytzinger: batchsearch.Eytzinger(...).search (building the layout
+#   is timed separately, as "eytzinger build")
+# - numpy: batchsearch.search_numpy, if NumPy is installed (on an
+#   array made beforehand, so the time doesn't include converting lst)
+#
+#   python3 batchsearch_bench.py [-n items] [-m queries]
+
+import argparse, random, time
+from binarysearch import is_in_bisect
+import batchsearch
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start, result)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares ways of searching for many values.')
+    parser.add_argument('-n', '--items', type=int, action='append',
+                        help='Items in the sorted list (default: 10^3, 10^5 and 10^7)')
+    parser.add_argument('-m', '--queries', type=int, action='append',
+                        help='Queries to make (default: 10^3 and 10^6)')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    rand = random.Random(1)
+    print("{:>9} {:>9} {:<16} {:>9} {:>13}".format("items", "queries", "method", "seconds", "queries/s"))
+    for n in args.items or [10 ** 3, 10 ** 5, 10 ** 7]:
+        lst = sorted(rand.randrange(2 * n) for i in range(n))
+        for m in args.queries or [10 ** 3, 10 ** 6]:
+            queries = [rand.randrange(2 * n) for i in range(m)]
+            (expected_found, expected_positions) = batchsearch.search_bisect(lst, queries)
+
+            def show(method, seconds):
+                rate = "-" if method == "eytzinger build" else "{:.0f}".format(m / seconds)
+                print("{:>9} {:>9} {:<16} {:>9.4f} {:>13}".format(n, m, method, seconds, rate))
+
+            (seconds, found) = timed(lambda: [is_in_bisect(lst, x) for x in queries])
+            assert found == expected_found
+            show("is_in_bisect", seconds)
+            (seconds, result) = timed(lambda: batchsearch.search_bisect(lst, queries))
+            show("bisect", seconds)
+            (seconds, result) = timed(lambda: batchsearch.search_merge(lst, sorted(queries)))
+            assert result[1] == sorted(expected_positions)
+            show("merge", seconds)
+            (seconds, eytzinger) = timed(lambda: batchsearch.Eytzinger(lst))
+            show("eytzinger build", seconds)
+            (seconds, result) = timed(lambda: eytzinger.search(queries))
+            assert result == (expected_found, expected_positions)
+            show("eytzinger", seconds)
+            eytzinger = None
+            if batchsearch.np is not None:
+                array = batchsearch.np.array(lst)
+                (seconds, result) = timed(lambda: batchsearch.search_numpy(array, queries))
+                assert result == (expected_found, expected_positions)
+                show("numpy", seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Benchmark of the mergesorts, on n random, nearly sorted (1% of items
+# swapped) and reversed integers:
+# - recursive: mergesort.py, slicing the list in half each time
+# - compare: mergesort_cmp.py, with a lambda for the comparison
+# - bottomup: mergesort_bottomup.py
+# - bottomup key: mergesort_bottomup.py with key=lambda x: -x
+# - sorted: Python's own sorted(), for comparison
+# Then external_sort on a file of random numbers, one per line.
+#
+#   python3 mergesort_bench.py [-n items] [--file-mb MB] [--memory-mb MB]
+#
+# With the defaults (10^7 items, a 2GB file) this takes a good while.
+# The file goes in the system's temporary directory, unless you say
+# otherwise with --tmpdir.
+
+import argparse, os, random, sys, tempfile, time
+import mergesort as recursive
+import mergesort_cmp
+from mergesort_bottomup import mergesort, external_sort
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start, result)
+
+sorts = {
+    "recursive": lambda lst: recursive.mergesort(lst),
+    "compare": lambda lst: mergesort_cmp.mergesort(lst, lambda x, y: x <= y),
+    "bottomup": lambda lst: mergesort(lst),
+    "bottomup key": lambda lst: mergesort(lst, key=lambda x: -x),
+    "sorted": lambda lst: sorted(lst),
+}
+
+def inputs(n, rand):
+    lst = list(range(n))
+    rand.shuffle(lst)
+    yield ("random", lst)
+    lst = list(range(n))
+    for i in range(n // 100):
+        a = rand.randrange(n)
+        b = rand.randrange(n)
+        (lst[a], lst[b]) = (lst[b], lst[a])
+    yield ("nearly sorted", lst)
+    yield ("reversed", list(range(n, 0, -1)))
+
+def write_numbers(filename, size, rand):
+    with open(filename, "wb") as f:
+        written = 0
+        while written < size:
+            chunk = b"".join(b"%d\n" % rand.randrange(10 ** 12) for i in range(100000))
+            f.write(chunk)
+            written += len(chunk)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares mergesorts.')
+    parser.add_argument('-n', '--items', type=int, default=10 ** 7, help='Items to sort in memory')
+    parser.add_argument('-s', '--sort', action='append', choices=list(sorts),
+                        help='Sort to test (default: all of them)')
+    parser.add_argument('--file-mb', type=int, default=2048, help='Size of file to sort (0 to skip)')
+    parser.add_argument('--memory-mb', type=int, default=64, help='Memory for each run of external_sort')
+    parser.add_argument('--tmpdir', default=None, help='Where to put the file and the runs')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    rand = random.Random(1)
+    # the recursive sorts only go log2(n) deep, but just in case
+    sys.setrecursionlimit(10000)
+    print("{} items; seconds".format(args.items))
+    names = args.sort or list(sorts)
+    print("{:<14}".format("input"), " ".join("{:>13}".format(name) for name in names))
+    for (kind, lst) in inputs(args.items, rand):
+        expected = None
+        times = []
+        for name in names:
+            (seconds, result) = timed(lambda: sorts[name](lst))
+            if name == "bottomup key":
+                result.reverse()
+            if expected is None:
+                expected = sorted(lst)
+            assert result == expected, name + " got it wrong"
+            times.append(seconds)
+            result = None
+        print("{:<14}".format(kind), " ".join("{:>13.2f}".format(t) for t in times))
+        expected = None
+
+    if args.file_mb == 0:
+        return
+    tmpdir = tempfile.mkdtemp(dir=args.tmpdir)
+    infile = os.path.join(tmpdir, "numbers.txt")
+    outfile = os.path.join(tmpdir, "sorted.txt")
+    write_numbers(infile, args.file_mb * 1024 * 1024, rand)
+    size = os.path.getsize(infile)
+    (seconds, runs) = timed(lambda: external_sort(infile, outfile, key=int,
+                                                  memory=args.memory_mb * 1024 * 1024,
+                                                  tmpdir=tmpdir))
+    # check it's in order, a line at a time
+    lines = 0
+    with open(outfile, "rb") as f:
+        previous = -1
+        for line in f:
+            value = int(line)
+            assert previous <= value
+            previous = value
+            lines += 1
+    print("external_sort: {:.0f} MB, {} lines, {} runs of {} MB: {:.1f} s, {:.1f} MB/s".format(
+        size / 2 ** 20, lines, runs, args.memory_mb, seconds, size / 2 ** 20 / seconds))
+    os.unlink(infile)
+    os.unlink(outfile)
+    os.rmdir(tmpdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# Faster mergesort, and mergesort for files too big to fit in memory.
+#
+# mergesort.py splits the list in half with lst[:pivot] and
+# lst[pivot:], which copies every element at every level of the
+# recursion, and builds a new list for every merge.  mergesort_cmp.py
+# also calls compare() once for every comparison, which is slow if the
+# comparison has to do work (like len(x)) each time.
+#
+# This version works the other way round: bottom-up.
+# - First find the runs that are already in order.  Random data has
+#   short runs, so we sort small pieces (MIN_RUN long) with insertion
+#   sort to start with runs at least that long.  Data that's already
+#   nearly sorted has long runs, and then there's almost nothing left
+#   to do: a sorted list is one run, and costs O(n).
+# - Then merge neighbouring pairs of runs, over and over, until there's
+#   just one run.  Each pass merges from one list into another, then
+#   they swap roles, so one scratch list of length n is all we need.
+# - Like sorted(), it takes a key function, rather than a compare
+#   function.  key(x) is called once for each item, and the keys are
+#   sorted with the items carried along beside them.
+#
+# external_sort() sorts the lines of a file that may be much bigger
+# than memory: it reads as many lines as fit in memory, sorts them and
+# writes them out to a temporary file (a "run"), and so on until it
+# gets to the end.  Then it merges all the runs at once with
+# heapq.merge, which only needs to hold one line from each run.
+
+import bisect, heapq, os, tempfile
+
+def test_simple_sort():
+    assert mergesort([2, 3, 1, 4, 0]) == [0, 1, 2, 3, 4]
+
+def test_simple_sort10(): # Test edge cases, for 1 or no elements.
+    assert mergesort([190]) == [190]
+    assert mergesort([]) == []
+
+def test_longlists():
+    import random
+    for n in [31, 32, 33, 1000, 5000]:
+        lst = list(range(n))
+        random.shuffle(lst)
+        assert mergesort(lst) == list(range(n))
+        assert mergesort(list(range(n))) == list(range(n))
+        assert mergesort(list(range(n, 0, -1))) == list(range(1, n + 1))
+
+def test_key_is_stable():
+    items = ["A", "BB", "CCC", "DD", "E"]
+    assert mergesort(items, key=len) == ["A", "E", "BB", "DD", "CCC"]
+    import random
+    pairs = [(random.randrange(10), i) for i in range(3000)]
+    assert mergesort(pairs, key=lambda pair: pair[0]) == sorted(pairs, key=lambda pair: pair[0])
+
+def test_key_called_once():
+    calls = []
+    def key(x):
+        calls.append(x)
+        return -x
+    assert mergesort(list(range(100)), key=key) == list(range(99, -1, -1))
+    assert len(calls) == 100
+
+def test_external_sort(tmp_path):
+    import random
+    numbers = [random.randrange(10 ** 6) for i in range(5000)]
+    infile = tmp_path / "in.txt"
+    outfile = tmp_path / "out.txt"
+    # the last line has no newline
+    infile.write_bytes(b"\n".join(b"%d" % x for x in numbers))
+    # tiny runs, so there are lots of them to merge
+    runs = external_sort(str(infile), str(outfile), key=int, memory=1024)
+    assert runs > 10
+    assert [int(line) for line in outfile.read_bytes().split()] == sorted(numbers)
+
+
+MIN_RUN = 64   # shortest run we'll start merging with
+
+def mergesort(lst, key=None):
+    ''' Return a new list holding the items of lst in order, stably.'''
+    n = len(lst)
+    if key is None:
+        keys = list(lst)
+        values = None
+    else:
+        keys = [key(x) for x in lst]
+        values = list(lst)
+    if n <= 1:
+        return list(lst)
+    runs = find_runs(keys, values)
+    # merge pairs of runs from src into dst, then swap them over
+    src_keys = keys
+    src_values = values
+    dst_keys = [None] * n
+    dst_values = None if values is None else [None] * n
+    while len(runs) > 2:
+        merged_runs = []
+        for r in range(0, len(runs) - 1, 2):
+            lo = runs[r]
+            if r + 2 < len(runs):
+                mid = runs[r + 1]
+                hi = runs[r + 2]
+                if values is None:
+                    merge(src_keys, dst_keys, lo, mid, hi)
+                else:
+                    merge_with_values(src_keys, src_values, dst_keys, dst_values, lo, mid, hi)
+            else:
+                # an odd run left over at the end: it just moves across
+                hi = runs[r + 1]
+                dst_keys[lo:hi] = src_keys[lo:hi]
+                if values is not None:
+                    dst_values[lo:hi] = src_values[lo:hi]
+            merged_runs.append(lo)
+        merged_runs.append(n)
+        runs = merged_runs
+        (src_keys, dst_keys) = (dst_keys, src_keys)
+        (src_values, dst_values) = (dst_values, src_values)
+    if values is None:
+        return src_keys
+    return src_values
+
+def find_runs(keys, values):
+    ''' Find the runs that are already in order, reversing the ones that
+        are in reverse order and sorting short ones up to MIN_RUN long.
+        Returns the index each run starts at, followed by len(keys).'''
+    n = len(keys)
+    runs = []
+    lo = 0
+    while lo < n:
+        hi = lo + 1
+        if hi < n and keys[hi] < keys[lo]:
+            # strictly descending, so reversing it can't reorder equal keys
+            while hi < n and keys[hi] < keys[hi - 1]:
+                hi += 1
+            keys[lo:hi] = keys[lo:hi][::-1]
+            if values is not None:
+                values[lo:hi] = values[lo:hi][::-1]
+        else:
+            while hi < n and not keys[hi] < keys[hi - 1]:
+                hi += 1
+        if hi - lo < MIN_RUN and hi < n:
+            end = min(n, lo + MIN_RUN)
+            insertion_sort(keys, values, lo, hi, end)
+            hi = end
+        runs.append(lo)
+        lo = hi
+    runs.append(n)
+    return runs
+
+def insertion_sort(keys, values, lo, sorted_to, hi):
+    ''' keys[lo:sorted_to] is sorted already: insert the rest of
+        keys[lo:hi] into it one at a time.'''
+    for i in range(sorted_to, hi):
+        k = keys[i]
+        # after any equal keys, to keep the sort stable
+        pos = bisect.bisect_right(keys, k, lo, i)
+        if pos < i:
+            keys[pos + 1:i + 1] = keys[pos:i]
+            keys[pos] = k
+            if values is not None:
+                v = values[i]
+                values[pos + 1:i + 1] = values[pos:i]
+                values[pos] = v
+
+def merge(src, dst, lo, mid, hi):
+    ''' Merge the sorted runs src[lo:mid] and src[mid:hi] into dst[lo:hi].'''
+    if not src[mid] < src[mid - 1]:
+        # already in order, as happens a lot with nearly sorted data
+        dst[lo:hi] = src[lo:hi]
+        return
+    i = lo
+    j = mid
+    k = lo
+    # keep the front item of each run in a variable, so each step only
+    # has to fetch one new item
+    a = src[i]
+    b = src[j]
+    while True:
+        if b < a:
+            dst[k] = b
+            k += 1
+            j += 1
+            if j == hi:
+                break
+            b = src[j]
+        else:
+            # on a tie, take from the left run, to keep the sort stable
+            dst[k] = a
+            k += 1
+            i += 1
+            if i == mid:
+                break
+            a = src[i]
+    # one run is used up; the rest of the other is in order already
+    if i < mid:
+        dst[k:hi] = src[i:mid]
+    else:
+        dst[k:hi] = src[j:hi]
+
+def merge_with_values(src_keys, src_values, dst_keys, dst_values, lo, mid, hi):
+    ''' The same as merge, but moving each value with its key.'''
+    if not src_keys[mid] < src_keys[mid - 1]:
+        dst_keys[lo:hi] = src_keys[lo:hi]
+        dst_values[lo:hi] = src_values[lo:hi]
+        return
+    i = lo
+    j = mid
+    k = lo
+    a = src_keys[i]
+    b = src_keys[j]
+    while True:
+        if b < a:
+            dst_keys[k] = b
+            dst_values[k] = src_values[j]
+            k += 1
+            j += 1
+            if j == hi:
+                break
+            b = src_keys[j]
+        else:
+            dst_keys[k] = a
+            dst_values[k] = src_values[i]
+            k += 1
+            i += 1
+            if i == mid:
+                break
+            a = src_keys[i]
+    if i < mid:
+        dst_keys[k:hi] = src_keys[i:mid]
+        dst_values[k:hi] = src_values[i:mid]
+    else:
+        dst_keys[k:hi] = src_keys[j:hi]
+        dst_values[k:hi] = src_values[j:hi]
+
+
+def external_sort(infile, outfile, key=None, memory=64 * 1024 * 1024, tmpdir=None):
+    ''' Sort the lines of the file infile into outfile, using about
+        memory bytes of lines at a time.  Lines are bytes, so key gets
+        bytes too (int() is happy with bytes).  Returns the number of
+        runs it had to merge.'''
+    with tempfile.TemporaryDirectory(dir=tmpdir) as rundir:
+        runfiles = []
+        with open(infile, "rb") as f:
+            while True:
+                # readlines stops once it has read more than memory bytes
+                lines = f.readlines(memory)
+                if len(lines) == 0:
+                    break
+                if not lines[-1].endswith(b"\n"):
+                    lines[-1] += b"\n"
+                runfile = os.path.join(rundir, "run" + str(len(runfiles)))
+                with open(runfile, "wb") as run:
+                    run.writelines(mergesort(lines, key=key))
+                runfiles.append(runfile)
+        runs = [open(runfile, "rb") for runfile in runfiles]
+        try:
+            with open(outfile, "wb") as out:
+                out.writelines(heapq.merge(*runs, key=key))
+        finally:
+            for run in runs:
+                run.close()
+    return len(runfiles)
+
+
+if __name__ == "__main__":
+    test_longlists()
@@ -0,0 +1,148 @@
+# Mergesort on several processor cores at once.
+#
+# Python only runs one thread of Python code at a time, so to use more
+# than one core we need more than one process.  The obvious way, giving
+# each process its chunk of the list as an argument, means pickling the
+# chunk, sending it down a pipe and unpickling it, and the same again
+# for the answer - for big lists that takes longer than sorting does.
+#
+# Instead, the numbers go into shared memory, which every process can
+# see.  Each process is only told where in it its chunk is:
+# 1. Copy the list into a shared array of 64-bit ints or floats.
+# 2. Split it into one chunk per worker, and have each worker sort its
+#    chunk in place with mergesort_bottomup.mergesort.
+# 3. Merge pairs of neighbouring sorted chunks into a second shared
+#    array, again one pair per worker, then pairs of those back into
+#    the first, and so on, until there's only one run left.
+#
+# Only lists of ints (that fit in 64 bits) or floats can be shared like
+# this; anything else is just sorted in this process.  Small lists are
+# too, since starting the workers costs more than it saves.
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import mergesort_bottomup
+
+def test_simple_sort():
+    assert mergesort([2, 3, 1, 4, 0]) == [0, 1, 2, 3, 4]
+
+def test_simple_sort10(): # Test edge cases, for 1 or no elements.
+    assert mergesort([190]) == [190]
+    assert mergesort([]) == []
+
+def test_parallel():
+    import random
+    for (n, workers) in [(20000, 2), (30001, 3), (25000, 4)]:
+        lst = [random.randrange(-10 ** 15, 10 ** 15) for i in range(n)]
+        assert mergesort(lst, workers=workers) == sorted(lst)
+        floats = [random.random() for i in range(n)]
+        assert mergesort(floats, workers=workers) == sorted(floats)
+
+def test_not_shareable():
+    import random
+    # too big for 64 bits, and not numbers: sorted here instead
+    big = [random.randrange(10 ** 30) for i in range(20000)]
+    assert mergesort(big, workers=2) == sorted(big)
+    words = [str(random.random()) for i in range(20000)]
+    assert mergesort(words, workers=2) == sorted(words)
+
+
+PARALLEL_MIN = 10000   # shorter lists than this are sorted here
+
+def shared_typecode(lst):
+    ''' The array typecode we can share lst as, or None.'''
+    if all(type(x) is int for x in lst):
+        return 'q'
+    if all(type(x) is float for x in lst):
+        return 'd'
+    return None
+
+def attach(name, typecode):
+    shm = shared_memory.SharedMemory(name=name)
+    return (shm, shm.buf.cast(typecode))
+
+def sort_chunk(name, typecode, lo, hi):
+    (shm, view) = attach(name, typecode)
+    try:
+        view[lo:hi] = array(typecode, mergesort_bottomup.mergesort(view[lo:hi].tolist()))
+    finally:
+        view.release()
+        shm.close()
+
+def merge_chunks(src_name, dst_name, typecode, lo, mid, hi):
+    ''' Merge runs src[lo:mid] and src[mid:hi] into dst[lo:hi].'''
+    (src_shm, src) = attach(src_name, typecode)
+    (dst_shm, dst) = attach(dst_name, typecode)
+    try:
+        runs = src[lo:hi].tolist()
+        if mid == hi:
+            # an odd run left over at the end: it just moves across
+            merged = runs
+        else:
+            merged = [None] * len(runs)
+            mergesort_bottomup.merge(runs, merged, 0, mid - lo, hi - lo)
+        dst[lo:hi] = array(typecode, merged)
+    finally:
+        src.release()
+        dst.release()
+        src_shm.close()
+        dst_shm.close()
+
+def mergesort(lst, workers=None):
+    ''' Return a new list holding the items of lst in order, sorting on
+        up to workers processes (default: one per core).'''
+    if workers is None:
+        workers = os.cpu_count()
+    n = len(lst)
+    typecode = shared_typecode(lst) if n >= PARALLEL_MIN else None
+    if typecode is None:
+        return mergesort_bottomup.mergesort(lst)
+    try:
+        numbers = array(typecode, lst)
+    except OverflowError:
+        return mergesort_bottomup.mergesort(lst)
+
+    size = n * numbers.itemsize
+    shms = [shared_memory.SharedMemory(create=True, size=size),
+            shared_memory.SharedMemory(create=True, size=size)]
+    try:
+        shms[0].buf[:size] = memoryview(numbers).cast('B')
+        numbers = None
+        # the index each chunk starts at, followed by n
+        runs = [n * i // workers for i in range(workers)] + [n]
+        with ProcessPoolExecutor(workers) as pool:
+            jobs = [pool.submit(sort_chunk, shms[0].name, typecode, lo, hi)
+                    for (lo, hi) in zip(runs, runs[1:])]
+            for job in jobs:
+                job.result()
+            # each round merges pairs of runs from src into dst
+            src = 0
+            while len(runs) > 2:
+                jobs = []
+                merged_runs = []
+                for r in range(0, len(runs) - 1, 2):
+                    lo = runs[r]
+                    mid = runs[r + 1]
+                    hi = runs[r + 2] if r + 2 < len(runs) else mid
+                    jobs.append(pool.submit(merge_chunks, shms[src].name, shms[1 - src].name,
+                                            typecode, lo, mid, hi))
+                    merged_runs.append(lo)
+                merged_runs.append(n)
+                for job in jobs:
+                    job.result()
+                runs = merged_runs
+                src = 1 - src
+        view = shms[src].buf.cast(typecode)
+        result = view[:n].tolist()
+        view.release()
+        return result
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+
+if __name__ == "__main__":
+    test_parallel()
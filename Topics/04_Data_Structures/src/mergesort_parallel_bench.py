@@ -0,0 +1,53 @@
+# How mergesort_parallel.py scales with the number of worker processes,
+# for random integer lists of several sizes.  For each size we time:
+# - sequential: mergesort_bottomup.mergesort, in this process
+# - 1, 2, ... workers: mergesort_parallel.mergesort
+# - sorted: Python's own sorted(), for comparison
+# The speedup is against sequential.  There's no speedup to be had
+# from more workers than the machine has cores.
+#
+#   python3 mergesort_parallel_bench.py [-n 1000000 -n 10000000 ...] [-w max_workers]
+#
+# A list of 10^8 Python ints takes about 4GB, plus as much again
+# while it's being sorted, so only ask for that on a big machine.
+
+import argparse, os, random, time
+import mergesort_bottomup
+import mergesort_parallel
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start, result)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Measures parallel mergesort scaling.')
+    parser.add_argument('-n', '--items', type=int, action='append',
+                        help='List size (default: 10^6 and 10^7)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                        help='Most workers to try (default: one per core)')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    sizes = args.items or [10 ** 6, 10 ** 7]
+    rand = random.Random(1)
+    print("{} cores".format(os.cpu_count()))
+    print("{:>10} {:<12} {:>9} {:>8}".format("items", "sort", "seconds", "speedup"))
+    for n in sizes:
+        lst = [rand.randrange(2 ** 62) for i in range(n)]
+        (sequential, expected) = timed(lambda: mergesort_bottomup.mergesort(lst))
+        print("{:>10} {:<12} {:>9.2f} {:>8.2f}".format(n, "sequential", sequential, 1))
+        for workers in range(1, args.workers + 1):
+            (seconds, result) = timed(lambda: mergesort_parallel.mergesort(lst, workers))
+            assert result == expected
+            result = None
+            print("{:>10} {:<12} {:>9.2f} {:>8.2f}".format(
+                n, str(workers) + " workers", seconds, sequential / seconds))
+        (seconds, result) = timed(lambda: sorted(lst))
+        print("{:>10} {:<12} {:>9.2f} {:>8.2f}".format(n, "sorted", seconds, sequential / seconds))
+        expected = None
+        result = None
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#Headless benchmark of building collisions in bomber_mvc.py.
+#
+# Plays the game's Model, without any views, for cities of different
+# widths, and times the frame's collision checks (check_plane and
+# check_bomb):
+# - testing the bomb and the plane against every building, as the
+#   game used to (ScanningModel below)
+# - looking up the one building below each point from its x
+#   coordinate (Model.building_at)
+#
+# The plane is kept at the top of the screen, so it never crashes, and
+# drops a bomb every BOMB_EVERY frames.
+#
+#   python3 bomber_city_bench.py [-f frames] [-w width,width,...]
+
+import argparse, time
+from random import Random
+import bomber_mvc
+from bomber_mvc import Model
+
+BOMB_EVERY = 30   # frames between bombs
+
+''' StubController stands in for the Controller, so the Model can run
+    without any views '''
+class StubController():
+    def register_plane(self, plane):
+        pass
+
+    def register_bomb(self, bomb):
+        pass
+
+    def register_building(self, building):
+        pass
+
+    def unregister_buildings(self):
+        pass
+
+    def update_score(self, score):
+        pass
+
+    def update_level(self, level):
+        pass
+
+    def game_over(self):
+        pass
+
+    def plane_landed(self):
+        pass
+
+''' ScanningModel checks for collisions as the Model used to, by
+    testing every building '''
+class ScanningModel(Model):
+    def check_bomb(self):
+        if not self.bomb.falling:
+            return
+        for building in self.buildings:
+            if building.is_inside(self.bomb.position):
+                self.bomb.explode()
+                building.shrink()
+        if self.bomb.position.getY() > bomber_mvc.CANVAS_HEIGHT:
+            self.bomb.explode()
+
+    def check_plane(self):
+        plane_nose = self.plane.position.copy()
+        plane_nose.move(0, 28)
+        plane_body_bottom = self.plane.position.copy()
+        plane_body_bottom.move(12, 32)
+        for building in self.buildings:
+            if building.is_inside(plane_nose) or building.is_inside(plane_body_bottom) :
+                self.game_over()
+        if plane_body_bottom.getY() == bomber_mvc.CANVAS_HEIGHT and plane_body_bottom.getX() < 20:
+            self.plane_landed()
+
+def play(model_class, city_width, frames):
+    ''' returns the microseconds per frame spent checking for
+        collisions, and how many times a building was hit '''
+    bomber_mvc.CITY_WIDTH = city_width
+    bomber_mvc.speed = 1.0
+    model = model_class(StubController())
+    model.rand = Random(1)
+    model.create_buildings()
+    heights_before = sum([building.get_height() for building in model.buildings])
+    checking = 0
+    for frame in range(frames):
+        model.plane.position.Y = 0
+        if frame % BOMB_EVERY == 0:
+            model.drop_bomb()
+        model.plane.move()
+        model.bomb.move()
+        start = time.perf_counter()
+        model.check_plane()
+        model.check_bomb()
+        checking += time.perf_counter() - start
+    hits = (heights_before - sum([building.get_height() for building in model.buildings])) // 50
+    return 1e6 * checking / frames, hits
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Times building collisions in bomber_mvc for cities of different widths.')
+    parser.add_argument('-f', '--frames', type=int, default=5000, help='Frames to play for each city')
+    parser.add_argument('-w', '--widths', type=str, default='1000,10000,100000,1000000',
+                        help='Comma-separated city widths')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    print("{} frames per city".format(args.frames))
+    print("{:>10} {:>10} {:>12} {:>12} {:>8}".format("width", "buildings", "scan us", "indexed us", "hits"))
+    for width in [int(w) for w in args.widths.split(",")]:
+        (scan, scan_hits) = play(ScanningModel, width, args.frames)
+        (indexed, hits) = play(Model, width, args.frames)
+        assert hits == scan_hits
+        print("{:>10} {:>10} {:>12.2f} {:>12.2f} {:>8}".format(width, width // bomber_mvc.SPACING, scan, indexed, hits))
+    bomber_mvc.CITY_WIDTH = bomber_mvc.CANVAS_WIDTH
+
+if __name__ == "__main__":
+    main()
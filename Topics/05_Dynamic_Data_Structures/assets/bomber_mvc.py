@@ -3,10 +3,14 @@ from tkinter import font
 from math import sqrt
 from random import *
 from time import time
+from bomber_render import Renderer
 
 CANVAS_WIDTH = 1000
 CANVAS_HEIGHT = 700
 SPACING = 100
+# The city can be much wider than the window (try 100000), in which
+# case the view scrolls to follow the plane.
+CITY_WIDTH = CANVAS_WIDTH
 speed = 0.0
 
 class Point(object):
@@ -45,14 +49,15 @@ class Point(object):
 
 ''' update_position takes a list of x and y coordinates and a Point.
     It creates a new list of x and y coordintes by adding the Point to all
-    the coordintes from the original list '''    
+    the coordintes from the original list.  left is the x coordinate of
+    the city at the left edge of the view. '''    
 
-def update_position(position_list, position, scale):
+def update_position(position_list, position, scale, left=0):
     newlist = []
     is_x = True;
     for val in position_list:
         if is_x:
-            newlist.append(int(scale*(val + position.getX())))
+            newlist.append(int(scale*(val + position.getX() - left)))
         else:
             newlist.append(int(scale*(val + position.getY())))
         is_x = not is_x
@@ -60,27 +65,29 @@ def update_position(position_list, position, scale):
 
 ''' The BuildingView class has the task of displaying one building '''
 class BuildingView():
-    def __init__(self, canvas, building, scale):
-        self.canvas = canvas
+    def __init__(self, renderer, building, scale, left=0):
+        self.renderer = renderer
         self.building = building
-        self.height = scale*building.get_height()
-        xpos = scale*building.get_xpos()
-        width = scale*building.get_width()
+        self.height = building.get_height()
+        self.left = left
+        self.main_rect = renderer.take_rectangle("building", self.get_coords(scale), "building", fill="brown")
+
+    def get_coords(self, scale):
+        xpos = scale*(self.building.get_xpos() - self.left)
+        width = scale*self.building.get_width()
         canvas_height = scale*CANVAS_HEIGHT
-        self.main_rect = canvas.create_rectangle(xpos, canvas_height, xpos + width, canvas_height - self.height, fill="brown")
-
-    def redraw(self, scale):
-        if self.building.get_height() != self.height:
-            #the building has changed; need to redraw it
-            self.canvas.delete(self.main_rect)
-            self.height = scale*self.building.get_height()
-            xpos = scale*self.building.get_xpos()
-            width = scale*self.building.get_width()
-            canvas_height = scale*CANVAS_HEIGHT
-            self.main_rect = self.canvas.create_rectangle(xpos, canvas_height, xpos + width, canvas_height-self.height, fill="brown")
-            
+        return [xpos, canvas_height, xpos + width, canvas_height - scale*self.height]
+
+    def redraw(self, scale, left=0):
+        if self.building.get_height() != self.height or left != self.left:
+            #the building has changed, or the view has scrolled; need to redraw it
+            self.height = self.building.get_height()
+            self.left = left
+            self.renderer.set_coords(self.main_rect, self.get_coords(scale))
+
+    ''' hand the rectangle back, for a building on the next level '''
     def cleanup(self):
-        self.canvas.delete(self.main_rect)
+        self.renderer.release("building", self.main_rect)
 
 ''' The Building class holds all the state associated with the model of one building '''
 class Building():
@@ -110,24 +117,27 @@ class Building():
 
 ''' BombView is responsible for displaying the bomb '''
 class BombView():
-    def __init__(self, canvas, bomb_model, scale):
+    def __init__(self, renderer, bomb_model, scale):
         self.bomb_model = bomb_model
-        self.canvas = canvas
+        self.renderer = renderer
         self.points = [0,0, 10,0, 5,5, 10,10, 10,20, 5,22, 0,20, 0,10, 5,5]
+        # the polygon is created once, and moved or hidden after that
+        self.polygon = renderer.polygon(self.points, "bomb", fill="black")
         self.draw(scale)
 
     ''' draw the bomb at its current position '''
-    def draw(self, scale):
-        current_points = update_position(self.points, self.bomb_model.get_position(), scale)
-        self.polygon = self.canvas.create_polygon(*current_points, fill="black")
+    def draw(self, scale, left=0):
+        current_points = update_position(self.points, self.bomb_model.get_position(), scale, left)
+        self.renderer.set_coords(self.polygon, current_points)
+        self.renderer.show(self.polygon)
         self.drawn = True
 
     ''' erase the old bomb, and redraw it '''
-    def redraw(self, scale):
+    def redraw(self, scale, left=0):
         if self.drawn:
-            self.canvas.delete(self.polygon)
+            self.renderer.hide(self.polygon)
         if self.bomb_model.is_drawable():
-            self.draw(scale)
+            self.draw(scale, left)
 
 ''' The Bomb class maintains the model of the bomb.  There's                           
     only one bomb.  Once it explodes it can be reused again '''
@@ -161,32 +171,33 @@ class Bomb():
 
 ''' PlaneView class is responsibe for displaying the plane '''
 class PlaneView():
-    def __init__(self, canvas, plane_model, scale):
-        self.canvas = canvas
+    def __init__(self, renderer, plane_model, scale):
+        self.renderer = renderer
         self.plane_model = plane_model
         self.body_points = [0,28, 20,16, 120,16, 94,32, 12,32]
         self.wing1_points = [40,28, 76,28, 94,48, 80,48]
         self.wing2_points = [52,16, 78,8, 94,8, 81,16]
         self.tail_points = [90,16, 110,0, 124,0, 116,16]
+        # the polygons are created once, and moved after that
+        self.body = renderer.polygon(self.body_points, "plane", fill="red")
+        self.wing1 = renderer.polygon(self.wing1_points, "plane", fill="grey")
+        self.wing2 = renderer.polygon(self.wing2_points, "plane", fill="grey")
+        self.tail = renderer.polygon(self.tail_points, "plane", fill="grey")
         self.draw(scale)
 
-    def draw(self, scale):
+    def draw(self, scale, left=0):
         pos = self.plane_model.get_position()
-        current_body_points = update_position(self.body_points, pos, scale)
-        current_wing1_points = update_position(self.wing1_points, pos, scale)
-        current_wing2_points = update_position(self.wing2_points, pos, scale)
-        current_tail_points = update_position(self.tail_points, pos, scale)
-        self.body = self.canvas.create_polygon(*current_body_points, fill="red")
-        self.wing1 = self.canvas.create_polygon(*current_wing1_points, fill="grey")
-        self.wing2 = self.canvas.create_polygon(*current_wing2_points, fill="grey")
-        self.tail = self.canvas.create_polygon(*current_tail_points, fill="grey")
-
-    def redraw(self, scale):
-        self.canvas.delete(self.body)
-        self.canvas.delete(self.wing1)
-        self.canvas.delete(self.wing2)
-        self.canvas.delete(self.tail)
-        self.draw(scale)
+        current_body_points = update_position(self.body_points, pos, scale, left)
+        current_wing1_points = update_position(self.wing1_points, pos, scale, left)
+        current_wing2_points = update_position(self.wing2_points, pos, scale, left)
+        current_tail_points = update_position(self.tail_points, pos, scale, left)
+        self.renderer.set_coords(self.body, current_body_points)
+        self.renderer.set_coords(self.wing1, current_wing1_points)
+        self.renderer.set_coords(self.wing2, current_wing2_points)
+        self.renderer.set_coords(self.tail, current_tail_points)
+
+    def redraw(self, scale, left=0):
+        self.draw(scale, left)
 
 #the plane model, independent of its view
 class Plane():
@@ -206,7 +217,7 @@ class Plane():
     def move(self):
         self.position.move(-4 * speed, 0)
         if self.position.getX() < -self.width:
-            self.position.move(CANVAS_WIDTH + self.width, 40)
+            self.position.move(CITY_WIDTH + self.width, 40)
             #ensure we don't go off the bottom of the screen                                    
             if self.position.getY() > CANVAS_HEIGHT - 32:
                 self.position.Y = CANVAS_HEIGHT - 32
@@ -225,9 +236,16 @@ class View(Frame):
         self.scale = scale
         self.canvas = Canvas(self.frame, width=int(CANVAS_WIDTH*scale), height=int(CANVAS_HEIGHT*scale), bg="white")
         self.canvas.pack(side = LEFT, fill=BOTH, expand=TRUE)
+        # the moving things are drawn through the renderer, which sends
+        # the changes to the canvas once per frame (see bomber_render.py)
+        self.renderer = Renderer(self.canvas, ["building", "plane", "bomb"])
         self.init_fonts()
         self.init_score()
-        self.building_views = []
+        # the models of all the buildings, and views of the ones that can be seen
+        self.buildings = []
+        self.building_views = {}
+        # the x coordinate of the city at the left edge of the view
+        self.left = 0
         self.messages_displayed = False
 
     def init_fonts(self):
@@ -241,22 +259,41 @@ class View(Frame):
         self.canvas.itemconfig(self.score_text, text="Score:", font=self.scorefont)
 
     def register_plane(self, plane_model):
-        self.plane_view = PlaneView(self.canvas, plane_model, self.scale)
+        self.plane_view = PlaneView(self.renderer, plane_model, self.scale)
 
     def register_bomb(self, bomb_model):
-        self.bomb_view = BombView(self.canvas, bomb_model, self.scale)
+        self.bomb_view = BombView(self.renderer, bomb_model, self.scale)
 
+    # buildings are registered in order, left to right.  Views of them
+    # are only made when they scroll into view (see scroll).
     def register_building(self, building_model):
-        building_view = BuildingView(self.canvas, building_model, self.scale)
-        self.building_views.append(building_view)
+        self.buildings.append(building_model)
 
     def unregister_buildings(self):
-        for building_view in self.building_views:
+        for building_view in self.building_views.values():
             building_view.cleanup()
         self.building_views.clear()
+        self.buildings.clear()
+
+    ''' scroll keeps the plane in view, a quarter of the way in from the
+        right, when the city is wider than the window.  Only the buildings
+        that can be seen have views, so a wide city costs no more to draw
+        than a narrow one. '''
+    def scroll(self):
+        plane_x = self.plane_view.plane_model.get_position().getX()
+        self.left = min(max(0, plane_x - CANVAS_WIDTH * 3 // 4), CITY_WIDTH - CANVAS_WIDTH)
+        first = int(self.left // SPACING)
+        last = min(len(self.buildings), int((self.left + CANVAS_WIDTH) // SPACING) + 1)
+        for building_num in list(self.building_views.keys()):
+            if building_num < first or building_num >= last:
+                self.building_views.pop(building_num).cleanup()
+        for building_num in range(first, last):
+            if building_num not in self.building_views:
+                self.building_views[building_num] = BuildingView(self.renderer, self.buildings[building_num],
+                                                                 self.scale, self.left)
 
     def display_score(self):
-        self.canvas.itemconfig(self.score_text, text="Level: " + str(self.controller.get_level())
+        self.renderer.configure(self.score_text, text="Level: " + str(self.controller.get_level())
                                + "  Score: " + str(self.controller.get_score()), font=self.scorefont)
 
     def game_over(self):
@@ -279,11 +316,13 @@ class View(Frame):
             self.canvas.delete(self.text2)
 
     def update(self):
-        self.plane_view.redraw(self.scale)
-        self.bomb_view.redraw(self.scale)
-        for building_view in self.building_views:
-            building_view.redraw(self.scale)
+        self.scroll()
+        self.plane_view.redraw(self.scale, self.left)
+        self.bomb_view.redraw(self.scale, self.left)
+        for building_view in self.building_views.values():
+            building_view.redraw(self.scale, self.left)
         self.display_score()
+        self.renderer.flush()
 
 ''' The Model class holds the game model, and manages the interactions
 between the elements of the game, namely the Plane, Bomb and
@@ -295,7 +334,7 @@ class Model(Frame):
         self.rand = Random()
 
         #create game objects
-        self.plane = Plane(CANVAS_WIDTH - 100, 0)
+        self.plane = Plane(CITY_WIDTH - 100, 0)
         controller.register_plane(self.plane)
         self.bomb = Bomb()
         controller.register_bomb(self.bomb)
@@ -317,22 +356,33 @@ class Model(Frame):
         self.buildings.clear()
 
         #create the new ones
-        for building_num in range(0, 1000//SPACING):
+        for building_num in range(0, CITY_WIDTH//SPACING):
             height = self.rand.randint(10,500) #random number between 10 and 500
             building = Building(building_num, height, self.building_width)
             self.buildings.append(building);
             self.controller.register_building(building)
 
+    ''' building_at returns the building whose slot contains x
+        coordinate x, or None if there isn't one.  Buildings are SPACING
+        apart, so we can work this out directly from x, rather than
+        testing every building, however wide the city is. '''
+    def building_at(self, x):
+        building_num = int(x // SPACING)
+        if building_num < 0 or building_num >= len(self.buildings):
+            return None
+        return self.buildings[building_num]
+
     def drop_bomb(self):
         self.bomb.drop(self.plane.position)
 
     def check_bomb(self):
         if not self.bomb.falling:
             return
-        for building in self.buildings:
-            if building.is_inside(self.bomb.position):
-                self.bomb.explode()
-                building.shrink()
+        # only the building below the bomb can have been hit
+        building = self.building_at(self.bomb.position.getX())
+        if building is not None and building.is_inside(self.bomb.position):
+            self.bomb.explode()
+            building.shrink()
         if self.bomb.position.getY() > CANVAS_HEIGHT:
             self.bomb.explode()
 
@@ -343,7 +393,13 @@ class Model(Frame):
         plane_nose.move(0, 28)
         plane_body_bottom = self.plane.position.copy()
         plane_body_bottom.move(12, 32)
-        for building in self.buildings:
+        # only the buildings below the nose and the fuselage can have been hit
+        candidates = []
+        for point in [plane_nose, plane_body_bottom]:
+            building = self.building_at(point.getX())
+            if building is not None and building not in candidates:
+                candidates.append(building)
+        for building in candidates:
             if building.is_inside(plane_nose) or building.is_inside(plane_body_bottom) :
                 self.game_over()
         if plane_body_bottom.getY() == CANVAS_HEIGHT and plane_body_bottom.getX() < 20:
@@ -517,5 +573,6 @@ class Controller():
             self.checkspeed()
         self.root.destroy()
 
-game = Controller();
-game.run()
+if __name__ == "__main__":
+    game = Controller();
+    game.run()
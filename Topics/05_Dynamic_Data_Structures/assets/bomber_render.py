@@ -0,0 +1,103 @@
+#Drawing layer shared by the Bomber games.
+#
+# Deleting a canvas item and creating a new one each frame, just to
+# move it, is slow: tkinter has to allocate the item, parse all its
+# options again, and redraw everything it overlaps.  The Renderer
+# instead creates each item once and then only changes its
+# coordinates or options.  Changes are collected during a frame and
+# sent to the canvas together by flush(), once per frame, skipping
+# any that don't actually change anything.  Items for things that come
+# and go (like the buildings on each level) are kept in pools, hidden,
+# and handed out again rather than deleted.
+
+class Renderer():
+    def __init__(self, canvas, layers=()):
+        self.canvas = canvas
+        # items are drawn in layers, later layers on top of earlier ones
+        self.layers = list(layers)
+        # what the canvas currently shows for each item we created
+        self.shown_coords = {}
+        self.shown_options = {}
+        # changes waiting for the next flush
+        self.pending_coords = {}
+        self.pending_options = {}
+        # kind -> list of hidden items waiting to be reused
+        self.pools = {}
+        self.restack = False
+        # how many canvas calls we've made, and how many items we created
+        self.canvas_calls = 0
+        self.items_created = 0
+
+    def _created(self, item, coords, layer, options):
+        self.items_created += 1
+        self.canvas_calls += 1
+        self.shown_coords[item] = list(coords)
+        self.shown_options[item] = dict(options)
+        if layer is not None:
+            self.restack = True
+        return item
+
+    def polygon(self, points, layer=None, **options):
+        tags = () if layer is None else (layer,)
+        item = self.canvas.create_polygon(*points, tags=tags, **options)
+        return self._created(item, points, layer, options)
+
+    def rectangle(self, coords, layer=None, **options):
+        tags = () if layer is None else (layer,)
+        item = self.canvas.create_rectangle(*coords, tags=tags, **options)
+        return self._created(item, coords, layer, options)
+
+    def set_coords(self, item, coords):
+        self.pending_coords[item] = list(coords)
+
+    def configure(self, item, **options):
+        self.pending_options.setdefault(item, {}).update(options)
+
+    def show(self, item):
+        self.configure(item, state="normal")
+
+    def hide(self, item):
+        self.configure(item, state="hidden")
+
+    ''' take_rectangle returns a rectangle of the given kind with the given
+        coordinates, reusing a hidden one from the pool if there is one '''
+    def take_rectangle(self, kind, coords, layer=None, **options):
+        pool = self.pools.setdefault(kind, [])
+        if len(pool) == 0:
+            return self.rectangle(coords, layer, **options)
+        item = pool.pop()
+        self.set_coords(item, coords)
+        self.configure(item, state="normal", **options)
+        return item
+
+    ''' release hides item, and keeps it for take_rectangle to reuse '''
+    def release(self, kind, item):
+        self.hide(item)
+        self.pools.setdefault(kind, []).append(item)
+
+    ''' flush sends the frame's changes to the canvas '''
+    def flush(self):
+        canvas = self.canvas
+        for item, coords in self.pending_coords.items():
+            if self.shown_coords.get(item) != coords:
+                canvas.coords(item, *coords)
+                self.shown_coords[item] = coords
+                self.canvas_calls += 1
+        self.pending_coords.clear()
+        for item, options in self.pending_options.items():
+            shown = self.shown_options.setdefault(item, {})
+            changed = {}
+            for name, value in options.items():
+                if shown.get(name) != value:
+                    changed[name] = value
+            if len(changed) > 0:
+                canvas.itemconfig(item, **changed)
+                shown.update(changed)
+                self.canvas_calls += 1
+        self.pending_options.clear()
+        if self.restack:
+            # new items start on top, so put the layers back in order
+            for layer in self.layers:
+                canvas.tag_raise(layer)
+                self.canvas_calls += 1
+            self.restack = False
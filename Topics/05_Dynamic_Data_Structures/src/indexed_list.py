@@ -0,0 +1,525 @@
+# A faster linked list than linked_list_class.py's LinkedList.
+#
+# LinkedList has to walk from the head to find the node at a position,
+# so get_value, insert_before and insert_after are all O(n), and it
+# can't remove a node without first finding the one before it.
+# IndexedList fixes that in two ways:
+#
+# - It's doubly linked: each node points to the one before it as well
+#   as the one after, so a node we already have can be unlinked in O(1).
+#   A "sentinel" node that holds no value sits before the first node and
+#   after the last, so the list is really a circle, and there are no
+#   special cases for the ends of the list.
+#
+# - If you ask for indexed=True, it also builds a skip list on top of
+#   the nodes.  A random quarter of the nodes get a link on level 1 to
+#   the next node on level 1, a quarter of those get one on level 2,
+#   and so on, with each link remembering how many nodes it skips:
+#
+#   level 2:  S-------------------5------------->
+#   level 1:  S---------2---------5-----7------->
+#   level 0:  S---0---1---2---3---4---5---6---7---8---S
+#
+#   To find position 6, start at the top and take each link that
+#   doesn't overshoot, then drop down a level.  That's O(log n), rather
+#   than O(n).  Inserting and deleting fix up the links around the
+#   node, which is also O(log n).
+#
+# IndexedList is a MutableSequence, so it works like a Python list:
+# len(), l[i], l[i] = v, del l[i], insert, append, pop, iteration and
+# so on.  It also has the same methods as LinkedList, so it can be used
+# in its place, but append_list() moves the other list's nodes over
+# rather than copying them, so it takes O(1) (or O(log n) when indexed)
+# and leaves the other list empty.
+
+import random
+from collections.abc import MutableSequence
+
+MAX_LEVEL = 32
+P = 0.25   # chance of a node reaching each level above the last
+
+class ListNode():
+    # __slots__ stops Python giving each node a dictionary for its
+    # attributes, so the nodes are much smaller
+    __slots__ = ('value', 'prev', 'next', 'links', 'backs', 'widths')
+
+    # links[k], backs[k] and widths[k] are the node's forward link,
+    # backward link and forward link's width on level k+1.  Most nodes
+    # don't reach level 1, and don't have them at all.
+    def __init__(self, value, height=1):
+        self.value = value
+        self.prev = None
+        self.next = None
+        if height > 1:
+            self.links = [None] * (height - 1)
+            self.backs = [None] * (height - 1)
+            self.widths = [0] * (height - 1)
+        else:
+            self.links = None
+            self.backs = None
+            self.widths = None
+
+    def get_value(self):
+        return self.value
+
+def _height(node):
+    if node.links is None:
+        return 1
+    return 1 + len(node.links)
+
+
+class IndexedList(MutableSequence):
+    def __init__(self, values=(), indexed=False, seed=None):
+        self.indexed = indexed
+        self.rand = random.Random(seed)
+        self.head_node = ListNode(None, MAX_LEVEL if indexed else 1)
+        self.clear()
+        self.extend(values)
+
+    def clear(self):
+        sentinel = self.head_node
+        sentinel.next = sentinel
+        sentinel.prev = sentinel
+        if self.indexed:
+            sentinel.links = [None] * (MAX_LEVEL - 1)
+            sentinel.backs = [None] * (MAX_LEVEL - 1)
+            sentinel.widths = [0] * (MAX_LEVEL - 1)
+        # the most levels any node has used
+        self.top = 1
+        self.list_length = 0
+
+    def __len__(self):
+        return self.list_length
+
+    def __repr__(self):
+        return "IndexedList(" + repr([value for value in self]) + ")"
+
+    def __iter__(self):
+        node = self.head_node.next
+        while node is not self.head_node:
+            yield node.value
+            node = node.next
+
+    def __reversed__(self):
+        node = self.head_node.prev
+        while node is not self.head_node:
+            yield node.value
+            node = node.prev
+
+    def nodes(self):
+        node = self.head_node.next
+        while node is not self.head_node:
+            yield node
+            node = node.next
+
+    def _new_node(self, value):
+        if not self.indexed:
+            return ListNode(value)
+        height = 1
+        while height < MAX_LEVEL and self.rand.random() < P:
+            height += 1
+        return ListNode(value, height)
+
+    # turn an index (which may count back from the end) into a position
+    # from 0, checking it's in the list
+    def _check_index(self, index):
+        if not isinstance(index, int):
+            raise TypeError("IndexedList indices must be integers, not " + type(index).__name__)
+        if index < 0:
+            index += self.list_length
+        if index < 0 or index >= self.list_length:
+            raise IndexError("Attempt to index past end of list")
+        return index
+
+    # Find the node at position pos, counting the sentinel as 0 and the
+    # first node as 1
+    def _node_at_pos(self, pos):
+        node = self.head_node
+        if not self.indexed:
+            # walk from whichever end is nearer
+            if pos <= self.list_length // 2:
+                for i in range(pos):
+                    node = node.next
+            else:
+                for i in range(self.list_length + 1 - pos):
+                    node = node.prev
+            return node
+        reached = 0
+        for k in range(self.top - 2, -1, -1):
+            while node.links[k] is not None and reached + node.widths[k] <= pos:
+                reached += node.widths[k]
+                node = node.links[k]
+        while reached < pos:
+            node = node.next
+            reached += 1
+        return node
+
+    # For each of the first levels levels above 0, find the nearest node
+    # at or before node that reaches that level, and how many nodes
+    # before node it is.  We go back along each level in turn, which
+    # only takes a few steps per level.
+    def _predecessors(self, node, levels):
+        found = []
+        distance = 0
+        for k in range(levels):
+            while _height(node) <= k + 1:
+                if k == 0:
+                    node = node.prev
+                    distance += 1
+                else:
+                    node = node.backs[k - 1]
+                    distance += node.widths[k - 1]
+            found.append((node, distance))
+        return found
+
+    # put node into the list straight after pred
+    def _link_after(self, pred, node):
+        node.prev = pred
+        node.next = pred.next
+        pred.next.prev = node
+        pred.next = node
+        self.list_length += 1
+        if not self.indexed:
+            return
+        height = _height(node)
+        self.top = max(self.top, height)
+        if node.next is self.head_node:
+            # nothing after it, so no links above its height skip over it
+            levels = height - 1
+        else:
+            levels = self.top - 1
+        for (k, (before, distance)) in enumerate(self._predecessors(pred, levels)):
+            if k < height - 1:
+                after = before.links[k]
+                node.links[k] = after
+                node.backs[k] = before
+                if after is not None:
+                    node.widths[k] = before.widths[k] - distance
+                    after.backs[k] = node
+                before.links[k] = node
+                before.widths[k] = distance + 1
+            elif before.links[k] is not None:
+                # this link now skips over one more node
+                before.widths[k] += 1
+
+    # take node out of the list
+    def _unlink(self, node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        self.list_length -= 1
+        if self.indexed:
+            height = _height(node)
+            if node.next is self.head_node:
+                levels = height - 1
+            else:
+                levels = self.top - 1
+            for (k, (before, distance)) in enumerate(self._predecessors(node.prev, levels)):
+                if k < height - 1:
+                    after = node.links[k]
+                    before.links[k] = after
+                    if after is not None:
+                        before.widths[k] += node.widths[k] - 1
+                        after.backs[k] = before
+                elif before.links[k] is not None:
+                    before.widths[k] -= 1
+        node.prev = None
+        node.next = None
+
+    def __getitem__(self, index):
+        return self._node_at_pos(self._check_index(index) + 1).value
+
+    def __setitem__(self, index, value):
+        self._node_at_pos(self._check_index(index) + 1).value = value
+
+    def __delitem__(self, index):
+        self._unlink(self._node_at_pos(self._check_index(index) + 1))
+
+    # insert value before position index, like list.insert
+    def insert(self, index, value):
+        if index < 0:
+            index = max(0, index + self.list_length)
+        index = min(index, self.list_length)
+        self._link_after(self._node_at_pos(index), self._new_node(value))
+
+    def append(self, value):
+        self._link_after(self.head_node.prev, self._new_node(value))
+
+    def appendleft(self, value):
+        self._link_after(self.head_node, self._new_node(value))
+
+    def pop(self, index=-1):
+        if self.list_length == 0:
+            raise IndexError("Attempt to pop from empty list")
+        if index == -1:
+            node = self.head_node.prev
+        else:
+            node = self._node_at_pos(self._check_index(index) + 1)
+        self._unlink(node)
+        return node.value
+
+    def popleft(self):
+        return self.pop(0)
+
+    # The MutableSequence versions of these use l[i], which is fine for
+    # a list, but we can do them in one pass along the nodes
+
+    def index(self, value, start=0, stop=None):
+        # negative start and stop count from the end, as for a list
+        if start < 0:
+            start = max(len(self) + start, 0)
+        if stop is not None and stop < 0:
+            stop += len(self)
+        for (i, v) in enumerate(self):
+            if stop is not None and i >= stop:
+                break
+            if i >= start and (v is value or v == value):
+                return i
+        raise ValueError(repr(value) + " is not in list")
+
+    def remove(self, value):
+        for node in self.nodes():
+            if node.value is value or node.value == value:
+                self._unlink(node)
+                return
+        raise ValueError(repr(value) + " is not in list")
+
+    def reverse(self):
+        front = self.head_node.next
+        back = self.head_node.prev
+        for i in range(self.list_length // 2):
+            (front.value, back.value) = (back.value, front.value)
+            front = front.next
+            back = back.prev
+
+    # return the node at position index
+    def node_at(self, index):
+        return self._node_at_pos(self._check_index(index) + 1)
+
+    # remove a node we already have: O(1), or O(log n) if indexed
+    def remove_node(self, node):
+        if node.next is None:
+            raise ValueError("node is not in a list")
+        self._unlink(node)
+        return node.value
+
+    # insert value after a node we already have, returning its new node
+    def insert_after_node(self, node, value):
+        newnode = self._new_node(value)
+        self._link_after(node, newnode)
+        return newnode
+
+    # Move all of llist's nodes onto the end of this list, leaving llist
+    # empty.  Nothing is copied: we just link our last node to its first,
+    # and on each level of the index, our last link to its first.
+    def append_list(self, llist):
+        if llist is self:
+            raise ValueError("can't append a list to itself")
+        if llist.indexed != self.indexed:
+            # different kinds of node, so we do have to copy
+            self.extend(llist)
+            llist.clear()
+            return
+        if llist.list_length == 0:
+            return
+        other = llist.head_node
+        if self.indexed:
+            levels = max(self.top, llist.top) - 1
+            last = self.head_node.prev
+            for (k, (before, distance)) in enumerate(self._predecessors(last, levels)):
+                after = other.links[k]
+                if after is not None:
+                    before.links[k] = after
+                    before.widths[k] = distance + other.widths[k]
+                    after.backs[k] = before
+            self.top = max(self.top, llist.top)
+        first = other.next
+        last = other.prev
+        first.prev = self.head_node.prev
+        self.head_node.prev.next = first
+        last.next = self.head_node
+        self.head_node.prev = last
+        self.list_length += llist.list_length
+        llist.clear()
+
+    # The same methods as LinkedList in linked_list_class.py
+
+    # return the head node
+    def head(self):
+        if self.list_length == 0:
+            return None
+        return self.head_node.next
+
+    # return the tail node
+    def tail(self):
+        if self.list_length == 0:
+            return None
+        return self.head_node.prev
+
+    # return the list length
+    def length(self):
+        return self.list_length
+
+    def copy(self):
+        return IndexedList(self, self.indexed)
+
+    def pop_front(self):
+        return self.pop(0)
+
+    def get_node_by_index(self, index):
+        if index < 0:
+            raise IndexError("Invalid negative index")
+        return self.node_at(index)
+
+    def get_value(self, index):
+        return self.get_node_by_index(index).value
+
+    # insert the value in the list, after the node at position index
+    def insert_after(self, index, value):
+        self.insert_after_node(self.get_node_by_index(index), value)
+
+    # insert the value in the list, before the node at position index
+    def insert_before(self, index, value):
+        if index == 0:
+            self.appendleft(value)
+        else:
+            self.insert_after_node(self.get_node_by_index(index - 1), value)
+
+    #generate a python list from the linked list
+    def list(self):
+        return [value for value in self]
+
+
+import pytest
+
+# check the nodes are linked both ways, and every link on every level
+# goes to the next node on that level, with the right width
+def check_list(llist):
+    nodes = [llist.head_node] + list(llist.nodes())
+    assert len(nodes) == len(llist) + 1
+    for (node, after) in zip(nodes, nodes[1:] + [llist.head_node]):
+        assert node.next is after
+        assert after.prev is node
+    if not llist.indexed:
+        return
+    for k in range(MAX_LEVEL - 1):
+        level = [(pos, node) for (pos, node) in enumerate(nodes) if _height(node) > k + 1]
+        if k >= llist.top - 1:
+            assert len(level) == 1   # just the sentinel
+        for ((pos, node), (next_pos, after)) in zip(level, level[1:]):
+            assert node.links[k] is after
+            assert node.widths[k] == next_pos - pos
+            assert after.backs[k] is node
+        assert level[-1][1].links[k] is None
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_list(indexed):
+    # the test from linked_list_class.py
+    llist = IndexedList(indexed=indexed)
+    assert(llist.length() == 0)
+    with pytest.raises(IndexError):
+        llist.get_value(0)
+
+    llist.append(0)
+    llist.append(1)
+    llist.insert_before(1, 3)
+    llist.insert_before(0, 4)
+    llist.insert_after(0, 5)
+    llist.insert_after(4, 6)
+    assert(llist.list() == [4,5,0,3,1,6])
+    assert(llist.tail().value == 6)
+    assert(llist.pop_front() == 4)
+    assert(llist.list() == [5,0,3,1,6])
+    for value in [5, 0, 3, 1, 6]:
+        assert(llist.pop_front() == value)
+    with pytest.raises(IndexError):
+        llist.pop_front()
+
+    llist.extend([1,2,3])
+    llist2 = llist.copy()
+    llist.append(4)
+    llist2.append(5)
+    assert(llist.list() == [1,2,3,4])
+    assert(llist2.list() == [1,2,3,5])
+    llist.append_list(llist2)
+    assert(llist.list() == [1,2,3,4,1,2,3,5])
+    assert(llist.length() == 8)
+    assert(llist.tail().value == 5)
+    # the nodes moved, rather than being copied
+    assert(llist2.length() == 0)
+    assert(llist2.head() is None)
+    check_list(llist)
+    check_list(llist2)
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_sequence(indexed):
+    llist = IndexedList(range(10), indexed=indexed, seed=1)
+    assert list(llist) == list(range(10))
+    assert list(reversed(llist)) == list(range(9, -1, -1))
+    assert llist[3] == 3
+    assert llist[-1] == 9
+    llist[3] = "three"
+    assert llist[3] == "three"
+    del llist[3]
+    assert llist[3] == 4
+    assert 5 in llist
+    assert llist.index(5) == 4
+    # start and stop as for a list, counting from the end if negative
+    assert llist.index(8, -3) == 7 and llist.index(5, 1, -2) == 4
+    with pytest.raises(ValueError):
+        llist.index(1, -3)
+    with pytest.raises(ValueError):
+        llist.index(8, 0, -2)
+    llist.remove(5)
+    assert 5 not in llist
+    assert llist.pop() == 9
+    assert llist.popleft() == 0
+    llist.reverse()
+    assert list(llist) == [8, 7, 6, 4, 2, 1]
+    with pytest.raises(IndexError):
+        llist[6]
+    with pytest.raises(TypeError):
+        llist[1:2]
+    check_list(llist)
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_remove_node(indexed):
+    llist = IndexedList(range(100), indexed=indexed, seed=2)
+    nodes = list(llist.nodes())
+    for node in nodes[::3]:
+        llist.remove_node(node)
+    check_list(llist)
+    assert list(llist) == [i for i in range(100) if i % 3 != 0]
+    node = llist.insert_after_node(nodes[1], "x")
+    assert llist[1] == "x"
+    llist.remove_node(node)
+    with pytest.raises(ValueError):
+        llist.remove_node(node)
+    check_list(llist)
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_against_list(indexed):
+    rand = random.Random(4)
+    llist = IndexedList(indexed=indexed, seed=5)
+    reference = []
+    for step in range(3000):
+        choice = rand.random()
+        if choice < 0.35 or len(reference) == 0:
+            i = rand.randint(-len(reference) - 2, len(reference) + 2)
+            llist.insert(i, step)
+            reference.insert(i, step)
+        elif choice < 0.5:
+            llist.append(step)
+            reference.append(step)
+        elif choice < 0.75:
+            i = rand.randrange(len(reference))
+            assert llist.pop(i) == reference.pop(i)
+        else:
+            i = rand.randrange(len(reference))
+            assert llist[i] == reference[i]
+        if step % 100 == 0:
+            check_list(llist)
+            other = IndexedList(range(rand.randrange(50)), indexed=indexed)
+            reference.extend(other)
+            llist.append_list(other)
+    check_list(llist)
+    assert list(llist) == reference
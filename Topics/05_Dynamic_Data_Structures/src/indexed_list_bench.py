@@ -0,0 +1,92 @@
+# Benchmark of IndexedList (indexed_list.py), with and without its
+# skip-list index, against Python's list, collections.deque and
+# LinkedList from linked_list_class.py.  With n items in each, we time:
+# - append: appending n items
+# - get: reading 1000 items at random positions
+# - insert: inserting 1000 items at random positions
+# - popleft: removing 1000 items from the front
+# - splice: joining another list of n items onto the end
+#
+#   python3 indexed_list_bench.py [-n items]
+
+import argparse, random, time
+from collections import deque
+from linked_list_class import LinkedList
+from indexed_list import IndexedList
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+# each structure: how to make an empty one, get, insert, popleft and splice
+structures = {
+    "list": (list,
+             lambda l, i: l[i],
+             lambda l, i, v: l.insert(i, v),
+             lambda l: l.pop(0),
+             lambda l, other: l.extend(other)),
+    "deque": (deque,
+              lambda l, i: l[i],
+              lambda l, i, v: l.insert(i, v),
+              lambda l: l.popleft(),
+              lambda l, other: l.extend(other)),
+    "LinkedList": (LinkedList,
+                   lambda l, i: l.get_value(i),
+                   lambda l, i, v: l.insert_before(i, v),
+                   lambda l: l.pop_front(),
+                   lambda l, other: l.append_list(other)),
+    "IndexedList": (IndexedList,
+                    lambda l, i: l[i],
+                    lambda l, i, v: l.insert(i, v),
+                    lambda l: l.popleft(),
+                    lambda l, other: l.append_list(other)),
+    "IndexedList+index": (lambda: IndexedList(indexed=True),
+                          lambda l, i: l[i],
+                          lambda l, i, v: l.insert(i, v),
+                          lambda l: l.popleft(),
+                          lambda l, other: l.append_list(other)),
+}
+
+def run(name, n, positions):
+    (make, get, insert, popleft, splice) = structures[name]
+    l = make()
+    other = make()
+    def append():
+        for i in range(n):
+            l.append(i)
+            other.append(i)
+    def get_all():
+        for i in positions:
+            get(l, i)
+    def insert_all():
+        for i in positions:
+            insert(l, i, i)
+    def popleft_all():
+        for i in range(len(positions)):
+            popleft(l)
+    # append fills two lists, so halve it
+    times = [timed(append) / 2]
+    times += [timed(get_all), timed(insert_all), timed(popleft_all), timed(lambda: splice(l, other))]
+    return times
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares linked lists with list and deque.')
+    parser.add_argument('-n', '--items', type=int, default=100000, help='Items in each list')
+    parser.add_argument('-s', '--structure', action='append', choices=list(structures),
+                        help='Structure to test (default: all of them)')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    rand = random.Random(1)
+    positions = [rand.randrange(args.items // 2) for i in range(1000)]
+    print("{} items; seconds for each phase".format(args.items))
+    print("{:<18} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "structure", "append", "get", "insert", "popleft", "splice"))
+    for name in args.structure or list(structures):
+        times = run(name, args.items, positions)
+        print("{:<18}".format(name), " ".join("{:>9.4f}".format(t) for t in times))
+
+if __name__ == "__main__":
+    main()
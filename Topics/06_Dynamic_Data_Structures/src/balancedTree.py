@@ -0,0 +1,480 @@
+# Balanced versions of the sorted binary tree in binaryTree.py.
+#
+# binaryTree.py's tree is only as good as the order keys arrive in:
+# add the keys in sorted order and every node has just a right child,
+# so the "tree" is really a linked list, and get() has to look at every
+# node.  Worse, add, find, delete and walk are recursive, so at around
+# 1000 keys deep Python gives up with a RecursionError.
+#
+# The trees here keep themselves balanced as keys are added and
+# deleted, so they're never more than about 1.44*log2(n) (AVL) or
+# on average about 2.5*log2(n) (treap) levels deep:
+# - AVLTree: every node remembers the height of its subtree, and if
+#   its two children's heights ever differ by more than one, it's
+#   fixed by rotating nodes around.
+# - Treap: every node gets a random priority, and the tree is kept so
+#   each node's priority is higher than its children's (like a heap).
+#   That makes the tree look as if the keys had been added in a random
+#   order, whatever order they really came in.
+#
+# Both have the same API as BinaryTree (add, get, delete, walk, len),
+# and everything is done with loops rather than recursion.  Each node
+# also remembers how many nodes are in its subtree, so we can find the
+# k-th smallest key, or how many keys are smaller than a given key, in
+# O(log n) too.
+#
+# Unlike BinaryTree, adding a key that's already there replaces its
+# value, rather than adding a second copy.
+
+import random
+
+def _size(node):
+    if node is None:
+        return 0
+    return node.size
+
+def _height(node):
+    if node is None:
+        return 0
+    return node.height
+
+
+class AVLNode():
+    # __slots__ stops Python giving each node a dictionary for its
+    # attributes, which makes a million nodes much smaller and faster
+    __slots__ = ('key', 'value', 'left', 'right', 'height', 'size')
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.size = 1
+
+
+class TreapNode():
+    __slots__ = ('key', 'value', 'left', 'right', 'priority', 'size')
+
+    def __init__(self, key, value, priority):
+        self.key = key
+        self.value = value
+        self.left = None
+        self.right = None
+        self.priority = priority
+        self.size = 1
+
+
+'''SearchTree holds everything that works the same way whichever way
+   the tree is balanced: looking things up and walking the tree.
+   AVLTree and Treap provide add and delete.'''
+class SearchTree():
+    def __init__(self):
+        self.root = None
+
+    def __len__(self):
+        return _size(self.root)
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def _find(self, key):
+        node = self.root
+        while node is not None:
+            if key == node.key:
+                return node
+            elif key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        return None
+
+    # return the value matching the key, or None if no match is found
+    def get(self, key):
+        node = self._find(key)
+        if node is None:
+            return None
+        return node.value
+
+    # create a generator for walking the tree in order.  Rather than
+    # recursing, we keep our own stack of the nodes whose left subtree
+    # we're still walking.
+    def walk(self):
+        stack = []
+        node = self.root
+        while len(stack) > 0 or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield (node.key, node.value)
+                node = node.right
+
+    # walk, in order, just the keys with low <= key < high
+    def range(self, low, high):
+        stack = []
+        node = self.root
+        while len(stack) > 0 or node is not None:
+            if node is not None:
+                if node.key < low:
+                    # this node and everything to its left is too small
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            else:
+                node = stack.pop()
+                if not node.key < high:
+                    return
+                yield (node.key, node.value)
+                node = node.right
+
+    # return the (key, value) with the k-th smallest key, counting from
+    # 0.  Like a list, negative k counts back from the largest.
+    def kth(self, k):
+        if k < 0:
+            k += len(self)
+        if k < 0 or k >= len(self):
+            raise IndexError("tree index out of range")
+        node = self.root
+        while True:
+            left_size = _size(node.left)
+            if k < left_size:
+                node = node.left
+            elif k == left_size:
+                return (node.key, node.value)
+            else:
+                k -= left_size + 1
+                node = node.right
+
+    # return how many keys in the tree are smaller than key
+    def rank(self, key):
+        count = 0
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                count += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    # make new take old's place as a child of parent (or as the root)
+    def _replace_child(self, parent, old, new):
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def _update(self, node):
+        node.size = 1 + _size(node.left) + _size(node.right)
+
+    # Rotations change which node is at the top of a subtree without
+    # changing the order of the keys:
+    #
+    #         node              left
+    #        /    \            /    \
+    #      left    C   <->    A     node
+    #     /    \                   /    \
+    #    A      B                 B      C
+    #
+    # They return the new top node, which the caller has to put back
+    # where node was.
+    def _rotate_right(self, node):
+        left = node.left
+        node.left = left.right
+        left.right = node
+        self._update(node)
+        self._update(left)
+        return left
+
+    def _rotate_left(self, node):
+        right = node.right
+        node.right = right.left
+        right.left = node
+        self._update(node)
+        self._update(right)
+        return right
+
+    # walk down from the root to where key is, or would be.  Returns
+    # the node with that key (or None) and the list of nodes above it.
+    def _path_to(self, key):
+        path = []
+        node = self.root
+        while node is not None and key != node.key:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        return (node, path)
+
+
+class AVLTree(SearchTree):
+    def add(self, key, value):
+        (node, path) = self._path_to(key)
+        if node is not None:
+            node.value = value
+            return
+        node = AVLNode(key, value)
+        if len(path) == 0:
+            self.root = node
+            return
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = node
+        else:
+            parent.right = node
+        self._rebalance(path)
+
+    # delete the item matching the key from the tree
+    def delete(self, key):
+        (node, path) = self._path_to(key)
+        if node is None:
+            return
+        if node.left is not None and node.right is not None:
+            # two children: copy the next key in the sequence (the
+            # smallest in the right subtree) here, and delete that
+            # node instead - it has no left child
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            node.key = successor.key
+            node.value = successor.value
+            node = successor
+        # node now has at most one child, which takes its place
+        if node.left is not None:
+            child = node.left
+        else:
+            child = node.right
+        if len(path) == 0:
+            self.root = child
+        else:
+            self._replace_child(path[-1], node, child)
+        self._rebalance(path)
+
+    def _update(self, node):
+        node.size = 1 + _size(node.left) + _size(node.right)
+        node.height = 1 + max(_height(node.left), _height(node.right))
+
+    # fix heights, sizes and balance on the way back up to the root
+    # from a node we've added or deleted
+    def _rebalance(self, path):
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            top = self._balance(node)
+            if top is not node:
+                if i == 0:
+                    self.root = top
+                else:
+                    self._replace_child(path[i - 1], node, top)
+
+    def _balance(self, node):
+        self._update(node)
+        balance = _height(node.left) - _height(node.right)
+        if balance > 1:
+            # left side too tall.  If it's tall on its inside, rotate
+            # that to the outside first, or the rotation won't help.
+            if _height(node.left.left) < _height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if _height(node.right.right) < _height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+    def height(self):
+        return _height(self.root)
+
+
+class Treap(SearchTree):
+    def __init__(self, seed=None):
+        super().__init__()
+        self.rand = random.Random(seed)
+
+    def add(self, key, value):
+        (node, path) = self._path_to(key)
+        if node is not None:
+            node.value = value
+            return
+        node = TreapNode(key, value, self.rand.random())
+        if len(path) == 0:
+            self.root = node
+            return
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = node
+        else:
+            parent.right = node
+        # the new node goes in as a leaf; rotate it up until its
+        # parent has a higher priority
+        i = len(path) - 1
+        while i >= 0 and path[i].priority < node.priority:
+            parent = path[i]
+            if parent.left is node:
+                self._rotate_right(parent)
+            else:
+                self._rotate_left(parent)
+            if i == 0:
+                self.root = node
+            else:
+                self._replace_child(path[i - 1], parent, node)
+            i -= 1
+        # everything above it is one bigger now
+        for j in range(i, -1, -1):
+            self._update(path[j])
+
+    # delete the item matching the key from the tree
+    def delete(self, key):
+        (node, path) = self._path_to(key)
+        if node is None:
+            return
+        # rotate the node down, always lifting the child with the
+        # higher priority above it, until it has at most one child
+        while node.left is not None and node.right is not None:
+            if node.left.priority > node.right.priority:
+                top = self._rotate_right(node)
+            else:
+                top = self._rotate_left(node)
+            if len(path) == 0:
+                self.root = top
+            else:
+                self._replace_child(path[-1], node, top)
+            path.append(top)
+        if node.left is not None:
+            child = node.left
+        else:
+            child = node.right
+        if len(path) == 0:
+            self.root = child
+        else:
+            self._replace_child(path[-1], node, child)
+        for i in range(len(path) - 1, -1, -1):
+            self._update(path[i])
+
+    def height(self):
+        # there's no height stored in a treap's nodes, so go and look
+        height = 0
+        level = [self.root] if self.root is not None else []
+        while len(level) > 0:
+            height += 1
+            level = [child for node in level for child in (node.left, node.right)
+                     if child is not None]
+        return height
+
+
+import pytest
+
+tree_classes = [AVLTree, Treap]
+
+@pytest.fixture
+def two_lists():
+    items = list(range(100))
+    old_items = items.copy()
+    random.shuffle(items)
+    return (items, old_items)
+
+# check everything a tree promises: keys in order, sizes right, and
+# balanced (AVL) or heap-ordered (treap)
+def check_tree(tree):
+    stack = [(tree.root, None, None)]
+    while len(stack) > 0:
+        (node, low, high) = stack.pop()
+        if node is None:
+            continue
+        assert low is None or low < node.key
+        assert high is None or node.key < high
+        assert node.size == 1 + _size(node.left) + _size(node.right)
+        if isinstance(node, AVLNode):
+            assert node.height == 1 + max(_height(node.left), _height(node.right))
+            assert abs(_height(node.left) - _height(node.right)) <= 1
+        else:
+            for child in (node.left, node.right):
+                assert child is None or child.priority <= node.priority
+        stack.append((node.left, low, node.key))
+        stack.append((node.right, node.key, high))
+
+@pytest.mark.parametrize("tree_class", tree_classes)
+def test_basics(tree_class):
+    tree = tree_class()
+    tree.add(3,3)
+    tree.add(2,2)
+    tree.add(1,1)
+    assert list(tree.walk()) == [(1,1), (2,2), (3,3)]
+    tree.delete(2)
+    assert tree.get(1) == 1
+    assert tree.get(2) is None
+    assert 3 in tree
+    tree.delete(2)  # delete something that's not there
+    assert len(tree) == 2
+    tree.add(3, "three")  # replaces, rather than adding another 3
+    assert len(tree) == 2
+    assert tree.get(3) == "three"
+    check_tree(tree)
+
+@pytest.mark.parametrize("tree_class", tree_classes)
+def test_add_delete(tree_class, two_lists):
+    items, _ = two_lists
+    tree = tree_class()
+    for i in items:
+        tree.add(i, i)
+        check_tree(tree)
+    for pos, i in enumerate(items):
+        assert len(tree) == 100 - pos
+        assert tree.get(i) == i
+        tree.delete(i)
+        assert tree.get(i) is None
+        check_tree(tree)
+    assert tree.root is None
+
+@pytest.mark.parametrize("tree_class", tree_classes)
+def test_sorted_keys(tree_class):
+    # BinaryTree would hit the recursion limit long before this
+    tree = tree_class()
+    for i in range(20000):
+        tree.add(i, i)
+    assert len(tree) == 20000
+    assert tree.height() < 60
+    assert [key for (key, value) in tree.walk()] == list(range(20000))
+    check_tree(tree)
+
+@pytest.mark.parametrize("tree_class", tree_classes)
+def test_range_kth_rank(tree_class, two_lists):
+    items, _ = two_lists
+    tree = tree_class()
+    for i in items:
+        tree.add(i * 2, i)   # even keys 0..198
+    assert [key for (key, value) in tree.range(10, 20)] == [10, 12, 14, 16, 18]
+    assert [key for (key, value) in tree.range(11, 12)] == []
+    assert [key for (key, value) in tree.range(-5, 3)] == [0, 2]
+    assert tree.kth(0) == (0, 0)
+    assert tree.kth(7) == (14, 7)
+    assert tree.kth(-1) == (198, 99)
+    with pytest.raises(IndexError):
+        tree.kth(100)
+    assert tree.rank(0) == 0
+    assert tree.rank(15) == 8
+    assert tree.rank(16) == 8
+    assert tree.rank(1000) == 100
+
+@pytest.mark.parametrize("tree_class", tree_classes)
+def test_against_dict(tree_class):
+    rand = random.Random(2)
+    tree = tree_class()
+    reference = {}
+    for step in range(3000):
+        key = rand.randrange(500)
+        if rand.random() < 0.6:
+            tree.add(key, step)
+            reference[key] = step
+        else:
+            tree.delete(key)
+            reference.pop(key, None)
+    check_tree(tree)
+    assert list(tree.walk()) == sorted(reference.items())
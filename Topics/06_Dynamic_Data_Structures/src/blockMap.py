@@ -0,0 +1,384 @@
+# A sorted map that keeps its keys in blocks rather than in tree nodes.
+#
+# A binary tree spends a whole object on every key: the node itself,
+# with its key, value and two child pointers, and each lookup follows
+# pointers from node to node all over memory.  Here the keys are kept
+# in order in a list of blocks, each block being an ordinary sorted
+# Python list (or, for numbers, an array, which stores the numbers
+# themselves rather than pointers to int objects):
+#
+#   maxes:  [  17,              42,             99 ]
+#   keys:   [ [2, 5, 9, 17],  [20, 31, 42],   [50, 63, 77, 99] ]
+#   values: [ [...],          [...],          [...] ]
+#
+# To find a key, bisect maxes (the largest key in each block) to find
+# which block it must be in, then bisect that block.  Adding or
+# deleting only shifts the keys along inside one block, and when a
+# block gets too big we split it in two.  With a thousand or so keys
+# in a block, a million keys is only a thousand blocks.
+#
+# Sorted keys can be loaded in O(n) by just cutting them into blocks,
+# and a map of numbers can be saved to a file in a form that
+# MappedMap can look keys up in without reading the whole file.
+
+import bisect, mmap, pickle, struct, sys
+from array import array
+
+LOAD = 1000   # aim for blocks of this many keys (up to twice as many)
+
+class BlockMap():
+    # key_type and value_type are array typecodes (like 'q' for 64-bit
+    # ints or 'd' for floats), or None to allow any Python objects
+    def __init__(self, key_type=None, value_type=None, load=LOAD):
+        self.key_type = key_type
+        self.value_type = value_type
+        self.load = load
+        self.maxes = []
+        self.keys = []
+        self.values = []
+        self.count = 0
+
+    # build a map from (key, value) pairs that are already sorted by
+    # key, without any searching
+    @classmethod
+    def from_sorted(cls, items, key_type=None, value_type=None, load=LOAD):
+        m = cls(key_type, value_type, load)
+        keys = m._new_block(m.key_type)
+        values = m._new_block(m.value_type)
+        for (key, value) in items:
+            if len(keys) > 0 and not keys[-1] < key:
+                raise ValueError("keys must be sorted, with no repeats")
+            keys.append(key)
+            values.append(value)
+            if len(keys) == load:
+                m._append_block(keys, values)
+                keys = m._new_block(m.key_type)
+                values = m._new_block(m.value_type)
+        if len(keys) > 0:
+            m._append_block(keys, values)
+        return m
+
+    def _new_block(self, typecode):
+        if typecode is None:
+            return []
+        return array(typecode)
+
+    def _append_block(self, keys, values):
+        self.maxes.append(keys[-1])
+        self.keys.append(keys)
+        self.values.append(values)
+        self.count += len(keys)
+
+    def __len__(self):
+        return self.count
+
+    # return (block, index) of the key, or None if it isn't there
+    def _find(self, key):
+        b = bisect.bisect_left(self.maxes, key)
+        if b == len(self.maxes):
+            return None
+        keys = self.keys[b]
+        i = bisect.bisect_left(keys, key)
+        if keys[i] != key:
+            return None
+        return (b, i)
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    # return the value matching the key, or None if no match is found
+    def get(self, key):
+        found = self._find(key)
+        if found is None:
+            return None
+        (b, i) = found
+        return self.values[b][i]
+
+    def add(self, key, value):
+        if len(self.maxes) == 0:
+            keys = self._new_block(self.key_type)
+            values = self._new_block(self.value_type)
+            keys.append(key)
+            values.append(value)
+            self._append_block(keys, values)
+            return
+        b = bisect.bisect_left(self.maxes, key)
+        if b == len(self.maxes):
+            # bigger than everything: it goes on the end of the last block
+            b -= 1
+        keys = self.keys[b]
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            self.values[b][i] = value
+            return
+        keys.insert(i, key)
+        self.values[b].insert(i, value)
+        self.maxes[b] = keys[-1]
+        self.count += 1
+        if len(keys) > 2 * self.load:
+            self._split(b)
+
+    # delete the item matching the key from the map
+    def delete(self, key):
+        found = self._find(key)
+        if found is None:
+            return
+        (b, i) = found
+        keys = self.keys[b]
+        del keys[i]
+        del self.values[b][i]
+        self.count -= 1
+        if len(keys) == 0:
+            del self.maxes[b]
+            del self.keys[b]
+            del self.values[b]
+            return
+        self.maxes[b] = keys[-1]
+        if len(keys) < self.load // 2 and len(self.keys) > 1:
+            # too small: join it onto a neighbour
+            if b == len(self.keys) - 1:
+                b -= 1
+            self._merge(b)
+
+    def _split(self, b):
+        keys = self.keys[b]
+        values = self.values[b]
+        half = len(keys) // 2
+        self.keys[b:b + 1] = [keys[:half], keys[half:]]
+        self.values[b:b + 1] = [values[:half], values[half:]]
+        self.maxes[b:b + 1] = [keys[half - 1], keys[-1]]
+
+    # join block b+1 onto the end of block b
+    def _merge(self, b):
+        self.keys[b] += self.keys[b + 1]
+        self.values[b] += self.values[b + 1]
+        self.maxes[b] = self.maxes[b + 1]
+        del self.keys[b + 1]
+        del self.values[b + 1]
+        del self.maxes[b + 1]
+        if len(self.keys[b]) > 2 * self.load:
+            self._split(b)
+
+    # create a generator for walking the map in order
+    def walk(self):
+        for (keys, values) in zip(self.keys, self.values):
+            yield from zip(keys, values)
+
+    # walk, in order, just the keys with low <= key < high
+    def range(self, low, high):
+        b = bisect.bisect_left(self.maxes, low)
+        if b == len(self.maxes):
+            return
+        start = bisect.bisect_left(self.keys[b], low)
+        while b < len(self.keys):
+            keys = self.keys[b]
+            end = bisect.bisect_left(keys, high, start)
+            yield from zip(keys[start:end], self.values[b][start:end])
+            if end < len(keys):
+                return
+            b += 1
+            start = 0
+
+    # Pickle just the keys and values, end to end, rather than every
+    # block.  For arrays, that's the raw bytes of the numbers.
+    def __getstate__(self):
+        keys = self._new_block(self.key_type)
+        values = self._new_block(self.value_type)
+        for block in self.keys:
+            keys += block
+        for block in self.values:
+            values += block
+        return (self.key_type, self.value_type, self.load, keys, values)
+
+    def __setstate__(self, state):
+        (key_type, value_type, load, keys, values) = state
+        self.__init__(key_type, value_type, load)
+        for start in range(0, len(keys), load):
+            self._append_block(keys[start:start + load], values[start:start + load])
+
+    # Write the map to a file that MappedMap can open.  Only maps of
+    # numbers can be saved like this: the file is the keys as one big
+    # array, then the values as another, so they can be searched
+    # straight from the file.
+    def save(self, filename):
+        if self.key_type is None or self.value_type is None:
+            raise TypeError("only maps with array key and value types can be saved")
+        (keys, values) = self.__getstate__()[3:]
+        with open(filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.key_type.encode(), self.value_type.encode(),
+                                sys.byteorder[0].encode(), len(keys)))
+            keys.tofile(f)
+            # start the values on an 8-byte boundary
+            f.write(bytes(-f.tell() % 8))
+            values.tofile(f)
+
+
+# magic number, key typecode, value typecode, byte order, key count
+HEADER = struct.Struct("=4scccxQ")
+MAGIC = b"BMAP"
+
+'''A read-only map from a file written by BlockMap.save().  The file is
+   memory-mapped, so opening it reads nothing: the operating system
+   reads in just the pages we look at, and if several programs open
+   the same file, they share one copy of it in memory.'''
+class MappedMap():
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, key_type, value_type, byteorder, count) = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError(filename + " is not a saved BlockMap")
+        if byteorder != sys.byteorder[0].encode():
+            raise ValueError(filename + " was saved on a machine with a different byte order")
+        view = memoryview(self.mm)
+        key_size = array(key_type.decode()).itemsize
+        value_size = array(value_type.decode()).itemsize
+        start = HEADER.size
+        end = start + count * key_size
+        self.keys = view[start:end].cast(key_type.decode())
+        start = end + (-end % 8)
+        self.values = view[start:start + count * value_size].cast(value_type.decode())
+
+    def close(self):
+        # the views have to go before the mmap can be closed
+        self.keys.release()
+        self.values.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def get(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.values[i]
+        return None
+
+    def walk(self):
+        return zip(self.keys, self.values)
+
+    def range(self, low, high):
+        start = bisect.bisect_left(self.keys, low)
+        end = bisect.bisect_left(self.keys, high, start)
+        return zip(self.keys[start:end], self.values[start:end])
+
+
+import random
+import pytest
+
+@pytest.fixture
+def two_lists():
+    items = list(range(100))
+    old_items = items.copy()
+    random.shuffle(items)
+    return (items, old_items)
+
+# check the blocks are in order, not too big, and that maxes and count
+# agree with them
+def check_map(m):
+    assert len(m.keys) == len(m.values) == len(m.maxes)
+    assert sum(len(block) for block in m.keys) == len(m)
+    previous = None
+    for (keys, values, largest) in zip(m.keys, m.values, m.maxes):
+        assert 0 < len(keys) <= 2 * m.load
+        assert len(keys) == len(values)
+        assert keys[-1] == largest
+        for key in keys:
+            assert previous is None or previous < key
+            previous = key
+
+def test_basics():
+    m = BlockMap()
+    m.add(3,3)
+    m.add(2,2)
+    m.add(1,1)
+    assert list(m.walk()) == [(1,1), (2,2), (3,3)]
+    m.delete(2)
+    assert m.get(1) == 1
+    assert m.get(2) is None
+    assert 3 in m
+    m.delete(2)  # delete something that's not there
+    m.delete(10)
+    assert len(m) == 2
+    m.add(3, "three")
+    assert len(m) == 2
+    assert m.get(3) == "three"
+    m.add(4, None)   # None is a value like any other
+    assert 4 in m and 5 not in m
+
+@pytest.mark.parametrize("key_type", [None, 'q'])
+def test_add_delete(key_type, two_lists):
+    items, _ = two_lists
+    # small blocks, so there's plenty of splitting and merging
+    m = BlockMap(key_type, key_type, load=4)
+    for i in items:
+        m.add(i, i)
+        check_map(m)
+    assert list(m.walk()) == [(i, i) for i in range(100)]
+    for pos, i in enumerate(items):
+        assert len(m) == 100 - pos
+        assert m.get(i) == i
+        m.delete(i)
+        assert m.get(i) is None
+        check_map(m)
+    assert len(m.keys) == 0
+
+def test_against_dict():
+    rand = random.Random(3)
+    m = BlockMap(load=8)
+    reference = {}
+    for step in range(5000):
+        key = rand.randrange(300)
+        if rand.random() < 0.6:
+            m.add(key, step)
+            reference[key] = step
+        else:
+            m.delete(key)
+            reference.pop(key, None)
+    check_map(m)
+    assert list(m.walk()) == sorted(reference.items())
+
+def test_from_sorted_and_range():
+    m = BlockMap.from_sorted(((i * 2, i) for i in range(1000)), 'q', 'q', load=16)
+    check_map(m)
+    assert len(m) == 1000
+    assert m.get(500) == 250
+    assert m.get(501) is None
+    assert list(m.range(10, 20)) == [(10, 5), (12, 6), (14, 7), (16, 8), (18, 9)]
+    assert [key for (key, value) in m.range(0, 2000)] == list(range(0, 2000, 2))
+    assert list(m.range(31, 32)) == []
+    assert list(m.range(5000, 6000)) == []
+    with pytest.raises(ValueError):
+        BlockMap.from_sorted([(2, 2), (1, 1)])
+
+def test_pickle():
+    m = BlockMap.from_sorted(((i, i / 2) for i in range(5000)), 'q', 'd')
+    copy = pickle.loads(pickle.dumps(m))
+    check_map(copy)
+    assert list(copy.walk()) == list(m.walk())
+    # the keys and values go in as raw numbers, 16 bytes for each pair
+    assert len(pickle.dumps(m)) < 5000 * 16 + 1000
+
+def test_save_mapped(tmp_path):
+    m = BlockMap.from_sorted(((i * 3, i) for i in range(5000)), 'i', 'd', load=64)
+    filename = str(tmp_path / "map.bmap")
+    m.save(filename)
+    with MappedMap(filename) as mapped:
+        assert len(mapped) == 5000
+        assert mapped.get(300) == 100
+        assert mapped.get(301) is None
+        assert mapped.get(10 ** 6) is None
+        assert list(mapped.range(3, 12)) == [(3, 1), (6, 2), (9, 3)]
+        assert list(mapped.walk()) == list(m.walk())
+    with pytest.raises(TypeError):
+        BlockMap().save(filename)
@@ -0,0 +1,109 @@
+# Memory and speed of BlockMap (blockMap.py) compared with the trees
+# that use a node for each key (binaryTree.py and balancedTree.py),
+# for n random integer keys.  For each structure we measure:
+# - memory: how much it allocates holding the n keys.  The lists and
+#   trees point to int objects we already had, so that doesn't count
+#   them; "with ints" adds the 32 bytes each int object takes, which
+#   they'd need if nothing else was keeping the keys.  Arrays hold the
+#   numbers themselves.
+# - add: seconds to add the keys one at a time, in random order
+# - load: seconds to build it from the keys in sorted order, using
+#   from_sorted where there is one, or add otherwise (BinaryTree can't
+#   take sorted keys, so that's skipped for it)
+# - get: seconds to look up every key
+# - range: seconds for 1000 range queries, each covering about 100 keys
+# MappedMap is a BlockMap of arrays saved to a file and memory-mapped.
+#
+#   python3 block_bench.py [-n keys]
+
+import argparse, gc, os, random, sys, tempfile, time, tracemalloc
+from binaryTree import BinaryTree
+from balancedTree import AVLTree
+from blockMap import BlockMap, MappedMap
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    m = build()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (m, used)
+
+def add_all(make, keys):
+    m = make()
+    for key in keys:
+        m.add(key, key)
+    return m
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares BlockMap with node-per-key trees.')
+    parser.add_argument('-n', '--keys', type=int, default=1000000, help='Keys to store')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    rand = random.Random(1)
+    # keys big enough that Python doesn't share one int object for them
+    keys = rand.sample(range(10 ** 12), args.keys)
+    sorted_keys = sorted(keys)
+    lookups = keys.copy()
+    rand.shuffle(lookups)
+    ranges = []
+    for i in range(1000):
+        start = rand.randrange(len(sorted_keys))
+        end = min(len(sorted_keys) - 1, start + 100)
+        ranges.append((sorted_keys[start], sorted_keys[end]))
+
+    int_size = sys.getsizeof(keys[0])
+    # name, how to make an empty one, how to load sorted keys, and
+    # whether it holds int objects
+    structures = [
+        ("BinaryTree", BinaryTree, None, True),
+        ("AVLTree", AVLTree, lambda: add_all(AVLTree, sorted_keys), True),
+        ("BlockMap list", BlockMap,
+         lambda: BlockMap.from_sorted((key, key) for key in sorted_keys), True),
+        ("BlockMap array", lambda: BlockMap('q', 'q'),
+         lambda: BlockMap.from_sorted(((key, key) for key in sorted_keys), 'q', 'q'), False),
+    ]
+
+    print("{} keys".format(args.keys))
+    print("{:<15} {:>12} {:>10} {:>9} {:>9} {:>9} {:>9}".format(
+        "structure", "memory (MB)", "with ints", "add", "load", "get", "range"))
+    for (name, make, load, holds_ints) in structures:
+        (m, used) = measure_memory(lambda: add_all(make, keys))
+        with_ints = used + (int_size * len(keys) if holds_ints else 0)
+        # time a fresh one, with only one of them around for the
+        # garbage collector to look through
+        m = None
+        gc.collect()
+        add_time = timed(lambda: add_all(make, keys))
+        m = add_all(make, keys)
+        load_time = "-" if load is None else "{:.3f}".format(timed(load))
+        get_time = timed(lambda: [m.get(key) for key in lookups])
+        if hasattr(m, "range"):
+            range_time = "{:.3f}".format(timed(lambda: [list(m.range(low, high)) for (low, high) in ranges]))
+        else:
+            range_time = "-"
+        print("{:<15} {:>12.1f} {:>10.1f} {:>9.3f} {:>9} {:>9.3f} {:>9}".format(
+            name, used / 1e6, with_ints / 1e6, add_time, load_time, get_time, range_time))
+        m = None
+
+    filename = os.path.join(tempfile.mkdtemp(), "bench.bmap")
+    BlockMap.from_sorted(((key, key) for key in sorted_keys), 'q', 'q').save(filename)
+    (mapped, used) = measure_memory(lambda: MappedMap(filename))
+    get_time = timed(lambda: [mapped.get(key) for key in lookups])
+    range_time = timed(lambda: [list(mapped.range(low, high)) for (low, high) in ranges])
+    print("{:<15} {:>12.1f} {:>10.1f} {:>9} {:>9} {:>9.3f} {:>9.3f}".format(
+        "MappedMap", used / 1e6, used / 1e6, "-", "-", get_time, range_time))
+    print("file size: {:.1f} MB".format(os.path.getsize(filename) / 1e6))
+    mapped.close()
+    os.unlink(filename)
+    os.rmdir(os.path.dirname(filename))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Benchmark of ways to keep a map from keys to values:
+# - BinaryTree from binaryTree.py, which doesn't balance itself
+# - AVLTree and Treap from balancedTree.py
+# - dict, which is a hash table: fastest for get, but no order, so no
+#   range queries
+# - a sorted list searched with bisect: fast to search, but adding or
+#   deleting shifts everything after that position along
+# We time adding n keys in random order and in sorted order, then
+# getting every key, some range queries, and deleting every key.
+# BinaryTree can't cope with sorted keys: it recurses once per level,
+# and each key is a level, so we stop it when it hits the recursion limit.
+#
+#   python3 tree_bench.py [-n keys] [-s structure ...]
+
+import argparse, bisect, random, time
+from binaryTree import BinaryTree
+from balancedTree import AVLTree, Treap
+
+class DictMap():
+    def __init__(self):
+        self.d = {}
+
+    def add(self, key, value):
+        self.d[key] = value
+
+    def get(self, key):
+        return self.d.get(key)
+
+    def delete(self, key):
+        self.d.pop(key, None)
+
+    def range(self, low, high):
+        # no order in a dict, so all we can do is look at every key
+        return sorted((key, value) for (key, value) in self.d.items() if low <= key < high)
+
+class BisectMap():
+    def __init__(self):
+        self.keys = []
+        self.values = []
+
+    def add(self, key, value):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            self.values[i] = value
+        else:
+            self.keys.insert(i, key)
+            self.values.insert(i, value)
+
+    def get(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.values[i]
+        return None
+
+    def delete(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.values[i]
+
+    def range(self, low, high):
+        start = bisect.bisect_left(self.keys, low)
+        end = bisect.bisect_left(self.keys, high)
+        return zip(self.keys[start:end], self.values[start:end])
+
+structures = {
+    "binarytree": BinaryTree,
+    "avl": AVLTree,
+    "treap": Treap,
+    "dict": DictMap,
+    "bisect": BisectMap,
+}
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def run(make, keys, lookups, ranges):
+    ''' returns the seconds taken to add, get, range-query and delete,
+        or None for the ones that we couldn't do '''
+    m = make()
+    def add():
+        for key in keys:
+            m.add(key, key)
+    def get():
+        for key in lookups:
+            m.get(key)
+    def query():
+        for (low, high) in ranges:
+            for item in m.range(low, high):
+                pass
+    def delete():
+        for key in lookups:
+            m.delete(key)
+    times = []
+    for phase in (add, get, query, delete):
+        if phase is query and not hasattr(m, "range"):
+            times.append(None)
+            continue
+        try:
+            times.append(timed(phase))
+        except RecursionError:
+            return times + [None] * (4 - len(times))
+    return times
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares sorted map implementations.')
+    parser.add_argument('-n', '--keys', type=int, default=1000000, help='Keys to add')
+    parser.add_argument('-q', '--queries', type=int, default=1000, help='Range queries to make')
+    parser.add_argument('-s', '--structure', action='append', choices=sorted(structures),
+                        help='Structure to test (default: all of them)')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    rand = random.Random(1)
+    random_keys = list(range(args.keys))
+    rand.shuffle(random_keys)
+    lookups = list(range(args.keys))
+    rand.shuffle(lookups)
+    # each range query covers about 100 keys
+    ranges = []
+    for i in range(args.queries):
+        low = rand.randrange(args.keys)
+        ranges.append((low, low + 100))
+    names = args.structure or list(structures)
+
+    def show(seconds):
+        if seconds is None:
+            return "{:>9}".format("-")
+        return "{:>9.3f}".format(seconds)
+
+    print("{} keys, {} range queries; seconds for each phase".format(args.keys, args.queries))
+    print("{:<8} {:<11} {:>9} {:>9} {:>9} {:>9}".format("order", "structure", "add", "get", "range", "delete"))
+    for (order, keys) in (("random", random_keys), ("sorted", sorted(random_keys))):
+        for name in names:
+            times = run(structures[name], keys, lookups, ranges)
+            print("{:<8} {:<11}".format(order, name), " ".join(show(t) for t in times))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# An interactive client for chat_server.py.  Like 05_select_chat's
+# sender, it uses select() to wait for either the keyboard or the
+# network, but its messages are framed with their length in front
+# (chat_framing.py), so the server can tell where each one ends.
+#
+#   python3 chat_client.py [server ip] [port]
+
+import sys
+import socket
+from time import sleep
+import select
+from nonblocking_readline import *
+from chat_framing import encode_frame, FrameDecoder
+
+def get_sock():
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    except socket.error as err:
+        print("socket creation failed with error %s" %(err))
+        sys.exit()
+    return sock
+
+
+def client(sock, ip, port):
+    while True:
+        try:
+            sock.connect((ip, port))
+            print("connected to", ip, "on port", port)
+            return sock
+        except ConnectionRefusedError as err:
+            # server seems to not be ready for us yet.  We'll retry shortly
+            # socket latches into error state, so close it and try again
+            sock.close()
+            sock = get_sock()
+            print("waiting for server")
+            sleep(1)
+
+
+ip = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+port = int(sys.argv[2]) if len(sys.argv) > 2 else 1234
+sock = get_sock()
+sock = client(sock, ip, port)
+decoder = FrameDecoder()
+
+close_conn = False
+while close_conn == False:
+    try:
+        rd, wd, ed = select.select([sock, sys.stdin],[],[])
+        if sys.stdin in rd:
+            key_text = nonblocking_readline()
+            if key_text != "":
+                # sendall keeps sending until the whole message has gone
+                sock.sendall(encode_frame(key_text.encode('utf-8')))
+
+        if sock in rd:
+            received_bytes = sock.recv(4096)
+            if len(received_bytes) == 0:
+                close_conn = True
+            else:
+                for message in decoder.feed(received_bytes):
+                    print(">>", message.decode('utf-8'), end="")
+    except (EOFError, KeyboardInterrupt, BrokenPipeError):
+        close_conn = True
+
+print("End of input, closing connection")
+sock.close()
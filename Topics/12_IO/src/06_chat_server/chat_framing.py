@@ -0,0 +1,43 @@
+# TCP gives us a stream of bytes, not messages: one recv() can return
+# half a message, or several messages stuck together.  So each message
+# is sent as a 4-byte length (in network byte order) followed by that
+# many bytes of message, and the receiver uses the lengths to cut the
+# stream back up into messages.
+
+import struct
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE = 65536    # longest message we'll accept, in bytes
+
+class FramingError(Exception):
+    pass
+
+def encode_frame(payload):
+    ''' returns payload (bytes) with its length in front, ready to send '''
+    return HEADER.pack(len(payload)) + payload
+
+class FrameDecoder():
+    def __init__(self, max_message=MAX_MESSAGE):
+        self.buffer = bytearray()
+        self.max_message = max_message
+
+    # feed takes bytes received from the socket, and returns a list of
+    # the messages they complete.  Bytes of an unfinished message are
+    # kept until the rest of it arrives.
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        messages = []
+        start = 0
+        while len(buffer) - start >= HEADER.size:
+            (length,) = HEADER.unpack_from(buffer, start)
+            if length > self.max_message:
+                raise FramingError("message of " + str(length) + " bytes is too long")
+            end = start + HEADER.size + length
+            if end > len(buffer):
+                break
+            messages.append(bytes(buffer[start + HEADER.size:end]))
+            start = end
+        # throw away the messages we've finished with, all at once
+        del buffer[:start]
+        return messages
@@ -0,0 +1,188 @@
+# Load test for chat_server.py.  Connects many clients to the server
+# (all from this one process, using selectors), has each of them send
+# messages at a steady rate, and checks that every other client gets
+# every message.  Each message carries the time it was sent, so when
+# it arrives we know how long it took.  At the end, we report the
+# messages sent and delivered per second, and percentiles of the
+# delivery latency.
+#
+#   python3 chat_server.py -q &
+#   python3 chat_load_test.py [-c clients] [-m messages] [-r rate] [-s size]
+#
+# or let the load test start (and stop) the server itself:
+#
+#   python3 chat_load_test.py --start-server
+
+import argparse, os, selectors, socket, struct, subprocess, sys, time
+from chat_framing import encode_frame, FrameDecoder
+from chat_server import raise_file_limit
+
+# each message starts with the sender's number, the message's number
+# and the time it was sent
+MESSAGE = struct.Struct("!IId")
+PROBE = 0xFFFFFFFF     # message number of the probes sent before we start
+
+class LoadClient():
+    def __init__(self, number, sock):
+        self.number = number
+        self.sock = sock
+        self.decoder = FrameDecoder()
+        self.outbound = bytearray()
+        self.sent = 0
+        self.received = 0
+        self.probed = False
+
+def connect(host, port, number_clients):
+    clients = []
+    for number in range(number_clients):
+        sock = socket.create_connection((host, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        clients.append(LoadClient(number, sock))
+    return clients
+
+def message(client, sequence, size):
+    body = MESSAGE.pack(client.number, sequence, time.perf_counter())
+    return encode_frame(body + b"x" * max(0, size - len(body)))
+
+def send_queued(client):
+    if len(client.outbound) > 0:
+        try:
+            sent = client.sock.send(client.outbound)
+            del client.outbound[:sent]
+        except BlockingIOError:
+            pass
+
+class LoadTest():
+    def __init__(self, clients, messages, rate, size):
+        self.clients = clients
+        self.messages = messages
+        self.rate = rate
+        self.size = size
+        self.selector = selectors.DefaultSelector()
+        for client in clients:
+            self.selector.register(client.sock, selectors.EVENT_READ, client)
+        self.latencies = []
+
+    def receive(self, client):
+        data = client.sock.recv(65536)
+        if len(data) == 0:
+            raise ConnectionError("server closed client " + str(client.number) + "'s connection")
+        now = time.perf_counter()
+        for payload in client.decoder.feed(data):
+            (sender, sequence, sent_time) = MESSAGE.unpack_from(payload)
+            if sequence == PROBE:
+                client.probed = True
+            else:
+                client.received += 1
+                self.latencies.append(now - sent_time)
+
+    def poll(self, timeout):
+        for (key, mask) in self.selector.select(timeout):
+            self.receive(key.data)
+        for client in self.clients:
+            send_queued(client)
+
+    def wait_for_everyone(self):
+        # The server may not have accepted all our connections yet,
+        # and messages only go to clients it has accepted.  So the first
+        # client sends probes until every other client has got one.
+        prober = self.clients[0]
+        waiting = self.clients[1:]
+        while len(waiting) > 0:
+            prober.outbound += message(prober, PROBE, 0)
+            deadline = time.perf_counter() + 0.2
+            while time.perf_counter() < deadline and len(waiting) > 0:
+                self.poll(0.05)
+                waiting = [client for client in waiting if not client.probed]
+
+    def run(self, timeout):
+        ''' sends every client's messages, rate per second each, and waits
+            for them all to be delivered or for timeout seconds to pass '''
+        self.wait_for_everyone()
+        # the first probe may have reached some clients more than once
+        for client in self.clients:
+            client.received = 0
+        self.latencies = []
+        number_clients = len(self.clients)
+        expected = number_clients * self.messages * (number_clients - 1)
+        interval = 1 / self.rate
+        # spread the clients' sends out over the first interval
+        start = time.perf_counter()
+        next_send = [start + interval * i / number_clients for i in range(number_clients)]
+        sent = 0
+        delivered = 0
+        deadline = start + self.messages * interval + timeout
+        while delivered < expected and time.perf_counter() < deadline:
+            now = time.perf_counter()
+            for client in self.clients:
+                while client.sent < self.messages and next_send[client.number] <= now:
+                    client.outbound += message(client, client.sent, self.size)
+                    client.sent += 1
+                    sent += 1
+                    next_send[client.number] += interval
+            if sent == number_clients * self.messages:
+                wait = 0.05
+            else:
+                wait = max(0, min(next_send) - time.perf_counter())
+            self.poll(wait)
+            delivered = len(self.latencies)
+        elapsed = time.perf_counter() - start
+        return sent, delivered, expected, elapsed
+
+    def close(self):
+        for client in self.clients:
+            self.selector.unregister(client.sock)
+            client.sock.close()
+        self.selector.close()
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Load test for chat_server.py.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Server address')
+    parser.add_argument('-p', '--port', type=int, default=1234, help='Server port')
+    parser.add_argument('-c', '--clients', type=int, default=100, help='Number of clients')
+    parser.add_argument('-m', '--messages', type=int, default=50, help='Messages each client sends')
+    parser.add_argument('-r', '--rate', type=float, default=10, help='Messages per second each client sends')
+    parser.add_argument('-s', '--size', type=int, default=64, help='Bytes in each message')
+    parser.add_argument('-t', '--timeout', type=float, default=30, help='Seconds to wait for the last messages')
+    parser.add_argument('--start-server', action='store_true', help='Start chat_server.py for the test')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    raise_file_limit()
+    server = None
+    if args.start_server:
+        here = os.path.dirname(os.path.abspath(__file__))
+        server = subprocess.Popen([sys.executable, os.path.join(here, "chat_server.py"), "-q", "-p", str(args.port)],
+                                  stdout=subprocess.DEVNULL)
+        # wait for the server to be listening
+        while True:
+            try:
+                socket.create_connection((args.host, args.port)).close()
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.1)
+    try:
+        test = LoadTest(connect(args.host, args.port, args.clients), args.messages, args.rate, args.size)
+        (sent, delivered, expected, elapsed) = test.run(args.timeout)
+        test.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print("clients: {}  messages each: {}  rate: {}/s each  size: {} bytes".format(
+        args.clients, args.messages, args.rate, args.size))
+    print("sent {} messages in {:.2f}s: {:.0f} messages/s".format(sent, elapsed, sent / elapsed))
+    print("delivered {} of {} ({:.1f}%): {:.0f} messages/s".format(
+        delivered, expected, 100 * delivered / max(1, expected), delivered / elapsed))
+    if delivered > 0:
+        latencies = sorted(test.latencies)
+        print("latency ms: p50 {:.2f}  p90 {:.2f}  p99 {:.2f}  max {:.2f}".format(
+            *[1000 * percentile(latencies, fraction) for fraction in [0.5, 0.9, 0.99]], 1000 * latencies[-1]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# A chat server for many clients at once.  Every message a client
+# sends is passed on to all the other clients.
+#
+# Instead of select() on a list of sockets, we use the selectors
+# module, which picks the best mechanism the OS has (epoll on Linux,
+# kqueue on macOS), so it still works well with thousands of clients.
+# All the sockets are non-blocking, and one loop handles them all:
+# - messages are framed with their length in front (chat_framing.py)
+# - each client has a queue of bytes waiting to be sent to it.  We
+#   only ask to hear when a socket can be written to while its queue
+#   isn't empty.
+# - a message sent to everyone is framed once, and the same bytes are
+#   put in every client's queue, rather than a copy for each client
+# - backpressure: if a client's queue gets long (it isn't reading
+#   fast enough), we stop reading from it until the queue drains, and
+#   if it gets far too long, we disconnect that client
+#
+#   python3 chat_server.py [-p port] [-q]
+
+import argparse, selectors, socket
+from time import sleep
+from collections import deque
+from chat_framing import encode_frame, FrameDecoder, FramingError
+
+RECV_SIZE = 65536
+HIGH_WATER = 256 * 1024       # stop reading from a client with this much queued for it...
+LOW_WATER = 64 * 1024         # ...until it has no more than this queued
+MAX_QUEUED = 4 * 1024 * 1024  # disconnect a client with this much queued for it
+MAX_BUFFERS = 64              # most queued buffers to send in one go
+
+def raise_file_limit():
+    # each client needs a file descriptor, and the default limit is
+    # often only 1024, so raise it as far as we're allowed to
+    try:
+        import resource
+        (soft, hard) = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or hard > 65536:
+            hard = 65536
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+class Client():
+    def __init__(self, sock, addr):
+        self.sock = sock
+        self.addr = addr
+        self.decoder = FrameDecoder()
+        # memoryviews of the bytes waiting to be sent to this client
+        self.outbound = deque()
+        self.queued_bytes = 0
+        self.reading = True
+
+
+class ChatServer():
+    def __init__(self, port, host='', verbose=True):
+        self.port = port
+        self.host = host
+        self.verbose = verbose
+        self.selector = selectors.DefaultSelector()
+        self.clients = {}     # socket -> Client
+        # clients that have had bytes queued since we last tried sending
+        self.to_write = []
+        self.running = False
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.clients_dropped = 0
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def start(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.listener.bind((self.host, self.port))
+        except OSError:
+            self.listener.close()
+            raise
+        # a long queue of connections waiting to be accepted, in case
+        # lots of clients connect at once
+        self.listener.listen(1024)
+        self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+        self.selector.register(self.listener, selectors.EVENT_READ, None)
+        self.running = True
+        self.log("listening on port", self.port)
+
+    def run(self):
+        while self.running:
+            for (key, mask) in self.selector.select(timeout=0.5):
+                if key.data is None:
+                    self.accept()
+                    continue
+                client = key.data
+                # a broadcast earlier in this batch may have dropped the
+                # client for being too slow, closing its socket
+                if mask & selectors.EVENT_READ and client.sock in self.clients:
+                    self.read(client)
+                if mask & selectors.EVENT_WRITE and client.sock in self.clients:
+                    self.write(client)
+            self.write_queued()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        for client in list(self.clients.values()):
+            self.disconnect(client, "server closing")
+        self.selector.unregister(self.listener)
+        self.listener.close()
+        self.selector.close()
+
+    def accept(self):
+        # accept all the connections that are waiting, not just one
+        while True:
+            try:
+                (sock, addr) = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as err:
+                # probably out of file descriptors; try again later
+                self.log("accept failed:", err)
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = Client(sock, addr)
+            self.clients[sock] = client
+            self.selector.register(sock, selectors.EVENT_READ, client)
+            self.log("Got an incoming connection from", addr)
+
+    def disconnect(self, client, reason):
+        self.log("closing connection from", client.addr, ":", reason)
+        del self.clients[client.sock]
+        self.selector.unregister(client.sock)
+        client.sock.close()
+
+    def read(self, client):
+        try:
+            data = client.sock.recv(RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as err:
+            self.disconnect(client, str(err))
+            return
+        if len(data) == 0:
+            self.disconnect(client, "closed by remote end")
+            return
+        try:
+            messages = client.decoder.feed(data)
+        except FramingError as err:
+            self.disconnect(client, str(err))
+            return
+        for message in messages:
+            self.messages_received += 1
+            self.broadcast(message, client)
+
+    def broadcast(self, message, sender):
+        # frame the message once; every client's queue shares its bytes
+        frame = memoryview(encode_frame(message))
+        for client in list(self.clients.values()):
+            if client is not sender:
+                self.queue(client, frame)
+
+    def queue(self, client, frame):
+        was_empty = len(client.outbound) == 0
+        client.outbound.append(frame)
+        client.queued_bytes += len(frame)
+        self.messages_sent += 1
+        if client.queued_bytes > MAX_QUEUED:
+            self.clients_dropped += 1
+            self.disconnect(client, "too slow, " + str(client.queued_bytes) + " bytes queued")
+            return
+        if was_empty:
+            # send once we've handled all the events select() gave us, so
+            # everything queued for this client meanwhile goes together
+            self.to_write.append(client)
+        elif client.queued_bytes > HIGH_WATER and client.reading:
+            # don't take any more from a client we can't keep up with
+            client.reading = False
+            self.update_events(client)
+
+    def write_queued(self):
+        # try to send straight away; usually the socket has room, and
+        # then we never need to wait to be told it's writable
+        to_write = self.to_write
+        self.to_write = []
+        for client in to_write:
+            if client.sock in self.clients:
+                self.write(client)
+
+    def write(self, client):
+        sock = client.sock
+        outbound = client.outbound
+        while len(outbound) > 0:
+            try:
+                if len(outbound) > 1 and hasattr(sock, "sendmsg"):
+                    # send several queued buffers with one system call
+                    buffers = [outbound[i] for i in range(min(len(outbound), MAX_BUFFERS))]
+                    sent = sock.sendmsg(buffers)
+                else:
+                    sent = sock.send(outbound[0])
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as err:
+                self.disconnect(client, str(err))
+                return
+            client.queued_bytes -= sent
+            # drop the buffers that were sent, and the part of the
+            # first one left that was
+            while sent > 0:
+                first = outbound[0]
+                if sent >= len(first):
+                    outbound.popleft()
+                    sent -= len(first)
+                else:
+                    outbound[0] = first[sent:]
+                    sent = 0
+        if not client.reading and client.queued_bytes <= LOW_WATER:
+            client.reading = True
+        self.update_events(client)
+
+    def update_events(self, client):
+        events = 0
+        if client.reading:
+            events |= selectors.EVENT_READ
+        if len(client.outbound) > 0:
+            events |= selectors.EVENT_WRITE
+        # (a client we've stopped reading from always has bytes queued,
+        # so events is never 0)
+        if self.selector.get_key(client.sock).events != events:
+            self.selector.modify(client.sock, events, client)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Chat server for many clients.')
+    parser.add_argument('-p', '--port', type=int, default=1234, help='Port to listen on')
+    parser.add_argument('-q', '--quiet', action='store_true', help="Don't print each connection")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    raise_file_limit()
+    server = ChatServer(args.port, verbose=not args.quiet)
+    while True:
+        try:
+            server.start()
+            break
+        except OSError as err:
+            # sometimes the port is still in use; wait til it's free
+            print(err)
+            print("waiting, will retry in 10 seconds")
+            sleep(10)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        print("user termination")
+    print("received", server.messages_received, "messages, sent", server.messages_sent)
+    server.close()
@@ -0,0 +1,17 @@
+# The chat sender and receiver again, written with asyncio.  Instead of
+# select() or polling non-blocking sockets, each connection is handled
+# by a coroutine, and asyncio's event loop runs whichever ones have
+# something to do.
+#
+# - framing.py: reading whole messages from a StreamReader, either a
+#   line at a time or with their length in front
+# - transports.py: TCP or Unix domain sockets, chosen by an address
+#   like "tcp:127.0.0.1:1234" or "unix:/tmp/chat.sock"
+# - pool.py: connections that are re-made when they fail, waiting
+#   longer after each failed attempt, rather than a fixed sleep(1)
+# - roles.py: the sender and the receiver
+
+from aiochat.framing import LineFraming, LengthFraming, framing_for
+from aiochat.transports import TcpTransport, UnixTransport, transport_for
+from aiochat.pool import ConnectionPool, Backoff
+from aiochat.roles import run_sender, run_receiver
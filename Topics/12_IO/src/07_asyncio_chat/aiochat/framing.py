@@ -0,0 +1,60 @@
+# TCP (and a Unix domain stream socket) gives us a stream of bytes,
+# not messages, so we need to mark where each message ends.  Two ways:
+# - LineFraming: each message is one line, ending with a newline.
+#   Simple, and you can type it with telnet, but a message can't
+#   contain a newline.
+# - LengthFraming: each message has its length in front, as 4 bytes in
+#   network byte order.  A message can contain anything.
+# Both read with StreamReader, which does the buffering for us:
+# readline() and readexactly() only return once they have the whole
+# message.
+
+import asyncio, struct
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE = 65536    # longest message we'll accept, in bytes
+
+class FramingError(Exception):
+    pass
+
+class LineFraming():
+    name = "line"
+
+    def encode(self, payload):
+        if b"\n" in payload:
+            raise FramingError("a line can't contain a newline")
+        return payload + b"\n"
+
+    async def read(self, reader):
+        ''' returns the next message, or None when the other end closes '''
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise FramingError("line too long")
+        return line[:-1]
+
+class LengthFraming():
+    name = "length"
+
+    def encode(self, payload):
+        return HEADER.pack(len(payload)) + payload
+
+    async def read(self, reader):
+        ''' returns the next message, or None when the other end closes '''
+        try:
+            header = await reader.readexactly(HEADER.size)
+            (length,) = HEADER.unpack(header)
+            if length > MAX_MESSAGE:
+                raise FramingError("message of " + str(length) + " bytes is too long")
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return None
+
+def framing_for(name):
+    if name == "line":
+        return LineFraming()
+    elif name == "length":
+        return LengthFraming()
+    raise ValueError("unknown framing " + name)
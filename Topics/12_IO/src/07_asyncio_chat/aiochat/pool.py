@@ -0,0 +1,100 @@
+# The earlier senders retry a refused connection every second, for
+# ever.  Here, a ConnectionPool hands out connections, keeps ones that
+# are given back for reuse, and makes new ones when needed.  If
+# connecting fails, it waits before trying again, doubling the wait
+# each time (up to a limit), with a little randomness so lots of
+# clients that lost the same server don't all come back at once.
+
+import asyncio, random
+from collections import deque
+
+class Backoff():
+    def __init__(self, initial=0.1, maximum=5.0, factor=2, jitter=0.1, rand=None):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.rand = rand if rand is not None else random.Random()
+        self.delay = initial
+
+    def reset(self):
+        self.delay = self.initial
+
+    def next_delay(self):
+        ''' returns how long to wait before the next attempt '''
+        delay = self.delay
+        self.delay = min(self.maximum, self.delay * self.factor)
+        return delay * (1 + self.jitter * (2 * self.rand.random() - 1))
+
+
+class Connection():
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def is_alive(self):
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool():
+    def __init__(self, transport, size=1, backoff=None, attempts=None, log=print):
+        self.transport = transport
+        # most idle connections to keep
+        self.size = size
+        self.backoff = backoff if backoff is not None else Backoff()
+        # give up after this many failed attempts in a row (None: never)
+        self.attempts = attempts
+        self.log = log
+        self.idle = deque()
+        self.connects = 0
+        self.failures = 0
+
+    async def get(self):
+        ''' returns a working connection, reusing an idle one if there is one '''
+        while len(self.idle) > 0:
+            connection = self.idle.popleft()
+            if connection.is_alive():
+                return connection
+            connection.close()
+        failed = 0
+        while True:
+            try:
+                (reader, writer) = await self.transport.connect()
+                self.connects += 1
+                self.backoff.reset()
+                return Connection(reader, writer)
+            except OSError as err:
+                # refused, or no such socket file yet: the receiver
+                # seems to not be ready for us yet
+                self.failures += 1
+                failed += 1
+                if self.attempts is not None and failed >= self.attempts:
+                    raise
+                delay = self.backoff.next_delay()
+                if self.log is not None:
+                    self.log("can't connect to", self.transport, "(" + str(err) + "), retrying in",
+                             round(delay, 2), "seconds")
+                await asyncio.sleep(delay)
+
+    def release(self, connection):
+        ''' gives back a connection we've finished with, for reuse '''
+        if connection.is_alive() and len(self.idle) < self.size:
+            self.idle.append(connection)
+        else:
+            connection.close()
+
+    def discard(self, connection):
+        ''' gives back a connection that failed '''
+        connection.close()
+
+    async def close(self):
+        while len(self.idle) > 0:
+            connection = self.idle.popleft()
+            connection.close()
+            try:
+                await connection.writer.wait_closed()
+            except OSError:
+                pass
@@ -0,0 +1,111 @@
+# The two ends of the chat.  As in 05_select_chat, each end sends what
+# you type and prints what it receives, but each of these jobs is a
+# coroutine of its own, and asyncio runs whichever one has something
+# to do.  No select(), no non-blocking reads, no sleeping.
+# - the receiver listens for senders, and can talk to several at once
+# - the sender connects to the receiver, and if the connection fails,
+#   connects again (through a ConnectionPool) and carries on
+
+import asyncio, sys
+from aiochat.framing import FramingError
+
+def print_message(message):
+    # the other end can send any bytes, so show what isn't UTF-8 as
+    # replacement characters rather than failing
+    print(">>", message.decode('utf-8', errors='replace'))
+
+async def keyboard_reader():
+    ''' returns a StreamReader for what's typed on stdin, so it can be
+        awaited like a socket, rather than read a character at a time '''
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    return reader
+
+async def receive_messages(reader, framing, show):
+    ''' shows each message that arrives, until the other end closes '''
+    while True:
+        message = await framing.read(reader)
+        if message is None:
+            return
+        show(message)
+
+async def listen(connection, framing, show):
+    ''' receive_messages for the sender.  After a badly framed message
+        we can't tell where the next one starts, so close the
+        connection; the next send finds it closed and reconnects. '''
+    try:
+        await receive_messages(connection.reader, framing, show)
+    except FramingError as err:
+        print(err, "- closing connection")
+        connection.close()
+
+async def run_sender(pool, framing, keyboard, show=print_message):
+    ''' sends each line read from keyboard (a StreamReader) until it
+        ends, showing messages that arrive meanwhile '''
+    connection = await pool.get()
+    listening = asyncio.create_task(listen(connection, framing, show))
+    while True:
+        line = await keyboard.readline()
+        if line == b"":
+            break
+        message = framing.encode(line.rstrip(b"\n"))
+        while True:
+            try:
+                if not connection.is_alive():
+                    raise ConnectionResetError("connection closed by remote end")
+                connection.writer.write(message)
+                # wait until the socket has room for more, if it's full
+                await connection.writer.drain()
+                break
+            except ConnectionError as err:
+                print(err, "- reconnecting")
+                listening.cancel()
+                pool.discard(connection)
+                connection = await pool.get()
+                listening = asyncio.create_task(listen(connection, framing, show))
+    print("End of input, closing connection")
+    listening.cancel()
+    pool.discard(connection)
+    await pool.close()
+
+async def run_receiver(transport, framing, keyboard, show=print_message):
+    ''' listens for senders, showing what they send, and sends each line
+        read from keyboard to all of them, until keyboard ends '''
+    senders = set()
+    handlers = set()
+
+    async def handle_sender(reader, writer):
+        print("Got an incoming connection from", writer.get_extra_info('peername') or transport)
+        senders.add(writer)
+        handlers.add(asyncio.current_task())
+        try:
+            await receive_messages(reader, framing, show)
+            print("connection closed by remote end")
+        except (ConnectionError, FramingError) as err:
+            print(err)
+        finally:
+            senders.discard(writer)
+            handlers.discard(asyncio.current_task())
+            writer.close()
+
+    server = await transport.serve(handle_sender)
+    print("listening on", transport)
+    async with server:
+        while True:
+            line = await keyboard.readline()
+            if line == b"":
+                break
+            message = framing.encode(line.rstrip(b"\n"))
+            for writer in list(senders):
+                writer.write(message)
+            for writer in list(senders):
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    senders.discard(writer)
+        print("End of input, closing connections")
+        for writer in list(senders):
+            writer.close()
+        # closing a connection ends its handler, once it notices
+        await asyncio.gather(*handlers, return_exceptions=True)
@@ -0,0 +1,52 @@
+# The chat doesn't care what kind of stream socket it runs over, so the
+# sender and receiver take a transport, which knows how to connect
+# (for the sender) and how to listen (for the receiver).  Unix domain
+# sockets only work between programs on the same machine, but skip the
+# whole TCP/IP stack, so they're faster than TCP on loopback.
+
+import asyncio, os
+
+class TcpTransport():
+    # host "" means this machine when connecting, and all of its
+    # addresses when listening, like binding to '' in the other examples
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def __str__(self):
+        if self.host == "":
+            return "tcp:" + str(self.port)
+        return "tcp:" + self.host + ":" + str(self.port)
+
+    async def connect(self):
+        return await asyncio.open_connection(self.host or "127.0.0.1", self.port)
+
+    async def serve(self, handler):
+        return await asyncio.start_server(handler, self.host or None, self.port)
+
+class UnixTransport():
+    def __init__(self, path):
+        self.path = path
+
+    def __str__(self):
+        return "unix:" + self.path
+
+    async def connect(self):
+        return await asyncio.open_unix_connection(self.path)
+
+    async def serve(self, handler):
+        # a socket file left behind by an earlier run would stop us listening
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        return await asyncio.start_unix_server(handler, self.path)
+
+def transport_for(address):
+    ''' makes a transport from an address like "tcp:127.0.0.1:1234",
+        "tcp:1234" (on this machine) or "unix:/tmp/chat.sock" '''
+    (kind, sep, rest) = address.partition(":")
+    if kind == "tcp":
+        (host, sep, port) = rest.rpartition(":")
+        return TcpTransport(host, int(port))
+    elif kind == "unix":
+        return UnixTransport(rest)
+    raise ValueError("unknown transport " + address)
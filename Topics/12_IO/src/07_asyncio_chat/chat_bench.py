@@ -0,0 +1,139 @@
+# Throughput benchmark of the ways of doing chat I/O in these examples,
+# on loopback.  A sender sends a number of messages as fast as it can,
+# and we time how long it takes the receiver to get them all, with:
+# - select: the receiver waits in select() until the socket has data,
+#   as in 05_select_chat
+# - nonblocking: the receiver polls a non-blocking socket, sleeping
+#   for 0.1 seconds when there's nothing there, as in 04_nonblocking_chat
+# - asyncio: the receiver and sender from aiochat, over TCP and over a
+#   Unix domain socket, with line framing and with length framing
+# The select and non-blocking senders send each message with its own
+# sendall(), like the examples do; all messages are length-framed,
+# except the asyncio ones with line framing.
+#
+#   python3 chat_bench.py [-n messages] [-s size]
+
+import argparse, asyncio, os, select, socket, sys, tempfile, threading, time
+from aiochat import TcpTransport, UnixTransport, LineFraming, LengthFraming, ConnectionPool
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "06_chat_server"))
+from chat_framing import encode_frame, FrameDecoder
+
+def listen():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    return listener
+
+def blocking_sender(port, count, size):
+    sock = socket.create_connection(('127.0.0.1', port))
+    frame = encode_frame(b"x" * size)
+    for i in range(count):
+        sock.sendall(frame)
+    sock.close()
+
+def select_receive(sock, count):
+    decoder = FrameDecoder()
+    received = 0
+    while received < count:
+        rd, wd, ed = select.select([sock], [], [])
+        if sock in rd:
+            data = sock.recv(65536)
+            if len(data) == 0:
+                break
+            received += len(decoder.feed(data))
+    return received
+
+def nonblocking_receive(sock, count):
+    sock.setblocking(False)
+    decoder = FrameDecoder()
+    received = 0
+    while received < count:
+        try:
+            data = sock.recv(65536)
+            if len(data) == 0:
+                break
+            received += len(decoder.feed(data))
+        except BlockingIOError:
+            time.sleep(0.1)
+    return received
+
+def time_sync(receive, count, size):
+    listener = listen()
+    sender = threading.Thread(target=blocking_sender, args=(listener.getsockname()[1], count, size))
+    start = time.perf_counter()
+    sender.start()
+    (sock, addr) = listener.accept()
+    received = receive(sock, count)
+    elapsed = time.perf_counter() - start
+    sender.join()
+    sock.close()
+    listener.close()
+    return received, elapsed
+
+async def asyncio_run(transport, framing, count, size):
+    done = asyncio.get_running_loop().create_future()
+
+    async def handle_sender(reader, writer):
+        received = 0
+        while received < count:
+            message = await framing.read(reader)
+            if message is None:
+                break
+            received += 1
+        done.set_result(received)
+        writer.close()
+
+    server = await transport.serve(handle_sender)
+    if isinstance(transport, TcpTransport) and transport.port == 0:
+        # we listened on any free port; the sender needs to know which
+        transport.port = server.sockets[0].getsockname()[1]
+    async with server:
+        start = time.perf_counter()
+        pool = ConnectionPool(transport, log=None)
+        connection = await pool.get()
+        message = framing.encode(b"x" * size)
+        for i in range(count):
+            connection.writer.write(message)
+            # let the receiver catch up now and then, rather than
+            # buffering everything
+            if i % 64 == 63:
+                await connection.writer.drain()
+        await connection.writer.drain()
+        received = await done
+        elapsed = time.perf_counter() - start
+        pool.discard(connection)
+    return received, elapsed
+
+def time_asyncio(transport, framing, count, size):
+    return asyncio.run(asyncio_run(transport, framing, count, size))
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compares chat I/O throughput on loopback.')
+    parser.add_argument('-n', '--messages', type=int, default=100000, help='Messages to send')
+    parser.add_argument('-s', '--size', type=int, default=64, help='Bytes in each message')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    socket_path = os.path.join(tempfile.mkdtemp(), "chat_bench.sock")
+    variants = [
+        ("select", lambda: time_sync(select_receive, args.messages, args.size)),
+        ("nonblocking", lambda: time_sync(nonblocking_receive, args.messages, args.size)),
+        ("asyncio tcp line", lambda: time_asyncio(TcpTransport("127.0.0.1", 0), LineFraming(), args.messages, args.size)),
+        ("asyncio tcp length", lambda: time_asyncio(TcpTransport("127.0.0.1", 0), LengthFraming(), args.messages, args.size)),
+        ("asyncio unix length", lambda: time_asyncio(UnixTransport(socket_path), LengthFraming(), args.messages, args.size)),
+    ]
+    print("{} messages of {} bytes".format(args.messages, args.size))
+    print("{:<22} {:>10} {:>10} {:>14} {:>8}".format("variant", "received", "seconds", "messages/s", "MB/s"))
+    for (name, run) in variants:
+        (received, elapsed) = run()
+        print("{:<22} {:>10} {:>10.3f} {:>14.0f} {:>8.1f}".format(
+            name, received, elapsed, received / elapsed, received * args.size / elapsed / 1e6))
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    os.rmdir(os.path.dirname(socket_path))
+
+if __name__ == "__main__":
+    main()
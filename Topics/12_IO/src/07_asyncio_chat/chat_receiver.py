@@ -0,0 +1,23 @@
+# The asyncio chat receiver: listens for senders, prints what they
+# send, and sends them what you type.
+#
+#   python3 chat_receiver.py [address] [-f line|length]
+#
+# where address is like tcp:1234 (the default) or unix:/tmp/chat.sock
+
+import argparse, asyncio
+from aiochat import transport_for, framing_for, run_receiver
+from aiochat.roles import keyboard_reader
+
+async def main(args):
+    keyboard = await keyboard_reader()
+    await run_receiver(transport_for(args.address), framing_for(args.framing), keyboard)
+
+parser = argparse.ArgumentParser(description='asyncio chat receiver.')
+parser.add_argument('address', nargs='?', default='tcp:1234', help='tcp:[host:]port or unix:path')
+parser.add_argument('-f', '--framing', choices=['line', 'length'], default='line', help='How messages are framed')
+args = parser.parse_args()
+try:
+    asyncio.run(main(args))
+except KeyboardInterrupt:
+    print("user termination")
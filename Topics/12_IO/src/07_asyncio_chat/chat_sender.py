@@ -0,0 +1,26 @@
+# The asyncio chat sender: connects to the receiver, sends what you
+# type, and prints what it sends back.  If the receiver isn't there
+# yet, or goes away, it keeps trying to connect, waiting longer after
+# each failed attempt.
+#
+#   python3 chat_sender.py [address] [-f line|length]
+#
+# where address is like tcp:127.0.0.1:1234 (the default) or unix:/tmp/chat.sock
+
+import argparse, asyncio
+from aiochat import transport_for, framing_for, run_sender, ConnectionPool
+from aiochat.roles import keyboard_reader
+
+async def main(args):
+    keyboard = await keyboard_reader()
+    pool = ConnectionPool(transport_for(args.address))
+    await run_sender(pool, framing_for(args.framing), keyboard)
+
+parser = argparse.ArgumentParser(description='asyncio chat sender.')
+parser.add_argument('address', nargs='?', default='tcp:127.0.0.1:1234', help='tcp:[host:]port or unix:path')
+parser.add_argument('-f', '--framing', choices=['line', 'length'], default='line', help='How messages are framed')
+args = parser.parse_args()
+try:
+    asyncio.run(main(args))
+except KeyboardInterrupt:
+    print("user termination")